@@ -0,0 +1,394 @@
+#!/usr/bin/env python3
+"""
+아파트별 차량 SQLite 스냅샷 생성 작업 (vehicle_directory 기반)
+신규 경비 단말 초기 설정 시 JSON 파싱 + 100건 단위 insert 대신
+앱 Room 'vehicles' 테이블과 같은 스키마의 SQLite 파일 하나를 내려받아
+ATTACH 후 한 번에 복사하도록 한다.
+
+서버에서 실행:
+    python3 apartment_snapshot_builder.py --all        # 변경된 아파트만 재생성
+    python3 apartment_snapshot_builder.py 12 --force   # 특정 아파트 강제 재생성
+"""
+
+import hashlib
+import json
+import os
+import sqlite3
+import sys
+import tempfile
+import threading
+import time
+
+from response_compression import negotiate_encoding, precompressed_path, write_precompressed
+
+SNAPSHOT_FORMAT_VERSION = 2
+SNAPSHOT_DIR = os.environ.get(
+    'APTGO_SNAPSHOT_DIR', '/home/kyb9852/vehicle-management-system/media/snapshots'
+)
+# 연속 저장이 몰릴 때 마지막 변경 후 이 시간만큼 기다렸다가 한 번만 재생성
+SNAPSHOT_DEBOUNCE_SECONDS = 30
+# 로그인마다 last_login 만 저장된다 - 스냅샷 내용과 무관하므로 재생성하지 않음
+LAST_LOGIN_ONLY = frozenset({'last_login'})
+
+# 앱 org.aptgo.vehiclemanager.models.Vehicle 과 같은 컬럼 (Date 는 epoch ms)
+VEHICLE_COLUMNS = (
+    'vehicleId', 'plateNumber', 'ownerName', 'unitNumber', 'phoneNumber',
+    'registrationDate', 'status', 'vehicleType', 'memo', 'lastUpdated', 'communityId',
+    'plateSuffix',
+)
+
+SNAPSHOT_SCHEMA = '''
+CREATE TABLE vehicles (
+    vehicleId TEXT NOT NULL PRIMARY KEY,
+    plateNumber TEXT NOT NULL,
+    ownerName TEXT NOT NULL,
+    unitNumber TEXT NOT NULL,
+    phoneNumber TEXT,
+    registrationDate INTEGER,
+    status TEXT NOT NULL,
+    vehicleType TEXT NOT NULL,
+    memo TEXT,
+    lastUpdated INTEGER,
+    communityId TEXT,
+    plateSuffix TEXT
+);
+CREATE INDEX index_vehicles_plateNumber ON vehicles (plateNumber);
+CREATE INDEX index_vehicles_plateSuffix ON vehicles (plateSuffix);
+CREATE TABLE snapshot_meta (key TEXT NOT NULL PRIMARY KEY, value TEXT);
+'''
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def manifest_path_for(apartment_id):
+    return os.path.join(SNAPSHOT_DIR, f'apt_{apartment_id}.json')
+
+
+def snapshot_file_path(apartment_id, file_sha256):
+    """내용 주소 파일 경로 - 한 번 쓴 파일은 다시 쓰지 않는다 (.br/.gz 도 같은 이름 옆에)"""
+    return os.path.join(SNAPSHOT_DIR, f'apt_{apartment_id}_{file_sha256}.sqlite')
+
+
+def manifest_file_path(manifest):
+    """manifest 가 가리키는 SQLite 파일 (없으면 None)"""
+    path = snapshot_file_path(manifest['apartment_id'], manifest['sha256'])
+    return path if os.path.exists(path) else None
+
+
+def read_manifest(apartment_id):
+    """저장된 manifest (없으면 None)"""
+    try:
+        with open(manifest_path_for(apartment_id), 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def collect_vehicle_rows(apartment_id):
+    """vehicle_directory 의 유효 차량을 앱 Vehicle 행으로 변환"""
+    from vehicle_directory import RESIDENT_SOURCES, query_directory
+
+    now_ms = int(time.time() * 1000)
+    rows = []
+    for row in query_directory(apartment_id, order_by='source, source_id'):
+        plate = row['plate_number']
+        if row['source'] in RESIDENT_SOURCES:
+            vehicle_id = f'v_{row["source_id"]}' if row['source'] == 'resident_user' else f'r_{row["source_id"]}'
+            rows.append((
+                vehicle_id, plate, row['owner_name'], row['unit_label'], row['phone'] or None,
+                now_ms, 'active', 'resident', '서버 스냅샷', now_ms, str(apartment_id), row['plate_suffix'],
+            ))
+        else:
+            prefix = 'visitor' if row['source'] == 'visitor_vehicle' else 'reservation'
+            memo = f'방문차량 - 등록자: {row["registered_by"] or "알 수 없음"}'
+            rows.append((
+                f'{prefix}_{row["source_id"]}', plate, row['owner_name'] or '방문자',
+                f'{row["unit_label"]} 방문'.strip(), row['phone'] or None,
+                now_ms, 'active', 'guest', memo, now_ms, str(apartment_id), row['plate_suffix'],
+            ))
+    return rows
+
+
+def rows_digest(rows):
+    """시간 컬럼을 제외한 내용 해시 - 변경 여부 판단용"""
+    digest = hashlib.sha256()
+    for row in rows:
+        digest.update(repr((row[0], row[1], row[2], row[3], row[4], row[7], row[8])).encode('utf-8'))
+    return digest.hexdigest()
+
+
+def write_snapshot_file(rows, apartment_id, content_digest):
+    """임시 파일에 SQLite 를 만든 뒤 sha256 이름으로 옮긴다 -> (경로, sha256)"""
+    os.makedirs(SNAPSHOT_DIR, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(suffix='.sqlite.tmp', dir=SNAPSHOT_DIR)
+    os.close(fd)
+    try:
+        conn = sqlite3.connect(tmp_path)
+        try:
+            conn.execute('PRAGMA journal_mode=OFF')
+            conn.execute('PRAGMA synchronous=OFF')
+            conn.executescript(SNAPSHOT_SCHEMA)
+            placeholders = ', '.join('?' * len(VEHICLE_COLUMNS))
+            conn.executemany(
+                f'INSERT OR REPLACE INTO vehicles ({", ".join(VEHICLE_COLUMNS)}) VALUES ({placeholders})',
+                rows
+            )
+            conn.executemany('INSERT INTO snapshot_meta (key, value) VALUES (?, ?)', [
+                ('format_version', str(SNAPSHOT_FORMAT_VERSION)),
+                ('apartment_id', str(apartment_id)),
+                ('content_digest', content_digest),
+                ('row_count', str(len(rows))),
+                ('built_at', str(int(time.time() * 1000))),
+            ])
+            conn.commit()
+            conn.execute('VACUUM')
+        finally:
+            conn.close()
+
+        with open(tmp_path, 'rb') as f:
+            file_sha256 = hashlib.sha256(f.read()).hexdigest()
+        path = snapshot_file_path(apartment_id, file_sha256)
+        os.replace(tmp_path, path)
+        # 다운로드마다 압축하지 않도록 .br/.gz 를 파일 옆에 미리 만들어 둔다 (manifest 교체 전에 완성)
+        write_precompressed(path)
+        return path, file_sha256
+    except Exception:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def build_apartment_snapshot(apartment_id, force=False):
+    """스냅샷 생성 - 내용이 그대로면 기존 파일 유지. manifest 반환"""
+    rows = collect_vehicle_rows(apartment_id)
+    content_digest = rows_digest(rows)
+
+    previous = read_manifest(apartment_id)
+    if (not force and previous and previous.get('content_digest') == content_digest
+            and previous.get('format_version') == SNAPSHOT_FORMAT_VERSION
+            and manifest_file_path(previous)):
+        return previous
+
+    sqlite_path, file_sha256 = write_snapshot_file(rows, apartment_id, content_digest)
+    manifest = {
+        'format_version': SNAPSHOT_FORMAT_VERSION,
+        'apartment_id': apartment_id,
+        'content_digest': content_digest,
+        'sha256': file_sha256,
+        'row_count': len(rows),
+        'size': os.path.getsize(sqlite_path),
+        'built_at': int(time.time() * 1000),
+    }
+    # manifest 교체가 유일한 전환 시점 - 다운로드는 항상 manifest 와 짝이 맞는 파일을 받는다
+    manifest_path = manifest_path_for(apartment_id)
+    tmp_manifest = manifest_path + '.tmp'
+    with open(tmp_manifest, 'w', encoding='utf-8') as f:
+        json.dump(manifest, f)
+    os.replace(tmp_manifest, manifest_path)
+    remove_old_snapshots(apartment_id, keep={file_sha256, previous.get('sha256') if previous else None})
+    return manifest
+
+
+def remove_old_snapshots(apartment_id, keep):
+    """현재/직전 버전 외 파일 삭제 - 직전 manifest 를 읽은 다운로드가 아직 파일을 열기 전일 수 있다"""
+    prefix = f'apt_{apartment_id}_'
+    for name in os.listdir(SNAPSHOT_DIR):
+        if not name.startswith(prefix):
+            continue
+        digest = name[len(prefix):].split('.', 1)[0]
+        if digest not in keep:
+            try:
+                os.remove(os.path.join(SNAPSHOT_DIR, name))
+            except OSError:
+                pass
+
+
+# ---------------------------------------------------------------------------
+# 변경 감지 후 재생성 (signals + debounce)
+# ---------------------------------------------------------------------------
+
+_dirty_apartments = set()
+_dirty_lock = threading.Lock()
+_rebuild_timer = None
+
+
+def _run_pending_rebuilds():
+    global _rebuild_timer
+    with _dirty_lock:
+        pending = list(_dirty_apartments)
+        _dirty_apartments.clear()
+        _rebuild_timer = None
+
+    from django.db import close_old_connections
+
+    for apartment_id in pending:
+        try:
+            build_apartment_snapshot(apartment_id)
+        except Exception as e:
+            print(f"❌ 스냅샷 생성 실패 (apartment={apartment_id}): {e}")
+    close_old_connections()
+
+
+def schedule_snapshot_rebuild(apartment_id):
+    """변경된 아파트를 표시하고 debounce 후 백그라운드에서 재생성"""
+    global _rebuild_timer
+    if not apartment_id:
+        return
+    with _dirty_lock:
+        _dirty_apartments.add(apartment_id)
+        if _rebuild_timer is None:
+            _rebuild_timer = threading.Timer(SNAPSHOT_DEBOUNCE_SECONDS, _run_pending_rebuilds)
+            _rebuild_timer.daemon = True
+            _rebuild_timer.start()
+
+
+def flush_snapshot_rebuilds():
+    """대기 중인 재생성을 지금 실행 (debounce 타이머는 daemon 이라 CLI 가 끝나면 사라진다)"""
+    with _dirty_lock:
+        if _rebuild_timer is not None:
+            _rebuild_timer.cancel()
+    _run_pending_rebuilds()
+
+
+def user_apartment_id(user):
+    if user.user_type == 'main_account':
+        return user.apartment_id
+    parent = getattr(user, 'parent_account', None)
+    return parent.apartment_id if parent else None
+
+
+def connect_snapshot_signals():
+    """AppConfig.ready() 에서 한 번 호출"""
+    from django.db import transaction
+    from django.db.models.signals import post_delete, post_save
+
+    from accounts.models import User
+    from vehicles.models import Resident, VisitorVehicle
+    from visitors.models import VisitorReservation
+
+    def user_changed(sender, instance, update_fields=None, **kwargs):
+        if instance.user_type != 'sub_account':
+            return
+        if update_fields and set(update_fields) <= LAST_LOGIN_ONLY:
+            return
+        apartment_id = user_apartment_id(instance)
+        transaction.on_commit(lambda: schedule_snapshot_rebuild(apartment_id))
+
+    def apartment_row_changed(sender, instance, **kwargs):
+        apartment_id = instance.apartment_id
+        transaction.on_commit(lambda: schedule_snapshot_rebuild(apartment_id))
+
+    def reservation_changed(sender, instance, **kwargs):
+        if instance.resident is None:
+            return
+        apartment_id = user_apartment_id(instance.resident)
+        transaction.on_commit(lambda: schedule_snapshot_rebuild(apartment_id))
+
+    post_save.connect(user_changed, sender=User, dispatch_uid='snapshot_user_saved')
+    post_delete.connect(user_changed, sender=User, dispatch_uid='snapshot_user_deleted')
+    post_save.connect(apartment_row_changed, sender=VisitorVehicle, dispatch_uid='snapshot_visitor_saved')
+    post_delete.connect(apartment_row_changed, sender=VisitorVehicle, dispatch_uid='snapshot_visitor_deleted')
+    # Resident/방문예약도 vehicle_directory 를 거쳐 스냅샷에 들어간다
+    post_save.connect(apartment_row_changed, sender=Resident, dispatch_uid='snapshot_resident_saved')
+    post_delete.connect(apartment_row_changed, sender=Resident, dispatch_uid='snapshot_resident_deleted')
+    post_save.connect(reservation_changed, sender=VisitorReservation, dispatch_uid='snapshot_reservation_saved')
+    post_delete.connect(reservation_changed, sender=VisitorReservation, dispatch_uid='snapshot_reservation_deleted')
+
+
+# ---------------------------------------------------------------------------
+# 다운로드 API
+# ---------------------------------------------------------------------------
+
+def vehicle_snapshot_api(request):
+    """GET /api/vehicle-snapshot/ - 아파트 SQLite 스냅샷 다운로드 (ETag 지원)"""
+    from django.http import FileResponse, HttpResponse, JsonResponse
+    from django.utils.cache import patch_vary_headers
+    from vehicles.views import api_auth_required
+
+    from request_scope import get_request_scope
+
+    @api_auth_required
+    def _view(request):
+        scope = get_request_scope(request)
+        if not scope.can_manage:
+            return JsonResponse({'success': False, 'error': '관리단 권한이 필요합니다.'}, status=403)
+        apartment_id = scope.apartment_id
+        if not apartment_id:
+            return JsonResponse({'error': '아파트 정보가 없습니다.'}, status=400)
+
+        manifest = read_manifest(apartment_id)
+        sqlite_path = manifest_file_path(manifest) if manifest else None
+        if sqlite_path is None:
+            # 요청 안에서 만들지 않고 백그라운드 생성 후 다시 받게 한다
+            schedule_snapshot_rebuild(apartment_id)
+            response = JsonResponse({
+                'success': False, 'error': '스냅샷을 준비 중입니다. 잠시 후 다시 시도해주세요.',
+            }, status=503)
+            response['Retry-After'] = str(SNAPSHOT_DEBOUNCE_SECONDS + 10)
+            return response
+
+        etag = f'"{manifest["sha256"]}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponse(status=304)
+
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+        compressed_path = precompressed_path(sqlite_path, encoding)
+        response = FileResponse(
+            open(compressed_path or sqlite_path, 'rb'),
+            content_type='application/vnd.sqlite3',
+            as_attachment=True,
+            filename=f'vehicles_{apartment_id}.sqlite'
+        )
+        if compressed_path:
+            response['Content-Encoding'] = encoding
+        patch_vary_headers(response, ('Accept-Encoding',))
+        response['ETag'] = etag
+        response['X-Snapshot-Sha256'] = manifest['sha256']
+        response['X-Snapshot-Rows'] = str(manifest['row_count'])
+        response['X-Snapshot-Version'] = str(manifest['format_version'])
+        return response
+
+    return _view(request)
+
+
+def main():
+    print("=" * 60)
+    print("📦 아파트 차량 스냅샷 생성")
+    print("=" * 60)
+
+    args = sys.argv[1:]
+    force = '--force' in args
+    if not setup_django():
+        return
+
+    from accounts.models import Apartment
+
+    if '--all' in args:
+        apartment_ids = list(Apartment.objects.values_list('id', flat=True))
+    else:
+        apartment_ids = [int(a) for a in args if a.isdigit()]
+
+    if not apartment_ids:
+        print("사용법: python3 apartment_snapshot_builder.py [--all | <apartment_id> ...] [--force]")
+        return
+
+    for apartment_id in apartment_ids:
+        start = time.time()
+        manifest = build_apartment_snapshot(apartment_id, force=force)
+        print(f"   ✅ apartment={apartment_id}: {manifest['row_count']}대, "
+              f"{manifest['size'] / 1024:.1f} KB, {time.time() - start:.2f}초")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,385 @@
+#!/usr/bin/env python3
+"""
+배포 검증용 API 스냅샷 비교
+complete_flow_test.py 는 하드코딩한 계정 하나로 visitor-vehicles-api 응답만 전후 비교한다.
+이 도구는 역할별(메인 계정, 관리단 부아이디, 일반 부아이디) 표본 계정 전체로 모바일/대시보드 API
+응답을 비동기로 동시에 받아 스냅샷 파일로 저장하고, 두 스냅샷의 구조 차이를 보고한다.
+lastUpdated 처럼 요청 시각마다 바뀌는 필드는 비교에서 뺀다 (traffic_replay.normalize_payload).
+
+사용법 (서버에서 - 계정 표본 추출과 세션 발급에 Django 를 쓴다):
+    python3 api_snapshot_diff.py snapshot --base-url https://aptgo.org --out before.json [--per-role 30]
+    ... 배포 ...
+    python3 api_snapshot_diff.py snapshot --base-url https://aptgo.org --out after.json --same-accounts before.json
+    python3 api_snapshot_diff.py diff before.json after.json
+
+표본 계정마다 DB 세션을 직접 만들어 쿠키로 요청하고 끝나면 지운다 (비밀번호 불필요).
+서버 밖에서 돌릴 때는 --credentials accounts.json ([{"username", "password", "role"}, ...]) 로
+/api/login/ 토큰을 받아 Bearer 로 요청한다.
+HTTP 클라이언트는 aiohttp (pip install aiohttp).
+"""
+
+import asyncio
+import json
+import os
+import random
+import statistics
+import sys
+import time
+from datetime import datetime
+
+try:
+    import aiohttp
+except ImportError:
+    aiohttp = None
+
+from request_scope import ROLE_MAIN, ROLE_MANAGER, ROLE_SUB
+from traffic_replay import VOLATILE_FIELDS, diff_payloads, normalize_payload
+
+SNAPSHOT_ROLES = (ROLE_MAIN, ROLE_MANAGER, ROLE_SUB)
+DEFAULT_PER_ROLE = 20
+DEFAULT_CONCURRENCY = 32
+REQUEST_TIMEOUT = 60
+LOGIN_PATH = '/api/login/'
+MAX_DIFFS_PER_RESPONSE = 5
+
+# 이름 -> {'path': str, 'roles': tuple}
+SNAPSHOT_ENDPOINTS = {}
+
+
+def register_snapshot_endpoint(name, path, roles=SNAPSHOT_ROLES):
+    SNAPSHOT_ENDPOINTS[name] = {'path': path, 'roles': tuple(roles)}
+
+
+register_snapshot_endpoint('comprehensive', '/api/comprehensive/', (ROLE_MAIN, ROLE_MANAGER))
+register_snapshot_endpoint('visitor_vehicles', '/api/visitor-vehicles-api/')
+register_snapshot_endpoint('sub_accounts', '/api/sub-accounts/?limit=50', (ROLE_MAIN, ROLE_MANAGER))
+register_snapshot_endpoint('repeat_offenders', '/api/repeat-offenders/', (ROLE_MAIN, ROLE_MANAGER))
+for _fragment in ('summary', 'visitors', 'residents'):
+    register_snapshot_endpoint(
+        f'dashboard_{_fragment}', f'/main-account-dashboard/fragments/{_fragment}/', (ROLE_MAIN, ROLE_MANAGER)
+    )
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+# ---------------------------------------------------------------------------
+# 계정 표본 / 인증
+# ---------------------------------------------------------------------------
+
+def _role_querysets():
+    from accounts.models import User
+
+    active = User.objects.filter(is_active=True)
+    return {
+        ROLE_MAIN: active.filter(user_type='main_account'),
+        ROLE_MANAGER: active.filter(user_type='sub_account', is_manager=True),
+        ROLE_SUB: active.filter(user_type='sub_account', is_manager=False),
+    }
+
+
+def sample_accounts(per_role, seed=0, usernames=None):
+    """[{'username', 'role', 'userId'}] - 같은 seed/데이터면 같은 표본, usernames 를 주면 그 계정만"""
+    from accounts.models import User
+
+    accounts = []
+    if usernames is not None:
+        users = {user.username: user for user in User.objects.filter(username__in=[name for name, _ in usernames])}
+        for username, role in usernames:
+            if username in users:
+                accounts.append({'username': username, 'role': role, 'userId': users[username].pk})
+            else:
+                print(f"   ⚠️ 계정 없음: {username}")
+        return accounts
+
+    rng = random.Random(seed)
+    for role, queryset in _role_querysets().items():
+        candidates = list(queryset.order_by('pk').values_list('pk', 'username'))
+        for pk, username in sorted(rng.sample(candidates, min(per_role, len(candidates)))):
+            accounts.append({'username': username, 'role': role, 'userId': pk})
+    return accounts
+
+
+def create_sessions(accounts):
+    """계정마다 로그인 세션 생성 -> (쿠키 이름, {username: 세션 키})"""
+    from importlib import import_module
+
+    from django.conf import settings
+    from django.contrib.auth import BACKEND_SESSION_KEY, HASH_SESSION_KEY, SESSION_KEY
+
+    from accounts.models import User
+
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    users = User.objects.in_bulk([account['userId'] for account in accounts])
+    sessions = {}
+    for account in accounts:
+        user = users[account['userId']]
+        session = store()
+        session[SESSION_KEY] = user._meta.pk.value_to_string(user)
+        session[BACKEND_SESSION_KEY] = settings.AUTHENTICATION_BACKENDS[0]
+        session[HASH_SESSION_KEY] = user.get_session_auth_hash()
+        session.create()
+        sessions[account['username']] = session.session_key
+    return settings.SESSION_COOKIE_NAME, sessions
+
+
+def delete_sessions(session_keys):
+    from importlib import import_module
+
+    from django.conf import settings
+
+    store = import_module(settings.SESSION_ENGINE).SessionStore
+    for session_key in session_keys:
+        store(session_key).delete()
+
+
+async def login_tokens(client, base_url, credentials):
+    """--credentials 모드: /api/login/ 으로 계정별 토큰 -> {username: 헤더}"""
+    async def login(entry):
+        async with client.post(base_url + LOGIN_PATH, json={
+            'username': entry['username'], 'password': entry['password'],
+        }) as response:
+            data = await response.json(content_type=None)
+        token = data.get('token') or data.get('accessToken') or data.get('access_token')
+        if not token:
+            print(f"   ⚠️ 로그인 실패: {entry['username']} ({response.status})")
+            return entry['username'], None
+        return entry['username'], {'Authorization': f'Bearer {token}'}
+
+    pairs = await asyncio.gather(*(login(entry) for entry in credentials))
+    return {username: headers for username, headers in pairs if headers}
+
+
+# ---------------------------------------------------------------------------
+# 스냅샷
+# ---------------------------------------------------------------------------
+
+def snapshot_key(account, endpoint_name):
+    return f"{account['role']}:{account['username']} {endpoint_name}"
+
+
+async def fetch_snapshot(base_url, accounts, auth_headers, concurrency=DEFAULT_CONCURRENCY, client=None):
+    """계정 x 엔드포인트 응답을 동시에 받아 {키: {'status', 'body', 'ms'}}"""
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def fetch(session, account, name, path):
+        headers = dict(auth_headers[account['username']], Accept='application/json')
+        async with semaphore:
+            started = time.perf_counter()
+            try:
+                async with session.get(base_url + path, headers=headers, allow_redirects=False) as response:
+                    raw = await response.read()
+                    status = response.status
+                    content_type = response.headers.get('Content-Type', '')
+            except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+                return snapshot_key(account, name), {'status': 0, 'body': f'요청 실패: {e}', 'ms': None}
+            elapsed = (time.perf_counter() - started) * 1000
+        text = raw.decode('utf-8', 'replace')
+        body = text
+        if 'json' in content_type:
+            try:
+                body = json.loads(text)
+            except ValueError:
+                pass
+        return snapshot_key(account, name), {'status': status, 'body': body, 'ms': round(elapsed, 1)}
+
+    async def run(session):
+        jobs = [
+            fetch(session, account, name, endpoint['path'])
+            for account in accounts if account['username'] in auth_headers
+            for name, endpoint in SNAPSHOT_ENDPOINTS.items() if account['role'] in endpoint['roles']
+        ]
+        return dict(await asyncio.gather(*jobs))
+
+    if client is not None:
+        return await run(client)
+    async with _client(concurrency) as session:
+        return await run(session)
+
+
+def _client(concurrency):
+    # 계정마다 인증 헤더를 직접 보내므로 쿠키 저장소는 쓰지 않는다 (계정 간 세션 섞임 방지)
+    return aiohttp.ClientSession(
+        connector=aiohttp.TCPConnector(limit=concurrency),
+        cookie_jar=aiohttp.DummyCookieJar(),
+        timeout=aiohttp.ClientTimeout(total=REQUEST_TIMEOUT),
+    )
+
+
+async def take_snapshot(base_url, accounts=None, credentials=None, concurrency=DEFAULT_CONCURRENCY, sessions=None):
+    """세션(또는 로그인 토큰)으로 스냅샷 -> 저장할 dict
+
+    sessions: create_sessions() 결과 (쿠키 이름, {username: 세션 키}). ORM 호출은 이벤트 루프 안에서
+    할 수 없으므로 세션은 호출하는 쪽이 asyncio.run 전에 만들고 끝난 뒤 지운다 (snapshot_with_sessions).
+    """
+    async with _client(concurrency) as client:
+        if credentials is not None:
+            auth_headers = await login_tokens(client, base_url, credentials)
+            accounts = [
+                {'username': entry['username'], 'role': entry['role'], 'userId': None}
+                for entry in credentials
+            ]
+        else:
+            cookie_name, session_keys = sessions
+            auth_headers = {
+                username: {'Cookie': f'{cookie_name}={session_key}'}
+                for username, session_key in session_keys.items()
+            }
+        started = time.perf_counter()
+        responses = await fetch_snapshot(base_url, accounts, auth_headers, concurrency, client)
+        elapsed = time.perf_counter() - started
+
+    return {
+        'createdAt': datetime.now().isoformat(timespec='seconds'),
+        'baseUrl': base_url,
+        'seconds': round(elapsed, 2),
+        'accounts': [{'username': account['username'], 'role': account['role']} for account in accounts],
+        'responses': responses,
+    }
+
+
+def snapshot_with_sessions(base_url, accounts, concurrency=DEFAULT_CONCURRENCY):
+    """표본 계정 세션을 만들고 스냅샷을 받은 뒤 세션 삭제 (이벤트 루프 밖에서 ORM 호출)"""
+    sessions = create_sessions(accounts)
+    try:
+        return asyncio.run(take_snapshot(base_url, accounts, concurrency=concurrency, sessions=sessions))
+    finally:
+        delete_sessions(sessions[1].values())
+
+
+# ---------------------------------------------------------------------------
+# 비교
+# ---------------------------------------------------------------------------
+
+def compare_snapshots(before, after, ignore=VOLATILE_FIELDS):
+    """키별 결과 -> {'changed': {키: 차이 목록}, 'missing': [...], 'added': [...], 'latency': {엔드포인트: (전, 후)}}"""
+    old, new = before['responses'], after['responses']
+    changed = {}
+    for key in sorted(old.keys() & new.keys()):
+        diffs = []
+        if old[key]['status'] != new[key]['status']:
+            diffs.append(('status', old[key]['status'], new[key]['status']))
+        diffs.extend(diff_payloads(normalize_payload(old[key]['body'], ignore), normalize_payload(new[key]['body'], ignore)))
+        if diffs:
+            changed[key] = diffs
+
+    latency = {}
+    for name in SNAPSHOT_ENDPOINTS:
+        pairs = [
+            (old[key]['ms'], new[key]['ms']) for key in old.keys() & new.keys()
+            if key.endswith(f' {name}') and old[key]['ms'] is not None and new[key]['ms'] is not None
+        ]
+        if pairs:
+            latency[name] = (statistics.median(a for a, _ in pairs), statistics.median(b for _, b in pairs))
+
+    return {
+        'changed': changed,
+        'missing': sorted(old.keys() - new.keys()),
+        'added': sorted(new.keys() - old.keys()),
+        'latency': latency,
+    }
+
+
+def _short(value, limit=80):
+    text = value if isinstance(value, str) else json.dumps(value, ensure_ascii=False)
+    return text if len(text) <= limit else text[:limit] + '…'
+
+
+def print_comparison(result, total):
+    for key, diffs in result['changed'].items():
+        print(f"\n❌ {key}")
+        for path, old, new in diffs[:MAX_DIFFS_PER_RESPONSE]:
+            print(f"   {path}: {_short(old)} -> {_short(new)}")
+        if len(diffs) > MAX_DIFFS_PER_RESPONSE:
+            print(f"   ... 외 {len(diffs) - MAX_DIFFS_PER_RESPONSE}개")
+    for key in result['missing']:
+        print(f"⚠️ 이후 스냅샷에 없음: {key}")
+    for key in result['added']:
+        print(f"⚠️ 이후 스냅샷에만 있음: {key}")
+
+    print("\n" + "=" * 60)
+    print(f"📊 응답 {total}개 중 변경 {len(result['changed'])}개, 누락 {len(result['missing'])}개, 추가 {len(result['added'])}개")
+    for name, (old_ms, new_ms) in result['latency'].items():
+        print(f"   ⏱️ {name}: 중앙값 {old_ms:.0f}ms -> {new_ms:.0f}ms")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='역할별 계정 API 스냅샷 / 비교')
+    commands = parser.add_subparsers(dest='command', required=True)
+
+    snap = commands.add_parser('snapshot', help='스냅샷 저장')
+    snap.add_argument('--base-url', default='https://aptgo.org')
+    snap.add_argument('--out', required=True)
+    snap.add_argument('--per-role', type=int, default=DEFAULT_PER_ROLE, help='역할별 표본 계정 수')
+    snap.add_argument('--seed', type=int, default=0)
+    snap.add_argument('--same-accounts', help='이 스냅샷과 같은 계정으로')
+    snap.add_argument('--credentials', help='서버 밖 실행: [{"username","password","role"}] JSON')
+    snap.add_argument('--concurrency', type=int, default=DEFAULT_CONCURRENCY)
+
+    diff = commands.add_parser('diff', help='두 스냅샷 비교')
+    diff.add_argument('before')
+    diff.add_argument('after')
+    diff.add_argument('--ignore', action='append', default=[], help='비교에서 뺄 필드 추가')
+
+    args = parser.parse_args()
+
+    if args.command == 'diff':
+        print("🔍 API 스냅샷 비교")
+        print("=" * 60)
+        with open(args.before, encoding='utf-8') as f:
+            before = json.load(f)
+        with open(args.after, encoding='utf-8') as f:
+            after = json.load(f)
+        print(f"   {args.before} ({before['createdAt']}) -> {args.after} ({after['createdAt']})")
+        result = compare_snapshots(before, after, VOLATILE_FIELDS | set(args.ignore))
+        print_comparison(result, len(before['responses']))
+        sys.exit(1 if result['changed'] or result['missing'] else 0)
+
+    print("📸 API 스냅샷")
+    print("=" * 60)
+    if aiohttp is None:
+        print("❌ aiohttp 가 필요합니다 (pip install aiohttp)")
+        sys.exit(2)
+
+    credentials = accounts = None
+    if args.credentials:
+        with open(args.credentials, encoding='utf-8') as f:
+            credentials = json.load(f)
+    else:
+        if not setup_django():
+            sys.exit(2)
+        usernames = None
+        if args.same_accounts:
+            with open(args.same_accounts, encoding='utf-8') as f:
+                usernames = [(account['username'], account['role']) for account in json.load(f)['accounts']]
+        accounts = sample_accounts(args.per_role, args.seed, usernames)
+
+    if credentials is not None:
+        snapshot = asyncio.run(take_snapshot(args.base_url, credentials=credentials, concurrency=args.concurrency))
+    else:
+        snapshot = snapshot_with_sessions(args.base_url, accounts, args.concurrency)
+    with open(args.out, 'w', encoding='utf-8') as f:
+        json.dump(snapshot, f, ensure_ascii=False)
+
+    by_role = {}
+    for account in snapshot['accounts']:
+        by_role[account['role']] = by_role.get(account['role'], 0) + 1
+    failed = sum(1 for response in snapshot['responses'].values() if response['status'] >= 400 or not response['status'])
+    print(f"   계정: {', '.join(f'{role} {count}' for role, count in by_role.items())}")
+    print(f"✅ 응답 {len(snapshot['responses'])}개 ({failed}개 오류 상태) {snapshot['seconds']}초 -> {args.out}")
+
+
+if __name__ == '__main__':
+    main()
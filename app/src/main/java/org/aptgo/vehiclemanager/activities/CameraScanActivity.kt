@@ -23,7 +23,9 @@ import org.aptgo.vehiclemanager.databinding.ActivityCameraScanBinding
 import org.aptgo.vehiclemanager.models.ScanHistory
 import org.aptgo.vehiclemanager.models.Vehicle
 import org.aptgo.vehiclemanager.utils.PlateNumberValidator
+import org.aptgo.vehiclemanager.utils.PhotoUploader
 import org.aptgo.vehiclemanager.utils.PreferenceManager
+import org.aptgo.vehiclemanager.utils.RegisteredPlateSet
 import org.aptgo.vehiclemanager.network.NetworkModule
 import org.aptgo.vehiclemanager.utils.UserSession
 import java.io.File
@@ -65,6 +67,10 @@ class CameraScanActivity : AppCompatActivity() {
         preferenceManager = PreferenceManager(this)
         cameraExecutor = Executors.newSingleThreadExecutor()
         
+        lifecycleScope.launch {
+            RegisteredPlateSet.ensureLoaded(this@CameraScanActivity)
+        }
+        
         setupSounds()
         setupUI()
         requestCameraPermission()
@@ -235,7 +241,12 @@ class CameraScanActivity : AppCompatActivity() {
     }
     
     private suspend fun checkVehicle(plateNumber: String) {
-        val vehicle = database.vehicleDao().getVehicleByPlateNumber(plateNumber)
+        // 메모리 번호판 집합으로 먼저 판단하고, 등록 차량일 때만 Room 에서 상세 조회
+        val vehicle = if (RegisteredPlateSet.contains(plateNumber) == false) {
+            null
+        } else {
+            database.vehicleDao().getVehicleByPlateNumber(plateNumber)
+        }
         
         runOnUiThread {
             if (vehicle != null) {
@@ -414,14 +425,14 @@ class CameraScanActivity : AppCompatActivity() {
         }
     }
     
-    private fun showActionSelectionDialog(plateNumber: String, currentTime: String) {
+    private fun showActionSelectionDialog(plateNumber: String, currentTime: String, photoFile: File? = null) {
         val actions = arrayOf("스티커발부", "주의전화", "기타")
         
         val builder = android.app.AlertDialog.Builder(this)
         builder.setTitle("조치사항 선택")
         builder.setItems(actions) { _, which ->
             val selectedAction = actions[which]
-            recordActionWithReport(plateNumber, selectedAction, currentTime)
+            recordActionWithReport(plateNumber, selectedAction, currentTime, photoFile)
         }
         builder.show()
     }
@@ -446,7 +457,7 @@ class CameraScanActivity : AppCompatActivity() {
                         Toast.LENGTH_SHORT).show()
                     
                     // Show dialog to select action after photo is taken
-                    showActionSelectionDialog(plateNumber, currentTime)
+                    showActionSelectionDialog(plateNumber, currentTime, photoFile)
                 }
                 
                 override fun onError(exception: ImageCaptureException) {
@@ -458,7 +469,7 @@ class CameraScanActivity : AppCompatActivity() {
         )
     }
     
-    private fun recordActionWithReport(plateNumber: String, action: String, currentTime: String) {
+    private fun recordActionWithReport(plateNumber: String, action: String, currentTime: String, photoFile: File? = null) {
         lifecycleScope.launch {
             // Save to local database
             val scanHistory = ScanHistory(
@@ -469,7 +480,7 @@ class CameraScanActivity : AppCompatActivity() {
                 vehicleId = null,
                 location = "주차장",
                 actionTaken = action,
-                photoPath = null,
+                photoPath = photoFile?.absolutePath,
                 notes = "조치사항: $action",
                 userId = preferenceManager.getSavedUsername() ?: "",
                 synced = false
@@ -478,7 +489,7 @@ class CameraScanActivity : AppCompatActivity() {
             database.scanHistoryDao().insertScanHistory(scanHistory)
             
             // Send report to server
-            sendScanReport(plateNumber, false, currentTime, action)
+            sendScanReport(plateNumber, false, currentTime, action, photoFile)
             
             runOnUiThread {
                 Toast.makeText(this@CameraScanActivity, "$action 완료 및 보고서 전송", Toast.LENGTH_SHORT).show()
@@ -488,7 +499,7 @@ class CameraScanActivity : AppCompatActivity() {
         }
     }
     
-    private fun sendScanReport(plateNumber: String, isRegistered: Boolean, time: String, action: String?) {
+    private fun sendScanReport(plateNumber: String, isRegistered: Boolean, time: String, action: String?, photoFile: File? = null) {
         lifecycleScope.launch {
             try {
                 val token = preferenceManager.getAuthToken()
@@ -499,7 +510,7 @@ class CameraScanActivity : AppCompatActivity() {
                     return@launch
                 }
                 
-                val reportData = mapOf(
+                val reportData = mutableMapOf<String, Any>(
                     "plate_number" to plateNumber,
                     "is_registered" to isRegistered,
                     "recognition_time" to time,
@@ -508,12 +519,27 @@ class CameraScanActivity : AppCompatActivity() {
                     "user_id" to (preferenceManager.getSavedUsername() ?: ""),
                     "timestamp" to SimpleDateFormat("yyyy-MM-dd HH:mm:ss", Locale.getDefault()).format(Date())
                 )
+
+                // 증거 사진은 이어받기 업로드 후 URL 만 보고서에 포함 (실패해도 보고서는 전송)
+                photoFile?.let { file ->
+                    PhotoUploader.upload(file, token)?.let { uploaded ->
+                        uploaded.photoId?.let { reportData["photo_id"] = it }
+                        uploaded.url?.let { reportData["photo_url"] = it }
+                        uploaded.thumbnailUrl?.let { reportData["thumbnail_url"] = it }
+                    }
+                }
                 
                 // Send to ANPR reports API endpoint
-                val response = NetworkModule.apiService.sendScanReport(reportData)
+                val response = NetworkModule.apiService.sendScanReport("Bearer $token", reportData)
+                val result = response.body()
                 
                 runOnUiThread {
-                    Toast.makeText(this@CameraScanActivity, "보고서가 서버로 전송되었습니다", Toast.LENGTH_SHORT).show()
+                    val message = when {
+                        result?.action_suppressed == true -> "이미 조치된 차량입니다 (${result.action_taken})"
+                        result?.duplicate == true -> "중복 인식으로 기존 보고서에 합쳐졌습니다"
+                        else -> "보고서가 서버로 전송되었습니다"
+                    }
+                    Toast.makeText(this@CameraScanActivity, message, Toast.LENGTH_SHORT).show()
                 }
                 
             } catch (e: Exception) {
@@ -13,8 +13,10 @@ import org.aptgo.vehiclemanager.R
 import org.aptgo.vehiclemanager.database.AppDatabase
 import org.aptgo.vehiclemanager.databinding.ActivityMainBinding
 import org.aptgo.vehiclemanager.network.NetworkModule
+import org.aptgo.vehiclemanager.utils.PlateNumberValidator
 import org.aptgo.vehiclemanager.utils.PreferenceManager
 import org.aptgo.vehiclemanager.utils.UserSession
+import org.aptgo.vehiclemanager.utils.RegisteredPlateSet
 import org.aptgo.vehiclemanager.utils.VehicleDataSync
 
 class MainActivity : AppCompatActivity() {
@@ -39,6 +41,7 @@ class MainActivity : AppCompatActivity() {
         setupToolbar()
         setupDashboard()
         syncVehicleData()
+        loadRegisteredPlateSet()
         loadStatistics()
     }
     
@@ -91,7 +94,10 @@ class MainActivity : AppCompatActivity() {
                 )
                 
                 if (response.isSuccessful && response.body()?.success == true) {
-                    val vehicles = response.body()!!.vehicles
+                    // Gson 은 기본값을 채우지 않으므로 검색용 뒤 4자리를 직접 계산
+                    val vehicles = response.body()!!.vehicles.map {
+                        it.copy(plateSuffix = PlateNumberValidator.extractSuffix(it.plateNumber))
+                    }
                     
                     // Clear and update local database
                     database.vehicleDao().deleteAllVehicles()
@@ -109,6 +115,15 @@ class MainActivity : AppCompatActivity() {
         }
     }
     
+    private fun loadRegisteredPlateSet() {
+        lifecycleScope.launch {
+            // 스캔 루프의 등록/미등록 판단용 번호판 집합을 메모리에 올리고 최신화
+            RegisteredPlateSet.ensureLoaded(this@MainActivity)
+            val token = preferenceManager.getAuthToken() ?: return@launch
+            RegisteredPlateSet.refresh(this@MainActivity, token)
+        }
+    }
+    
     private fun loadStatistics() {
         lifecycleScope.launch {
             try {
@@ -15,6 +15,7 @@ import org.aptgo.vehiclemanager.database.AppDatabase
 import org.aptgo.vehiclemanager.databinding.ActivityManualSearchBinding
 import org.aptgo.vehiclemanager.models.ScanHistory
 import org.aptgo.vehiclemanager.models.Vehicle
+import org.aptgo.vehiclemanager.utils.PlateNumberValidator
 import org.aptgo.vehiclemanager.utils.PreferenceManager
 import org.aptgo.vehiclemanager.views.KoreanPlateKeypadView
 import java.util.Date
@@ -192,7 +193,10 @@ class ManualSearchActivity : AppCompatActivity() {
     private fun performSearch(query: String) {
         lifecycleScope.launch {
             val wildcardQuery = query.replace("*", "%")
-            val results = if (wildcardQuery.contains("%")) {
+            val results = if (PlateNumberValidator.isSuffixQuery(query)) {
+                // 뒤 4자리 입력은 plateSuffix 인덱스로 바로 조회
+                database.vehicleDao().searchByPlateSuffix(query)
+            } else if (wildcardQuery.contains("%")) {
                 database.vehicleDao().searchVehicles(wildcardQuery)
             } else {
                 database.vehicleDao().searchVehicles("%$wildcardQuery%")
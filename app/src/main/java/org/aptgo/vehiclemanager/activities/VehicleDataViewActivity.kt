@@ -248,10 +248,10 @@ class VehicleDataViewActivity : AppCompatActivity() {
                         }
                         
                         Vehicle(
-                            vehicleId = "v_${serverVehicle.id}",
+                            vehicleId = if (serverVehicle.source == "resident") "r_${serverVehicle.id}" else "v_${serverVehicle.id}",
                             plateNumber = serverVehicle.plateNumber,
                             ownerName = serverVehicle.ownerName,
-                            unitNumber = "${serverVehicle.dong ?: ""}-${serverVehicle.ho ?: ""}",
+                            unitNumber = serverVehicle.unitLabel ?: "${serverVehicle.dong ?: ""}-${serverVehicle.ho ?: ""}",
                             phoneNumber = serverVehicle.ownerPhone,
                             registrationDate = java.util.Date(),
                             status = if (serverVehicle.isActive) "active" else "inactive",
@@ -272,10 +272,11 @@ class VehicleDataViewActivity : AppCompatActivity() {
                         }
                         
                         Vehicle(
-                            vehicleId = "visitor_${visitorVehicle.id}",
+                            vehicleId = if (visitorVehicle.source == "visitor_reservation") "reservation_${visitorVehicle.id}" else "visitor_${visitorVehicle.id}",
                             plateNumber = visitorVehicle.plateNumber,
                             ownerName = visitorVehicle.ownerName ?: "방문자",
-                            unitNumber = "${visitorVehicle.dong ?: ""}-${visitorVehicle.ho ?: ""} 방문",
+                            unitNumber = visitorVehicle.unitLabel?.let { "$it 방문" }
+                                ?: "${visitorVehicle.dong ?: ""}-${visitorVehicle.ho ?: ""} 방문",
                             phoneNumber = visitorVehicle.contactNumber,
                             registrationDate = java.util.Date(),
                             status = if (visitorVehicle.isActive) "active" else "inactive",
@@ -5,12 +5,14 @@ import androidx.room.Database
 import androidx.room.Room
 import androidx.room.RoomDatabase
 import androidx.room.TypeConverters
+import androidx.room.migration.Migration
+import androidx.sqlite.db.SupportSQLiteDatabase
 import org.aptgo.vehiclemanager.models.Vehicle
 import org.aptgo.vehiclemanager.models.ScanHistory
 
 @Database(
     entities = [Vehicle::class, ScanHistory::class],
-    version = 1,
+    version = 2,
     exportSchema = false
 )
 @TypeConverters(Converters::class)
@@ -22,13 +24,30 @@ abstract class AppDatabase : RoomDatabase() {
         @Volatile
         private var INSTANCE: AppDatabase? = null
 
+        // PlateNumberValidator.extractSuffix 와 같은 정규화 (공백/탭/줄바꿈/하이픈 제거)
+        private const val NORMALIZED_PLATE_SQL =
+            "replace(replace(replace(replace(replace(plateNumber, ' ', ''), '-', ''), char(9), ''), char(10), ''), char(13), '')"
+
+        // v2: 번호판 끝 4자리 검색 컬럼 + 인덱스
+        val MIGRATION_1_2 = object : Migration(1, 2) {
+            override fun migrate(db: SupportSQLiteDatabase) {
+                db.execSQL("ALTER TABLE vehicles ADD COLUMN plateSuffix TEXT")
+                db.execSQL(
+                    "UPDATE vehicles SET plateSuffix = substr($NORMALIZED_PLATE_SQL, -4) " +
+                    "WHERE substr($NORMALIZED_PLATE_SQL, -4) GLOB '[0-9][0-9][0-9][0-9]'"
+                )
+                db.execSQL("CREATE INDEX IF NOT EXISTS index_vehicles_plateSuffix ON vehicles (plateSuffix)")
+            }
+        }
+
         fun getDatabase(context: Context): AppDatabase {
             return INSTANCE ?: synchronized(this) {
                 val instance = Room.databaseBuilder(
                     context.applicationContext,
                     AppDatabase::class.java,
                     "aptgo_vehicle_db"
-                ).build()
+                ).addMigrations(MIGRATION_1_2)
+                    .build()
                 INSTANCE = instance
                 instance
             }
@@ -9,6 +9,9 @@ interface VehicleDao {
     @Query("SELECT * FROM vehicles WHERE plateNumber = :plateNumber LIMIT 1")
     suspend fun getVehicleByPlateNumber(plateNumber: String): Vehicle?
 
+    @Query("SELECT * FROM vehicles WHERE plateSuffix = :suffix ORDER BY vehicleType = 'guest', plateNumber")
+    suspend fun searchByPlateSuffix(suffix: String): List<Vehicle>
+
     @Query("SELECT * FROM vehicles WHERE plateNumber LIKE :query")
     suspend fun searchVehicles(query: String): List<Vehicle>
 
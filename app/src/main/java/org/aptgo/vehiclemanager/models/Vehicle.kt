@@ -3,11 +3,15 @@ package org.aptgo.vehiclemanager.models
 import androidx.room.Entity
 import androidx.room.PrimaryKey
 import androidx.room.Index
+import org.aptgo.vehiclemanager.utils.PlateNumberValidator
 import java.util.Date
 
 @Entity(
     tableName = "vehicles",
-    indices = [Index(value = ["plateNumber"], unique = false)]
+    indices = [
+        Index(value = ["plateNumber"], unique = false),
+        Index(value = ["plateSuffix"], unique = false)
+    ]
 )
 data class Vehicle(
     @PrimaryKey
@@ -21,5 +25,7 @@ data class Vehicle(
     val vehicleType: String, // resident, guest, permitted
     val memo: String?,
     val lastUpdated: Date,
-    val communityId: String?
+    val communityId: String?,
+    // 번호판 끝 숫자 4자리 - 수동 검색 인덱스용
+    val plateSuffix: String? = PlateNumberValidator.extractSuffix(plateNumber)
 )
\ No newline at end of file
@@ -2,6 +2,8 @@ package org.aptgo.vehiclemanager.network
 
 import org.aptgo.vehiclemanager.models.Vehicle
 import org.aptgo.vehiclemanager.models.User
+import okhttp3.RequestBody
+import okhttp3.ResponseBody
 import retrofit2.Response
 import retrofit2.http.*
 
@@ -23,6 +25,21 @@ interface ApiService {
         @Header("Authorization") token: String
     ): Response<ComprehensiveVehicleDataResponse>
 
+    // 신규 단말 초기 설정용 아파트 차량 SQLite 스냅샷
+    @Streaming
+    @GET("api/vehicle-snapshot/")
+    suspend fun downloadVehicleSnapshot(
+        @Header("Authorization") token: String,
+        @Header("If-None-Match") etag: String? = null
+    ): Response<ResponseBody>
+
+    // 등록/미등록 판단용 번호판 해시 집합 (바이너리)
+    @GET("api/registered-plates/")
+    suspend fun getRegisteredPlateSet(
+        @Header("Authorization") token: String,
+        @Header("If-None-Match") etag: String? = null
+    ): Response<ResponseBody>
+
     @POST("api/reports/scan/")
     suspend fun submitScanReport(
         @Header("Authorization") token: String,
@@ -45,8 +62,24 @@ interface ApiService {
         @Body refreshRequest: RefreshTokenRequest
     ): Response<LoginResponse>
     
+    // 증거 사진 이어받기 업로드 (SHA-256 으로 시작/재개 후 Upload-Offset 청크 전송)
+    @POST("api/photos/uploads/")
+    suspend fun startPhotoUpload(
+        @Header("Authorization") token: String,
+        @Body request: PhotoUploadStartRequest
+    ): Response<PhotoUploadStatus>
+
+    @PUT("api/photos/uploads/{uploadId}/")
+    suspend fun uploadPhotoChunk(
+        @Header("Authorization") token: String,
+        @Path("uploadId") uploadId: String,
+        @Header("Upload-Offset") offset: Long,
+        @Body chunk: RequestBody
+    ): Response<PhotoUploadStatus>
+
     @POST("anpr-reports/api/receive/")
     suspend fun sendScanReport(
+        @Header("Authorization") token: String,
         @Body reportData: Map<String, Any>
     ): Response<ScanReportResponse>
 }
@@ -127,7 +160,9 @@ data class VehicleInfo(
     val dong: String?,
     val ho: String?,
     val registeredDate: String,
-    val isActive: Boolean
+    val isActive: Boolean,
+    val unitLabel: String? = null, // 서버가 정규화한 세대 라벨 ('101동 1203호')
+    val source: String? = null // vehicle_directory 출처 (resident_user / resident)
 )
 
 // 입주민 정보
@@ -151,7 +186,9 @@ data class VisitorVehicle(
     val registeredBy: String?, // 등록한 부아이디
     val dong: String?,
     val ho: String?,
-    val isActive: Boolean
+    val isActive: Boolean,
+    val unitLabel: String? = null, // 서버가 정규화한 세대 라벨
+    val source: String? = null // vehicle_directory 출처 (visitor_vehicle / visitor_reservation)
 )
 
 // 부아이디 정보
@@ -169,5 +206,29 @@ data class SubAccountInfo(
 data class ScanReportResponse(
     val success: Boolean,
     val message: String,
-    val report_id: Int?
-)
\ No newline at end of file
+    val report_id: Int?,
+    // 같은 차량이 중복 억제 시간 안에 다시 보고되면 새 보고서 대신 인식 횟수로 합쳐진다
+    val duplicate: Boolean = false,
+    val sighting_count: Int = 1,
+    val action_taken: String? = null,
+    val action_suppressed: Boolean = false
+)
+
+data class PhotoUploadStartRequest(
+    val sha256: String,
+    val size: Long,
+    val contentType: String = "image/jpeg"
+)
+
+data class PhotoUploadStatus(
+    val success: Boolean = true,
+    val complete: Boolean = false,
+    val uploadId: String? = null,
+    val offset: Long = 0,
+    val chunkSize: Int? = null,
+    val photoId: String? = null,
+    val url: String? = null,
+    val thumbnailUrl: String? = null,
+    val deduplicated: Boolean = false,
+    val error: String? = null
+)
@@ -1,6 +1,7 @@
 package org.aptgo.vehiclemanager.network
 
 import okhttp3.OkHttpClient
+import okhttp3.brotli.BrotliInterceptor
 import okhttp3.logging.HttpLoggingInterceptor
 import retrofit2.Retrofit
 import retrofit2.converter.gson.GsonConverterFactory
@@ -18,6 +19,8 @@ object NetworkModule {
     
     private val okHttpClient = OkHttpClient.Builder()
         .addInterceptor(loggingInterceptor)
+        // Accept-Encoding: br,gzip 를 보내고 응답을 풀어준다 (로깅은 풀린 본문 기준)
+        .addInterceptor(BrotliInterceptor)
         .connectTimeout(30, TimeUnit.SECONDS)
         .readTimeout(30, TimeUnit.SECONDS)
         .writeTimeout(30, TimeUnit.SECONDS)
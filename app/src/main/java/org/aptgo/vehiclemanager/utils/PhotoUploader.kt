@@ -0,0 +1,91 @@
+package org.aptgo.vehiclemanager.utils
+
+import android.util.Log
+import kotlinx.coroutines.Dispatchers
+import kotlinx.coroutines.delay
+import kotlinx.coroutines.withContext
+import okhttp3.MediaType.Companion.toMediaType
+import okhttp3.RequestBody.Companion.toRequestBody
+import org.aptgo.vehiclemanager.network.NetworkModule
+import org.aptgo.vehiclemanager.network.PhotoUploadStartRequest
+import org.aptgo.vehiclemanager.network.PhotoUploadStatus
+import java.io.File
+import java.io.RandomAccessFile
+import java.security.MessageDigest
+
+/**
+ * 증거 사진 이어받기 업로드.
+ * SHA-256 으로 업로드를 시작하면 서버가 이미 받은 위치(offset)를 알려주므로
+ * 네트워크가 끊겨도 처음부터 다시 보내지 않는다. 같은 사진은 서버에서 한 벌만 저장된다.
+ */
+object PhotoUploader {
+    private const val TAG = "PhotoUploader"
+    private const val DEFAULT_CHUNK_SIZE = 256 * 1024
+    private const val MAX_ATTEMPTS = 5
+
+    private val JPEG = "image/jpeg".toMediaType()
+    private val OCTET_STREAM = "application/octet-stream".toMediaType()
+
+    /**
+     * 업로드 완료 시 서버 상태 (photoId/url/thumbnailUrl), 실패 시 null
+     */
+    suspend fun upload(file: File, token: String): PhotoUploadStatus? = withContext(Dispatchers.IO) {
+        if (!file.exists()) return@withContext null
+        val sha256 = sha256Of(file)
+        val size = file.length()
+        val auth = "Bearer $token"
+
+        repeat(MAX_ATTEMPTS) { attempt ->
+            try {
+                // 시작/재개 - 매 시도마다 서버 offset 기준으로 이어서 보낸다
+                val startResponse = NetworkModule.apiService.startPhotoUpload(
+                    auth, PhotoUploadStartRequest(sha256, size, JPEG.toString())
+                )
+                var status = startResponse.body()
+                if (!startResponse.isSuccessful || status == null) {
+                    Log.w(TAG, "Upload start failed: ${startResponse.code()}")
+                    return@withContext null
+                }
+                if (status.complete) return@withContext status
+
+                val uploadId = status.uploadId ?: return@withContext null
+                val chunkSize = status.chunkSize ?: DEFAULT_CHUNK_SIZE
+                RandomAccessFile(file, "r").use { raf ->
+                    var offset = status!!.offset
+                    val buffer = ByteArray(chunkSize)
+                    while (offset < size) {
+                        raf.seek(offset)
+                        val read = raf.read(buffer, 0, minOf(chunkSize.toLong(), size - offset).toInt())
+                        val response = NetworkModule.apiService.uploadPhotoChunk(
+                            auth, uploadId, offset, buffer.toRequestBody(OCTET_STREAM, 0, read)
+                        )
+                        status = response.body()
+                        if (!response.isSuccessful || status == null) {
+                            // 409(offset 불일치) 등은 다시 시작해서 서버 offset 을 받는다
+                            throw IllegalStateException("Chunk upload failed: ${response.code()}")
+                        }
+                        if (status!!.complete) return@withContext status
+                        offset = status!!.offset
+                    }
+                }
+            } catch (e: Exception) {
+                Log.w(TAG, "Photo upload attempt ${attempt + 1} failed", e)
+                delay(1000L * (attempt + 1))
+            }
+        }
+        null
+    }
+
+    private fun sha256Of(file: File): String {
+        val digest = MessageDigest.getInstance("SHA-256")
+        file.inputStream().use { input ->
+            val buffer = ByteArray(64 * 1024)
+            while (true) {
+                val read = input.read(buffer)
+                if (read < 0) break
+                digest.update(buffer, 0, read)
+            }
+        }
+        return digest.digest().joinToString("") { "%02x".format(it) }
+    }
+}
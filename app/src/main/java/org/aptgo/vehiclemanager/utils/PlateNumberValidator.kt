@@ -87,6 +87,20 @@ object PlateNumberValidator {
         }
     }
     
+    private val SUFFIX_PATTERN = Regex("(\\d{4})$")
+    
+    /**
+     * 번호판 끝 숫자 4자리 (서버 plate_suffix_index.plate_suffix 와 동일)
+     */
+    fun extractSuffix(plateNumber: String): String? {
+        val normalized = plateNumber.replace("[\\s\\-]".toRegex(), "")
+        return SUFFIX_PATTERN.find(normalized)?.groupValues?.get(1)
+    }
+    
+    fun isSuffixQuery(query: String): Boolean {
+        return query.length == 4 && query.all { it.isDigit() }
+    }
+    
     fun formatPlateNumber(plateNumber: String): String {
         // Format plate number for display
         return plateNumber.uppercase()
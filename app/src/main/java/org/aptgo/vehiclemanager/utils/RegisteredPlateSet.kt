@@ -0,0 +1,120 @@
+package org.aptgo.vehiclemanager.utils
+
+import android.content.Context
+import android.util.Log
+import kotlinx.coroutines.Dispatchers
+import kotlinx.coroutines.withContext
+import org.aptgo.vehiclemanager.network.NetworkModule
+import java.io.File
+import java.nio.ByteBuffer
+import java.nio.ByteOrder
+
+/**
+ * 서버가 만든 등록 번호판 해시 집합 (registered_plate_set.py 버전 1 형식).
+ * 스캔 루프에서 등록/미등록을 메모리 이진 탐색으로 판단하고
+ * 등록 차량일 때만 Room 에서 상세 정보를 조회한다.
+ */
+object RegisteredPlateSet {
+    private const val TAG = "RegisteredPlateSet"
+    private const val FILE_NAME = "registered_plates.bin"
+    private const val PREFS_NAME = "registered_plate_set"
+    private const val KEY_ETAG = "etag"
+
+    private const val MAGIC = 0x41504C54 // "APLT"
+    private const val FORMAT_VERSION = 1
+    private const val HASH_ALGO_FNV1A_64 = 1
+    private const val HEADER_SIZE = 24
+
+    private const val FNV_OFFSET = -0x340d631b7bdddcdbL // 0xcbf29ce484222325
+    private const val FNV_PRIME = 0x100000001b3L
+
+    private val STRIP_REGEX = "[\\s\\-]".toRegex()
+
+    @Volatile
+    private var hashes: LongArray? = null
+
+    val isLoaded: Boolean get() = hashes != null
+
+    /**
+     * 등록 여부. 집합이 아직 없으면 null (호출 측에서 Room 조회)
+     */
+    fun contains(plateNumber: String): Boolean? {
+        val current = hashes ?: return null
+        return current.binarySearch(hash(plateNumber)) >= 0
+    }
+
+    fun normalize(plateNumber: String): String {
+        return plateNumber.replace(STRIP_REGEX, "").uppercase()
+    }
+
+    fun hash(plateNumber: String): Long {
+        var h = FNV_OFFSET
+        for (b in normalize(plateNumber).toByteArray(Charsets.UTF_8)) {
+            h = h xor (b.toLong() and 0xff)
+            h *= FNV_PRIME
+        }
+        return h
+    }
+
+    /**
+     * 저장된 집합 파일을 메모리에 올린다 (앱 시작 시)
+     */
+    suspend fun ensureLoaded(context: Context) = withContext(Dispatchers.IO) {
+        if (hashes != null) return@withContext
+        val file = File(context.filesDir, FILE_NAME)
+        if (!file.exists()) return@withContext
+        try {
+            hashes = parse(file.readBytes())
+            Log.d(TAG, "Loaded ${hashes?.size} plate hashes")
+        } catch (e: Exception) {
+            Log.e(TAG, "Invalid plate set file, deleting", e)
+            file.delete()
+        }
+    }
+
+    /**
+     * 서버에서 최신 집합을 받아 교체 (변경 없으면 304 로 건너뜀)
+     */
+    suspend fun refresh(context: Context, token: String): Boolean = withContext(Dispatchers.IO) {
+        val prefs = context.getSharedPreferences(PREFS_NAME, Context.MODE_PRIVATE)
+        try {
+            val etag = if (hashes != null) prefs.getString(KEY_ETAG, null) else null
+            val response = NetworkModule.apiService.getRegisteredPlateSet("Bearer $token", etag)
+            if (response.code() == 304) return@withContext true
+            val body = response.body()
+            if (!response.isSuccessful || body == null) {
+                Log.w(TAG, "Plate set download failed: ${response.code()}")
+                return@withContext false
+            }
+
+            val bytes = body.bytes()
+            val parsed = parse(bytes)
+
+            val tmpFile = File(context.filesDir, "$FILE_NAME.tmp")
+            tmpFile.writeBytes(bytes)
+            if (!tmpFile.renameTo(File(context.filesDir, FILE_NAME))) {
+                tmpFile.delete()
+            }
+            hashes = parsed
+            prefs.edit().putString(KEY_ETAG, response.headers()["ETag"]).apply()
+            Log.d(TAG, "Plate set updated: ${parsed.size} hashes")
+            true
+        } catch (e: Exception) {
+            Log.e(TAG, "Plate set refresh failed", e)
+            false
+        }
+    }
+
+    private fun parse(bytes: ByteArray): LongArray {
+        val buffer = ByteBuffer.wrap(bytes).order(ByteOrder.BIG_ENDIAN)
+        require(bytes.size >= HEADER_SIZE) { "plate set too short" }
+        require(buffer.int == MAGIC) { "bad magic" }
+        require(buffer.short.toInt() == FORMAT_VERSION) { "unsupported version" }
+        require(buffer.short.toInt() == HASH_ALGO_FNV1A_64) { "unsupported hash" }
+        val count = buffer.int
+        buffer.int // apartment_id
+        buffer.long // generated_at
+        require(bytes.size == HEADER_SIZE + count * 8) { "bad length" }
+        return LongArray(count) { buffer.long }
+    }
+}
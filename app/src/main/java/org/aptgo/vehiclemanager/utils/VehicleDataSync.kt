@@ -46,9 +46,26 @@ class VehicleDataSync {
                 }
                 
                 progressCallback?.onProgress(0, 100, "동기화 준비 중...")
-                
-                // Step 2: Backup current data for rollback capability
+
                 val database = AppDatabase.getDatabase(context)
+
+                // First-time provisioning: install the prebuilt SQLite snapshot in one transfer
+                if (database.vehicleDao().getVehicleCount() == 0) {
+                    progressCallback?.onProgress(5, 100, "차량 스냅샷 다운로드 중...")
+                    val installedCount = VehicleSnapshotInstaller.install(context, token)
+                    if (installedCount != null) {
+                        RegisteredPlateSet.refresh(context, token)
+                        progressCallback?.onProgress(100, 100, "동기화 완료")
+                        return@withContext SyncResult(
+                            success = true,
+                            message = "차량 데이터 동기화 완료: 스냅샷으로 ${installedCount}대 차량 정보를 설치했습니다.",
+                            vehicleCount = installedCount
+                        )
+                    }
+                    Log.w(TAG, "Snapshot install unavailable, falling back to JSON sync")
+                }
+
+                // Step 2: Backup current data for rollback capability
                 val backupVehicles = createDataBackup(database)
                 
                 progressCallback?.onProgress(10, 100, "데이터 백업 완료")
@@ -70,6 +87,7 @@ class VehicleDataSync {
                         return@withContext processResult
                     }
                     
+                    RegisteredPlateSet.refresh(context, token)
                     progressCallback?.onProgress(100, 100, "동기화 완료")
                     return@withContext processResult
                     
@@ -152,7 +170,19 @@ class VehicleDataSync {
                         val errorMsg = response.body()?.message ?: "서버 응답 오류 (${response.code()})"
                         Log.e(TAG, "API call failed: $errorMsg")
                         Log.e(TAG, "Response code: ${response.code()}")
-                        
+
+                        // 서버가 아파트별 동시 요청 제한에 걸리면 Retry-After 만큼 기다렸다가 재시도
+                        if (response.code() == 429) {
+                            val retryAfterMs = (response.headers()["Retry-After"]?.toLongOrNull() ?: 1L) * 1000
+                            lastException = Exception("HTTP 429: 서버 요청 혼잡")
+                            if (attempt < MAX_RETRY_ATTEMPTS - 1) {
+                                Log.w(TAG, "Server busy, retrying after ${retryAfterMs}ms")
+                                // 단말들이 동시에 다시 몰리지 않도록 약간의 지터 추가
+                                delay(retryAfterMs + (0L..500L).random())
+                            }
+                            return@repeat
+                        }
+
                         // Don't retry for authentication errors (4xx)
                         if (response.code() in 400..499) {
                             return SyncResult(
@@ -222,10 +252,11 @@ class VehicleDataSync {
                 data.vehicles.forEach { vehicleData ->
                     if (validateVehicleData(vehicleData)) {
                         val vehicle = Vehicle(
-                            vehicleId = "v_${vehicleData.id}",
+                            vehicleId = if (vehicleData.source == "resident") "r_${vehicleData.id}" else "v_${vehicleData.id}",
                             plateNumber = vehicleData.plateNumber.trim(),
                             ownerName = vehicleData.ownerName.trim(),
-                            unitNumber = "${vehicleData.dong ?: ""}동 ${vehicleData.ho ?: ""}호".trim(),
+                            unitNumber = vehicleData.unitLabel
+                                ?: "${vehicleData.dong ?: ""}동 ${vehicleData.ho ?: ""}호".trim(),
                             phoneNumber = vehicleData.ownerPhone?.trim(),
                             registrationDate = Date(),
                             status = if (vehicleData.isActive) "active" else "inactive",
@@ -242,10 +273,11 @@ class VehicleDataSync {
                 data.visitorVehicles.forEach { visitorData ->
                     if (validateVisitorVehicleData(visitorData)) {
                         val vehicle = Vehicle(
-                            vehicleId = "visitor_${visitorData.id}",
+                            vehicleId = if (visitorData.source == "visitor_reservation") "reservation_${visitorData.id}" else "visitor_${visitorData.id}",
                             plateNumber = visitorData.plateNumber.trim(),
                             ownerName = visitorData.ownerName?.trim() ?: "방문자",
-                            unitNumber = "${visitorData.dong ?: ""}동 ${visitorData.ho ?: ""}호 방문".trim(),
+                            unitNumber = visitorData.unitLabel?.let { "$it 방문".trim() }
+                                ?: "${visitorData.dong ?: ""}동 ${visitorData.ho ?: ""}호 방문".trim(),
                             phoneNumber = visitorData.contactNumber?.trim(),
                             registrationDate = Date(),
                             status = if (visitorData.isActive) "active" else "inactive",
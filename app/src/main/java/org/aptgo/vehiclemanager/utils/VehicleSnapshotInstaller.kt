@@ -0,0 +1,110 @@
+package org.aptgo.vehiclemanager.utils
+
+import android.content.Context
+import android.util.Log
+import kotlinx.coroutines.Dispatchers
+import kotlinx.coroutines.withContext
+import org.aptgo.vehiclemanager.database.AppDatabase
+import org.aptgo.vehiclemanager.network.NetworkModule
+import java.io.File
+import java.security.MessageDigest
+
+/**
+ * 서버가 미리 만든 아파트별 SQLite 스냅샷으로 vehicles 테이블을 한 번에 채운다.
+ * 신규 단말 초기 설정 시 JSON 파싱 + 청크 insert 를 대신한다.
+ */
+object VehicleSnapshotInstaller {
+    private const val TAG = "VehicleSnapshotInstaller"
+    private const val SNAPSHOT_FILE = "vehicle_snapshot.sqlite"
+    private const val SUPPORTED_FORMAT_VERSION = "2"
+
+    private val VEHICLE_COLUMNS = listOf(
+        "vehicleId", "plateNumber", "ownerName", "unitNumber", "phoneNumber",
+        "registrationDate", "status", "vehicleType", "memo", "lastUpdated", "communityId",
+        "plateSuffix"
+    ).joinToString(", ")
+
+    /**
+     * 스냅샷 다운로드 후 설치. 성공 시 설치된 차량 수, 실패 시 null (JSON 동기화로 대체)
+     */
+    suspend fun install(context: Context, token: String): Int? = withContext(Dispatchers.IO) {
+        val tmpFile = File(context.cacheDir, "$SNAPSHOT_FILE.tmp")
+        val snapshotFile = File(context.cacheDir, SNAPSHOT_FILE)
+        try {
+            val response = NetworkModule.apiService.downloadVehicleSnapshot("Bearer $token")
+            val body = response.body()
+            if (!response.isSuccessful || body == null) {
+                Log.w(TAG, "Snapshot download failed: ${response.code()}")
+                return@withContext null
+            }
+            if (response.headers()["X-Snapshot-Version"] != SUPPORTED_FORMAT_VERSION) {
+                Log.w(TAG, "Unsupported snapshot version: ${response.headers()["X-Snapshot-Version"]}")
+                body.close()
+                return@withContext null
+            }
+
+            // 다운로드하면서 SHA-256 계산
+            val digest = MessageDigest.getInstance("SHA-256")
+            body.byteStream().use { input ->
+                tmpFile.outputStream().use { output ->
+                    val buffer = ByteArray(64 * 1024)
+                    while (true) {
+                        val read = input.read(buffer)
+                        if (read < 0) break
+                        digest.update(buffer, 0, read)
+                        output.write(buffer, 0, read)
+                    }
+                }
+            }
+            val actualSha = digest.digest().joinToString("") { "%02x".format(it) }
+            val expectedSha = response.headers()["X-Snapshot-Sha256"]
+            if (expectedSha != null && !expectedSha.equals(actualSha, ignoreCase = true)) {
+                Log.e(TAG, "Snapshot checksum mismatch")
+                return@withContext null
+            }
+            if (!tmpFile.renameTo(snapshotFile)) {
+                Log.e(TAG, "Failed to move snapshot file")
+                return@withContext null
+            }
+
+            val count = copyIntoRoom(AppDatabase.getDatabase(context), snapshotFile)
+            Log.d(TAG, "Installed $count vehicles from snapshot")
+            count
+        } catch (e: Exception) {
+            Log.e(TAG, "Snapshot install failed", e)
+            null
+        } finally {
+            tmpFile.delete()
+            snapshotFile.delete()
+        }
+    }
+
+    /**
+     * ATTACH 후 한 트랜잭션 안에서 vehicles 전체 교체 (실패 시 기존 데이터 유지)
+     */
+    private fun copyIntoRoom(database: AppDatabase, snapshotFile: File): Int {
+        val db = database.openHelper.writableDatabase
+        // ATTACH 는 트랜잭션 밖에서만 가능
+        db.execSQL("ATTACH DATABASE ? AS snapshot", arrayOf(snapshotFile.absolutePath))
+        try {
+            db.beginTransaction()
+            try {
+                db.execSQL("DELETE FROM vehicles")
+                db.execSQL(
+                    "INSERT INTO vehicles ($VEHICLE_COLUMNS) SELECT $VEHICLE_COLUMNS FROM snapshot.vehicles"
+                )
+                db.setTransactionSuccessful()
+            } finally {
+                db.endTransaction()
+            }
+        } finally {
+            db.execSQL("DETACH DATABASE snapshot")
+        }
+        // Room Flow 구독자에게 변경 알림
+        database.invalidationTracker.refreshVersionsAsync()
+
+        db.query("SELECT COUNT(*) FROM vehicles").use { cursor ->
+            return if (cursor.moveToFirst()) cursor.getInt(0) else 0
+        }
+    }
+}
@@ -0,0 +1,462 @@
+#!/usr/bin/env python3
+"""
+Prometheus 호환 /metrics
+test_server_api.py 같은 수동 스크립트 말고는 API 지연/DB/캐시 상태를 볼 방법이 없어
+워커 프로세스 안에서 카운터/히스토그램을 모아 Prometheus 텍스트 형식으로 내보낸다.
+
+- 뷰별 요청 지연 히스토그램, 상태 코드별 요청 수, 진행 중 요청 수
+- 요청당 DB 쿼리 수/시간 (connection.execute_wrapper), 응답 본문 크기
+- 캐시 적중률 (request_scope, 대시보드 조각, comprehensive coalescing) - record_cache()
+- 스캔 보고서 수신 결과 (신규/중복/조치 억제)
+
+샘플 하나 기록은 dict 조회 + 리스트 원소 증가뿐이라 잠금을 쓰지 않는다 (1µs 미만).
+GIL 아래에서 드물게 증가분 하나를 잃을 수 있지만 모니터링 용도에서는 허용한다.
+읽는 쪽(기록 스레드, /metrics)은 list(dict.items()) 로 한 번에 복사한 뒤 순회한다.
+
+gunicorn 처럼 워커가 여럿이면 APTGO_METRICS_DIR 을 지정한다. 워커마다 METRICS_FLUSH_SECONDS
+간격으로 <pid>-<시작시각>.json 을 쓰고, /metrics 를 받은 워커가 모두 합쳐 내보낸다.
+오래 갱신되지 않은 워커 파일은 게이지만 빼고 합치며 (카운터가 줄어들지 않도록),
+그 워커 프로세스가 이미 없으면 카운터/히스토그램을 retired.json 에 더해 두고 파일을 지운다.
+
+settings.MIDDLEWARE 맨 앞에 'app_metrics.MetricsMiddleware' 추가, urls.py:
+    from app_metrics import metrics_view
+    path('metrics', metrics_view),
+
+접근은 Authorization: Bearer <APTGO_METRICS_TOKEN> (권장) 또는 APTGO_METRICS_ALLOWED_IPS.
+둘 다 기본은 비어 있어 설정하지 않으면 /metrics 는 항상 403 이다.
+앱은 로컬 리버스 프록시 뒤에서 127.0.0.1 로 요청을 받으므로 인터넷 요청도 REMOTE_ADDR 가 127.0.0.1 이다.
+그래서 IP 허용 목록은 프록시를 거치지 않은 (X-Forwarded-For 가 없는) 요청에만 적용한다 -
+프록시가 X-Forwarded-For 를 붙이도록 설정되어 있어야 한다.
+"""
+
+import fcntl
+import hmac
+import json
+import os
+import threading
+import time
+from bisect import bisect_left
+
+METRICS_DIR = os.environ.get('APTGO_METRICS_DIR', '')
+METRICS_FLUSH_SECONDS = 5
+# 이보다 오래 갱신되지 않은 워커 파일은 종료된 워커로 보고 게이지를 합치지 않는다
+METRICS_STALE_SECONDS = 60
+# 종료된 워커들의 카운터/히스토그램 누적 (워커 파일과 구분되는 이름)
+RETIRED_FILE = 'retired.json'
+
+METRICS_TOKEN = os.environ.get('APTGO_METRICS_TOKEN', '')
+METRICS_ALLOWED_IPS = tuple(
+    ip.strip() for ip in os.environ.get('APTGO_METRICS_ALLOWED_IPS', '').split(',') if ip.strip()
+)
+
+LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+SIZE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304)
+QUERY_COUNT_BUCKETS = (0, 1, 2, 5, 10, 20, 50, 100)
+
+
+class Counter:
+    """단조 증가 카운터 (라벨 값 튜플별)"""
+
+    kind = 'counter'
+
+    def __init__(self, name, help_text, labelnames=()):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.values = {}
+
+    def inc(self, labels=(), amount=1):
+        values = self.values
+        values[labels] = values.get(labels, 0) + amount
+
+    def snapshot(self):
+        # 다른 스레드가 새 라벨을 추가해도 순회 중 크기 변경 오류가 나지 않도록 먼저 복사
+        return [[list(labels), value] for labels, value in list(self.values.items())]
+
+
+class Gauge(Counter):
+    """현재 값 (진행 중 요청 수 등) - 워커 합산 시 더한다"""
+
+    kind = 'gauge'
+
+    def dec(self, labels=(), amount=1):
+        values = self.values
+        values[labels] = values.get(labels, 0) - amount
+
+
+class Histogram:
+    """버킷별 개수 (비누적 저장, 내보낼 때 누적) + 합계"""
+
+    kind = 'histogram'
+
+    def __init__(self, name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+        self.name = name
+        self.help = help_text
+        self.labelnames = labelnames
+        self.buckets = tuple(buckets)
+        self.series = {}
+
+    def observe(self, value, labels=()):
+        series = self.series.get(labels)
+        if series is None:
+            # [버킷별 개수..., +Inf 개수, 합계]
+            series = self.series.setdefault(labels, [0] * (len(self.buckets) + 1) + [0.0])
+        series[bisect_left(self.buckets, value)] += 1
+        series[-1] += value
+
+    def snapshot(self):
+        return [[list(labels), list(series)] for labels, series in list(self.series.items())]
+
+
+REGISTRY = {}
+
+
+def _register(metric):
+    REGISTRY[metric.name] = metric
+    return metric
+
+
+def counter(name, help_text, labelnames=()):
+    return _register(Counter(name, help_text, labelnames))
+
+
+def gauge(name, help_text, labelnames=()):
+    return _register(Gauge(name, help_text, labelnames))
+
+
+def histogram(name, help_text, labelnames=(), buckets=LATENCY_BUCKETS):
+    return _register(Histogram(name, help_text, labelnames, buckets))
+
+
+request_latency = histogram(
+    'aptgo_http_request_duration_seconds', '뷰별 요청 처리 시간', ('view',)
+)
+requests_total = counter(
+    'aptgo_http_requests_total', '뷰/상태 코드 계열별 요청 수', ('view', 'status')
+)
+requests_in_flight = gauge(
+    'aptgo_http_requests_in_flight', '처리 중인 요청 수'
+)
+response_size = histogram(
+    'aptgo_http_response_size_bytes', '뷰별 응답 본문 크기 (스트리밍 제외)', ('view',), SIZE_BUCKETS
+)
+db_queries = histogram(
+    'aptgo_db_queries_per_request', '요청당 DB 쿼리 수', ('view',), QUERY_COUNT_BUCKETS
+)
+db_query_seconds = counter(
+    'aptgo_db_query_seconds_total', '뷰별 DB 쿼리 누적 시간', ('view',)
+)
+cache_requests = counter(
+    'aptgo_cache_requests_total', '캐시 조회 결과 (hit/miss)', ('cache', 'result')
+)
+scan_reports = counter(
+    'aptgo_scan_reports_total', '스캔 보고서 수신 결과 (new/duplicate/suppressed)', ('result',)
+)
+
+
+def record_cache(name, hit):
+    """캐시 조회 한 번 기록"""
+    cache_requests.inc((name, 'hit' if hit else 'miss'))
+
+
+# ---------------------------------------------------------------------------
+# 워커 합산
+# ---------------------------------------------------------------------------
+
+def snapshot():
+    return {
+        name: {'kind': metric.kind, 'samples': metric.snapshot()}
+        for name, metric in list(REGISTRY.items())
+    }
+
+
+_worker_ids = {}
+
+
+def _worker_file():
+    """이 워커 파일 이름 - pid 가 재사용돼도 이전 워커 파일을 덮어쓰지 않도록 시작 시각을 붙인다"""
+    pid = os.getpid()
+    name = _worker_ids.get(pid)
+    if name is None:
+        name = _worker_ids.setdefault(pid, f'{pid}-{int(time.time() * 1000)}.json')
+    return name
+
+
+def flush_snapshot():
+    """이 워커의 값을 METRICS_DIR/<pid>-<시작시각>.json 에 기록 (임시 파일 -> rename)"""
+    if not METRICS_DIR:
+        return
+    os.makedirs(METRICS_DIR, exist_ok=True)
+    path = os.path.join(METRICS_DIR, _worker_file())
+    tmp_path = f'{path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(snapshot(), f)
+    os.replace(tmp_path, path)
+
+
+_flusher_lock = threading.Lock()
+_flusher_pid = None
+
+
+def _ensure_flusher():
+    """워커(fork 이후 pid)마다 한 번 백그라운드 기록 스레드 시작"""
+    global _flusher_pid
+    if not METRICS_DIR or _flusher_pid == os.getpid():
+        return
+    with _flusher_lock:
+        if _flusher_pid == os.getpid():
+            return
+        _flusher_pid = os.getpid()
+
+        def loop():
+            while True:
+                time.sleep(METRICS_FLUSH_SECONDS)
+                # 어떤 오류에도 스레드가 조용히 죽지 않도록 (다음 주기에 다시 기록)
+                try:
+                    flush_snapshot()
+                except Exception as e:
+                    print(f"⚠️  metrics 기록 실패: {e}")
+
+        threading.Thread(target=loop, name='metrics-flush', daemon=True).start()
+
+
+def _read_json(path):
+    with open(path, encoding='utf-8') as f:
+        return json.load(f)
+
+
+def _without_gauges(data):
+    return {name: entry for name, entry in data.items() if entry['kind'] != 'gauge'}
+
+
+def _process_alive(name):
+    try:
+        os.kill(int(name.split('-', 1)[0]), 0)
+    except ProcessLookupError:
+        return False
+    except (ValueError, OSError):
+        return True
+    return True
+
+
+def _retire_workers(dead, retired):
+    """종료된 워커 값(게이지 제외)을 retired 에 더한 새 dict 를 retired.json 에 쓰고 워커 파일 삭제 (잠금 안에서)"""
+    kinds = {name: entry['kind'] for data in [retired] + [data for _, data in dead] for name, entry in data.items()}
+    merged = merge_snapshots([retired] + [data for _, data in dead])
+    retired = {
+        name: {'kind': kinds[name], 'samples': [[list(labels), value] for labels, value in series.items()]}
+        for name, series in merged.items()
+    }
+    retired_path = os.path.join(METRICS_DIR, RETIRED_FILE)
+    tmp_path = f'{retired_path}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(retired, f)
+    os.replace(tmp_path, retired_path)
+    # retired.json 이 확정된 뒤에 지워야 중간에 죽어도 값이 사라지지 않는다
+    for path, _ in dead:
+        os.remove(path)
+    return retired
+
+
+def collect_snapshots():
+    """현재 워커 값 + 다른 워커 파일 + 종료된 워커 누적 (retired.json)
+
+    오래된 워커 파일은 게이지만 빼고 합친다 (카운터가 줄어 보이지 않도록).
+    그 워커 프로세스가 없으면 retired.json 으로 옮겨 파일이 계속 쌓이지 않게 한다.
+    /metrics 를 동시에 받은 워커끼리 같은 파일을 두 번 세거나 빠뜨리지 않도록
+    목록 읽기부터 retired.json 갱신까지 디렉터리 잠금 안에서 한다.
+    """
+    snapshots = [snapshot()]
+    if not METRICS_DIR or not os.path.isdir(METRICS_DIR):
+        return snapshots
+    own = _worker_file()
+    with open(os.path.join(METRICS_DIR, '.lock'), 'w') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        try:
+            retired = _read_json(os.path.join(METRICS_DIR, RETIRED_FILE))
+        except (OSError, ValueError):
+            retired = {}
+        now = time.time()
+        dead = []
+        for name in os.listdir(METRICS_DIR):
+            if not name.endswith('.json') or name in (own, RETIRED_FILE):
+                continue
+            path = os.path.join(METRICS_DIR, name)
+            try:
+                stale = now - os.path.getmtime(path) > METRICS_STALE_SECONDS
+                data = _read_json(path)
+            except (OSError, ValueError):
+                continue
+            if stale and not _process_alive(name):
+                dead.append((path, _without_gauges(data)))
+            else:
+                snapshots.append(_without_gauges(data) if stale else data)
+        if dead:
+            try:
+                retired = _retire_workers(dead, retired)
+            except (OSError, ValueError) as e:
+                # 옮기지 못했으면 이번에는 파일 값을 그대로 센다
+                print(f"⚠️  종료된 워커 metrics 정리 실패: {e}")
+                snapshots.extend(data for _, data in dead)
+    snapshots.append(retired)
+    return snapshots
+
+
+def merge_snapshots(snapshots):
+    """{name: {labels 튜플: 값 또는 리스트}} - 카운터/게이지는 더하고 히스토그램은 원소별로 더한다"""
+    merged = {}
+    for data in snapshots:
+        for name, entry in data.items():
+            series = merged.setdefault(name, {})
+            for labels, value in entry['samples']:
+                key = tuple(labels)
+                if isinstance(value, list):
+                    current = series.get(key)
+                    series[key] = value if current is None else [a + b for a, b in zip(current, value)]
+                else:
+                    series[key] = series.get(key, 0) + value
+    return merged
+
+
+def _escape(value):
+    return str(value).replace('\\', '\\\\').replace('\n', '\\n').replace('"', '\\"')
+
+
+def _labels_text(names, values, extra=()):
+    pairs = [f'{name}="{_escape(value)}"' for name, value in zip(names, values)]
+    pairs.extend(f'{name}="{_escape(value)}"' for name, value in extra)
+    return '{' + ','.join(pairs) + '}' if pairs else ''
+
+
+def _format_value(value):
+    if isinstance(value, float):
+        return repr(value) if value != int(value) else str(int(value))
+    return str(value)
+
+
+def render_metrics(snapshots=None):
+    """Prometheus 텍스트 형식 (0.0.4)"""
+    merged = merge_snapshots(snapshots if snapshots is not None else collect_snapshots())
+    lines = []
+    for name, metric in REGISTRY.items():
+        lines.append(f'# HELP {name} {metric.help}')
+        lines.append(f'# TYPE {name} {metric.kind}')
+        for labels, value in sorted(merged.get(name, {}).items()):
+            if metric.kind != 'histogram':
+                lines.append(f'{name}{_labels_text(metric.labelnames, labels)} {_format_value(value)}')
+                continue
+            cumulative = 0
+            for bound, count in zip(metric.buckets + ('+Inf',), value[:-1]):
+                cumulative += count
+                le = bound if bound == '+Inf' else _format_value(float(bound))
+                lines.append(
+                    f'{name}_bucket{_labels_text(metric.labelnames, labels, (("le", le),))} {cumulative}'
+                )
+            lines.append(f'{name}_sum{_labels_text(metric.labelnames, labels)} {_format_value(value[-1])}')
+            lines.append(f'{name}_count{_labels_text(metric.labelnames, labels)} {cumulative}')
+    return '\n'.join(lines) + '\n'
+
+
+# ---------------------------------------------------------------------------
+# 미들웨어 / 뷰
+# ---------------------------------------------------------------------------
+
+def view_label(request):
+    """resolver_match 의 뷰 함수 이름 (URL 이 없으면 'unmatched') - 라벨 종류가 URL 수로 제한된다"""
+    match = getattr(request, 'resolver_match', None)
+    if match is None:
+        return 'unmatched'
+    func = match.func
+    view_class = getattr(func, 'view_class', None)
+    if view_class is not None:
+        return view_class.__name__
+    return getattr(func, '__name__', match.view_name or 'unknown')
+
+
+def _status_class(status_code):
+    return f'{status_code // 100}xx'
+
+
+def observe_response(request, response, elapsed, query_count=None, query_seconds=0.0):
+    view = view_label(request)
+    labels = (view,)
+    request_latency.observe(elapsed, labels)
+    requests_total.inc((view, _status_class(response.status_code)))
+    if not response.streaming:
+        response_size.observe(len(response.content), labels)
+    if query_count is not None:
+        db_queries.observe(query_count, labels)
+        db_query_seconds.inc(labels, query_seconds)
+
+
+class MetricsMiddleware:
+    """요청 지연/상태/크기/DB 쿼리 수 기록 (MIDDLEWARE 맨 앞)
+
+    async 뷰(ASGI)는 ORM 이 다른 스레드의 연결을 쓰므로 DB 쿼리 수는 동기 요청만 센다.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        from django.db import connection
+
+        _ensure_flusher()
+        queries = [0, 0.0]
+
+        def count_query(execute, sql, params, many, context):
+            started = time.perf_counter()
+            try:
+                return execute(sql, params, many, context)
+            finally:
+                queries[0] += 1
+                queries[1] += time.perf_counter() - started
+
+        requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            with connection.execute_wrapper(count_query):
+                response = self.get_response(request)
+        finally:
+            requests_in_flight.dec()
+        observe_response(request, response, time.perf_counter() - started, queries[0], queries[1])
+        return response
+
+    async def __acall__(self, request):
+        _ensure_flusher()
+        requests_in_flight.inc()
+        started = time.perf_counter()
+        try:
+            response = await self.get_response(request)
+        finally:
+            requests_in_flight.dec()
+        observe_response(request, response, time.perf_counter() - started)
+        return response
+
+
+def _client_allowed(request):
+    if METRICS_TOKEN and hmac.compare_digest(request.headers.get('Authorization', ''), f'Bearer {METRICS_TOKEN}'):
+        return True
+    # 프록시를 거친 요청은 REMOTE_ADDR 가 프록시 주소라 IP 로 판단할 수 없다
+    if 'HTTP_X_FORWARDED_FOR' in request.META:
+        return False
+    return request.META.get('REMOTE_ADDR', '') in METRICS_ALLOWED_IPS
+
+
+def metrics_view(request):
+    """GET /metrics - 모든 워커 합산 값 (Prometheus 텍스트 형식)"""
+    from django.http import HttpResponse
+
+    if not _client_allowed(request):
+        return HttpResponse('forbidden\n', status=403, content_type='text/plain; charset=utf-8')
+    return HttpResponse(render_metrics(), content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,147 @@
+#!/usr/bin/env python3
+"""
+WSGI vs ASGI 느린 클라이언트 벤치마크
+LTE 단말처럼 응답 본문을 천천히 읽는 클라이언트 200개를 동시에 붙여
+기존 WSGI 서비스와 ASGI 프로필(gunicorn_asgi_profile.py)의 처리량을 비교한다.
+
+클라이언트 수신 버퍼를 작게 잡고 초당 읽는 양을 제한하므로, 서버는 본문을 다 보낼 때까지
+소켓 쓰기에서 기다린다. WSGI 는 그동안 워커가 묶이고, ASGI 는 이벤트 루프가 다른 요청을 처리한다.
+느린 클라이언트가 붙어 있는 동안 빠른 프로브 요청의 응답 시간도 함께 잰다.
+
+사용법 (서버 두 개를 띄운 뒤):
+    python3 benchmark_asgi_vs_wsgi.py --token <API 토큰> \\
+        --wsgi http://127.0.0.1:8000/api/comprehensive/ \\
+        --asgi http://127.0.0.1:8001/api/comprehensive/ \\
+        [--clients 200] [--rate 32768]
+"""
+
+import argparse
+import asyncio
+import socket
+import ssl
+import statistics
+import time
+from urllib.parse import urlsplit
+
+DEFAULT_CLIENTS = 200
+DEFAULT_RATE = 32 * 1024          # 느린 클라이언트 초당 수신 바이트 (LTE 약한 전계 수준)
+READ_CHUNK = 4 * 1024
+CLIENT_RCVBUF = 16 * 1024         # 커널 버퍼가 본문을 다 삼키지 않도록 작게
+PROBE_INTERVAL = 0.25
+
+
+async def fetch(url, token, rate=None):
+    """GET 한 번 -> (status, 본문 바이트 수, 첫 바이트까지 시간, 전체 시간)
+
+    rate 를 주면 초당 rate 바이트만 읽는다.
+    """
+    parts = urlsplit(url)
+    https = parts.scheme == 'https'
+    port = parts.port or (443 if https else 80)
+    path = parts.path + (f'?{parts.query}' if parts.query else '')
+
+    sock = socket.socket(socket.AF_INET, socket.SOCK_STREAM)
+    sock.setsockopt(socket.SOL_SOCKET, socket.SO_RCVBUF, CLIENT_RCVBUF)
+    sock.setblocking(False)
+    start = time.perf_counter()
+    await asyncio.get_running_loop().sock_connect(sock, (parts.hostname, port))
+    reader, writer = await asyncio.open_connection(
+        sock=sock, ssl=ssl.create_default_context() if https else None,
+        server_hostname=parts.hostname if https else None, limit=READ_CHUNK * 4
+    )
+    try:
+        writer.write((
+            f'GET {path} HTTP/1.1\r\nHost: {parts.netloc}\r\n'
+            f'Authorization: Bearer {token}\r\nAccept: application/json\r\nConnection: close\r\n\r\n'
+        ).encode('ascii'))
+        await writer.drain()
+
+        status_line = await reader.readline()
+        first_byte = time.perf_counter() - start
+        status = int(status_line.split()[1]) if status_line else 0
+        while (await reader.readline()) not in (b'\r\n', b''):
+            pass
+
+        received = 0
+        while True:
+            chunk = await reader.read(READ_CHUNK)
+            if not chunk:
+                break
+            received += len(chunk)
+            if rate:
+                await asyncio.sleep(len(chunk) / rate)
+        return status, received, first_byte, time.perf_counter() - start
+    finally:
+        writer.close()
+
+
+def percentile(values, ratio):
+    if not values:
+        return 0.0
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * ratio))]
+
+
+async def run_target(name, url, token, clients, rate):
+    """느린 클라이언트 clients 개 + 빠른 프로브 1개"""
+    done = asyncio.Event()
+    probe_times = []
+
+    async def probe():
+        while not done.is_set():
+            try:
+                _, _, _, elapsed = await fetch(url, token)
+                probe_times.append(elapsed)
+            except OSError:
+                pass
+            await asyncio.sleep(PROBE_INTERVAL)
+
+    probe_task = asyncio.ensure_future(probe())
+    start = time.perf_counter()
+    results = await asyncio.gather(*(fetch(url, token, rate) for _ in range(clients)), return_exceptions=True)
+    wall = time.perf_counter() - start
+    done.set()
+    await probe_task
+
+    ok = [r for r in results if not isinstance(r, BaseException) and r[0] == 200]
+    statuses = {}
+    for r in results:
+        key = type(r).__name__ if isinstance(r, BaseException) else r[0]
+        statuses[key] = statuses.get(key, 0) + 1
+
+    ttfb = [r[2] for r in ok]
+    total = [r[3] for r in ok]
+    print(f"\n📊 {name}: {url}")
+    print(f"   응답 상태: {statuses}")
+    if ok:
+        print(f"   본문 크기: {statistics.mean(r[1] for r in ok) / 1024:.1f} KB")
+    print(f"   처리량: {len(ok) / wall:6.2f} req/s (전체 {wall:.1f}초)")
+    print(f"   첫 바이트: p50 {percentile(ttfb, 0.5) * 1000:7.0f}ms | p95 {percentile(ttfb, 0.95) * 1000:7.0f}ms")
+    print(f"   완료 시간: p50 {percentile(total, 0.5):7.2f}s  | p95 {percentile(total, 0.95):7.2f}s")
+    print(f"   빠른 프로브 {len(probe_times)}회: p50 {percentile(probe_times, 0.5) * 1000:7.0f}ms | "
+          f"p95 {percentile(probe_times, 0.95) * 1000:7.0f}ms")
+    return len(ok) / wall
+
+
+def main():
+    parser = argparse.ArgumentParser(description='WSGI vs ASGI 느린 클라이언트 벤치마크')
+    parser.add_argument('--wsgi', required=True, help='WSGI 서비스 URL')
+    parser.add_argument('--asgi', required=True, help='ASGI 서비스 URL')
+    parser.add_argument('--token', required=True, help='API 토큰 (Bearer)')
+    parser.add_argument('--clients', type=int, default=DEFAULT_CLIENTS)
+    parser.add_argument('--rate', type=int, default=DEFAULT_RATE, help='느린 클라이언트 초당 수신 바이트')
+    args = parser.parse_args()
+
+    print("=" * 60)
+    print("🐢 WSGI vs ASGI 느린 클라이언트 벤치마크")
+    print(f"   클라이언트 {args.clients}개, 초당 {args.rate / 1024:.0f} KB 수신")
+    print("=" * 60)
+
+    wsgi = asyncio.run(run_target('WSGI', args.wsgi, args.token, args.clients, args.rate))
+    asgi = asyncio.run(run_target('ASGI', args.asgi, args.token, args.clients, args.rate))
+    if wsgi:
+        print(f"\n✅ ASGI / WSGI 처리량: {asgi / wsgi:.1f}x")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+고속 직렬화 마이크로벤치마크
+기존 방식(행마다 localtime + strftime + JsonResponse 표준 json)과
+지금 운영에서 응답을 만드는 경로를 10k / 100k 행으로 비교한다.
+    visitor_vehicles_api   -> fast_serializers (일괄 KST 변환 + 날짜 캐시 + orjson)
+    comprehensive vehicles -> vehicle_directory 행 직렬화 (serialize_directory_vehicles + orjson)
+
+Django 없이 합성 데이터로 실행된다: python3 benchmark_fast_serializers.py
+"""
+
+import json
+import random
+import time
+from datetime import date, datetime, time as dt_time, timedelta, timezone as dt_timezone
+
+from fast_serializers import (
+    KST,
+    KSTFormatter,
+    dumps,
+    orjson,
+    serialize_visitor_reservations,
+)
+from vehicle_directory import DIRECTORY_COLUMNS, serialize_directory_vehicles
+
+ROW_COUNTS = (10_000, 100_000)
+REPEAT = 3
+
+
+def make_reservation_rows(count):
+    """VISITOR_RESERVATION_FIELDS 순서의 합성 튜플 생성"""
+    rng = random.Random(count)
+    base = datetime(2025, 8, 1, tzinfo=dt_timezone.utc)
+    rows = []
+    for i in range(count):
+        created_at = base + timedelta(seconds=rng.randrange(0, 60 * 86400))
+        visit_date = (created_at + timedelta(days=rng.randrange(0, 7))).date()
+        rows.append((
+            i + 1, f'{rng.randrange(10, 999)}가{rng.randrange(1000, 9999)}', f'방문자{i}',
+            f'010-{rng.randrange(1000, 9999)}-{rng.randrange(1000, 9999)}',
+            visit_date, dt_time(rng.randrange(0, 24), rng.randrange(0, 60)),
+            '방문', rng.randrange(1, 300), f'sub{rng.randrange(1, 300)}', created_at, True,
+        ))
+    return rows
+
+
+def make_resident_vehicle_rows(count):
+    """기존 comprehensive 가 User 에서 읽던 (id, 번호판, 아이디, 전화, 동, 호, 가입일, 활성) 합성 튜플"""
+    rng = random.Random(count + 1)
+    base = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+    return [
+        (
+            i + 1, f'{rng.randrange(10, 999)}나{rng.randrange(1000, 9999)}', f'user{i}',
+            '010-0000-0000', str(100 + i % 20), str(100 + i % 1500),
+            base + timedelta(seconds=rng.randrange(0, 365 * 86400)), True,
+        )
+        for i in range(count)
+    ]
+
+
+def make_directory_rows(count):
+    """query_directory 가 돌려주는 형태의 입주민 행 (dict) 합성"""
+    rng = random.Random(count + 1)
+    base = datetime(2024, 1, 1, tzinfo=dt_timezone.utc)
+    fmt = KSTFormatter()
+    rows = []
+    for i in range(count):
+        plate = f'{rng.randrange(10, 999)}나{rng.randrange(1000, 9999)}'
+        dong, ho = str(100 + i % 20), str(100 + i % 1500)
+        rows.append(dict(zip(DIRECTORY_COLUMNS, (
+            1, plate, plate, plate[-4:], 'resident_user', i + 1, 'resident_user', f'user{i}', '010-0000-0000',
+            dong, ho, f'{dong}동 {ho}호', '', fmt.kst_iso(base + timedelta(seconds=rng.randrange(0, 365 * 86400))),
+            None, None,
+        ))))
+    return rows
+
+
+def legacy_reservations(rows):
+    """기존 visitor_vehicles_api 방식: 행마다 localtime + strftime 3회"""
+    result = []
+    for (pk, plate, visitor_name, visitor_phone, visit_date, visit_time,
+         purpose, resident_id, resident_username, created_at, is_approved) in rows:
+        visit_datetime_kr = datetime.combine(visit_date, visit_time, tzinfo=KST).astimezone(KST)
+        created_at_kr = created_at.astimezone(KST)
+        result.append({
+            'id': pk,
+            'vehicle_number': plate,
+            'visitor_name': visitor_name,
+            'contact': visitor_phone,
+            'visit_date': visit_date.strftime('%Y-%m-%d'),
+            'visit_time': visit_time.strftime('%H:%M'),
+            'visit_datetime': visit_datetime_kr.strftime('%Y-%m-%d %H:%M'),
+            'purpose': purpose,
+            'registered_by': resident_username,
+            'registered_by_apartment': '테스트아파트',
+            'created_at': created_at_kr.strftime('%Y-%m-%d %H:%M'),
+            'is_approved': is_approved,
+            'can_delete': True,
+        })
+    return json.dumps({'visitor_vehicles': result}).encode('utf-8')
+
+
+def fast_reservations(rows):
+    data = serialize_visitor_reservations(rows, KSTFormatter(), 1, True, '테스트아파트')
+    return dumps({'visitor_vehicles': data})
+
+
+def legacy_resident_vehicles(rows):
+    """기존 comprehensive 방식: 행마다 isoformat()"""
+    result = [
+        {
+            'id': pk, 'plateNumber': plate, 'vehicleType': 'resident', 'ownerName': username,
+            'ownerPhone': phone or '', 'dong': dong or '', 'ho': ho or '',
+            'unitLabel': f'{dong}동 {ho}호',
+            'registeredDate': joined.isoformat(), 'isActive': active,
+        }
+        for pk, plate, username, phone, dong, ho, joined, active in rows
+    ]
+    return json.dumps({'vehicles': result}).encode('utf-8')
+
+
+def directory_resident_vehicles(rows):
+    return dumps({'vehicles': serialize_directory_vehicles(rows)})
+
+
+def measure(func, rows):
+    """REPEAT 회 중 최솟값 (초)"""
+    best = None
+    for _ in range(REPEAT):
+        start = time.perf_counter()
+        func(rows)
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best
+
+
+def main():
+    print("=" * 60)
+    print("⏱️  고속 직렬화 마이크로벤치마크")
+    print(f"   JSON 인코더: {'orjson' if orjson is not None else 'json (orjson 미설치)'}")
+    print("=" * 60)
+
+    # (이름, 기존 행, 기존 방식, 운영 행, 운영 경로)
+    cases = [
+        ('visitor_vehicles_api', make_reservation_rows, legacy_reservations, make_reservation_rows,
+         fast_reservations),
+        ('comprehensive vehicles', make_resident_vehicle_rows, legacy_resident_vehicles, make_directory_rows,
+         directory_resident_vehicles),
+    ]
+
+    for name, make_legacy_rows, legacy, make_rows, fast in cases:
+        print(f"\n📊 {name}")
+        for count in ROW_COUNTS:
+            legacy_time = measure(legacy, make_legacy_rows(count))
+            fast_time = measure(fast, make_rows(count))
+            print(f"   {count:>7,}행: 기존 {legacy_time * 1000:8.1f}ms | "
+                  f"고속 {fast_time * 1000:8.1f}ms | {legacy_time / fast_time:4.1f}x")
+
+
+if __name__ == "__main__":
+    main()
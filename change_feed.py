@@ -0,0 +1,434 @@
+#!/usr/bin/env python3
+"""
+변경 피드
+User/Resident/VisitorVehicle/VisitorReservation 이 바뀔 때마다
+(entity, id, apartment, op, version) 이벤트를 change_feed 에 추가한다.
+단말 동기화, 대시보드 카운터, 캐시, 리포트는 테이블 전체를 다시 읽는 대신
+커서(seq) 이후 이벤트만 배치로 읽어 처리한다.
+
+이벤트는 먼저 change_feed_pending 에 호출한 쪽 트랜잭션으로 쓰인다.
+transaction.atomic() 안에서 저장하면 저장과 이벤트가 함께 커밋/롤백되지만,
+atomic() 밖(autocommit)의 post_save 에서는 저장이 이미 커밋된 뒤 따로 쓰이므로
+그 사이에 프로세스가 죽으면 이벤트가 빠질 수 있다 (단말은 reset 으로 복구).
+
+seq 는 커밋 뒤에 매긴다. 순번기가 카운터 행을 잠근 채 커밋된 pending 이벤트에
+seq 를 붙여 change_feed 로 옮기므로, 작은 seq 가 큰 seq 보다 늦게 보이는 일이 없다.
+(INSERT 시점 seq 는 늦게 커밋된 트랜잭션의 작은 seq 를 커서가 건너뛸 수 있다)
+
+    from change_feed import read_changes, iter_change_batches
+    for batch in iter_change_batches('dashboard_counters', batch_size=500):
+        ...  # 처리 후 다음 배치를 요청하면 커서가 저장된다
+
+보관 기간이 지난 이벤트는 prune 으로 지우고, 커서가 보관 범위보다 뒤처진
+소비자에게는 reset=True 를 돌려줘 전체 재동기화하도록 한다.
+
+서버에서 실행:
+    python3 change_feed.py --prune        # 보관 기간(기본 7일) 지난 이벤트 삭제
+    python3 change_feed.py --tail 20      # 최근 이벤트 확인
+    python3 change_feed.py --sequence     # 순번기 실패로 남은 pending 이벤트 처리
+"""
+
+import os
+import sys
+import threading
+import time
+
+CHANGE_FEED_TABLE = 'change_feed'
+CHANGE_PENDING_TABLE = 'change_feed_pending'
+CHANGE_SEQUENCER_TABLE = 'change_feed_sequencer'
+CHANGE_VERSION_TABLE = 'change_feed_version'
+CHANGE_CURSOR_TABLE = 'change_feed_cursor'
+
+CHANGE_FEED_RETENTION_DAYS = int(os.environ.get('APTGO_CHANGE_FEED_RETENTION_DAYS', '7'))
+DEFAULT_BATCH_SIZE = 500
+MAX_BATCH_SIZE = 5000
+SEQUENCE_BATCH_SIZE = 1000
+SEQUENCER_NAME = 'feed'
+
+ENTITY_USER = 'user'
+ENTITY_RESIDENT = 'resident'
+ENTITY_VISITOR_VEHICLE = 'visitor_vehicle'
+ENTITY_VISITOR_RESERVATION = 'visitor_reservation'
+
+OP_CREATE = 'create'
+OP_UPDATE = 'update'
+OP_DELETE = 'delete'
+
+# 이 필드만 저장하면 (django.contrib.auth 로그인) 이벤트를 만들지 않는다
+LAST_LOGIN_ONLY = frozenset({'last_login'})
+
+# 커서 테이블에 함께 저장하는 '삭제된 마지막 seq' (소비자 이름과 겹치지 않게)
+PRUNED_WATERMARK = '__pruned__'
+
+CHANGE_COLUMNS = ('seq', 'entity', 'entity_id', 'apartment_id', 'op', 'version', 'created_at')
+EVENT_COLUMNS = CHANGE_COLUMNS[1:]
+
+# pending id 자동 증가 문법만 백엔드별로 다르다 (change_feed.seq 는 순번기가 직접 넣는다)
+_ID_COLUMN = {
+    'sqlite': 'id INTEGER PRIMARY KEY AUTOINCREMENT',
+    'postgresql': 'id BIGSERIAL PRIMARY KEY',
+}
+
+_tables_ready = False
+_tables_lock = threading.Lock()
+
+
+def _change_feed_ddl(vendor):
+    return (
+        f'''CREATE TABLE IF NOT EXISTS {CHANGE_FEED_TABLE} (
+            seq BIGINT PRIMARY KEY,
+            entity VARCHAR(30) NOT NULL,
+            entity_id INTEGER NOT NULL,
+            apartment_id INTEGER,
+            op VARCHAR(10) NOT NULL,
+            version INTEGER NOT NULL,
+            created_at BIGINT NOT NULL
+        )''',
+        f'CREATE INDEX IF NOT EXISTS change_feed_apartment_idx ON {CHANGE_FEED_TABLE} (apartment_id, seq)',
+        f'CREATE INDEX IF NOT EXISTS change_feed_created_idx ON {CHANGE_FEED_TABLE} (created_at)',
+        f'''CREATE TABLE IF NOT EXISTS {CHANGE_PENDING_TABLE} (
+            {_ID_COLUMN.get(vendor, _ID_COLUMN['postgresql'])},
+            entity VARCHAR(30) NOT NULL,
+            entity_id INTEGER NOT NULL,
+            apartment_id INTEGER,
+            op VARCHAR(10) NOT NULL,
+            version INTEGER NOT NULL,
+            created_at BIGINT NOT NULL
+        )''',
+        f'''CREATE TABLE IF NOT EXISTS {CHANGE_SEQUENCER_TABLE} (
+            name VARCHAR(30) PRIMARY KEY,
+            last_seq BIGINT NOT NULL
+        )''',
+        # 기존 피드가 있으면 그 마지막 seq 부터 이어서 매긴다 (WHERE 는 SQLite 의 ON CONFLICT 파싱용)
+        f"INSERT INTO {CHANGE_SEQUENCER_TABLE} (name, last_seq) "
+        f"SELECT '{SEQUENCER_NAME}', COALESCE(MAX(seq), 0) FROM {CHANGE_FEED_TABLE} WHERE 1 = 1 "
+        f"ON CONFLICT (name) DO NOTHING",
+        f'''CREATE TABLE IF NOT EXISTS {CHANGE_VERSION_TABLE} (
+            entity VARCHAR(30) NOT NULL,
+            entity_id INTEGER NOT NULL,
+            version INTEGER NOT NULL,
+            PRIMARY KEY (entity, entity_id)
+        )''',
+        f'''CREATE TABLE IF NOT EXISTS {CHANGE_CURSOR_TABLE} (
+            consumer VARCHAR(50) PRIMARY KEY,
+            last_seq BIGINT NOT NULL,
+            updated_at BIGINT NOT NULL
+        )''',
+    )
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def ensure_change_feed_tables():
+    """변경 피드/pending/순번기/버전/커서 테이블 생성 (이미 있으면 무시). 워커당 한 번만 DDL"""
+    from django.db import connection, transaction
+
+    if _tables_ready:
+        return
+    with _tables_lock:
+        if _tables_ready:
+            return
+        with connection.cursor() as cursor:
+            for statement in _change_feed_ddl(connection.vendor):
+                cursor.execute(statement)
+
+        def mark_ready():
+            global _tables_ready
+            _tables_ready = True
+
+        # PostgreSQL 은 DDL 도 트랜잭션에 묶이므로 커밋된 뒤에만 '있음' 으로 기억
+        transaction.on_commit(mark_ready)
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def record_change(entity, entity_id, apartment_id, op):
+    """이벤트 한 건을 pending 에 추가 - 호출한 쪽의 트랜잭션에 함께 묶이고, 커밋 뒤 seq 가 매겨진다.
+    새 version 반환"""
+    from django.db import connection, transaction
+
+    ensure_change_feed_tables()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {CHANGE_VERSION_TABLE} (entity, entity_id, version) VALUES (%s, %s, 1) '
+            f'ON CONFLICT (entity, entity_id) DO UPDATE SET version = {CHANGE_VERSION_TABLE}.version + 1',
+            [entity, entity_id]
+        )
+        cursor.execute(
+            f'SELECT version FROM {CHANGE_VERSION_TABLE} WHERE entity = %s AND entity_id = %s',
+            [entity, entity_id]
+        )
+        version = cursor.fetchone()[0]
+        cursor.execute(
+            f'INSERT INTO {CHANGE_PENDING_TABLE} ({", ".join(EVENT_COLUMNS)}) VALUES (%s, %s, %s, %s, %s, %s)',
+            [entity, entity_id, apartment_id, op, version, _now_ms()]
+        )
+    # 한 트랜잭션에서 여러 건을 기록해도 (가져오기 등) 순번기는 커밋 뒤 한 번만
+    if not any(entry[1] is _sequence_after_commit for entry in connection.run_on_commit):
+        transaction.on_commit(_sequence_after_commit)
+    return version
+
+
+def sequence_pending_changes():
+    """커밋된 pending 이벤트에 seq 를 매겨 change_feed 로 옮긴다. 옮긴 건수 반환
+
+    카운터 행을 먼저 잠가 순번기를 한 줄로 세우므로 (PostgreSQL 행 잠금, SQLite 쓰기 잠금)
+    seq 를 매기는 트랜잭션은 seq 순서대로 커밋된다. 아직 커밋되지 않은 pending 은 보이지 않으니
+    그 트랜잭션의 커밋 뒤 순번기가 처리하고, 실패해 남은 것은 다음 순번기가 함께 옮긴다.
+    """
+    from django.db import connection, transaction
+
+    moved = 0
+    while True:
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {CHANGE_SEQUENCER_TABLE} SET last_seq = last_seq WHERE name = %s', [SEQUENCER_NAME]
+            )
+            cursor.execute(f'SELECT last_seq FROM {CHANGE_SEQUENCER_TABLE} WHERE name = %s', [SEQUENCER_NAME])
+            last_seq = cursor.fetchone()[0]
+            cursor.execute(
+                f'SELECT id, {", ".join(EVENT_COLUMNS)} FROM {CHANGE_PENDING_TABLE} ORDER BY id LIMIT %s',
+                [SEQUENCE_BATCH_SIZE]
+            )
+            rows = cursor.fetchall()
+            if not rows:
+                return moved
+            cursor.executemany(
+                f'INSERT INTO {CHANGE_FEED_TABLE} ({", ".join(CHANGE_COLUMNS)}) '
+                f'VALUES (%s, %s, %s, %s, %s, %s, %s)',
+                [(last_seq + offset, *row[1:]) for offset, row in enumerate(rows, 1)]
+            )
+            # 읽은 id 만 지운다 (범위로 지우면 그 사이 커밋된 pending 이 seq 없이 사라진다)
+            cursor.executemany(f'DELETE FROM {CHANGE_PENDING_TABLE} WHERE id = %s', [(row[0],) for row in rows])
+            cursor.execute(
+                f'UPDATE {CHANGE_SEQUENCER_TABLE} SET last_seq = %s WHERE name = %s',
+                [last_seq + len(rows), SEQUENCER_NAME]
+            )
+        moved += len(rows)
+        if len(rows) < SEQUENCE_BATCH_SIZE:
+            return moved
+
+
+def _sequence_after_commit():
+    """on_commit 순번기 - 실패해도 이미 커밋된 저장에 예외를 올리지 않는다 (다음 순번기가 이어서 처리)"""
+    from django.db import DatabaseError
+
+    try:
+        sequence_pending_changes()
+    except DatabaseError as e:
+        print(f"⚠️  change_feed 순번 부여 실패: {e}")
+
+
+def read_changes(cursor_seq=0, limit=DEFAULT_BATCH_SIZE, apartment_id=None):
+    """cursor_seq 이후 이벤트 최대 limit 건
+
+    반환: {'changes': [...], 'cursor': 마지막 seq, 'hasMore': bool, 'reset': bool}
+    reset 은 커서가 이미 삭제된 범위에 있어 전체 재동기화가 필요하다는 뜻이다.
+    """
+    from django.db import connection
+
+    limit = max(1, min(int(limit), MAX_BATCH_SIZE))
+    # seq 는 커밋 순서대로 매겨지므로 커서 이후를 그대로 읽어도 빠지는 이벤트가 없다
+    sql = f'SELECT {", ".join(CHANGE_COLUMNS)} FROM {CHANGE_FEED_TABLE} WHERE seq > %s'
+    params = [cursor_seq]
+    if apartment_id is not None:
+        sql += ' AND apartment_id = %s'
+        params.append(apartment_id)
+
+    pruned_seq = load_cursor(PRUNED_WATERMARK)
+    with connection.cursor() as cursor:
+        # limit + 1 건을 읽어 다음 배치 존재 여부 판단
+        cursor.execute(f'{sql} ORDER BY seq LIMIT %s', params + [limit + 1])
+        rows = cursor.fetchall()
+
+    changes = [
+        {
+            'seq': seq,
+            'entity': entity,
+            'id': entity_id,
+            'apartmentId': row_apartment_id,
+            'op': op,
+            'version': version,
+            'createdAt': created_at,
+        }
+        for seq, entity, entity_id, row_apartment_id, op, version, created_at in rows[:limit]
+    ]
+    return {
+        'changes': changes,
+        'cursor': changes[-1]['seq'] if changes else cursor_seq,
+        'hasMore': len(rows) > limit,
+        'reset': cursor_seq < pruned_seq,
+    }
+
+
+def load_cursor(consumer):
+    """소비자 커서 (없으면 0)"""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT last_seq FROM {CHANGE_CURSOR_TABLE} WHERE consumer = %s', [consumer])
+        row = cursor.fetchone()
+    return row[0] if row else 0
+
+
+def save_cursor(consumer, last_seq):
+    """소비자 커서 저장 (처리 완료한 마지막 seq)"""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {CHANGE_CURSOR_TABLE} (consumer, last_seq, updated_at) VALUES (%s, %s, %s) '
+            f'ON CONFLICT (consumer) DO UPDATE SET last_seq = excluded.last_seq, updated_at = excluded.updated_at',
+            [consumer, last_seq, _now_ms()]
+        )
+
+
+def iter_change_batches(consumer, batch_size=DEFAULT_BATCH_SIZE, apartment_id=None):
+    """서버 내부 소비자용 배치 반복자 - 배치를 처리하고 다음 배치를 요청할 때 커서 저장
+
+    중간에 예외가 나면 마지막으로 끝낸 배치까지만 커서가 남으므로 다시 실행하면 이어서 처리한다.
+    """
+    cursor_seq = load_cursor(consumer)
+    while True:
+        page = read_changes(cursor_seq, batch_size, apartment_id)
+        if not page['changes']:
+            return
+        yield page
+        cursor_seq = page['cursor']
+        save_cursor(consumer, cursor_seq)
+        if not page['hasMore']:
+            return
+
+
+def prune_changes(retention_days=CHANGE_FEED_RETENTION_DAYS):
+    """보관 기간이 지난 이벤트 삭제. 삭제 건수 반환"""
+    from django.db import connection, transaction
+
+    cutoff = _now_ms() - retention_days * 86400 * 1000
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'SELECT MAX(seq) FROM {CHANGE_FEED_TABLE} WHERE created_at < %s', [cutoff])
+        last_pruned = cursor.fetchone()[0]
+        if last_pruned is None:
+            return 0
+        cursor.execute(f'DELETE FROM {CHANGE_FEED_TABLE} WHERE seq <= %s', [last_pruned])
+        deleted = cursor.rowcount
+        # 이 seq 보다 뒤처진 커서는 reset 대상
+        save_cursor(PRUNED_WATERMARK, last_pruned)
+    return deleted
+
+
+def change_feed_api(request):
+    """GET /api/changes/?cursor=0&limit=500 - 사용자 아파트의 변경 이벤트"""
+    from vehicles.views import api_auth_required
+
+    from fast_serializers import json_response
+    from request_scope import get_request_scope
+
+    @api_auth_required
+    def _view(request):
+        scope = get_request_scope(request)
+        # 아파트 전체 입주민/방문자 변경 내역이므로 관리단만
+        if not scope.can_manage:
+            return json_response({'success': False, 'error': '관리단 권한이 필요합니다.'}, status=403)
+        apartment_id = scope.apartment_id
+        if not apartment_id:
+            return json_response({'error': '아파트 정보가 없습니다.'}, status=400)
+        try:
+            cursor_seq = int(request.GET.get('cursor', 0))
+            limit = int(request.GET.get('limit', DEFAULT_BATCH_SIZE))
+        except ValueError:
+            return json_response({'success': False, 'error': 'cursor/limit 는 숫자여야 합니다.'}, status=400)
+
+        page = read_changes(cursor_seq, limit, apartment_id)
+        page['success'] = True
+        return json_response(page)
+
+    return _view(request)
+
+
+def connect_change_feed_signals():
+    """AppConfig.ready() 에서 한 번 호출 - 저장/삭제 직후 이벤트 기록"""
+    from django.db import DatabaseError, transaction
+    from django.db.models.signals import post_delete, post_save
+
+    from accounts.models import User
+    from vehicles.models import Resident, VisitorVehicle
+    from visitors.models import VisitorReservation
+
+    from apartment_snapshot_builder import user_apartment_id
+
+    def reservation_apartment_id(instance):
+        return user_apartment_id(instance.resident) if instance.resident_id else None
+
+    entities = (
+        (User, ENTITY_USER, user_apartment_id),
+        (Resident, ENTITY_RESIDENT, lambda instance: instance.apartment_id),
+        (VisitorVehicle, ENTITY_VISITOR_VEHICLE, lambda instance: instance.apartment_id),
+        (VisitorReservation, ENTITY_VISITOR_RESERVATION, reservation_apartment_id),
+    )
+    def record_safely(entity, instance, apartment_of, op):
+        # 피드 기록 실패로 저장(로그인 포함)이 깨지지 않도록 savepoint 안에서만 되돌린다
+        try:
+            with transaction.atomic():
+                record_change(entity, instance.pk, apartment_of(instance), op)
+        except DatabaseError as e:
+            print(f"⚠️  change_feed 기록 실패 ({entity}:{instance.pk}): {e}")
+
+    for model, entity, apartment_of in entities:
+        def saved(sender, instance, created, entity=entity, apartment_of=apartment_of, update_fields=None, **kwargs):
+            # 로그인 시각만 바뀐 저장은 단말/대시보드가 볼 변경이 아니다
+            if update_fields and set(update_fields) <= LAST_LOGIN_ONLY:
+                return
+            record_safely(entity, instance, apartment_of, OP_CREATE if created else OP_UPDATE)
+
+        def deleted(sender, instance, entity=entity, apartment_of=apartment_of, **kwargs):
+            record_safely(entity, instance, apartment_of, OP_DELETE)
+
+        post_save.connect(saved, sender=model, dispatch_uid=f'change_feed_{entity}_saved', weak=False)
+        post_delete.connect(deleted, sender=model, dispatch_uid=f'change_feed_{entity}_deleted', weak=False)
+
+
+def main():
+    print("=" * 60)
+    print("📰 변경 피드")
+    print("=" * 60)
+
+    args = sys.argv[1:]
+    if not setup_django():
+        return
+
+    ensure_change_feed_tables()
+    if '--sequence' in args:
+        print(f"   🔢 {sequence_pending_changes()}건 순번 부여")
+
+    if '--prune' in args:
+        print(f"   🗑️  {prune_changes()}건 삭제 (보관 {CHANGE_FEED_RETENTION_DAYS}일)")
+
+    if '--tail' in args:
+        position = args.index('--tail')
+        count = int(args[position + 1]) if position + 1 < len(args) and args[position + 1].isdigit() else 20
+        from django.db import connection
+
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT MAX(seq) FROM {CHANGE_FEED_TABLE}')
+            latest = cursor.fetchone()[0] or 0
+        for change in read_changes(max(0, latest - count), count)['changes']:
+            print(f"   #{change['seq']} {change['entity']}:{change['id']} {change['op']} "
+                  f"v{change['version']} apartment={change['apartmentId']}")
+
+
+if __name__ == "__main__":
+    main()
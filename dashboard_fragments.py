@@ -0,0 +1,348 @@
+#!/usr/bin/env python3
+"""
+main-account-dashboard 조각(fragment) 캐시 + 지연 로딩
+대시보드가 방문차량 카운터, 방문차량 목록, 부아이디 요약을 한 요청에서 모두 조회해
+첫 화면이 가장 느린 쿼리를 기다리던 것을 조각 단위로 나눈다.
+
+- 조각마다 (아파트, 데이터 버전) 으로 Django 캐시에 HTML 을 저장한다.
+  데이터 버전은 change_feed 의 아파트별 마지막 seq 이므로, 저장/삭제가 일어나면
+  키가 바뀌어 지울 필요 없이 다음 요청에서 다시 렌더링된다.
+- 첫 화면에는 카운터(요약)만 넣고, 방문차량 목록/입주민 표는 토글을 열 때
+  /main-account-dashboard/fragments/<name>/ 에서 받아온다.
+  버튼에 마우스를 올리거나 포커스/터치하면 미리 요청해 두어 클릭 즉시 표시된다.
+
+서버 대시보드 뷰/템플릿에서:
+    from dashboard_fragments import dashboard_context
+    context.update(dashboard_context(request))
+    {{ visitor_section }} {{ resident_section }} {{ fragment_script }}
+
+urls.py:
+    path('main-account-dashboard/fragments/<str:name>/', dashboard_fragment_view)
+
+서버에서 실행:
+    python3 dashboard_fragments.py <apartment_id>   # 조각 렌더링 시간 확인
+"""
+
+import os
+import sys
+import time
+from datetime import date
+
+from app_metrics import record_cache
+
+FRAGMENT_CACHE_PREFIX = 'dash_fragment:v1:'
+# 키에 데이터 버전이 들어가므로 TTL 은 쓰지 않는 키가 사라지는 시간일 뿐이다
+FRAGMENT_CACHE_SECONDS = 24 * 3600
+FRAGMENT_URL = '/main-account-dashboard/fragments/{name}/'
+
+# 이름 -> {'render': callable(scope, today), 'title': str, 'daily': bool}
+DASHBOARD_FRAGMENTS = {}
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def register_dashboard_fragment(name, title, render, daily=False):
+    """대시보드 조각 등록. daily=True 면 오늘 날짜도 캐시 키에 넣는다 (방문일 기준 목록)"""
+    DASHBOARD_FRAGMENTS[name] = {'render': render, 'title': title, 'daily': daily}
+
+
+def apartment_data_version(apartment_id):
+    """아파트 데이터 버전 = change_feed 의 마지막 seq (apartment_id, seq 인덱스 한 번 조회)"""
+    from django.db import connection
+
+    from change_feed import CHANGE_FEED_TABLE
+
+    if not apartment_id:
+        return 0
+    with connection.cursor() as cursor:
+        cursor.execute(f'SELECT MAX(seq) FROM {CHANGE_FEED_TABLE} WHERE apartment_id = %s', [apartment_id])
+        row = cursor.fetchone()
+    return (row[0] if row else None) or 0
+
+
+def _scope_variant(scope):
+    """같은 아파트라도 '본인 것만' 보는 사용자는 캐시를 따로 쓴다"""
+    from request_scope import DATA_SCOPE_APARTMENT
+
+    if scope.data_scope == DATA_SCOPE_APARTMENT:
+        return f'a{scope.main_account_id or 0}'
+    return f'u{scope.user_id}'
+
+
+def fragment_cache_key(name, scope, version, today):
+    key = f'{FRAGMENT_CACHE_PREFIX}{name}:{scope.apartment_id or 0}:{_scope_variant(scope)}:{version}'
+    if DASHBOARD_FRAGMENTS[name]['daily']:
+        key += f':{today.toordinal()}'
+    return key
+
+
+def get_fragment(name, scope, version=None, today=None):
+    """조각 HTML (캐시 우선). 반환: (html, version)"""
+    from django.core.cache import cache
+
+    today = today or date.today()
+    if version is None:
+        version = apartment_data_version(scope.apartment_id)
+    key = fragment_cache_key(name, scope, version, today)
+    html = cache.get(key)
+    record_cache('dashboard_fragment', html is not None)
+    if html is None:
+        html = str(DASHBOARD_FRAGMENTS[name]['render'](scope, today))
+        cache.set(key, html, FRAGMENT_CACHE_SECONDS)
+    return html, version
+
+
+# ---------------------------------------------------------------- 조각 렌더러
+
+def _summary_counts(scope, today):
+    from mobile_api_views import active_sub_users, visitor_reservations_for
+
+    reservations = visitor_reservations_for(scope, today)
+    return {
+        'visitors': reservations.count() if reservations is not None else 0,
+        'sub_accounts': active_sub_users(scope.main_account_id).count() if scope.main_account_id else 0,
+    }
+
+
+def render_summary(scope, today):
+    """첫 화면 카운터 - 토글 버튼 숫자에 쓰는 값 ('방문차량 N')"""
+    from django.utils.html import format_html
+
+    counts = _summary_counts(scope, today)
+    return format_html(
+        '<span class="dashboard-count" data-count="visitors">{}</span>'
+        '<span class="dashboard-count" data-count="sub_accounts">{}</span>',
+        counts['visitors'], counts['sub_accounts']
+    )
+
+
+def render_visitor_list(scope, today):
+    """방문차량 목록 표 (오늘 이후 승인된 방문예약)"""
+    from django.utils.html import format_html, format_html_join
+
+    from fast_serializers import KSTFormatter, VISITOR_RESERVATION_FIELDS, serialize_visitor_reservations
+    from mobile_api_views import visitor_reservations_for
+    from request_scope import DATA_SCOPE_APARTMENT
+
+    reservations = visitor_reservations_for(scope, today)
+    if reservations is None:
+        return format_html('<p class="dashboard-empty">{}</p>', '권한이 없습니다.')
+    rows = reservations.order_by('-created_at').values_list(*VISITOR_RESERVATION_FIELDS)
+    visitors = serialize_visitor_reservations(
+        rows, KSTFormatter(), scope.user_id, scope.data_scope == DATA_SCOPE_APARTMENT, scope.apartment_name
+    )
+    if not visitors:
+        return format_html('<p class="dashboard-empty">{}</p>', '등록된 방문차량이 없습니다.')
+
+    body = format_html_join(
+        '\n', '<tr data-id="{}"><td>{}</td><td>{}</td><td>{}</td><td>{}</td><td>{}</td></tr>',
+        (
+            (v['id'], v['vehicle_number'], v['visitor_name'], v['visit_datetime'] or v['visit_date'],
+             v['purpose'] or '', v['registered_by'])
+            for v in visitors
+        )
+    )
+    return format_html(
+        '<table class="dashboard-table visitor-list" data-count="{}">'
+        '<thead><tr><th>차량번호</th><th>방문자</th><th>방문일시</th><th>목적</th><th>등록자</th></tr></thead>'
+        '<tbody>{}</tbody></table>',
+        len(visitors), body
+    )
+
+
+def render_resident_table(scope, today):
+    """부아이디(입주민) 요약 표"""
+    from django.utils.html import format_html, format_html_join
+
+    from fast_serializers import RESIDENT_FIELDS, serialize_sub_accounts
+    from mobile_api_views import active_sub_users
+
+    if not scope.main_account_id:
+        return format_html('<p class="dashboard-empty">{}</p>', '메인 계정 정보 없음')
+    rows = active_sub_users(scope.main_account_id).order_by('dong', 'ho', 'username').values_list(*RESIDENT_FIELDS)
+    accounts = serialize_sub_accounts(rows, scope.main_username)
+    if not accounts:
+        return format_html('<p class="dashboard-empty">{}</p>', '등록된 부아이디가 없습니다.')
+
+    body = format_html_join(
+        '\n', '<tr data-id="{}"><td>{}</td><td>{}</td><td>{}</td></tr>',
+        (
+            (a['id'], a['username'], a['unitLabel'], '관리단' if a['is_manager'] else '입주민')
+            for a in accounts
+        )
+    )
+    return format_html(
+        '<table class="dashboard-table resident-table" data-count="{}">'
+        '<thead><tr><th>아이디</th><th>동/호</th><th>구분</th></tr></thead>'
+        '<tbody>{}</tbody></table>',
+        len(accounts), body
+    )
+
+
+register_dashboard_fragment('summary', '요약', render_summary, daily=True)
+register_dashboard_fragment('visitors', '방문차량', render_visitor_list, daily=True)
+register_dashboard_fragment('residents', '입주민', render_resident_table)
+
+
+# ---------------------------------------------------------------- 첫 화면 / 지연 로딩
+
+# 토글을 열 때 조각을 받아오고, hover/focus/touchstart 때 미리 받아 둔다 (요청은 조각당 한 번)
+FRAGMENT_SCRIPT = '''<script>
+(function () {
+  var pending = {};
+  function load(button) {
+    var url = button.getAttribute('data-fragment-url');
+    if (!pending[url]) {
+      pending[url] = fetch(url, {credentials: 'same-origin', headers: {'X-Requested-With': 'XMLHttpRequest'}})
+        .then(function (r) { if (!r.ok) { throw new Error(r.status); } return r.text(); })
+        .catch(function (e) { delete pending[url]; throw e; });
+    }
+    return pending[url];
+  }
+  document.querySelectorAll('[data-fragment-url]').forEach(function (button) {
+    var target = document.getElementById(button.getAttribute('aria-controls'));
+    var prefetch = function () { load(button).catch(function () {}); };
+    ['mouseenter', 'focus', 'touchstart'].forEach(function (type) {
+      button.addEventListener(type, prefetch, {once: true, passive: true});
+    });
+    button.addEventListener('click', function () {
+      var open = button.getAttribute('aria-expanded') !== 'true';
+      button.setAttribute('aria-expanded', open ? 'true' : 'false');
+      target.hidden = !open;
+      if (open && !target.getAttribute('data-loaded')) {
+        load(button).then(function (html) {
+          target.innerHTML = html;
+          target.setAttribute('data-loaded', '1');
+        }).catch(function () {
+          target.textContent = '불러오지 못했습니다. 다시 눌러 주세요.';
+        });
+      }
+    });
+  });
+})();
+</script>'''
+
+
+def lazy_section(name, label, count, version):
+    """토글 버튼 + 빈 컨테이너. 버전을 URL 에 넣어 브라우저 캐시도 데이터가 바뀔 때만 무효화"""
+    from django.utils.html import format_html
+
+    url = f'{FRAGMENT_URL.format(name=name)}?v={version}'
+    return format_html(
+        '<button type="button" class="dashboard-toggle" data-fragment-url="{}" '
+        'aria-controls="fragment-{}" aria-expanded="false">{} {}</button>'
+        '<div id="fragment-{}" class="dashboard-fragment" hidden></div>',
+        url, name, label, count, name
+    )
+
+
+def dashboard_context(request):
+    """대시보드 첫 화면 컨텍스트 - 카운터만 계산 (캐시), 목록은 지연 로딩"""
+    from django.utils.safestring import mark_safe
+
+    from request_scope import get_request_scope
+
+    scope = get_request_scope(request)
+    version = apartment_data_version(scope.apartment_id)
+    today = date.today()
+    counts = _cached_counts(scope, version, today)
+    return {
+        'fragment_version': version,
+        'visitor_count': counts['visitors'],
+        'sub_account_count': counts['sub_accounts'],
+        'visitor_section': lazy_section('visitors', '방문차량', counts['visitors'], version),
+        'resident_section': lazy_section('residents', '입주민', counts['sub_accounts'], version),
+        'fragment_script': mark_safe(FRAGMENT_SCRIPT),
+    }
+
+
+def _cached_counts(scope, version, today):
+    """summary 조각과 같은 키를 쓰되 숫자 dict 로 보관"""
+    from django.core.cache import cache
+
+    key = fragment_cache_key('summary', scope, version, today) + ':counts'
+    counts = cache.get(key)
+    record_cache('dashboard_counts', counts is not None)
+    if counts is None:
+        counts = _summary_counts(scope, today)
+        cache.set(key, counts, FRAGMENT_CACHE_SECONDS)
+    return counts
+
+
+def dashboard_fragment_view(request, name):
+    """GET /main-account-dashboard/fragments/<name>/ - 조각 HTML (ETag = 데이터 버전)"""
+    from django.contrib.auth.decorators import login_required
+    from django.http import HttpResponse, HttpResponseNotFound, HttpResponseNotModified
+    from django.utils.cache import patch_cache_control
+
+    from request_scope import get_request_scope
+
+    @login_required
+    def _view(request):
+        if name not in DASHBOARD_FRAGMENTS:
+            return HttpResponseNotFound('unknown fragment')
+        scope = get_request_scope(request)
+        if not scope.can_manage:
+            return HttpResponse('권한이 없습니다.', status=403, content_type='text/plain; charset=utf-8')
+
+        today = date.today()
+        version = apartment_data_version(scope.apartment_id)
+        etag = '"{}"'.format(fragment_cache_key(name, scope, version, today)[len(FRAGMENT_CACHE_PREFIX):])
+        if request.META.get('HTTP_IF_NONE_MATCH') == etag:
+            response = HttpResponseNotModified()
+        else:
+            html, _ = get_fragment(name, scope, version, today)
+            response = HttpResponse(html, content_type='text/html; charset=utf-8')
+        response['ETag'] = etag
+        # 사용자별 내용이므로 공유 캐시 금지, 브라우저는 ETag 로 재검증
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+    return _view(request)
+
+
+def main():
+    print("=" * 60)
+    print("🧩 대시보드 조각 렌더링 시간")
+    print("=" * 60)
+
+    if len(sys.argv) < 2 or not sys.argv[1].isdigit():
+        print("사용법: python3 dashboard_fragments.py <apartment_id>")
+        return
+    if not setup_django():
+        return
+
+    from accounts.models import User
+
+    from request_scope import build_scope
+
+    main_user = User.objects.select_related('apartment').filter(
+        user_type='main_account', apartment_id=int(sys.argv[1])
+    ).first()
+    if main_user is None:
+        print("❌ 해당 아파트의 메인 계정이 없습니다.")
+        return
+
+    scope = build_scope(main_user)
+    version = apartment_data_version(scope.apartment_id)
+    print(f"🏢 {scope.apartment_name} (데이터 버전 {version})")
+    for name, fragment in DASHBOARD_FRAGMENTS.items():
+        started = time.perf_counter()
+        html = str(fragment['render'](scope, date.today()))
+        elapsed = (time.perf_counter() - started) * 1000
+        print(f"   {fragment['title']:<6} {elapsed:8.1f}ms  {len(html):>8,} bytes")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,524 @@
+#!/usr/bin/env python3
+"""
+단속 증거 사진 업로드 (이어받기 가능한 청크 업로드 + 내용 주소 저장)
+CameraScanActivity.capture720pPhoto 로 찍은 사진을 LTE 환경에서도 끊김 없이 올리도록
+SHA-256 으로 업로드를 시작하고 Upload-Offset 헤더로 청크를 이어 붙인다.
+
+    POST /api/photos/uploads/                {sha256, size, contentType}
+         -> 이미 있는 사진이면 바로 complete (중복 업로드 없음)
+         -> 아니면 {uploadId, offset} (재시도 시 같은 uploadId 와 이어받을 offset)
+    PUT  /api/photos/uploads/<uploadId>/      Upload-Offset: <offset>, 본문 = 청크
+    GET  /api/photos/<sha256>/thumb/          썸네일 (단속 이력 화면은 썸네일만 사용)
+    GET  /api/photos/<sha256>/                EXIF 제거한 원본 크기 사진
+
+업로드한 원본은 업로드 SHA-256 이름의 .orig 로 받아 두고 (같은 사진을 다시 올려도 한 벌만),
+썸네일 생성과 EXIF(GPS 등) 제거는 요청 스레드가 아닌 프로세스 풀에서 처리한다.
+처리 결과는 결과 파일 자신의 SHA-256 이름으로 한 번만 쓰고 다시 고쳐 쓰지 않으며,
+처리가 끝나면 .orig 를 지운다. 처리 전에는 202, 처리하지 못한 사진(Pillow 미설치 등)은 404 로
+EXIF 가 남은 원본은 절대 내려보내지 않는다. 풀 작업이 사라지면 (워커 재시작 등) 처리 요청 후
+PROCESSING_RETRY_SECONDS 가 지난 사진을 다음 조회/업로드 때 다시 처리하고,
+python3 evidence_photos.py --reprocess 로 한꺼번에 다시 처리할 수도 있다.
+
+사진은 올린 사용자의 아파트(메타데이터 apartmentIds)에서만 볼 수 있다. 다른 아파트에서 같은 사진을
+올리면 내용을 끝까지 받아 SHA-256 을 확인한 뒤에만 그 아파트를 추가한다.
+
+단속 이력 화면은 보고서의 photo_url 대신 thumbnail_url_for(photo_url) 을 렌더링하고
+원본은 클릭했을 때만 연다.
+
+urls.py:
+    from evidence_photos import photo_upload_start_api, photo_upload_chunk_api, photo_file_api
+    path('api/photos/uploads/', photo_upload_start_api),
+    path('api/photos/uploads/<str:upload_id>/', photo_upload_chunk_api),
+    path('api/photos/<str:sha256>/', photo_file_api),
+    path('api/photos/<str:sha256>/thumb/', photo_file_api, {'thumbnail': True}),
+"""
+
+import fcntl
+import hashlib
+import json
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    from PIL import Image, ImageOps
+except ImportError:
+    Image = None
+
+PHOTO_DIR = os.environ.get('APTGO_PHOTO_DIR', '/home/kyb9852/vehicle-management-system/media/evidence')
+PHOTO_WORKERS = int(os.environ.get('APTGO_PHOTO_WORKERS', '2'))
+
+MAX_PHOTO_SIZE = 15 * 1024 * 1024
+CHUNK_SIZE = 256 * 1024          # 앱에 권장하는 청크 크기
+MAX_CHUNK_SIZE = 4 * 1024 * 1024
+THUMBNAIL_SIZE = (320, 320)
+UPLOAD_EXPIRE_SECONDS = 24 * 3600
+PROCESSING_RETRY_SECONDS = 300
+ALLOWED_CONTENT_TYPES = ('image/jpeg', 'image/png', 'image/webp')
+
+_SHA256_PATTERN = re.compile(r'^[0-9a-f]{64}$')
+_UPLOAD_ID_PATTERN = re.compile(r'^[0-9a-f]{32}$')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def _blob_dir(sha256):
+    return os.path.join(PHOTO_DIR, sha256[:2], sha256[2:4])
+
+
+def photo_paths(sha256):
+    """업로드 SHA-256 기준 (받아 둔 원본, 메타데이터) 경로 - 원본은 EXIF 가 남아 있어 내려보내지 않는다"""
+    base = os.path.join(_blob_dir(sha256), sha256)
+    return base + '.orig', base + '.json'
+
+
+def processed_path(digest):
+    """처리 결과(EXIF 제거 사진/썸네일) 경로 - 결과 내용의 SHA-256 이름이라 한 번 쓰면 바뀌지 않는다"""
+    return os.path.join(PHOTO_DIR, 'processed', digest[:2], digest[2:4], digest + '.jpg')
+
+
+def _upload_paths(upload_id):
+    base = os.path.join(PHOTO_DIR, 'uploads', upload_id)
+    return base + '.part', base + '.json'
+
+
+def photo_urls(sha256):
+    """보고서/이력 화면에 넣는 URL"""
+    return {
+        'photoId': sha256,
+        'url': f'/api/photos/{sha256}/',
+        'thumbnailUrl': f'/api/photos/{sha256}/thumb/',
+    }
+
+
+def thumbnail_url_for(photo_url):
+    """보고서에 저장된 photo_url -> 썸네일 URL (단속 이력 목록은 원본 대신 이것만 렌더링)
+
+    이 저장소 URL 이 아니면 (이전 보고서 등) 그대로 돌려준다.
+    """
+    if photo_url:
+        match = re.search(r'/api/photos/([0-9a-f]{64})/?$', photo_url)
+        if match:
+            return photo_urls(match.group(1))['thumbnailUrl']
+    return photo_url
+
+
+def read_photo_meta(sha256):
+    _, meta_path = photo_paths(sha256)
+    try:
+        with open(meta_path, 'r', encoding='utf-8') as f:
+            return json.load(f)
+    except (OSError, ValueError):
+        return None
+
+
+def _write_json(path, data):
+    tmp_path = f'{path}.{os.getpid()}-{threading.get_ident()}.tmp'
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f)
+    os.replace(tmp_path, path)
+
+
+def _update_photo_meta(sha256, update):
+    """메타데이터 읽기-수정-쓰기를 잠금 안에서 (처리 완료 콜백/아파트 추가가 서로 덮어쓰지 않게)"""
+    _, meta_path = photo_paths(sha256)
+    with open(meta_path + '.lock', 'a') as lock:
+        fcntl.flock(lock, fcntl.LOCK_EX)
+        meta = read_photo_meta(sha256) or {}
+        update(meta)
+        _write_json(meta_path, meta)
+    return meta
+
+
+def photo_visible_to(meta, apartment_id):
+    return apartment_id is not None and apartment_id in meta.get('apartmentIds', ())
+
+
+# ---------------------------------------------------------------------------
+# 썸네일/EXIF 제거 (프로세스 풀)
+# ---------------------------------------------------------------------------
+
+def _save_processed(image, quality):
+    """이미지를 JPEG 로 저장해 내용 SHA-256 경로에 두고 digest 반환 (이미 있으면 그대로)"""
+    tmp_path = os.path.join(PHOTO_DIR, 'processed', f'{os.getpid()}-{threading.get_ident()}.tmp')
+    os.makedirs(os.path.dirname(tmp_path), exist_ok=True)
+    image.save(tmp_path, 'JPEG', quality=quality, optimize=True)
+
+    digest = hashlib.sha256()
+    with open(tmp_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    digest = digest.hexdigest()
+
+    path = processed_path(digest)
+    if os.path.exists(path):
+        os.remove(tmp_path)
+    else:
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        os.replace(tmp_path, path)
+    return digest
+
+
+def process_photo(original_path):
+    """워커 프로세스에서 실행: 회전 정보를 반영한 뒤 EXIF 없는 사진과 썸네일을 새 파일로 저장"""
+    if Image is None:
+        return {'processed': False, 'reason': 'Pillow 미설치'}
+    with Image.open(original_path) as image:
+        # EXIF Orientation 을 픽셀에 반영 (EXIF 를 지우면 회전 정보도 사라지므로)
+        image = ImageOps.exif_transpose(image).convert('RGB')
+        width, height = image.size
+        photo_digest = _save_processed(image, 88)
+        image.thumbnail(THUMBNAIL_SIZE)
+        thumb_digest = _save_processed(image, 75)
+    return {
+        'processed': True, 'width': width, 'height': height,
+        'photoDigest': photo_digest, 'thumbDigest': thumb_digest,
+    }
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=PHOTO_WORKERS)
+        return _executor
+
+
+def _record_result(sha256, result):
+    """처리 결과를 메타데이터에 기록 (성공하면 원본 삭제). 이미 처리된 사진이면 그대로 둔다"""
+    original_path, _ = photo_paths(sha256)
+
+    def update(meta):
+        # 다시 맡긴 작업이 겹친 경우 - 먼저 끝난 성공 결과를 실패로 덮어쓰지 않는다
+        if meta.get('processed'):
+            return
+        meta.update(result)
+        meta['processedAt'] = int(time.time() * 1000)
+
+    meta = _update_photo_meta(sha256, update)
+    if meta.get('processed') and os.path.exists(original_path):
+        os.remove(original_path)
+    return meta
+
+
+def schedule_processing(sha256):
+    """썸네일/EXIF 제거 작업을 프로세스 풀에 넣고 끝나면 메타데이터 갱신 (성공하면 원본 삭제)"""
+    original_path, _ = photo_paths(sha256)
+    _update_photo_meta(sha256, lambda meta: meta.update(scheduledAt=int(time.time() * 1000)))
+    future = _get_executor().submit(process_photo, original_path)
+
+    def done(finished):
+        try:
+            result = finished.result()
+        except Exception as e:
+            result = {'processed': False, 'reason': str(e)}
+        _record_result(sha256, result)
+
+    future.add_done_callback(done)
+    return future
+
+
+def processing_stuck(sha256, meta, now=None):
+    """처리 요청 후 PROCESSING_RETRY_SECONDS 가 지나도 결과가 없고 원본이 남아 있으면 True
+
+    풀 작업은 워커 프로세스 메모리에만 있어 워커가 재시작되면 결과가 영영 기록되지 않는다.
+    """
+    if 'processedAt' in meta:
+        return False
+    scheduled_at = meta.get('scheduledAt') or meta.get('uploadedAt') or 0
+    now = now if now is not None else time.time()
+    return now * 1000 - scheduled_at > PROCESSING_RETRY_SECONDS * 1000 and os.path.exists(photo_paths(sha256)[0])
+
+
+def reschedule_if_stuck(sha256, meta):
+    if processing_stuck(sha256, meta):
+        schedule_processing(sha256)
+        return True
+    return False
+
+
+def reprocess_photos(include_failed=False):
+    """처리 결과가 없는 (include_failed 면 실패한 것도) 사진을 이 프로세스에서 다시 처리. 건수 반환"""
+    count = 0
+    for dirpath, dirnames, filenames in os.walk(PHOTO_DIR):
+        dirnames[:] = [name for name in dirnames if name not in ('uploads', 'processed')]
+        for name in filenames:
+            sha256 = name[:-len('.json')]
+            if not name.endswith('.json') or not _SHA256_PATTERN.match(sha256):
+                continue
+            meta = read_photo_meta(sha256) or {}
+            if meta.get('processed') or ('processedAt' in meta and not include_failed):
+                continue
+            original_path, _ = photo_paths(sha256)
+            if not os.path.exists(original_path):
+                continue
+            if include_failed:
+                _update_photo_meta(sha256, lambda meta: meta.pop('processedAt', None))
+            try:
+                result = process_photo(original_path)
+            except Exception as e:
+                result = {'processed': False, 'reason': str(e)}
+            meta = _record_result(sha256, result)
+            print(f"   {'✅' if meta.get('processed') else '❌'} {sha256} {meta.get('reason', '')}")
+            count += 1
+    return count
+
+
+# ---------------------------------------------------------------------------
+# 업로드
+# ---------------------------------------------------------------------------
+
+def upload_id_for(user_id, sha256):
+    """같은 사용자가 같은 사진을 다시 시작하면 같은 uploadId (앱 재시작 후 이어받기)"""
+    return hashlib.sha256(f'{user_id}:{sha256}'.encode('utf-8')).hexdigest()[:32]
+
+
+def start_upload(user_id, apartment_id, sha256, size, content_type):
+    """업로드 시작/재개 - 상태 dict 반환
+
+    같은 아파트에 이미 있는 사진이면 바로 완료. 다른 아파트의 사진이면 SHA-256 만 알아서는
+    볼 수 없도록 내용을 끝까지 받는다 (_finish_upload 에서 확인 후 아파트 추가).
+    """
+    meta = read_photo_meta(sha256)
+    if meta is not None and photo_visible_to(meta, apartment_id):
+        reschedule_if_stuck(sha256, meta)
+        return dict(photo_urls(sha256), complete=True, deduplicated=True)
+
+    upload_id = upload_id_for(user_id, sha256)
+    part_path, session_path = _upload_paths(upload_id)
+    os.makedirs(os.path.dirname(part_path), exist_ok=True)
+    if not os.path.exists(session_path):
+        _write_json(session_path, {
+            'sha256': sha256, 'size': size, 'contentType': content_type,
+            'userId': user_id, 'apartmentId': apartment_id, 'createdAt': int(time.time() * 1000),
+        })
+        open(part_path, 'wb').close()
+    offset = os.path.getsize(part_path) if os.path.exists(part_path) else 0
+    return {'complete': False, 'uploadId': upload_id, 'offset': offset, 'size': size, 'chunkSize': CHUNK_SIZE}
+
+
+def append_chunk(user_id, upload_id, offset, chunk):
+    """청크 추가. (상태 dict, HTTP status) 반환 - offset 이 어긋나면 409 와 현재 offset
+
+    같은 offset 으로 동시에 들어온 PUT (LTE 재시도 등) 이 둘 다 붙지 않도록
+    .part 파일 잠금 안에서 offset 확인과 쓰기, 완료 처리를 한다 (워커 프로세스 간에도 유효).
+    """
+    part_path, session_path = _upload_paths(upload_id)
+    missing = {'success': False, 'error': '업로드 세션이 없습니다. 다시 시작해주세요.'}, 404
+    try:
+        with open(session_path, 'r', encoding='utf-8') as f:
+            session = json.load(f)
+        # 'ab' 는 이미 지워진 .part 를 새로 만들므로 있는 파일만 연다
+        part = open(part_path, 'r+b')
+    except (OSError, ValueError):
+        return missing
+    # 다른 사용자의 세션은 없는 것과 같게 (uploadId 존재 여부도 알리지 않는다)
+    if session.get('userId') != user_id:
+        part.close()
+        return missing
+
+    with part:
+        fcntl.flock(part, fcntl.LOCK_EX)
+        # 잠금을 기다리는 사이 앞선 요청이 업로드를 끝내고 세션을 지웠을 수 있다
+        if not os.path.exists(session_path):
+            return missing
+        current = os.fstat(part.fileno()).st_size
+        if offset != current:
+            return {'complete': False, 'uploadId': upload_id, 'offset': current, 'error': 'offset 불일치'}, 409
+        if current + len(chunk) > session['size']:
+            return {'success': False, 'error': '선언한 크기를 초과했습니다.'}, 400
+
+        part.seek(current)
+        part.write(chunk)
+        part.flush()
+        current += len(chunk)
+        if current < session['size']:
+            return {'complete': False, 'uploadId': upload_id, 'offset': current}, 200
+        return _finish_upload(upload_id, session)
+
+
+def _finish_upload(upload_id, session):
+    part_path, session_path = _upload_paths(upload_id)
+    sha256 = session['sha256']
+
+    digest = hashlib.sha256()
+    with open(part_path, 'rb') as f:
+        for block in iter(lambda: f.read(1024 * 1024), b''):
+            digest.update(block)
+    if digest.hexdigest() != sha256:
+        # 내용이 선언과 다르면 처음부터 다시
+        os.remove(part_path)
+        os.remove(session_path)
+        return {'success': False, 'error': 'SHA-256 이 일치하지 않습니다. 다시 업로드해주세요.'}, 422
+
+    original_path, meta_path = photo_paths(sha256)
+    os.makedirs(_blob_dir(sha256), exist_ok=True)
+    apartment_id = session.get('apartmentId')
+    meta = read_photo_meta(sha256)
+    if meta is not None:
+        # 다른 사용자/아파트가 같은 사진을 먼저 올린 경우 - 내용을 확인했으므로 이 아파트도 볼 수 있게
+        os.remove(part_path)
+
+        def grant(meta):
+            if apartment_id is not None and apartment_id not in meta.setdefault('apartmentIds', []):
+                meta['apartmentIds'].append(apartment_id)
+
+        reschedule_if_stuck(sha256, _update_photo_meta(sha256, grant))
+    else:
+        os.replace(part_path, original_path)
+        _write_json(meta_path, {
+            'sha256': sha256, 'size': session['size'], 'contentType': session['contentType'],
+            'uploadedBy': session['userId'], 'uploadedAt': int(time.time() * 1000), 'processed': False,
+            'apartmentIds': [apartment_id] if apartment_id is not None else [],
+        })
+        schedule_processing(sha256)
+    os.remove(session_path)
+    return dict(photo_urls(sha256), complete=True, deduplicated=False), 201
+
+
+def cleanup_stale_uploads(max_age=UPLOAD_EXPIRE_SECONDS):
+    """오래된 미완료 업로드 삭제. 삭제 건수 반환"""
+    upload_dir = os.path.join(PHOTO_DIR, 'uploads')
+    if not os.path.isdir(upload_dir):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for name in os.listdir(upload_dir):
+        path = os.path.join(upload_dir, name)
+        if os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            removed += name.endswith('.json')
+    return removed
+
+
+# ---------------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------------
+
+def photo_upload_start_api(request):
+    """POST /api/photos/uploads/ - 업로드 시작/재개"""
+    from django.views.decorators.csrf import csrf_exempt
+    from vehicles.views import api_auth_required
+
+    from fast_serializers import json_response
+    from request_scope import get_request_scope
+
+    @csrf_exempt
+    @api_auth_required
+    def _view(request):
+        if request.method != 'POST':
+            return json_response({'error': '잘못된 요청 방식입니다.'}, status=405)
+        try:
+            body = json.loads(request.body)
+            sha256 = str(body['sha256']).lower()
+            size = int(body['size'])
+            content_type = body.get('contentType', 'image/jpeg')
+        except (ValueError, KeyError, TypeError):
+            return json_response({'success': False, 'error': 'sha256/size 가 필요합니다.'}, status=400)
+        if not _SHA256_PATTERN.match(sha256) or not 0 < size <= MAX_PHOTO_SIZE:
+            return json_response({'success': False, 'error': '잘못된 사진 정보입니다.'}, status=400)
+        if content_type not in ALLOWED_CONTENT_TYPES:
+            return json_response({'success': False, 'error': '지원하지 않는 사진 형식입니다.'}, status=415)
+
+        apartment_id = get_request_scope(request).apartment_id
+        if not apartment_id:
+            return json_response({'error': '아파트 정보가 없습니다.'}, status=400)
+        state = start_upload(request.user.id, apartment_id, sha256, size, content_type)
+        state['success'] = True
+        return json_response(state, status=200 if state['complete'] else 201)
+
+    return _view(request)
+
+
+def photo_upload_chunk_api(request, upload_id):
+    """PUT /api/photos/uploads/<uploadId>/ - 청크 추가 (Upload-Offset 헤더 필수)"""
+    from django.views.decorators.csrf import csrf_exempt
+    from vehicles.views import api_auth_required
+
+    from fast_serializers import json_response
+
+    @csrf_exempt
+    @api_auth_required
+    def _view(request):
+        if request.method != 'PUT':
+            return json_response({'error': '잘못된 요청 방식입니다.'}, status=405)
+        if not _UPLOAD_ID_PATTERN.match(upload_id):
+            return json_response({'success': False, 'error': '잘못된 uploadId 입니다.'}, status=400)
+        try:
+            offset = int(request.headers.get('Upload-Offset', ''))
+        except ValueError:
+            return json_response({'success': False, 'error': 'Upload-Offset 헤더가 필요합니다.'}, status=400)
+        chunk = request.body
+        if len(chunk) > MAX_CHUNK_SIZE:
+            return json_response({'success': False, 'error': '청크가 너무 큽니다.'}, status=413)
+
+        state, status = append_chunk(request.user.id, upload_id, offset, chunk)
+        state.setdefault('success', status < 400 or status == 409)
+        return json_response(state, status=status)
+
+    return _view(request)
+
+
+def photo_file_api(request, sha256, thumbnail=False):
+    """GET /api/photos/<sha256>/[thumb/] - EXIF 제거한 사진/썸네일 (결과 파일이 바뀌지 않으므로 장기 캐시)"""
+    from django.http import FileResponse, Http404, HttpResponse
+    from vehicles.views import api_auth_required
+
+    from request_scope import get_request_scope
+
+    @api_auth_required
+    def _view(request):
+        if not _SHA256_PATTERN.match(sha256):
+            raise Http404
+        meta = read_photo_meta(sha256)
+        scope = get_request_scope(request)
+        # 다른 아파트의 단속 사진은 없는 것과 같게
+        if meta is None or not (scope.is_admin or photo_visible_to(meta, scope.apartment_id)):
+            raise Http404
+        if 'processedAt' not in meta:
+            # 아직 EXIF 제거 전 - 원본을 내보내지 않고 잠시 후 다시 요청하게 한다
+            reschedule_if_stuck(sha256, meta)
+            response = HttpResponse(status=202)
+            response['Retry-After'] = '2'
+            return response
+        # 처리하지 못한 사진 (Pillow 미설치 등) 은 EXIF 가 남아 있으므로 내보내지 않는다
+        if not meta.get('processed'):
+            raise Http404
+        digest = meta.get('thumbDigest' if thumbnail else 'photoDigest')
+        if not digest or not os.path.exists(processed_path(digest)):
+            raise Http404
+        path = processed_path(digest)
+
+        # ETag 는 실제로 내려보내는 파일 내용의 digest
+        etag = f'"{digest}"'
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponse(status=304)
+        response = FileResponse(open(path, 'rb'), content_type='image/jpeg')
+        response['ETag'] = etag
+        response['Cache-Control'] = 'private, max-age=31536000, immutable'
+        return response
+
+    return _view(request)
+
+
+def main():
+    print("=" * 60)
+    print("📷 증거 사진 저장소")
+    print("=" * 60)
+
+    args = sys.argv[1:]
+    if '--cleanup' in args:
+        print(f"   🗑️  미완료 업로드 {cleanup_stale_uploads()}건 삭제")
+    if '--reprocess' in args:
+        # --failed: Pillow 설치 후 처리하지 못했던 사진도 다시
+        print(f"   🔁 {reprocess_photos(include_failed='--failed' in args)}건 다시 처리")
+    print(f"   저장 위치: {PHOTO_DIR}")
+    print(f"   Pillow: {'사용' if Image is not None else '미설치 (사진 제공 불가)'}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,160 @@
+#!/usr/bin/env python3
+"""
+차량/방문차량 고속 직렬화 모듈
+values_list 튜플을 그대로 받아 KST 변환과 날짜 포맷을 일괄 처리하고
+orjson(설치된 경우)으로 바로 bytes 인코딩한다.
+
+서버 프로젝트(/home/kyb9852/vehicle-management-system)에 복사해서
+views 에서 import 하여 사용한다. Django 의존 부분은 json_response 뿐이다.
+"""
+
+import json
+from datetime import timedelta, timezone as dt_timezone
+
+try:
+    import orjson
+except ImportError:
+    orjson = None
+
+from unit_directory import unit_label
+
+# 한국은 서머타임이 없으므로 고정 오프셋 하나로 충분하다
+KST_OFFSET = timedelta(hours=9)
+KST = dt_timezone(KST_OFFSET, 'KST')
+
+# 'HH:MM' 문자열 미리 생성 (하루 1440개)
+_HHMM = [f'{h:02d}:{m:02d}' for h in range(24) for m in range(60)]
+
+# values_list 로 가져올 필드 목록 (순서가 곧 튜플 인덱스)
+RESIDENT_FIELDS = (
+    'id', 'username', 'phone', 'dong', 'ho', 'user_type', 'is_manager',
+)
+VISITOR_VEHICLE_FIELDS = (
+    'id', 'vehicle_number', 'contact', 'created_at', 'registered_by__username',
+    'visiting_dong', 'visiting_ho', 'is_active',
+)
+VISITOR_RESERVATION_FIELDS = (
+    'id', 'vehicle_number', 'visitor_name', 'visitor_phone', 'visit_date', 'visit_time',
+    'purpose', 'resident_id', 'resident__username', 'created_at', 'is_approved',
+)
+
+
+class KSTFormatter:
+    """KST 변환 및 날짜 문자열 캐시 - 응답 하나당 하나씩 생성"""
+
+    def __init__(self):
+        self._days = {}
+
+    def to_kst(self, value):
+        """aware datetime 을 KST naive datetime 으로 변환 (naive 는 이미 로컬 시간으로 간주)"""
+        offset = value.utcoffset()
+        if offset is None:
+            return value
+        return value.replace(tzinfo=None) + (KST_OFFSET - offset)
+
+    def day(self, value):
+        """date/datetime -> 'YYYY-MM-DD' (같은 날짜는 한 번만 포맷)"""
+        key = value.toordinal()
+        text = self._days.get(key)
+        if text is None:
+            text = f'{value.year:04d}-{value.month:02d}-{value.day:02d}'
+            self._days[key] = text
+        return text
+
+    def kst_day(self, value):
+        """UTC datetime -> KST 기준 'YYYY-MM-DD'"""
+        if value is None:
+            return ''
+        return self.day(self.to_kst(value))
+
+    def kst_minute(self, value):
+        """UTC datetime -> KST 기준 'YYYY-MM-DD HH:MM'"""
+        if value is None:
+            return ''
+        local = self.to_kst(value)
+        return f'{self.day(local)} {_HHMM[local.hour * 60 + local.minute]}'
+
+    def kst_iso(self, value):
+        """UTC datetime -> 'YYYY-MM-DDTHH:MM:SS+09:00'"""
+        if value is None:
+            return ''
+        local = self.to_kst(value)
+        return f'{self.day(local)}T{_HHMM[local.hour * 60 + local.minute]}:{local.second:02d}+09:00'
+
+
+def serialize_residents(rows, parent_username):
+    """부아이디 목록 (comprehensive 'residents')"""
+    return [
+        {
+            'id': pk,
+            'username': username,
+            'phone': phone or '',
+            'dong': dong or '',
+            'ho': ho or '',
+            'unitLabel': unit_label(dong, ho),
+            'user_type': user_type,
+            'parent_account': parent_username,
+        }
+        for pk, username, phone, dong, ho, user_type, is_manager in rows
+    ]
+
+
+def serialize_sub_accounts(rows, parent_username):
+    """부아이디 목록 (comprehensive 'subAccounts') - residents 와 같은 행을 재사용"""
+    return [
+        {
+            'id': pk,
+            'username': username,
+            'user_type': user_type,
+            'is_manager': bool(is_manager),
+            'parent_account': parent_username,
+            'dong': dong or '',
+            'ho': ho or '',
+            'unitLabel': unit_label(dong, ho),
+        }
+        for pk, username, phone, dong, ho, user_type, is_manager in rows
+    ]
+
+
+def serialize_visitor_reservations(rows, fmt, user_id, can_delete_all, apartment_name):
+    """VisitorReservation 목록 (visitor_vehicles_api 'visitor_vehicles')
+
+    visit_datetime 은 visit_date + visit_time 의 조합이므로 행마다
+    timezone.localtime() 을 호출하지 않고 문자열만 이어 붙인다.
+    """
+    result = []
+    append = result.append
+    for (pk, plate, visitor_name, visitor_phone, visit_date, visit_time,
+         purpose, resident_id, resident_username, created_at, is_approved) in rows:
+        visit_date_text = fmt.day(visit_date) if visit_date else ''
+        visit_time_text = _HHMM[visit_time.hour * 60 + visit_time.minute] if visit_time else ''
+        append({
+            'id': pk,
+            'vehicle_number': plate,
+            'visitor_name': visitor_name,
+            'contact': visitor_phone,
+            'visit_date': visit_date_text,
+            'visit_time': visit_time_text,
+            'visit_datetime': f'{visit_date_text} {visit_time_text}' if visit_date_text and visit_time_text else '',
+            'purpose': purpose,
+            'registered_by': resident_username or '',
+            'registered_by_apartment': apartment_name,
+            'created_at': fmt.kst_minute(created_at),
+            'is_approved': is_approved,
+            'can_delete': can_delete_all or resident_id == user_id,
+        })
+    return result
+
+
+def dumps(data):
+    """dict -> UTF-8 JSON bytes (orjson 이 없으면 표준 json 사용)"""
+    if orjson is not None:
+        return orjson.dumps(data)
+    return json.dumps(data, ensure_ascii=False, separators=(',', ':')).encode('utf-8')
+
+
+def json_response(data, status=200):
+    """JsonResponse 대신 사용하는 고속 응답 생성"""
+    from django.http import HttpResponse
+
+    return HttpResponse(dumps(data), status=status, content_type='application/json')
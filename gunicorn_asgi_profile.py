@@ -0,0 +1,39 @@
+"""
+ASGI 서버 프로필 (gunicorn + uvicorn 워커)
+mobile_api_async_views 의 async 뷰를 서비스할 때 사용하는 gunicorn 설정 파일.
+느린 LTE 단말이 본문을 받아가는 동안에도 워커는 이벤트 루프에서 다른 요청을 처리한다.
+
+서버에서 실행 (기존 WSGI 서비스와 다른 포트로 띄워 비교 가능):
+    pip install "uvicorn[standard]" gunicorn
+    gunicorn vehicle_system.asgi:application -c gunicorn_asgi_profile.py
+
+ASGI 에서는 요청마다 스레드가 달라질 수 있으므로 settings 의 CONN_MAX_AGE 는 0 으로 두거나
+pgbouncer 같은 외부 커넥션 풀을 사용한다.
+
+환경 변수로 조정:
+    APTGO_ASGI_BIND     기본 127.0.0.1:8001
+    APTGO_ASGI_WORKERS  기본 CPU 코어 수 (async 워커는 코어당 하나면 충분)
+"""
+
+import multiprocessing
+import os
+
+bind = os.environ.get('APTGO_ASGI_BIND', '127.0.0.1:8001')
+workers = int(os.environ.get('APTGO_ASGI_WORKERS', multiprocessing.cpu_count()))
+worker_class = 'uvicorn.workers.UvicornWorker'
+
+# 느린 단말이 많으므로 연결 유지 시간은 넉넉히, 요청 처리 타임아웃은 WSGI 와 같게
+keepalive = 20
+timeout = 60
+graceful_timeout = 30
+
+# 메모리 누수 대비 주기적 재시작 (워커마다 시점이 겹치지 않도록 jitter)
+max_requests = 20000
+max_requests_jitter = 2000
+
+chdir = os.environ.get('APTGO_SERVER_DIR', '/home/kyb9852/vehicle-management-system')
+raw_env = ['DJANGO_SETTINGS_MODULE=vehicle_system.settings']
+
+accesslog = '-'
+errorlog = '-'
+loglevel = 'info'
@@ -0,0 +1,510 @@
+#!/usr/bin/env python3
+"""
+단속/방문 이력 스트리밍 내보내기 (CSV / XLSX)
+관리사무소의 월별 이력 엑셀 요청을 메모리에 전부 올려 만들면 큰 단지에서 타임아웃이 나므로
+DB 서버 측 커서(.iterator(chunk_size=...))에서 읽은 행을 바로 CSV 또는 스트리밍 XLSX 로 흘려보낸다.
+행 수와 관계없이 메모리 사용량은 일정하다.
+
+    GET /api/exports/<dataset>/?format=csv|xlsx&start=YYYY-MM-DD&end=YYYY-MM-DD[&apartment=<id>]
+
+dataset: EXPORT_DATASETS 참고 (visitors, reservations, scans). 기간을 주지 않으면 이번 달(KST).
+apartment 는 admin/super_admin 만 지정할 수 있고, 나머지는 자기 아파트로 고정된다.
+
+이어받기: 응답에는 (조건 + 행 수 + 최대 id + 아파트 변경 피드 버전) 으로 만든 ETag 가 붙고,
+끝까지 내려간 본문은 EXPORT_DIR 에 보관된다. 끊긴 다운로드가 Range(+If-Range) 로 다시 요청하면
+보관본에서 이어서 보낸다. 보관본이 없으면 Range 를 무시하고 전체를 200 으로 다시 스트리밍한다
+(요청 스레드에서 전체를 먼저 만들지 않는다).
+pgbouncer transaction pooling 환경이면 settings 의 DISABLE_SERVER_SIDE_CURSORS 를 켜야 한다.
+"""
+
+import csv
+import hashlib
+import io
+import os
+import re
+import sys
+import threading
+import time
+import zipfile
+from datetime import date, datetime, timedelta
+from xml.sax.saxutils import escape
+
+from fast_serializers import KST, KSTFormatter, VISITOR_VEHICLE_FIELDS
+from unit_directory import unit_label
+
+EXPORT_DIR = os.environ.get('APTGO_EXPORT_DIR', '/home/kyb9852/vehicle-management-system/media/exports')
+EXPORT_CACHE_SECONDS = 24 * 3600
+
+ITERATOR_CHUNK_SIZE = 2000
+FLUSH_SIZE = 64 * 1024            # 이만큼 쌓이면 클라이언트로 내보낸다
+MAX_EXPORT_DAYS = 366
+
+EXPORT_FORMATS = {
+    'csv': ('text/csv; charset=utf-8', 'csv'),
+    'xlsx': ('application/vnd.openxmlformats-officedocument.spreadsheetml.sheet', 'xlsx'),
+}
+
+_RANGE_PATTERN = re.compile(r'^bytes=(\d+)-(\d*)$')
+# XML 1.0 에서 허용되지 않는 제어문자
+_XML_ILLEGAL = re.compile('[\x00-\x08\x0b\x0c\x0e-\x1f]')
+# 같은 내용이면 같은 바이트 (이어받기/ETag 안정)
+_ZIP_DATE_TIME = (2020, 1, 1, 0, 0, 0)
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+# ---------------------------------------------------------------------------
+# 데이터셋
+# ---------------------------------------------------------------------------
+
+def kst_range(start, end):
+    """KST 날짜 [start, end] -> aware datetime [from, to)"""
+    return (datetime.combine(start, datetime.min.time(), tzinfo=KST),
+            datetime.combine(end + timedelta(days=1), datetime.min.time(), tzinfo=KST))
+
+
+def _visitor_vehicle_queryset(apartment_id, start, end):
+    from vehicles.models import VisitorVehicle
+
+    created_from, created_to = kst_range(start, end)
+    return VisitorVehicle.objects.filter(
+        apartment_id=apartment_id, created_at__gte=created_from, created_at__lt=created_to
+    )
+
+
+def _visitor_vehicle_rows(apartment_id, start, end):
+    fmt = KSTFormatter()
+    queryset = _visitor_vehicle_queryset(apartment_id, start, end).order_by('id')
+    for pk, plate, contact, created_at, registered_by, dong, ho, active in (
+            queryset.values_list(*VISITOR_VEHICLE_FIELDS).iterator(chunk_size=ITERATOR_CHUNK_SIZE)):
+        yield (pk, plate, contact or '', unit_label(dong, ho), registered_by or '',
+               fmt.kst_minute(created_at), '활성' if active else '비활성')
+
+
+_RESERVATION_EXPORT_FIELDS = (
+    'id', 'vehicle_number', 'visitor_name', 'visitor_phone', 'visit_date', 'visit_time',
+    'purpose', 'resident__username', 'resident__dong', 'resident__ho', 'created_at', 'is_approved',
+)
+
+
+def _reservation_queryset(apartment_id, start, end):
+    from django.db.models import Q
+
+    from visitors.models import VisitorReservation
+
+    # 부아이디가 등록한 예약은 resident 에 apartment_id 가 없고 상위 계정(parent_account)에 있다
+    return VisitorReservation.objects.filter(
+        Q(resident__apartment_id=apartment_id) | Q(resident__parent_account__apartment_id=apartment_id),
+        visit_date__gte=start, visit_date__lte=end
+    )
+
+
+def _reservation_rows(apartment_id, start, end):
+    fmt = KSTFormatter()
+    queryset = _reservation_queryset(apartment_id, start, end).order_by('id')
+    for (pk, plate, visitor_name, visitor_phone, visit_date, visit_time, purpose,
+         resident_username, dong, ho, created_at, is_approved) in (
+            queryset.values_list(*_RESERVATION_EXPORT_FIELDS).iterator(chunk_size=ITERATOR_CHUNK_SIZE)):
+        yield (pk, plate, visitor_name or '', visitor_phone or '',
+               fmt.day(visit_date) if visit_date else '',
+               f'{visit_time.hour:02d}:{visit_time.minute:02d}' if visit_time else '',
+               purpose or '', resident_username or '', unit_label(dong, ho),
+               fmt.kst_minute(created_at), '승인' if is_approved else '미승인')
+
+
+def _kst_range_ms(start, end):
+    range_from, range_to = kst_range(start, end)
+    return int(range_from.timestamp() * 1000), int(range_to.timestamp() * 1000)
+
+
+def _scan_report_rows(apartment_id, start, end):
+    from scan_report_ingest import iter_scan_report_rows
+
+    fmt = KSTFormatter()
+    for (pk, plate, is_registered, first_seen_at, last_seen_at, sighting_count, action_taken,
+         action_count, location, reported_by, recognition_time, photo_id, photo_url, thumbnail_url) in (
+            iter_scan_report_rows(apartment_id, *_kst_range_ms(start, end), chunk_size=ITERATOR_CHUNK_SIZE)):
+        yield (pk, plate, '등록' if is_registered else '미등록',
+               fmt.kst_minute(datetime.fromtimestamp(first_seen_at / 1000, KST)),
+               fmt.kst_minute(datetime.fromtimestamp(last_seen_at / 1000, KST)),
+               sighting_count, action_taken, action_count, location, reported_by, photo_url or '')
+
+
+def _scan_report_version(apartment_id, start, end):
+    from scan_report_ingest import scan_report_version
+
+    return scan_report_version(apartment_id, *_kst_range_ms(start, end))
+
+
+def _queryset_version(queryset_fn):
+    """ORM 데이터셋 버전: (행 수, 최대 id, 아파트 변경 피드 seq)
+
+    행 수/최대 id 는 추가/삭제만 잡으므로, 기존 행을 고쳐도 바뀌는 change_feed 버전을 함께 넣는다.
+    """
+    def version(apartment_id, start, end):
+        from django.db.models import Count, Max
+
+        from dashboard_fragments import apartment_data_version
+
+        result = queryset_fn(apartment_id, start, end).aggregate(count=Count('id'), max_id=Max('id'))
+        return result['count'], result['max_id'], apartment_data_version(apartment_id)
+    return version
+
+
+# name -> {'title': 시트 이름, 'header': 열 제목, 'rows': 행 iterator 함수, 'version': ETag 재료 함수}
+EXPORT_DATASETS = {}
+
+
+def register_export_dataset(name, title, header, rows, version):
+    """내보내기 데이터셋 등록 (rows/version 은 (apartment_id, start, end) 를 받는다)"""
+    EXPORT_DATASETS[name] = {'title': title, 'header': header, 'rows': rows, 'version': version}
+
+
+register_export_dataset(
+    'visitors', '방문차량',
+    ('번호', '차량번호', '연락처', '방문 세대', '등록자', '등록일시', '상태'),
+    _visitor_vehicle_rows, _queryset_version(_visitor_vehicle_queryset),
+)
+register_export_dataset(
+    'reservations', '방문예약',
+    ('번호', '차량번호', '방문자', '방문자 연락처', '방문일', '방문시간', '방문목적',
+     '예약자', '예약 세대', '예약일시', '승인'),
+    _reservation_rows, _queryset_version(_reservation_queryset),
+)
+register_export_dataset(
+    'scans', '스캔 보고서',
+    ('번호', '차량번호', '등록여부', '최초 인식', '마지막 인식', '인식 횟수', '조치사항',
+     '조치 시도 횟수', '위치', '보고자', '사진'),
+    _scan_report_rows, _scan_report_version,
+)
+
+
+# ---------------------------------------------------------------------------
+# 스트리밍 인코더
+# ---------------------------------------------------------------------------
+
+class _ChunkSink(io.RawIOBase):
+    """쓰인 바이트를 모아 두었다가 drain() 때 한 덩어리로 내준다 (seek 불가 스트림)"""
+
+    def __init__(self):
+        super().__init__()
+        self._chunks = []
+        self.size = 0
+
+    def writable(self):
+        return True
+
+    def write(self, data):
+        self._chunks.append(bytes(data))
+        self.size += len(data)
+        return len(data)
+
+    def drain(self):
+        data = b''.join(self._chunks)
+        self._chunks = []
+        self.size = 0
+        return data
+
+
+class _LineBuffer:
+    def __init__(self):
+        self.parts = []
+
+    def write(self, text):
+        self.parts.append(text)
+
+
+def iter_csv(header, rows):
+    """CSV bytes 조각 (엑셀에서 한글이 깨지지 않도록 UTF-8 BOM 으로 시작)"""
+    buffer = _LineBuffer()
+    writer = csv.writer(buffer)
+    buffer.write('\ufeff')
+    writer.writerow(header)
+    size = 0
+    for row in rows:
+        writer.writerow(row)
+        size += 1
+        if size >= 500:
+            data = ''.join(buffer.parts).encode('utf-8')
+            buffer.parts = []
+            size = 0
+            yield data
+    yield ''.join(buffer.parts).encode('utf-8')
+
+
+def _xlsx_cell(value):
+    if isinstance(value, bool) or value is None or not isinstance(value, (int, float)):
+        text = escape(_XML_ILLEGAL.sub('', '' if value is None else str(value)))
+        return f'<c t="inlineStr"><is><t xml:space="preserve">{text}</t></is></c>'
+    return f'<c><v>{value}</v></c>'
+
+
+def _xlsx_row(values):
+    return '<row>' + ''.join(_xlsx_cell(v) for v in values) + '</row>'
+
+
+_XLSX_STATIC_PARTS = (
+    ('[Content_Types].xml',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Types xmlns="http://schemas.openxmlformats.org/package/2006/content-types">'
+     '<Default Extension="rels" ContentType="application/vnd.openxmlformats-package.relationships+xml"/>'
+     '<Default Extension="xml" ContentType="application/xml"/>'
+     '<Override PartName="/xl/workbook.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet.main+xml"/>'
+     '<Override PartName="/xl/worksheets/sheet1.xml" '
+     'ContentType="application/vnd.openxmlformats-officedocument.spreadsheetml.worksheet+xml"/>'
+     '</Types>'),
+    ('_rels/.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" Target="xl/workbook.xml" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/officeDocument"/>'
+     '</Relationships>'),
+    ('xl/_rels/workbook.xml.rels',
+     '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+     '<Relationships xmlns="http://schemas.openxmlformats.org/package/2006/relationships">'
+     '<Relationship Id="rId1" Target="worksheets/sheet1.xml" '
+     'Type="http://schemas.openxmlformats.org/officeDocument/2006/relationships/worksheet"/>'
+     '</Relationships>'),
+)
+
+
+def _zip_info(name):
+    info = zipfile.ZipInfo(name, date_time=_ZIP_DATE_TIME)
+    info.compress_type = zipfile.ZIP_DEFLATED
+    return info
+
+
+def iter_xlsx(title, header, rows):
+    """XLSX bytes 조각 - 시트 XML 을 zip 항목에 행 단위로 써 가며 내보낸다 (openpyxl 불필요)"""
+    sink = _ChunkSink()
+    with zipfile.ZipFile(sink, 'w') as archive:
+        for name, content in _XLSX_STATIC_PARTS:
+            archive.writestr(_zip_info(name), content)
+        archive.writestr(_zip_info('xl/workbook.xml'), (
+            '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+            '<workbook xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main" '
+            'xmlns:r="http://schemas.openxmlformats.org/officeDocument/2006/relationships">'
+            f'<sheets><sheet name="{escape(title[:31])}" sheetId="1" r:id="rId1"/></sheets></workbook>'
+        ))
+        yield sink.drain()
+
+        with archive.open(_zip_info('xl/worksheets/sheet1.xml'), 'w', force_zip64=True) as sheet:
+            sheet.write((
+                '<?xml version="1.0" encoding="UTF-8" standalone="yes"?>'
+                '<worksheet xmlns="http://schemas.openxmlformats.org/spreadsheetml/2006/main"><sheetData>'
+                + _xlsx_row(header)
+            ).encode('utf-8'))
+            for row in rows:
+                sheet.write(_xlsx_row(row).encode('utf-8'))
+                if sink.size >= FLUSH_SIZE:
+                    yield sink.drain()
+            sheet.write(b'</sheetData></worksheet>')
+    yield sink.drain()
+
+
+def iter_export(dataset, export_format, apartment_id, start, end):
+    """데이터셋 + 형식 -> bytes 조각 iterator"""
+    spec = EXPORT_DATASETS[dataset]
+    rows = spec['rows'](apartment_id, start, end)
+    if export_format == 'xlsx':
+        yield from iter_xlsx(spec['title'], spec['header'], rows)
+        return
+
+    pending, size = [], 0
+    for data in iter_csv(spec['header'], rows):
+        pending.append(data)
+        size += len(data)
+        if size >= FLUSH_SIZE:
+            yield b''.join(pending)
+            pending, size = [], 0
+    yield b''.join(pending)
+
+
+# ---------------------------------------------------------------------------
+# 이어받기용 보관본
+# ---------------------------------------------------------------------------
+
+def export_etag(dataset, export_format, apartment_id, start, end):
+    version = EXPORT_DATASETS[dataset]['version'](apartment_id, start, end)
+    key = f'{dataset}:{export_format}:{apartment_id}:{start}:{end}:{version}'
+    return hashlib.sha1(key.encode('utf-8')).hexdigest()
+
+
+def cached_export_path(etag, export_format):
+    return os.path.join(EXPORT_DIR, f'{etag}.{EXPORT_FORMATS[export_format][1]}')
+
+
+def tee_to_cache(chunks, path):
+    """조각을 내보내면서 파일에도 기록, 끝까지 가면 보관본으로 확정 (중간에 끊기면 버림)"""
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    part_path = f'{path}.{os.getpid()}.{threading.get_ident()}.part'
+    completed = False
+    try:
+        with open(part_path, 'wb') as f:
+            for chunk in chunks:
+                if chunk:
+                    f.write(chunk)
+                    yield chunk
+        os.replace(part_path, path)
+        completed = True
+    finally:
+        if not completed and os.path.exists(part_path):
+            os.remove(part_path)
+
+
+def iter_file_range(path, start, length, block_size=FLUSH_SIZE):
+    with open(path, 'rb') as f:
+        f.seek(start)
+        while length > 0:
+            data = f.read(min(block_size, length))
+            if not data:
+                break
+            length -= len(data)
+            yield data
+
+
+def cleanup_exports(max_age=EXPORT_CACHE_SECONDS):
+    """오래된 보관본 삭제. 삭제 건수 반환"""
+    if not os.path.isdir(EXPORT_DIR):
+        return 0
+    cutoff = time.time() - max_age
+    removed = 0
+    for name in os.listdir(EXPORT_DIR):
+        path = os.path.join(EXPORT_DIR, name)
+        if os.path.getmtime(path) < cutoff:
+            os.remove(path)
+            removed += 1
+    return removed
+
+
+# ---------------------------------------------------------------------------
+# API
+# ---------------------------------------------------------------------------
+
+def parse_export_period(params, today=None):
+    """start/end 파라미터 -> (start, end). 없으면 이번 달. 잘못되면 ValueError"""
+    today = today or datetime.now(KST).date()
+    start_text, end_text = params.get('start'), params.get('end')
+    start = date.fromisoformat(start_text) if start_text else today.replace(day=1)
+    end = date.fromisoformat(end_text) if end_text else today
+    if end < start:
+        raise ValueError('종료일이 시작일보다 빠릅니다.')
+    if (end - start).days >= MAX_EXPORT_DAYS:
+        raise ValueError(f'기간은 최대 {MAX_EXPORT_DAYS}일입니다.')
+    return start, end
+
+
+def export_api(request, dataset):
+    """GET /api/exports/<dataset>/ - CSV/XLSX 스트리밍 다운로드 (Range 이어받기 지원)"""
+    from django.http import HttpResponse, JsonResponse, StreamingHttpResponse
+    from vehicles.views import api_auth_required
+
+    from request_scope import get_request_scope
+
+    @api_auth_required
+    def _view(request):
+        if request.method != 'GET':
+            return JsonResponse({'error': '잘못된 요청 방식입니다.'}, status=405)
+        if dataset not in EXPORT_DATASETS:
+            return JsonResponse({'success': False, 'error': '알 수 없는 내보내기 항목입니다.'}, status=404)
+        export_format = request.GET.get('format', 'csv')
+        if export_format not in EXPORT_FORMATS:
+            return JsonResponse({'success': False, 'error': 'format 은 csv 또는 xlsx 입니다.'}, status=400)
+
+        scope = get_request_scope(request)
+        if not scope.can_manage:
+            return JsonResponse({'success': False, 'error': '관리단 권한이 필요합니다.'}, status=403)
+        apartment_id = (request.GET.get('apartment') if scope.is_admin else None) or scope.apartment_id
+        try:
+            apartment_id = int(apartment_id)
+            start, end = parse_export_period(request.GET)
+        except (TypeError, ValueError) as e:
+            return JsonResponse({'success': False, 'error': f'잘못된 조건입니다: {e}'}, status=400)
+
+        content_type, extension = EXPORT_FORMATS[export_format]
+        etag = f'"{export_etag(dataset, export_format, apartment_id, start, end)}"'
+        cache_path = cached_export_path(etag.strip('"'), export_format)
+        filename = f'{dataset}_{apartment_id}_{start:%Y%m%d}-{end:%Y%m%d}.{extension}'
+
+        range_match = _RANGE_PATTERN.match(request.headers.get('Range', ''))
+        if_range = request.headers.get('If-Range')
+        # 보관본이 없는 Range 요청은 아래에서 전체 200 스트리밍으로 응답 (Range 무시는 RFC 허용)
+        if range_match and (if_range is None or if_range == etag) and os.path.exists(cache_path):
+            total = os.path.getsize(cache_path)
+            first = int(range_match.group(1))
+            last = min(int(range_match.group(2) or total - 1), total - 1)
+            if first > last:
+                response = HttpResponse(status=416)
+                response['Content-Range'] = f'bytes */{total}'
+                return response
+            response = StreamingHttpResponse(
+                iter_file_range(cache_path, first, last - first + 1), status=206, content_type=content_type
+            )
+            response['Content-Range'] = f'bytes {first}-{last}/{total}'
+            response['Content-Length'] = str(last - first + 1)
+        elif os.path.exists(cache_path):
+            response = StreamingHttpResponse(
+                iter_file_range(cache_path, 0, os.path.getsize(cache_path)), content_type=content_type
+            )
+            response['Content-Length'] = str(os.path.getsize(cache_path))
+        else:
+            response = StreamingHttpResponse(
+                tee_to_cache(iter_export(dataset, export_format, apartment_id, start, end), cache_path),
+                content_type=content_type
+            )
+
+        response['ETag'] = etag
+        response['Accept-Ranges'] = 'bytes'
+        response['Content-Disposition'] = f'attachment; filename="{filename}"'
+        response['Cache-Control'] = 'private, no-transform'
+        return response
+
+    return _view(request)
+
+
+def main():
+    print("=" * 60)
+    print("📤 이력 내보내기")
+    print("=" * 60)
+
+    args = sys.argv[1:]
+    if '--cleanup' in args:
+        print(f"   🗑️  보관본 {cleanup_exports()}건 삭제")
+        return
+    if len(args) < 2 or args[0] not in EXPORT_DATASETS:
+        print("사용법: python3 history_export.py <dataset> <apartment_id> [start] [end] [--xlsx] [--cleanup]")
+        print(f"   dataset: {', '.join(EXPORT_DATASETS)}")
+        return
+    if not setup_django():
+        return
+
+    dataset, apartment_id = args[0], int(args[1])
+    dates = [a for a in args[2:] if not a.startswith('--')]
+    start, end = parse_export_period({'start': dates[0] if dates else None,
+                                      'end': dates[1] if len(dates) > 1 else None})
+    export_format = 'xlsx' if '--xlsx' in args else 'csv'
+    path = f'{dataset}_{apartment_id}_{start:%Y%m%d}-{end:%Y%m%d}.{EXPORT_FORMATS[export_format][1]}'
+
+    started = time.time()
+    size = 0
+    with open(path, 'wb') as f:
+        for chunk in iter_export(dataset, export_format, apartment_id, start, end):
+            f.write(chunk)
+            size += len(chunk)
+    print(f"   ✅ {path} ({size / 1024:.1f} KB, {time.time() - started:.1f}초)")
+
+
+if __name__ == "__main__":
+    main()
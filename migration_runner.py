@@ -0,0 +1,514 @@
+#!/usr/bin/env python3
+"""
+재개 가능한 배치 데이터 마이그레이션 러너
+debug_user_vehicles.py 처럼 queryset 전체를 읽어 비교/수정하면 운영 DB 에서 테이블을
+오래 잡고 부하가 몰리므로, 원본 테이블을 PK 범위 배치로 나눠 처리한다.
+
+- 배치마다 (변경 적용 + 체크포인트 저장) 을 한 트랜잭션으로 커밋 -> 중단 후 그 다음 PK 부터 재개
+- 배치 사이 대기: 고정 sleep 과 부하 비율(--max-load) 중 큰 값
+  (max_load=0.5 면 배치에 걸린 시간만큼 쉬어 DB 사용 시간이 절반을 넘지 않는다)
+- --dry-run: 쓰지 않고 바뀔 내용(diff)만 출력, 체크포인트도 건드리지 않는다
+- 적용은 조건부 UPDATE/INSERT ... ON CONFLICT 라 같은 배치를 다시 돌려도 결과가 같다
+- 같은 마이그레이션을 두 곳에서 동시에 돌리지 않도록 heartbeat 로 소유자를 확인
+  (소유권 확보는 체크포인트 행을 잠근 채 판단하고, 배치마다 커밋 전에 아직 소유자인지 다시 확인해
+  heartbeat 가 끊긴 사이 다른 실행이 이어받았으면 그 배치를 롤백하고 멈춘다)
+
+마이그레이션 등록:
+    register_migration(name, description, source, plan, apply, batch_size)
+        source(after_pk, limit) -> PK 오름차순 행 목록 (행[0] 이 PK)
+        plan(rows)              -> 변경 목록 [{'op': ..., 'target': ..., 'before': ..., 'after': ...}]
+        apply(changes)          -> 실제 반영 건수 (트랜잭션 안에서 호출)
+
+서버에서 실행:
+    python3 migration_runner.py --list
+    python3 migration_runner.py resident_plates_to_user --dry-run --batches 3
+    python3 migration_runner.py resident_plates_to_user --batch-size 500 --max-load 0.3
+    python3 migration_runner.py resident_plates_to_user --status
+    python3 migration_runner.py resident_plates_to_user --reset
+"""
+
+import os
+import socket
+import sys
+import time
+
+CHECKPOINT_TABLE = 'data_migration_checkpoint'
+
+DEFAULT_BATCH_SIZE = 500
+DEFAULT_SLEEP_SECONDS = 0.1
+DEFAULT_MAX_LOAD = 0.5
+# heartbeat 가 이보다 오래되면 이전 실행이 죽은 것으로 보고 이어받는다
+STALE_OWNER_SECONDS = 300
+
+STATUS_RUNNING = 'running'
+STATUS_PAUSED = 'paused'
+STATUS_DONE = 'done'
+
+CHECKPOINT_COLUMNS = (
+    'name', 'last_pk', 'processed', 'changed', 'skipped', 'status', 'owner', 'started_at', 'updated_at',
+)
+
+CHECKPOINT_DDL = (
+    f'''CREATE TABLE IF NOT EXISTS {CHECKPOINT_TABLE} (
+        name VARCHAR(100) PRIMARY KEY,
+        last_pk BIGINT NOT NULL,
+        processed BIGINT NOT NULL,
+        changed BIGINT NOT NULL,
+        skipped BIGINT NOT NULL,
+        status VARCHAR(10) NOT NULL,
+        owner VARCHAR(100) NOT NULL,
+        started_at BIGINT NOT NULL,
+        updated_at BIGINT NOT NULL
+    )''',
+)
+
+# 이름 -> {'description', 'source', 'plan', 'apply', 'batch_size'}
+MIGRATIONS = {}
+
+# 행 잠금 문법만 백엔드별로 다르다 (SQLite 는 먼저 쓴 트랜잭션이 DB 쓰기 잠금을 잡는다)
+_FOR_UPDATE = {
+    'sqlite': '',
+    'postgresql': ' FOR UPDATE',
+}
+
+
+class OwnershipLost(RuntimeError):
+    """다른 실행이 체크포인트를 이어받아 이 실행은 더 진행하면 안 된다"""
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def ensure_checkpoint_table():
+    """체크포인트 테이블 생성 (이미 있으면 무시)"""
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        for statement in CHECKPOINT_DDL:
+            cursor.execute(statement)
+
+
+def register_migration(name, description, source, plan, apply, batch_size=DEFAULT_BATCH_SIZE):
+    """배치 마이그레이션 등록"""
+    MIGRATIONS[name] = {
+        'description': description, 'source': source, 'plan': plan, 'apply': apply, 'batch_size': batch_size,
+    }
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+def _owner():
+    return f'{socket.gethostname()}:{os.getpid()}'
+
+
+# ---------------------------------------------------------------------------
+# 체크포인트
+# ---------------------------------------------------------------------------
+
+def load_checkpoint(name, for_update=False):
+    """체크포인트 dict (없으면 None). for_update=True 면 트랜잭션이 끝날 때까지 행을 잠근다"""
+    from django.db import connection
+
+    lock = _FOR_UPDATE.get(connection.vendor, _FOR_UPDATE['postgresql']) if for_update else ''
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {", ".join(CHECKPOINT_COLUMNS)} FROM {CHECKPOINT_TABLE} WHERE name = %s{lock}', [name]
+        )
+        row = cursor.fetchone()
+    return dict(zip(CHECKPOINT_COLUMNS, row)) if row else None
+
+
+def save_checkpoint(checkpoint):
+    from django.db import connection
+
+    checkpoint['updated_at'] = _now_ms()
+    updates = ', '.join(f'{column} = excluded.{column}' for column in CHECKPOINT_COLUMNS[1:])
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {CHECKPOINT_TABLE} ({", ".join(CHECKPOINT_COLUMNS)}) '
+            f'VALUES ({", ".join(["%s"] * len(CHECKPOINT_COLUMNS))}) '
+            f'ON CONFLICT (name) DO UPDATE SET {updates}',
+            [checkpoint[column] for column in CHECKPOINT_COLUMNS]
+        )
+
+
+def reset_checkpoint(name):
+    from django.db import connection
+
+    with connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {CHECKPOINT_TABLE} WHERE name = %s', [name])
+
+
+def claim_checkpoint(name, owner):
+    """실행 소유권 확보 - 다른 곳에서 실행 중(heartbeat 유효)이면 RuntimeError
+
+    두 실행이 동시에 '비어 있음/오래됨' 으로 보고 둘 다 소유자가 되지 않도록
+    행을 먼저 만들어 두고(있으면 그대로) 잠근 상태에서 판단한다.
+    """
+    from django.db import connection, transaction
+
+    with transaction.atomic():
+        now = _now_ms()
+        with connection.cursor() as cursor:
+            cursor.execute(
+                f'INSERT INTO {CHECKPOINT_TABLE} ({", ".join(CHECKPOINT_COLUMNS)}) '
+                f'VALUES (%s, 0, 0, 0, 0, %s, %s, %s, %s) ON CONFLICT (name) DO NOTHING',
+                [name, STATUS_PAUSED, '', now, now]
+            )
+        checkpoint = load_checkpoint(name, for_update=True)
+        if (checkpoint['status'] == STATUS_RUNNING and checkpoint['owner'] != owner
+                and now - checkpoint['updated_at'] < STALE_OWNER_SECONDS * 1000):
+            raise RuntimeError(f"이미 실행 중입니다 ({checkpoint['owner']})")
+        checkpoint.update(status=STATUS_RUNNING, owner=owner)
+        save_checkpoint(checkpoint)
+    return checkpoint
+
+
+def assert_owner(name, owner):
+    """(배치 트랜잭션 안에서) 아직 이 실행이 소유자인지 확인 - 행을 잠가 커밋까지 이어받기를 막는다"""
+    current = load_checkpoint(name, for_update=True)
+    if current is None or current['owner'] != owner:
+        raise OwnershipLost(f"다른 실행이 이어받았습니다 ({current['owner'] if current else '체크포인트 없음'})")
+
+
+# ---------------------------------------------------------------------------
+# 실행
+# ---------------------------------------------------------------------------
+
+def throttle_seconds(elapsed, sleep_seconds, max_load):
+    """배치에 elapsed 초가 걸렸을 때 다음 배치 전 대기 시간"""
+    if max_load <= 0 or max_load >= 1:
+        return sleep_seconds
+    return max(sleep_seconds, elapsed * (1 - max_load) / max_load)
+
+
+def run_migration(name, dry_run=False, batch_size=None, sleep_seconds=DEFAULT_SLEEP_SECONDS,
+                  max_load=DEFAULT_MAX_LOAD, max_batches=None, on_batch=None):
+    """마이그레이션 실행 (또는 재개). 요약 dict 반환
+
+    on_batch(batch_no, rows, changes, checkpoint) 는 배치마다 호출 (dry-run diff 출력용).
+    dry_run 은 체크포인트를 읽기만 하므로 실제 실행이 멈춘 위치부터의 diff 를 보여준다.
+    """
+    from django.db import transaction
+
+    migration = MIGRATIONS[name]
+    batch_size = batch_size or migration['batch_size']
+    owner = _owner()
+    if dry_run:
+        checkpoint = load_checkpoint(name) or {
+            'name': name, 'last_pk': 0, 'processed': 0, 'changed': 0, 'skipped': 0,
+            'status': STATUS_PAUSED, 'owner': owner, 'started_at': _now_ms(), 'updated_at': _now_ms(),
+        }
+    else:
+        checkpoint = claim_checkpoint(name, owner)
+
+    batches = 0
+    planned = 0
+    lost = False
+    try:
+        while max_batches is None or batches < max_batches:
+            started = time.time()
+            rows = migration['source'](checkpoint['last_pk'], batch_size)
+            if not rows:
+                checkpoint['status'] = STATUS_DONE
+                break
+
+            changes = migration['plan'](rows)
+            planned += len(changes)
+            if dry_run:
+                checkpoint['last_pk'] = rows[-1][0]
+                checkpoint['processed'] += len(rows)
+            else:
+                # 커밋에 실패하면 finally 에서 저장하는 체크포인트도 이전 배치 위치여야 한다
+                advanced = dict(checkpoint)
+                with transaction.atomic():
+                    # heartbeat 가 끊긴 사이 다른 실행이 이어받았으면 이 배치는 롤백하고 멈춘다
+                    assert_owner(name, owner)
+                    applied = migration['apply'](changes)
+                    advanced['last_pk'] = rows[-1][0]
+                    advanced['processed'] += len(rows)
+                    advanced['changed'] += applied
+                    advanced['skipped'] += len(changes) - applied
+                    save_checkpoint(advanced)
+                checkpoint = advanced
+            batches += 1
+            if on_batch:
+                on_batch(batches, rows, changes, checkpoint)
+            time.sleep(throttle_seconds(time.time() - started, sleep_seconds, max_load))
+        else:
+            checkpoint['status'] = STATUS_PAUSED
+    except KeyboardInterrupt:
+        # 마지막으로 커밋된 배치까지는 체크포인트에 남아 있다
+        checkpoint['status'] = STATUS_PAUSED
+    except OwnershipLost:
+        # 체크포인트는 이어받은 실행의 것이므로 덮어쓰지 않는다
+        lost = True
+        raise
+    finally:
+        if not dry_run and not lost:
+            if checkpoint['status'] == STATUS_RUNNING:
+                checkpoint['status'] = STATUS_PAUSED
+            save_checkpoint(checkpoint)
+
+    return {
+        'name': name, 'dryRun': dry_run, 'batches': batches, 'planned': planned,
+        'lastPk': checkpoint['last_pk'], 'processed': checkpoint['processed'],
+        'changed': checkpoint['changed'], 'status': checkpoint['status'],
+    }
+
+
+# ---------------------------------------------------------------------------
+# Resident.vehicle_number -> User.vehicle_number 통합
+# ---------------------------------------------------------------------------
+# Resident 한 행마다 같은 아파트의 부아이디를 (1) 같은 아이디 (2) 같은 동/호에 번호판이 빈
+# 부아이디가 하나뿐일 때 순서로 찾는다. 번호판이 비어 있으면 채우고(fill), 같으면 그대로(same),
+# 다르면 덮어쓰지 않고 conflict 로 남긴다. 맞는 부아이디가 없으면 unmatched (계정은 만들지 않는다).
+
+OP_FILL = 'fill'
+OP_SAME = 'same'
+OP_CONFLICT = 'conflict'
+OP_UNMATCHED = 'unmatched'
+
+RESIDENT_SOURCE_FIELDS = ('id', 'apartment_id', 'username', 'vehicle_number', 'dong', 'ho')
+
+
+def _resident_source(after_pk, limit):
+    from vehicles.models import Resident
+
+    return list(
+        Resident.objects.filter(pk__gt=after_pk).order_by('pk').values_list(*RESIDENT_SOURCE_FIELDS)[:limit]
+    )
+
+
+def _resident_plan(rows):
+    from django.db.models import Q
+
+    from accounts.models import User
+
+    from registered_plate_set import normalize_plate
+    from unit_directory import normalize_dong, normalize_ho, raw_variants
+
+    rows = [row for row in rows if row[1] and normalize_plate(row[3])]
+    if not rows:
+        return []
+
+    apartment_ids = {row[1] for row in rows}
+    usernames = {row[2] for row in rows if row[2]}
+    dongs = {variant for row in rows for variant in raw_variants(normalize_dong(row[4]), '동') if row[4]}
+    users = User.objects.filter(
+        Q(username__in=usernames) | Q(dong__in=dongs),
+        user_type='sub_account',
+        parent_account__apartment_id__in=apartment_ids,
+    ).values_list('id', 'parent_account__apartment_id', 'username', 'vehicle_number', 'dong', 'ho')
+
+    by_username = {}
+    by_unit = {}
+    for user in users:
+        user_id, apartment_id, username, plate, dong, ho = user
+        by_username[(apartment_id, username)] = user
+        unit = (apartment_id, normalize_dong(dong), normalize_ho(ho))
+        by_unit.setdefault(unit, []).append(user)
+
+    changes = []
+    for resident_id, apartment_id, username, plate, dong, ho in rows:
+        target = by_username.get((apartment_id, username))
+        if target is None:
+            empty = [
+                user for user in by_unit.get((apartment_id, normalize_dong(dong), normalize_ho(ho)), [])
+                if not normalize_plate(user[3])
+            ]
+            target = empty[0] if len(empty) == 1 else None
+
+        change = {
+            'source': resident_id, 'apartment_id': apartment_id, 'username': username,
+            'after': plate.strip(), 'target': None, 'before': None,
+        }
+        if target is None:
+            change['op'] = OP_UNMATCHED
+        else:
+            change['target'] = target[0]
+            change['before'] = target[3] or ''
+            if normalize_plate(target[3]) == normalize_plate(plate):
+                change['op'] = OP_SAME
+            elif not normalize_plate(target[3]):
+                change['op'] = OP_FILL
+            else:
+                change['op'] = OP_CONFLICT
+        changes.append(change)
+    return changes
+
+
+def _resident_apply(changes):
+    """fill 만 반영 - 비어 있을 때만 UPDATE 하므로 다시 실행해도 같은 결과"""
+    from django.db import transaction
+    from django.db.models import Q
+
+    from accounts.models import User
+
+    from change_feed import ENTITY_USER, OP_UPDATE, record_change
+
+    applied = []
+    for change in changes:
+        if change['op'] != OP_FILL:
+            continue
+        updated = User.objects.filter(
+            Q(vehicle_number__isnull=True) | Q(vehicle_number=''), pk=change['target']
+        ).update(vehicle_number=change['after'])
+        if not updated:
+            continue
+        applied.append(change)
+        # update() 는 post_save 를 보내지 않으므로 signals 가 하던 후속 작업을 직접
+        record_change(ENTITY_USER, change['target'], change['apartment_id'], OP_UPDATE)
+    if applied:
+        transaction.on_commit(lambda: _refresh_users(applied))
+    return len(applied)
+
+
+def _refresh_users(changes):
+    """배치 커밋 후 디렉터리 행 갱신 + 영향받은 아파트마다 스냅샷 재생성 한 번"""
+    from apartment_snapshot_builder import schedule_snapshot_rebuild
+    from sub_account_directory import refresh_sub_account
+    from vehicle_directory import refresh_source
+
+    for change in changes:
+        refresh_source('resident_user', change['target'], change['apartment_id'], change['after'])
+        refresh_sub_account(change['target'])
+    for apartment_id in {change['apartment_id'] for change in changes}:
+        schedule_snapshot_rebuild(apartment_id)
+
+
+register_migration(
+    'resident_plates_to_user',
+    'Resident.vehicle_number 를 같은 아파트 부아이디 User.vehicle_number 로 통합 (빈 값만 채움)',
+    _resident_source, _resident_plan, _resident_apply,
+)
+
+
+# ---------------------------------------------------------------------------
+# scan_reports 단일 테이블 -> 월별 파티션 (scan_report_partitions)
+# ---------------------------------------------------------------------------
+
+def _scan_report_source(after_pk, limit):
+    from scan_report_partitions import legacy_source
+
+    return legacy_source(after_pk, limit)
+
+
+def _scan_report_plan(rows):
+    from scan_report_partitions import legacy_plan
+
+    return legacy_plan(rows)
+
+
+def _scan_report_apply(changes):
+    from scan_report_partitions import legacy_apply
+
+    return legacy_apply(changes)
+
+
+register_migration(
+    'scan_reports_to_partitions',
+    '기존 scan_reports 행을 KST 월별 파티션으로 이동 (이동한 행은 원본에서 삭제)',
+    _scan_report_source, _scan_report_plan, _scan_report_apply, batch_size=2000,
+)
+
+
+def format_change(change):
+    """diff 한 줄"""
+    op = change['op']
+    if op == OP_FILL:
+        return (f"   + user#{change['target']} vehicle_number '{change['before']}' -> '{change['after']}' "
+                f"(resident#{change['source']} {change['username']})")
+    if op == OP_CONFLICT:
+        return (f"   ! user#{change['target']} '{change['before']}' != resident#{change['source']} "
+                f"'{change['after']}' ({change['username']}) - 덮어쓰지 않음")
+    if op == OP_UNMATCHED:
+        return (f"   ? resident#{change['source']} '{change['after']}' ({change['username']}) "
+                f"- 대응하는 부아이디 없음")
+    return None
+
+
+def main():
+    print("=" * 60)
+    print("🧱 배치 데이터 마이그레이션")
+    print("=" * 60)
+
+    args = sys.argv[1:]
+    if not setup_django():
+        return
+    ensure_checkpoint_table()
+
+    if '--list' in args or not args:
+        for name, migration in MIGRATIONS.items():
+            checkpoint = load_checkpoint(name)
+            state = f"{checkpoint['status']} (last_pk={checkpoint['last_pk']})" if checkpoint else '미실행'
+            print(f"   {name}: {migration['description']} - {state}")
+        return
+
+    name = args[0]
+    if name not in MIGRATIONS:
+        print(f"❌ 알 수 없는 마이그레이션: {name}")
+        return
+
+    def option(flag, cast, default):
+        return cast(args[args.index(flag) + 1]) if flag in args else default
+
+    if '--reset' in args:
+        reset_checkpoint(name)
+        print(f"   ✅ {name} 체크포인트 삭제")
+        return
+    if '--status' in args:
+        print(f"   {load_checkpoint(name) or '미실행'}")
+        return
+
+    dry_run = '--dry-run' in args
+    counts = {}
+
+    def on_batch(batch_no, rows, changes, checkpoint):
+        for change in changes:
+            counts[change['op']] = counts.get(change['op'], 0) + 1
+            if dry_run:
+                line = format_change(change)
+                if line:
+                    print(line)
+        print(f"   📦 배치 {batch_no}: {len(rows)}행 (last_pk={checkpoint['last_pk']}) "
+              f"누적 {', '.join(f'{op} {n}' for op, n in sorted(counts.items()))}")
+
+    try:
+        summary = run_migration(
+            name,
+            dry_run=dry_run,
+            batch_size=option('--batch-size', int, None),
+            sleep_seconds=option('--sleep', float, DEFAULT_SLEEP_SECONDS),
+            max_load=option('--max-load', float, DEFAULT_MAX_LOAD),
+            max_batches=option('--batches', int, None),
+            on_batch=on_batch,
+        )
+    except RuntimeError as e:
+        print(f"❌ {e}")
+        return
+    finally:
+        # 반영한 배치의 스냅샷 재생성이 debounce 대기 중이면 끝나기 전에 실행
+        from apartment_snapshot_builder import flush_snapshot_rebuilds
+
+        flush_snapshot_rebuilds()
+
+    label = '(dry-run) ' if dry_run else ''
+    print(f"\n   ✅ {label}{summary['status']}: 배치 {summary['batches']}개, 처리 {summary['processed']}행, "
+          f"반영 {summary['changed']}건, last_pk={summary['lastPk']}")
+
+
+if __name__ == '__main__':
+    main()
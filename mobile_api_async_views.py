@@ -0,0 +1,140 @@
+#!/usr/bin/env python3
+"""
+모바일 읽기 전용 API 의 비동기(ASGI) 버전
+LTE 단말이 응답 본문을 천천히 받아가는 동안 WSGI 워커 하나가 통째로 묶이던 문제를 피하기 위해
+ASGI 서버(gunicorn_asgi_profile.py)에서 async 뷰로 제공한다.
+응답 형식과 권한 규칙은 mobile_api_views 의 동기 뷰와 같다 (직렬화 함수 공용).
+
+독립적인 조회 구역(입주민 차량+방문차량 / 입주민+부아이디)은 asyncio.gather 로 동시에 실행한다.
+Django async ORM 은 내부적으로 하나의 sync 스레드에서 순서대로 실행되므로,
+vehicle_directory 원시 SQL 구역은 thread_sensitive=False 스레드(별도 DB 연결)에서 돌려 실제로 겹치게 한다.
+JSON 직렬화와 brotli/gzip 압축도 CPU 작업이라 이벤트 루프 밖 스레드에서 한다.
+
+urls.py (ASGI 배포):
+    from mobile_api_async_views import comprehensive_vehicle_data_async, visitor_vehicles_async
+    path('api/comprehensive/', comprehensive_vehicle_data_async),
+    path('api/visitor-vehicles/', visitor_vehicles_async),
+"""
+
+import asyncio
+from datetime import date
+
+from asgiref.sync import sync_to_async
+from django.contrib.auth.views import redirect_to_login
+from django.db import close_old_connections
+from django.http.response import HttpResponseBase
+from django.views.decorators.csrf import csrf_exempt
+
+from vehicles.views import api_auth_required
+
+from app_metrics import record_cache
+from fast_serializers import RESIDENT_FIELDS, json_response
+from mobile_api_views import (
+    active_sub_users,
+    comprehensive_access_error,
+    render_comprehensive,
+    visitor_reservations_for,
+    visitor_vehicles_payload,
+)
+from response_compression import CompressedPayload, payload_response
+from request_coalescing import apartment_limiter, comprehensive_async_flight, retry_after_response
+from request_scope import get_request_scope
+from vehicle_directory import query_directory
+
+# 압축(수십 ms)이 이벤트 루프를 막지 않도록 - DB 를 쓰지 않으니 sync 스레드에 줄 세우지 않는다
+_payload_response = sync_to_async(payload_response, thread_sensitive=False)
+
+
+@api_auth_required
+def _auth_gate(request):
+    """기존 토큰 인증 데코레이터를 그대로 통과시키고 인증된 사용자의 RequestScope 를 돌려준다"""
+    return get_request_scope(request)
+
+
+def _query_directory_isolated(apartment_id):
+    """별도 스레드에서 디렉터리 조회 후 그 스레드의 오래된 연결 정리"""
+    try:
+        return query_directory(apartment_id, order_by='source, source_id')
+    finally:
+        close_old_connections()
+
+
+async def _directory_rows(apartment_id):
+    if not apartment_id:
+        return []
+    return await sync_to_async(_query_directory_isolated, thread_sensitive=False)(apartment_id)
+
+
+async def _resident_rows(main_account_id):
+    return [row async for row in active_sub_users(main_account_id).values_list(*RESIDENT_FIELDS)]
+
+
+async def build_comprehensive_payload_async(scope):
+    """두 조회 구역을 동시에 실행한 뒤 동기 뷰와 같은 본문 생성"""
+    directory_rows, resident_rows = await asyncio.gather(
+        _directory_rows(scope.apartment_id),
+        _resident_rows(scope.main_account_id),
+    )
+    return await sync_to_async(render_comprehensive, thread_sensitive=False)(
+        scope.main_username, directory_rows, resident_rows
+    )
+
+
+async def _compressible(scope):
+    return CompressedPayload(await build_comprehensive_payload_async(scope))
+
+
+@csrf_exempt
+async def comprehensive_vehicle_data_async(request):
+    """포괄적인 차량 데이터 API (async) - 동시 요청은 (아파트, 권한 범위) 단위로 합쳐 한 번만 계산"""
+    if request.method != 'GET':
+        return json_response({'error': '잘못된 요청 방식입니다.'}, status=405)
+
+    gate = await sync_to_async(_auth_gate)(request)
+    if isinstance(gate, HttpResponseBase):
+        return gate
+    scope = gate
+    denied = comprehensive_access_error(scope)
+    if denied:
+        return denied
+
+    try:
+        with apartment_limiter.slot(scope.apartment_id) as acquired:
+            if not acquired:
+                return retry_after_response(apartment_limiter.retry_after)
+            key = ('comprehensive', scope.apartment_id, scope.main_account_id, scope.role)
+            payload, shared = await comprehensive_async_flight.do(key, lambda: _compressible(scope))
+        record_cache('comprehensive_coalescing', shared)
+
+        response = await _payload_response(request, payload)
+        response['X-Coalesced'] = '1' if shared else '0'
+        return response
+
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': f'데이터 조회 중 오류: {str(e)}'
+        }, status=500)
+
+
+async def visitor_vehicles_async(request):
+    """실시간 방문차량 목록 조회 API (async) - 세션 로그인 필요 (login_required 와 동일 동작)"""
+    # request.user 는 지연 평가라 sync 스레드에서 scope 와 함께 꺼낸다
+    scope = await sync_to_async(get_request_scope)(request)
+    if not scope.is_authenticated:
+        return redirect_to_login(request.get_full_path())
+
+    try:
+        reservations = visitor_reservations_for(scope, date.today())
+        if reservations is None:
+            return json_response({'error': '권한이 없습니다.'}, status=403)
+
+        # 버전 조회 + 캐시 조회(+ 미스일 때 조회/압축)는 sync 스레드에서 한 번에
+        payload = await sync_to_async(visitor_vehicles_payload)(scope, reservations, date.today())
+        return await _payload_response(request, payload)
+
+    except Exception as e:
+        return json_response({
+            'error': f'오류가 발생했습니다: {str(e)}',
+            'success': False
+        }, status=500)
@@ -0,0 +1,210 @@
+#!/usr/bin/env python3
+"""
+모바일/대시보드 읽기 전용 API 뷰
+views.py 함수 본문을 문자열로 교체하던 fix_*/deploy_* 스크립트 대신
+이 모듈을 서버 프로젝트에 두고 urls.py 에서 직접 연결한다.
+
+    from mobile_api_views import comprehensive_vehicle_data_api, visitor_vehicles_api
+"""
+
+from datetime import date
+
+from django.contrib.auth.decorators import login_required
+from django.views.decorators.csrf import csrf_exempt
+from django.utils import timezone
+
+from accounts.models import User
+from vehicles.views import api_auth_required
+from visitors.models import VisitorReservation
+
+from fast_serializers import (
+    KSTFormatter,
+    RESIDENT_FIELDS,
+    VISITOR_RESERVATION_FIELDS,
+    dumps,
+    json_response,
+    serialize_residents,
+    serialize_sub_accounts,
+    serialize_visitor_reservations,
+)
+from app_metrics import record_cache
+from response_compression import CompressedPayload, payload_response
+from request_coalescing import apartment_limiter, comprehensive_flight, retry_after_response
+from request_scope import DATA_SCOPE_APARTMENT, ROLE_MAIN, ROLE_MANAGER, get_request_scope
+from vehicle_directory import (
+    RESIDENT_SOURCES,
+    VISITOR_SOURCES,
+    query_directory,
+    serialize_directory_vehicles,
+    serialize_directory_visitors,
+)
+
+# 방문차량 본문(압축 결과 포함) 캐시 - 키에 change_feed 버전과 날짜가 들어가므로 TTL 은 넉넉히
+VISITOR_PAYLOAD_CACHE_PREFIX = 'visitor_payload:v1:'
+VISITOR_PAYLOAD_CACHE_SECONDS = 24 * 3600
+
+
+def render_comprehensive(main_username, directory_rows, resident_rows):
+    """조회 결과 -> comprehensive 응답 본문 (bytes). 동기/비동기 뷰 공용"""
+    vehicles_data = serialize_directory_vehicles(
+        [row for row in directory_rows if row['source'] in RESIDENT_SOURCES]
+    )
+    visitor_vehicles_data = serialize_directory_visitors(
+        [row for row in directory_rows if row['source'] in VISITOR_SOURCES]
+    )
+    residents_data = serialize_residents(resident_rows, main_username)
+    sub_accounts_data = serialize_sub_accounts(resident_rows, main_username)
+
+    return dumps({
+        'vehicles': vehicles_data,
+        'residents': residents_data,
+        'visitorVehicles': visitor_vehicles_data,
+        'subAccounts': sub_accounts_data,
+        'success': True,
+        'message': f'총 {len(vehicles_data)}대 차량, {len(residents_data)}명 입주민, {len(visitor_vehicles_data)}대 방문차량 데이터를 조회했습니다.',
+        'lastUpdated': int(timezone.now().timestamp() * 1000)
+    })
+
+
+def active_sub_users(main_account_id):
+    return User.objects.filter(
+        parent_account_id=main_account_id,
+        user_type='sub_account',
+        is_active=True
+    )
+
+
+def build_comprehensive_payload(scope):
+    """comprehensive 응답 본문 (bytes) - 같은 메인 계정 요청끼리 그대로 공유된다"""
+    # 1/3. 입주민 차량 + 방문차량 (vehicle_directory 에서 한 번에)
+    if scope.apartment_id:
+        directory_rows = query_directory(scope.apartment_id, order_by='source, source_id')
+    else:
+        directory_rows = []
+
+    # 2/4. 입주민 + 부아이디 정보 (같은 쿼리 결과를 두 번 사용)
+    resident_rows = list(active_sub_users(scope.main_account_id).values_list(*RESIDENT_FIELDS))
+
+    return render_comprehensive(scope.main_username, directory_rows, resident_rows)
+
+
+def comprehensive_access_error(scope):
+    """comprehensive 는 메인 계정과 관리단 부아이디만 - 거부 응답 또는 None"""
+    if scope.role in (ROLE_MAIN, ROLE_MANAGER):
+        if not scope.main_account_id:
+            return json_response({'error': '메인 계정 정보 없음'}, status=400)
+        return None
+    if scope.user_type == 'sub_account':
+        return json_response({'success': False, 'error': '관리단 권한이 필요합니다.'}, status=403)
+    return json_response({'success': False, 'error': '차량 데이터 접근 권한이 없습니다.'}, status=403)
+
+
+@csrf_exempt
+@api_auth_required
+def comprehensive_vehicle_data_api(request):
+    """포괄적인 차량 데이터 새로고침 API - 동시 요청은 (아파트, 권한 범위) 단위로 합쳐 한 번만 계산"""
+    if request.method != 'GET':
+        return json_response({'error': '잘못된 요청 방식입니다.'}, status=405)
+
+    scope = get_request_scope(request)
+    denied = comprehensive_access_error(scope)
+    if denied:
+        return denied
+
+    try:
+        with apartment_limiter.slot(scope.apartment_id) as acquired:
+            if not acquired:
+                return retry_after_response(apartment_limiter.retry_after)
+            key = ('comprehensive', scope.apartment_id, scope.main_account_id, scope.role)
+            # 함께 기다린 요청들은 압축 결과도 공유한다
+            payload, shared = comprehensive_flight.do(
+                key, lambda: CompressedPayload(build_comprehensive_payload(scope))
+            )
+
+        record_cache('comprehensive_coalescing', shared)
+        response = payload_response(request, payload)
+        response['X-Coalesced'] = '1' if shared else '0'
+        return response
+
+    except Exception as e:
+        return json_response({
+            'success': False,
+            'error': f'데이터 조회 중 오류: {str(e)}'
+        }, status=500)
+
+
+def visitor_reservations_for(scope, today):
+    """사용자 권한에 맞는 방문예약 queryset. 권한이 없으면 None"""
+    if scope.data_scope == DATA_SCOPE_APARTMENT:
+        # 메인아이디/관리자: 해당 아파트의 모든 방문차량 조회 (대시보드와 동일 로직)
+        if not scope.apartment_id:
+            return VisitorReservation.objects.none()
+        return VisitorReservation.objects.filter(
+            resident__apartment_id=scope.apartment_id,
+            visit_date__gte=today,
+            is_approved=True
+        )
+    if scope.user_type == 'sub_account':
+        # 부아이디: 자신이 등록한 방문차량만 조회
+        return VisitorReservation.objects.filter(
+            resident_id=scope.user_id,
+            visit_date__gte=today,
+            is_approved=True
+        )
+    return None
+
+
+def render_visitor_vehicles(rows, scope):
+    """방문예약 행 -> visitor_vehicles 응답 본문 (bytes). 동기/비동기 뷰 공용"""
+    visitor_vehicles = serialize_visitor_reservations(
+        rows, KSTFormatter(), scope.user_id, scope.data_scope == DATA_SCOPE_APARTMENT, scope.apartment_name
+    )
+    return dumps({
+        'visitor_vehicles': visitor_vehicles,
+        'success': True,
+        'count': len(visitor_vehicles)
+    })
+
+
+def visitor_vehicles_payload(scope, reservations, today):
+    """방문차량 응답 본문 CompressedPayload - 아파트 데이터 버전이 같으면 캐시된 압축 결과를 재사용"""
+    from django.core.cache import cache
+
+    from dashboard_fragments import apartment_data_version
+
+    def build():
+        rows = reservations.order_by('-created_at').values_list(*VISITOR_RESERVATION_FIELDS)
+        return CompressedPayload(render_visitor_vehicles(rows, scope))
+
+    if not scope.apartment_id:
+        # 버전을 알 수 없으면 캐시하지 않는다
+        return build()
+
+    # 아파트 범위는 모두 삭제 가능이라 본문이 사용자와 무관, 부아이디는 본인 것만
+    variant = 'a' if scope.data_scope == DATA_SCOPE_APARTMENT else f'u{scope.user_id}'
+    version = apartment_data_version(scope.apartment_id)
+    key = f'{VISITOR_PAYLOAD_CACHE_PREFIX}{scope.apartment_id}:{variant}:{version}:{today.toordinal()}'
+    payload = cache.get(key)
+    record_cache('visitor_vehicles_payload', payload is not None)
+    if payload is None:
+        payload = build().precompress()
+        cache.set(key, payload, VISITOR_PAYLOAD_CACHE_SECONDS)
+    return payload
+
+
+@login_required
+def visitor_vehicles_api(request):
+    """실시간 방문차량 목록 조회 API - VisitorReservation + 고속 직렬화 버전"""
+    try:
+        scope = get_request_scope(request)
+        reservations = visitor_reservations_for(scope, date.today())
+        if reservations is None:
+            return json_response({'error': '권한이 없습니다.'}, status=403)
+
+        return payload_response(request, visitor_vehicles_payload(scope, reservations, date.today()))
+
+    except Exception as e:
+        return json_response({
+            'error': f'오류가 발생했습니다: {str(e)}',
+            'success': False
+        }, status=500)
@@ -0,0 +1,124 @@
+#!/usr/bin/env python3
+"""
+번호판 뒤 4자리 검색
+경비원은 대부분 번호판 뒤 4자리만 입력하므로 LIKE '%...%' 대신
+vehicle_directory 의 (apartment_id, plate_suffix) 복합 인덱스로
+입주민/방문차량을 한 번의 인덱스 조회로 찾는다.
+(별도 보조 테이블은 vehicle_directory 로 통합됨)
+
+서버에서 확인:
+    python3 plate_suffix_index.py <apartment_id> 3456
+"""
+
+import os
+import re
+import sys
+import time
+
+from registered_plate_set import normalize_plate
+
+_SUFFIX_PATTERN = re.compile(r'(\d{4})$')
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def plate_suffix(plate_number):
+    """번호판 끝 숫자 4자리 (없으면 None) - 앱 PlateNumberValidator.extractSuffix 와 동일"""
+    match = _SUFFIX_PATTERN.search(normalize_plate(plate_number))
+    return match.group(1) if match else None
+
+
+def search_by_suffix(apartment_id, query, limit=50):
+    """뒤 4자리(또는 전체 번호판)로 검색 - 전체 번호판 일치 > 입주민 > 방문 순"""
+    from vehicle_directory import SOURCE_PRIORITY, date_text, query_directory
+
+    suffix = plate_suffix(query)
+    if not suffix:
+        return []
+    normalized = normalize_plate(query)
+
+    rows = query_directory(apartment_id, 'plate_suffix = %s', [suffix])
+    rows.sort(key=lambda r: (r['plate_normalized'] != normalized, SOURCE_PRIORITY[r['source']], r['plate_number']))
+    return [
+        {
+            'source': row['source'],
+            'id': row['source_id'],
+            'plateNumber': row['plate_number'],
+            'exactMatch': row['plate_normalized'] == normalized,
+            'ownerName': row['owner_name'],
+            'phone': row['phone'],
+            'dong': row['dong'],
+            'ho': row['ho'],
+            'unitLabel': row['unit_label'],
+            'validUntil': date_text(row['valid_until']),
+        }
+        for row in rows[:limit]
+    ]
+
+
+def plate_search_api(request):
+    """GET /api/plate-search/?q=3456 - 뒤 4자리 번호판 검색"""
+    from vehicles.views import api_auth_required
+
+    from fast_serializers import json_response
+    from request_scope import get_request_scope
+
+    @api_auth_required
+    def _view(request):
+        query = request.GET.get('q', '').strip()
+        if not plate_suffix(query):
+            return json_response({'success': False, 'error': '번호판 뒤 4자리를 입력해주세요.'}, status=400)
+        scope = get_request_scope(request)
+        # 결과에 이름/연락처가 들어가므로 관리단만
+        if not scope.can_manage:
+            return json_response({'success': False, 'error': '관리단 권한이 필요합니다.'}, status=403)
+        apartment_id = scope.apartment_id
+        if not apartment_id:
+            return json_response({'error': '아파트 정보가 없습니다.'}, status=400)
+
+        start = time.perf_counter()
+        results = search_by_suffix(apartment_id, query)
+        return json_response({
+            'success': True,
+            'query': query,
+            'results': results,
+            'count': len(results),
+            'elapsedMs': round((time.perf_counter() - start) * 1000, 3),
+        })
+
+    return _view(request)
+
+
+def main():
+    print("=" * 60)
+    print("🔎 번호판 뒤 4자리 검색")
+    print("=" * 60)
+
+    queries = [a for a in sys.argv[1:] if not a.startswith('--')]
+    if len(queries) != 2:
+        print("사용법: python3 plate_suffix_index.py <apartment_id> <뒤 4자리>")
+        return
+    if not setup_django():
+        return
+
+    apartment_id, query = int(queries[0]), queries[1]
+    start = time.perf_counter()
+    results = search_by_suffix(apartment_id, query)
+    print(f"\n🔍 '{query}' 검색: {len(results)}건, {(time.perf_counter() - start) * 1000:.3f}ms")
+    for result in results[:10]:
+        print(f"   - {result['plateNumber']} ({result['source']}) {result['unitLabel']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,151 @@
+#!/usr/bin/env python3
+"""
+등록 차량 번호판 집합 (바이너리) 생성 모듈
+경비 단말은 "등록/미등록" 판단만 필요하므로 전체 차량 레코드 대신
+정규화한 번호판의 64비트 해시를 정렬한 배열만 내려준다.
+앱은 시작 시 메모리에 올려 이진 탐색으로 판단하고, 등록 차량일 때만 Room 을 조회한다.
+
+파일 형식 (big-endian, 버전 1):
+    magic        4바이트  b'APLT'
+    version      uint16   1
+    hash_algo    uint16   1 = FNV-1a 64bit (UTF-8 정규화 번호판)
+    count        uint32   해시 개수
+    apartment_id uint32
+    generated_at int64    epoch ms
+    hashes       int64 * count  (부호 있는 정수 오름차순, 중복 없음)
+
+서버에서 확인:
+    python3 registered_plate_set.py <apartment_id>
+"""
+
+import hashlib
+import os
+import re
+import struct
+import sys
+import time
+
+PLATE_SET_MAGIC = b'APLT'
+PLATE_SET_VERSION = 1
+HASH_ALGO_FNV1A_64 = 1
+HEADER_FORMAT = '>4sHHIIq'
+HEADER_SIZE = struct.calcsize(HEADER_FORMAT)
+
+_FNV_OFFSET = 0xcbf29ce484222325
+_FNV_PRIME = 0x100000001b3
+_MASK_64 = 0xffffffffffffffff
+_STRIP_PATTERN = re.compile(r'[\s\-]')
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def normalize_plate(plate_number):
+    """공백/하이픈 제거 + 대문자 (앱 RegisteredPlateSet.normalize 와 동일해야 함)"""
+    return _STRIP_PATTERN.sub('', plate_number or '').upper()
+
+
+def plate_hash(plate_number):
+    """정규화 번호판의 FNV-1a 64bit 해시 (부호 있는 int64)"""
+    h = _FNV_OFFSET
+    for byte in normalize_plate(plate_number).encode('utf-8'):
+        h ^= byte
+        h = (h * _FNV_PRIME) & _MASK_64
+    return h - (1 << 64) if h >= (1 << 63) else h
+
+
+def build_plate_set_bytes(plate_numbers, apartment_id, generated_at=None):
+    """번호판 목록 -> 버전 1 바이너리"""
+    hashes = sorted({plate_hash(p) for p in plate_numbers if normalize_plate(p)})
+    header = struct.pack(
+        HEADER_FORMAT, PLATE_SET_MAGIC, PLATE_SET_VERSION, HASH_ALGO_FNV1A_64,
+        len(hashes), apartment_id,
+        int(time.time() * 1000) if generated_at is None else generated_at
+    )
+    return header + struct.pack(f'>{len(hashes)}q', *hashes)
+
+
+def parse_plate_set_bytes(data):
+    """바이너리 -> (apartment_id, generated_at, 해시 튜플) - 검증용"""
+    magic, version, algo, count, apartment_id, generated_at = struct.unpack_from(HEADER_FORMAT, data)
+    if magic != PLATE_SET_MAGIC or version != PLATE_SET_VERSION or algo != HASH_ALGO_FNV1A_64:
+        raise ValueError('지원하지 않는 번호판 집합 형식입니다.')
+    if len(data) != HEADER_SIZE + count * 8:
+        raise ValueError('번호판 집합 길이가 올바르지 않습니다.')
+    return apartment_id, generated_at, struct.unpack_from(f'>{count}q', data, HEADER_SIZE)
+
+
+def collect_registered_plates(apartment_id):
+    """vehicle_directory 의 유효 번호판 (스냅샷/comprehensive 와 같은 범위)"""
+    from vehicle_directory import query_directory
+
+    return [row['plate_number'] for row in query_directory(apartment_id)]
+
+
+def registered_plate_set_api(request):
+    """GET /api/registered-plates/ - 등록 번호판 해시 집합 다운로드 (ETag 지원)"""
+    from django.http import HttpResponse, JsonResponse
+    from vehicles.views import api_auth_required
+
+    from request_scope import get_request_scope
+
+    @api_auth_required
+    def _view(request):
+        scope = get_request_scope(request)
+        # 해시는 작은 키 공간이라 역산 가능 - 번호판 목록 전체와 같은 권한으로 취급
+        if not scope.can_manage:
+            return JsonResponse({'success': False, 'error': '관리단 권한이 필요합니다.'}, status=403)
+        apartment_id = scope.apartment_id
+        if not apartment_id:
+            return JsonResponse({'error': '아파트 정보가 없습니다.'}, status=400)
+
+        plates = collect_registered_plates(apartment_id)
+        # ETag 는 생성 시각을 제외한 내용 기준
+        etag = '"%s"' % hashlib.sha256(
+            build_plate_set_bytes(plates, apartment_id, generated_at=0)
+        ).hexdigest()
+        if request.headers.get('If-None-Match') == etag:
+            return HttpResponse(status=304)
+
+        response = HttpResponse(
+            build_plate_set_bytes(plates, apartment_id),
+            content_type='application/octet-stream'
+        )
+        response['ETag'] = etag
+        response['X-Plate-Set-Version'] = str(PLATE_SET_VERSION)
+        return response
+
+    return _view(request)
+
+
+def main():
+    print("=" * 60)
+    print("🔢 등록 번호판 집합 생성")
+    print("=" * 60)
+
+    apartment_ids = [int(a) for a in sys.argv[1:] if a.isdigit()]
+    if not apartment_ids:
+        print("사용법: python3 registered_plate_set.py <apartment_id> ...")
+        return
+    if not setup_django():
+        return
+
+    for apartment_id in apartment_ids:
+        plates = collect_registered_plates(apartment_id)
+        data = build_plate_set_bytes(plates, apartment_id)
+        _, _, hashes = parse_plate_set_bytes(data)
+        print(f"   ✅ apartment={apartment_id}: 번호판 {len(plates)}개 → 해시 {len(hashes)}개, {len(data):,} bytes")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,364 @@
+#!/usr/bin/env python3
+"""
+상습 미등록 차량 집계 (증분 슬라이딩 윈도우)
+미등록 스캔 보고서가 들어올 때마다 (아파트, 번호판) 의 일별 버킷과 7/30/90일 카운터를 갱신한다.
+순위 API 는 미리 갱신된 카운터를 인덱스 순서로 읽기만 하므로 조회할 때 이력을 다시 집계하지 않는다.
+
+    repeat_offender_daily   (apartment_id, plate, day) -> incidents, actions   (최대 90일치만 보관)
+    repeat_offenders        (apartment_id, plate) -> 윈도우별 카운터 + 마지막 인식/조치
+
+하루가 지나면 창 밖으로 밀려난 날짜의 버킷이 있는 번호판만 버킷 합계로 카운터를 다시 계산한다
+(roll_windows). 아파트별 마지막 롤오버 날짜는 repeat_offender_state 에 저장되어
+여러 워커 중 한 곳에서만 실행되고, 다시 실행해도 결과가 같다.
+
+incident 는 중복 억제로 합쳐진 보고서 한 건(scan_report_ingest), action 은 그 보고서의 첫 조치다.
+
+서버에서 실행:
+    python3 repeat_offenders.py <apartment_id> [--window 30]   # 순위 확인
+    python3 repeat_offenders.py --rebuild                      # 스캔 보고서 파티션에서 전체 재계산
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import date, datetime
+
+from fast_serializers import KST
+from registered_plate_set import normalize_plate
+
+OFFENDER_DAILY_TABLE = 'repeat_offender_daily'
+OFFENDER_TABLE = 'repeat_offenders'
+OFFENDER_STATE_TABLE = 'repeat_offender_state'
+
+OFFENDER_WINDOWS = (7, 30, 90)
+MAX_WINDOW_DAYS = max(OFFENDER_WINDOWS)
+DEFAULT_RANKING_WINDOW = 30
+MAX_RANKING_LIMIT = 200
+
+OFFENDER_DDL = (
+    f'''CREATE TABLE IF NOT EXISTS {OFFENDER_DAILY_TABLE} (
+        apartment_id INTEGER NOT NULL,
+        plate_normalized VARCHAR(20) NOT NULL,
+        day INTEGER NOT NULL,
+        incidents INTEGER NOT NULL DEFAULT 0,
+        actions INTEGER NOT NULL DEFAULT 0,
+        PRIMARY KEY (apartment_id, plate_normalized, day)
+    )''',
+    f'CREATE INDEX IF NOT EXISTS repeat_offender_daily_day_idx ON {OFFENDER_DAILY_TABLE} (apartment_id, day)',
+    f'''CREATE TABLE IF NOT EXISTS {OFFENDER_TABLE} (
+        apartment_id INTEGER NOT NULL,
+        plate_normalized VARCHAR(20) NOT NULL,
+        plate_number VARCHAR(20) NOT NULL,
+        incidents_7 INTEGER NOT NULL DEFAULT 0,
+        incidents_30 INTEGER NOT NULL DEFAULT 0,
+        incidents_90 INTEGER NOT NULL DEFAULT 0,
+        actions_7 INTEGER NOT NULL DEFAULT 0,
+        actions_30 INTEGER NOT NULL DEFAULT 0,
+        actions_90 INTEGER NOT NULL DEFAULT 0,
+        last_seen_at BIGINT NOT NULL,
+        last_action VARCHAR(30) NOT NULL DEFAULT '',
+        PRIMARY KEY (apartment_id, plate_normalized)
+    )''',
+) + tuple(
+    f'CREATE INDEX IF NOT EXISTS repeat_offenders_{window}_idx '
+    f'ON {OFFENDER_TABLE} (apartment_id, incidents_{window}, last_seen_at)'
+    for window in OFFENDER_WINDOWS
+) + (
+    f'''CREATE TABLE IF NOT EXISTS {OFFENDER_STATE_TABLE} (
+        apartment_id INTEGER PRIMARY KEY,
+        rolled_day INTEGER NOT NULL
+    )''',
+)
+
+OFFENDER_COLUMNS = (
+    'plate_number', 'incidents_7', 'incidents_30', 'incidents_90',
+    'actions_7', 'actions_30', 'actions_90', 'last_seen_at', 'last_action',
+)
+
+# 이 워커가 이미 롤오버를 확인한 (아파트 -> 날짜)
+_rolled_days = {}
+_rolled_lock = threading.Lock()
+
+_tables_ready = False
+_tables_lock = threading.Lock()
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def ensure_offender_tables():
+    """집계 테이블/인덱스 생성 (이미 있으면 무시). 워커당 한 번만 DDL"""
+    from django.db import connection, transaction
+
+    if _tables_ready:
+        return
+    with _tables_lock:
+        if _tables_ready:
+            return
+        with connection.cursor() as cursor:
+            for statement in OFFENDER_DDL:
+                cursor.execute(statement)
+
+        def mark_ready():
+            global _tables_ready
+            _tables_ready = True
+
+        # PostgreSQL 은 DDL 도 트랜잭션에 묶이므로 커밋된 뒤에만 '있음' 으로 기억
+        transaction.on_commit(mark_ready)
+
+
+def kst_day(timestamp_ms):
+    """epoch ms -> KST 날짜 ordinal"""
+    return datetime.fromtimestamp(timestamp_ms / 1000, KST).date().toordinal()
+
+
+def _window_sums_sql():
+    """윈도우별 카운터를 일별 버킷 합계로 다시 계산하는 SET 절 (파라미터: 윈도우마다 시작일 2개)"""
+    assignments = []
+    for window in OFFENDER_WINDOWS:
+        for column in ('incidents', 'actions'):
+            assignments.append(
+                f'{column}_{window} = (SELECT COALESCE(SUM(d.{column}), 0) FROM {OFFENDER_DAILY_TABLE} d '
+                f'WHERE d.apartment_id = {OFFENDER_TABLE}.apartment_id '
+                f'AND d.plate_normalized = {OFFENDER_TABLE}.plate_normalized AND d.day > %s)'
+            )
+    return ', '.join(assignments)
+
+
+def _window_sums_params(today):
+    return [today - window for window in OFFENDER_WINDOWS for _ in ('incidents', 'actions')]
+
+
+def roll_windows(apartment_id, today):
+    """today 기준으로 창 밖으로 밀려난 버킷 반영 (아파트별 하루 한 번). 다시 계산한 번호판 수 반환"""
+    from django.db import connection, transaction
+
+    ensure_offender_tables()
+    with _rolled_lock:
+        if _rolled_days.get(apartment_id) == today:
+            return 0
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT rolled_day FROM {OFFENDER_STATE_TABLE} WHERE apartment_id = %s', [apartment_id]
+        )
+        row = cursor.fetchone()
+        rolled_day = row[0] if row else None
+        recalculated = 0
+        if rolled_day is not None and rolled_day < today:
+            # (rolled_day - w, today - w] 구간 날짜가 윈도우 w 에서 빠졌다
+            expired = ' OR '.join('(day > %s AND day <= %s)' for _ in OFFENDER_WINDOWS)
+            expired_params = [bound for window in OFFENDER_WINDOWS
+                              for bound in (rolled_day - window, today - window)]
+            cursor.execute(
+                f'UPDATE {OFFENDER_TABLE} SET {_window_sums_sql()} '
+                f'WHERE apartment_id = %s AND plate_normalized IN ('
+                f'SELECT plate_normalized FROM {OFFENDER_DAILY_TABLE} WHERE apartment_id = %s AND ({expired}))',
+                _window_sums_params(today) + [apartment_id, apartment_id] + expired_params
+            )
+            recalculated = cursor.rowcount
+            cursor.execute(
+                f'DELETE FROM {OFFENDER_DAILY_TABLE} WHERE apartment_id = %s AND day <= %s',
+                [apartment_id, today - MAX_WINDOW_DAYS]
+            )
+            cursor.execute(
+                f'DELETE FROM {OFFENDER_TABLE} WHERE apartment_id = %s AND incidents_{MAX_WINDOW_DAYS} = 0 '
+                f'AND actions_{MAX_WINDOW_DAYS} = 0',
+                [apartment_id]
+            )
+        if rolled_day is None or rolled_day < today:
+            cursor.execute(
+                f'INSERT INTO {OFFENDER_STATE_TABLE} (apartment_id, rolled_day) VALUES (%s, %s) '
+                f'ON CONFLICT (apartment_id) DO UPDATE SET rolled_day = excluded.rolled_day',
+                [apartment_id, today]
+            )
+
+    with _rolled_lock:
+        _rolled_days[apartment_id] = today
+    return recalculated
+
+
+def record_offence(apartment_id, plate_number, seen_at, incident, action):
+    """미등록 보고서 한 건 반영 - 호출한 쪽(scan_report_ingest)의 트랜잭션에 함께 묶인다
+
+    incident: 새 보고서면 True (중복 억제로 합쳐진 인식은 False)
+    action: 이번 보고로 처음 기록된 조치사항 ('' 이면 없음)
+    """
+    from django.db import connection
+
+    if not incident and not action:
+        return
+    today = kst_day(seen_at)
+    roll_windows(apartment_id, today)
+
+    plate = normalize_plate(plate_number)
+    incident_delta, action_delta = int(bool(incident)), int(bool(action))
+    counter_columns = ', '.join(f'incidents_{w}, actions_{w}' for w in OFFENDER_WINDOWS)
+    counter_values = ', '.join('%s, %s' for _ in OFFENDER_WINDOWS)
+    counter_updates = ', '.join(
+        f'incidents_{w} = {OFFENDER_TABLE}.incidents_{w} + excluded.incidents_{w}, '
+        f'actions_{w} = {OFFENDER_TABLE}.actions_{w} + excluded.actions_{w}'
+        for w in OFFENDER_WINDOWS
+    )
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'INSERT INTO {OFFENDER_DAILY_TABLE} (apartment_id, plate_normalized, day, incidents, actions) '
+            f'VALUES (%s, %s, %s, %s, %s) ON CONFLICT (apartment_id, plate_normalized, day) DO UPDATE SET '
+            f'incidents = {OFFENDER_DAILY_TABLE}.incidents + excluded.incidents, '
+            f'actions = {OFFENDER_DAILY_TABLE}.actions + excluded.actions',
+            [apartment_id, plate, today, incident_delta, action_delta]
+        )
+        cursor.execute(
+            f'INSERT INTO {OFFENDER_TABLE} (apartment_id, plate_normalized, plate_number, {counter_columns}, '
+            f'last_seen_at, last_action) VALUES (%s, %s, %s, {counter_values}, %s, %s) '
+            f'ON CONFLICT (apartment_id, plate_normalized) DO UPDATE SET {counter_updates}, '
+            f'plate_number = excluded.plate_number, '
+            f'last_seen_at = CASE WHEN {OFFENDER_TABLE}.last_seen_at < excluded.last_seen_at '
+            f'THEN excluded.last_seen_at ELSE {OFFENDER_TABLE}.last_seen_at END, '
+            f"last_action = CASE WHEN excluded.last_action = '' "
+            f'THEN {OFFENDER_TABLE}.last_action ELSE excluded.last_action END',
+            [apartment_id, plate, plate_number]
+            + [delta for _ in OFFENDER_WINDOWS for delta in (incident_delta, action_delta)]
+            + [seen_at, action]
+        )
+
+
+def ranked_offenders(apartment_id, window=DEFAULT_RANKING_WINDOW, limit=50, min_incidents=2, today=None):
+    """윈도우 안 인식 횟수 순 상습 미등록 차량 목록"""
+    from django.db import connection
+
+    if window not in OFFENDER_WINDOWS:
+        raise ValueError(f'window 는 {OFFENDER_WINDOWS} 중 하나입니다.')
+    roll_windows(apartment_id, today if today is not None else datetime.now(KST).date().toordinal())
+
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {", ".join(OFFENDER_COLUMNS)} FROM {OFFENDER_TABLE} '
+            f'WHERE apartment_id = %s AND incidents_{window} >= %s '
+            f'ORDER BY incidents_{window} DESC, last_seen_at DESC LIMIT %s',
+            [apartment_id, min_incidents, max(1, min(int(limit), MAX_RANKING_LIMIT))]
+        )
+        rows = cursor.fetchall()
+
+    return [
+        {
+            'rank': rank,
+            'plateNumber': plate_number,
+            'incidents': {'7d': i7, '30d': i30, '90d': i90},
+            'actions': {'7d': a7, '30d': a30, '90d': a90},
+            'lastSeen': datetime.fromtimestamp(last_seen_at / 1000, KST).isoformat(timespec='seconds'),
+            'lastAction': last_action,
+        }
+        for rank, (plate_number, i7, i30, i90, a7, a30, a90, last_seen_at, last_action) in enumerate(rows, 1)
+    ]
+
+
+def rebuild_offenders(apartment_id=None):
+    """스캔 보고서(월별 파티션)에서 일별 버킷과 카운터를 다시 만든다 (최초 도입/검증용). 번호판 수 반환"""
+    from django.db import connection, transaction
+
+    from scan_report_partitions import partitions_for_range
+
+    today = datetime.now(KST).date().toordinal()
+    since_ms = int(datetime.combine(
+        date.fromordinal(today - MAX_WINDOW_DAYS + 1), datetime.min.time(), tzinfo=KST
+    ).timestamp() * 1000)
+    where, params = 'is_registered = %s AND first_seen_at >= %s', [False, since_ms]
+    if apartment_id is not None:
+        where += ' AND apartment_id = %s'
+        params.append(apartment_id)
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        scope, scope_params = ('WHERE apartment_id = %s', [apartment_id]) if apartment_id is not None else ('', [])
+        for table in (OFFENDER_DAILY_TABLE, OFFENDER_TABLE, OFFENDER_STATE_TABLE):
+            cursor.execute(f'DELETE FROM {table} {scope}', scope_params)
+        rows = []
+        # 최근 MAX_WINDOW_DAYS 에 걸친 달 파티션만 읽는다
+        for table in partitions_for_range(since_ms, int(time.time() * 1000) + 1):
+            cursor.execute(
+                f'SELECT apartment_id, plate_number, first_seen_at, last_seen_at, action_taken '
+                f'FROM {table} WHERE {where}',
+                params
+            )
+            rows.extend(cursor.fetchall())
+        rows.sort(key=lambda row: row[2])
+
+    with _rolled_lock:
+        _rolled_days.clear()
+    with transaction.atomic():
+        for row_apartment_id, plate_number, first_seen_at, last_seen_at, action_taken in rows:
+            record_offence(row_apartment_id, plate_number, first_seen_at, True, action_taken)
+    return len({(row[0], normalize_plate(row[1])) for row in rows})
+
+
+def repeat_offenders_api(request):
+    """GET /api/repeat-offenders/?window=30&limit=50 - 사용자 아파트의 상습 미등록 차량 순위"""
+    from vehicles.views import api_auth_required
+
+    from fast_serializers import json_response
+    from request_scope import get_request_scope
+
+    @api_auth_required
+    def _view(request):
+        scope = get_request_scope(request)
+        if not scope.can_manage:
+            return json_response({'success': False, 'error': '관리단 권한이 필요합니다.'}, status=403)
+        apartment_id = scope.apartment_id
+        if not apartment_id:
+            return json_response({'error': '아파트 정보가 없습니다.'}, status=400)
+        try:
+            window = int(request.GET.get('window', DEFAULT_RANKING_WINDOW))
+            limit = int(request.GET.get('limit', 50))
+            min_incidents = int(request.GET.get('min', 2))
+            offenders = ranked_offenders(apartment_id, window, limit, min_incidents)
+        except ValueError as e:
+            return json_response({'success': False, 'error': str(e)}, status=400)
+
+        return json_response({
+            'success': True,
+            'window': window,
+            'offenders': offenders,
+            'count': len(offenders),
+        })
+
+    return _view(request)
+
+
+def main():
+    print("=" * 60)
+    print("🚨 상습 미등록 차량 집계")
+    print("=" * 60)
+
+    args = sys.argv[1:]
+    if not setup_django():
+        return
+    ensure_offender_tables()
+
+    if '--rebuild' in args:
+        print(f"   ✅ 번호판 {rebuild_offenders()}개 재계산 완료")
+        return
+
+    apartment_ids = [int(a) for i, a in enumerate(args) if a.isdigit() and (i == 0 or args[i - 1] != '--window')]
+    if not apartment_ids:
+        print("사용법: python3 repeat_offenders.py [<apartment_id> [--window 7|30|90] | --rebuild]")
+        return
+    window = int(args[args.index('--window') + 1]) if '--window' in args else DEFAULT_RANKING_WINDOW
+    for offender in ranked_offenders(apartment_ids[0], window, min_incidents=1):
+        print(f"   {offender['rank']:3d}. {offender['plateNumber']:<12} "
+              f"7일 {offender['incidents']['7d']:3d} | 30일 {offender['incidents']['30d']:3d} | "
+              f"90일 {offender['incidents']['90d']:3d} | 조치 {offender['actions']['30d']}회 | {offender['lastSeen']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,161 @@
+#!/usr/bin/env python3
+"""
+동일 요청 합치기 (single-flight) + 아파트별 동시 요청 제한
+아침 교대 시간에 같은 아파트 단말 수십 대가 같은 초에 /api/comprehensive/ 를 호출하면
+각자 같은 쿼리를 모두 실행한다. 같은 키(아파트, 권한 범위)의 요청이 진행 중이면
+새 요청은 그 계산이 끝나기를 기다렸다가 직렬화된 bytes 를 그대로 받아 쓴다.
+
+합치기는 프로세스 단위다 (gunicorn 워커가 여러 개면 워커마다 최대 한 번씩 계산).
+아파트별 제한을 넘으면 429 + Retry-After 로 바로 돌려보내 워커가 대기열에 묶이지 않게 한다.
+
+    from request_coalescing import comprehensive_flight, apartment_limiter
+    with apartment_limiter.slot(apartment_id) as acquired:
+        if not acquired:
+            return retry_after_response(apartment_limiter.retry_after)
+        body, shared = comprehensive_flight.do(key, build_bytes)
+"""
+
+import asyncio
+import os
+import threading
+from contextlib import contextmanager
+
+# 아파트 하나당 동시에 처리(대기 포함)하는 요청 수
+APARTMENT_MAX_CONCURRENT = int(os.environ.get('APTGO_APARTMENT_MAX_CONCURRENT', '16'))
+APARTMENT_RETRY_AFTER_SECONDS = int(os.environ.get('APTGO_APARTMENT_RETRY_AFTER', '2'))
+
+
+class _Call:
+    __slots__ = ('done', 'value', 'error', 'waiters')
+
+    def __init__(self):
+        self.done = threading.Event()
+        self.value = None
+        self.error = None
+        self.waiters = 0
+
+
+class SingleFlight:
+    """키별로 진행 중인 계산 하나를 공유"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    def do(self, key, fn):
+        """fn() 결과 반환 -> (value, shared). 진행 중인 같은 키가 있으면 그 결과를 기다린다
+
+        fn 이 예외를 내면 기다리던 요청 모두 같은 예외를 받는다.
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is not None:
+                call.waiters += 1
+                leader = False
+            else:
+                call = _Call()
+                self._calls[key] = call
+                leader = True
+
+        if not leader:
+            call.done.wait()
+            if call.error is not None:
+                raise call.error
+            return call.value, True
+
+        try:
+            call.value = fn()
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            # 완료 후에 온 요청은 새로 계산 (오래된 결과를 공유하지 않도록 즉시 제거)
+            with self._lock:
+                self._calls.pop(key, None)
+            call.done.set()
+        return call.value, False
+
+    def in_flight(self):
+        with self._lock:
+            return {key: call.waiters for key, call in self._calls.items()}
+
+
+class AsyncSingleFlight:
+    """SingleFlight 의 asyncio 버전 (ASGI 뷰용) - 기다리는 동안 이벤트 루프를 막지 않는다"""
+
+    def __init__(self):
+        self._tasks = {}
+
+    async def do(self, key, coro_fn):
+        """await coro_fn() 결과 반환 -> (value, shared)
+
+        계산은 별도 Task 로 돌리고 모두 shield 로 기다리므로, 먼저 온 요청의
+        클라이언트가 끊겨도 계산은 끝까지 진행되어 나머지 요청이 결과를 받는다.
+        """
+        task = self._tasks.get(key)
+        if task is not None:
+            return await asyncio.shield(task), True
+
+        task = asyncio.ensure_future(coro_fn())
+        self._tasks[key] = task
+        task.add_done_callback(lambda done: self._finish(key, done))
+        return await asyncio.shield(task), False
+
+    def _finish(self, key, task):
+        if self._tasks.get(key) is task:
+            del self._tasks[key]
+        # 기다리는 요청이 모두 취소된 경우 'exception was never retrieved' 경고 방지
+        if not task.cancelled():
+            task.exception()
+
+
+class ApartmentLimiter:
+    """아파트별 동시 요청 수 제한 (대기 없이 즉시 성공/실패)"""
+
+    def __init__(self, max_concurrent=APARTMENT_MAX_CONCURRENT, retry_after=APARTMENT_RETRY_AFTER_SECONDS):
+        self.max_concurrent = max_concurrent
+        self.retry_after = retry_after
+        self._lock = threading.Lock()
+        self._active = {}
+
+    @contextmanager
+    def slot(self, apartment_id):
+        """with 블록 동안 자리 하나 점유. 꽉 찼으면 False 를 넘긴다"""
+        with self._lock:
+            active = self._active.get(apartment_id, 0)
+            acquired = active < self.max_concurrent
+            if acquired:
+                self._active[apartment_id] = active + 1
+        try:
+            yield acquired
+        finally:
+            if acquired:
+                with self._lock:
+                    remaining = self._active[apartment_id] - 1
+                    if remaining:
+                        self._active[apartment_id] = remaining
+                    else:
+                        del self._active[apartment_id]
+
+    def active(self, apartment_id):
+        with self._lock:
+            return self._active.get(apartment_id, 0)
+
+
+def retry_after_response(seconds):
+    """429 + Retry-After 응답"""
+    from fast_serializers import json_response
+
+    response = json_response({
+        'success': False,
+        'error': '요청이 많습니다. 잠시 후 다시 시도해주세요.',
+        'retryAfter': seconds,
+    }, status=429)
+    response['Retry-After'] = str(seconds)
+    return response
+
+
+# 프로세스 전역 인스턴스
+comprehensive_flight = SingleFlight()
+comprehensive_async_flight = AsyncSingleFlight()
+apartment_limiter = ApartmentLimiter()
@@ -0,0 +1,318 @@
+#!/usr/bin/env python3
+"""
+요청 단위 샘플링 프로파일러
+fix_*.py 처럼 계측 코드를 넣은 views.py 를 다시 배포하지 않고, 운영 데이터 그대로
+comprehensive_vehicle_data_api 같은 뷰 한 요청만 프로파일링한다.
+
+켜는 방법 (둘 중 하나)
+- 관리자(ROLE_ADMIN) 세션으로 요청 URL 에 ?__profile=1
+- X-Aptgo-Profile: <서명 토큰> 헤더 - 토큰 인증 앱 API 용. python3 request_profiler.py --sign <관리자 아이디>
+  로 발급, PROFILE_TOKEN_MAX_AGE 동안 유효 (SECRET_KEY 로 서명하므로 위조 불가).
+  토큰 인증은 뷰 안에서 끝나므로 샘플링은 먼저 시작하고, 응답 뒤 요청 사용자가 토큰을 발급받은
+  관리자 본인일 때만 저장한다 (아니면 결과를 버린다).
+
+켜진 요청만 별도 스레드가 PROFILE_INTERVAL 간격으로 요청 스레드의 호출 스택을 읽는다
+(sys._current_frames). 뷰 코드에는 손대지 않고, 꺼진 요청의 비용은 헤더/쿼리 확인뿐이다.
+결과는 PROFILE_DIR/<뷰>_<시각>.speedscope.json 으로 저장하며 https://www.speedscope.app 에서
+불꽃 그래프(Left Heavy)와 시간순(Time Order)으로 볼 수 있다. 응답 헤더 X-Profile-File 에 파일 이름이 실린다.
+스트리밍 응답(내보내기 등)은 본문을 끝까지 보낸 뒤에 저장한다.
+PROFILE_DIR 에는 최근 PROFILE_MAX_FILES 개, PROFILE_MAX_AGE_DAYS 일 이내 파일만 남긴다.
+
+settings.MIDDLEWARE 에 'request_profiler.ProfilerMiddleware' 추가 (RequestScopeMiddleware 뒤).
+동기 요청 전용 - ASGI 뷰는 이벤트 루프 스레드를 다른 요청과 공유하므로 스택이 섞인다.
+"""
+
+import json
+import os
+import re
+import sys
+import threading
+import time
+from datetime import datetime
+
+PROFILE_DIR = os.environ.get('APTGO_PROFILE_DIR', '/tmp/aptgo-profiles')
+PROFILE_INTERVAL = 0.001
+PROFILE_MAX_SECONDS = 60
+PROFILE_QUERY_FLAG = '__profile'
+PROFILE_HEADER = 'X-Aptgo-Profile'
+PROFILE_TOKEN_SALT = 'request_profiler'
+PROFILE_TOKEN_MAX_AGE = 3600
+PROFILE_MAX_FILES = int(os.environ.get('APTGO_PROFILE_MAX_FILES', '200'))
+PROFILE_MAX_AGE_DAYS = 7
+# 한 파일에 남길 최대 스택 깊이 (깊은 재귀로 파일이 커지는 것 방지)
+MAX_STACK_DEPTH = 128
+
+_SAFE_NAME = re.compile(r'[^A-Za-z0-9_.-]+')
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+class SamplingProfiler:
+    """대상 스레드의 스택을 주기적으로 읽어 (스택, 경과 시간) 샘플로 모은다"""
+
+    def __init__(self, thread_id, interval=PROFILE_INTERVAL, max_seconds=PROFILE_MAX_SECONDS):
+        self.thread_id = thread_id
+        self.interval = interval
+        self.max_seconds = max_seconds
+        self.frames = []
+        self.frame_index = {}
+        self.samples = []
+        self.weights = []
+        self.started = None
+        self.elapsed = 0.0
+        self._stop = threading.Event()
+        self._thread = None
+
+    def _frame_id(self, code):
+        key = (code.co_name, code.co_filename, code.co_firstlineno)
+        index = self.frame_index.get(key)
+        if index is None:
+            index = self.frame_index[key] = len(self.frames)
+            self.frames.append({'name': code.co_name, 'file': code.co_filename, 'line': code.co_firstlineno})
+        return index
+
+    def _sample(self, weight):
+        frame = sys._current_frames().get(self.thread_id)
+        stack = []
+        while frame is not None and len(stack) < MAX_STACK_DEPTH:
+            stack.append(self._frame_id(frame.f_code))
+            frame = frame.f_back
+        if stack:
+            stack.reverse()
+            self.samples.append(stack)
+            self.weights.append(weight)
+
+    def _run(self):
+        last = time.perf_counter()
+        deadline = last + self.max_seconds
+        while not self._stop.wait(self.interval):
+            now = time.perf_counter()
+            if now > deadline:
+                break
+            self._sample(now - last)
+            last = now
+
+    def start(self):
+        self.started = time.perf_counter()
+        self._thread = threading.Thread(target=self._run, name='request-profiler', daemon=True)
+        self._thread.start()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self.elapsed = time.perf_counter() - self.started
+
+    def speedscope(self, name):
+        """speedscope 파일 형식 (sampled 프로파일, 단위 초)"""
+        return {
+            '$schema': 'https://www.speedscope.app/file-format-schema.json',
+            'shared': {'frames': self.frames},
+            'profiles': [{
+                'type': 'sampled',
+                'name': name,
+                'unit': 'seconds',
+                'startValue': 0,
+                'endValue': sum(self.weights),
+                'samples': self.samples,
+                'weights': self.weights,
+            }],
+            'name': name,
+            'exporter': 'aptgo request_profiler',
+        }
+
+
+def profile_filename(view, when=None):
+    when = when or datetime.now()
+    return f"{_SAFE_NAME.sub('_', view)}_{when:%Y%m%d-%H%M%S-%f}.speedscope.json"
+
+
+def prune_profiles(max_files=PROFILE_MAX_FILES, max_age_days=PROFILE_MAX_AGE_DAYS):
+    """오래된/개수를 넘는 프로파일 삭제 (최신부터 max_files 개 유지). 삭제 건수 반환"""
+    if not os.path.isdir(PROFILE_DIR):
+        return 0
+    entries = []
+    for name in os.listdir(PROFILE_DIR):
+        if name.endswith('.speedscope.json'):
+            path = os.path.join(PROFILE_DIR, name)
+            try:
+                entries.append((os.path.getmtime(path), path))
+            except OSError:
+                continue
+    entries.sort(reverse=True)
+    cutoff = time.time() - max_age_days * 86400
+    removed = 0
+    for index, (mtime, path) in enumerate(entries):
+        if index >= max_files or mtime < cutoff:
+            try:
+                os.remove(path)
+                removed += 1
+            except OSError:
+                continue
+    return removed
+
+
+def save_profile(profiler, view, path, filename=None):
+    os.makedirs(PROFILE_DIR, exist_ok=True)
+    filename = filename or profile_filename(view)
+    data = profiler.speedscope(f'{view} {path} ({profiler.elapsed * 1000:.0f}ms, {len(profiler.samples)} samples)')
+    tmp_path = os.path.join(PROFILE_DIR, f'.{filename}.tmp')
+    with open(tmp_path, 'w', encoding='utf-8') as f:
+        json.dump(data, f, separators=(',', ':'))
+    os.replace(tmp_path, os.path.join(PROFILE_DIR, filename))
+    prune_profiles()
+    return filename
+
+
+def sign_profile_token(user_id):
+    """X-Aptgo-Profile 헤더 값 발급 - 발급받은 관리자 본인의 요청에서만 유효"""
+    from django.core import signing
+
+    return signing.TimestampSigner(salt=PROFILE_TOKEN_SALT).sign(f'profile:{user_id}')
+
+
+def _token_user_id(token):
+    """유효한 토큰이면 발급 대상 사용자 id, 아니면 None"""
+    from django.core import signing
+
+    try:
+        value = signing.TimestampSigner(salt=PROFILE_TOKEN_SALT).unsign(token, max_age=PROFILE_TOKEN_MAX_AGE)
+    except signing.BadSignature:
+        return None
+    kind, _, user_id = value.partition(':')
+    return int(user_id) if kind == 'profile' and user_id.isdigit() else None
+
+
+def _is_admin(request, user_id=None):
+    from request_scope import get_request_scope
+
+    scope = get_request_scope(request)
+    return scope.is_admin and (user_id is None or scope.user_id == user_id)
+
+
+def profiling_requested(request):
+    """샘플링을 시작할지 - (시작 여부, 응답 뒤 확인할 토큰 사용자 id)"""
+    token = request.headers.get(PROFILE_HEADER)
+    if token:
+        user_id = _token_user_id(token)
+        return user_id is not None, user_id
+    if request.GET.get(PROFILE_QUERY_FLAG) != '1':
+        return False, None
+    return _is_admin(request), None
+
+
+class ProfilerMiddleware:
+    """요청한 경우에만 이 요청 스레드를 샘플링해 speedscope 파일로 저장
+
+    async 요청(ASGI)은 한 스레드에 묶이지 않아 샘플링할 수 없으므로 그대로 통과시킨다.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.get_response(request)
+        requested, token_user_id = profiling_requested(request)
+        if not requested:
+            return self.get_response(request)
+
+        from app_metrics import view_label
+
+        profiler = SamplingProfiler(threading.get_ident())
+        profiler.start()
+        try:
+            response = self.get_response(request)
+        except BaseException:
+            profiler.stop()
+            raise
+        if token_user_id is not None and not _is_admin(request, token_user_id):
+            # 토큰 발급 대상 관리자가 아닌 요청 - 결과를 버린다
+            profiler.stop()
+            return response
+        view = view_label(request)
+        if getattr(response, 'streaming', False) and not getattr(response, 'is_async', False):
+            filename = profile_filename(view)
+            response.streaming_content = self._profiled_stream(response.streaming_content, profiler, view, request.path, filename)
+            response['X-Profile-File'] = filename
+            return response
+        profiler.stop()
+        try:
+            response['X-Profile-File'] = save_profile(profiler, view, request.path)
+        except OSError as e:
+            response['X-Profile-Error'] = str(e)[:200]
+        return response
+
+    @staticmethod
+    def _profiled_stream(content, profiler, view, path, filename):
+        """본문 전송이 끝날 때(또는 클라이언트가 끊을 때) 샘플링을 멈추고 저장"""
+        try:
+            yield from content
+        finally:
+            profiler.stop()
+            try:
+                save_profile(profiler, view, path, filename)
+            except OSError as e:
+                print(f"⚠️ 프로파일 저장 실패 ({filename}): {e}")
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='요청 단위 프로파일러')
+    parser.add_argument('--sign', metavar='USERNAME', help=f'관리자 계정용 {PROFILE_HEADER} 헤더 토큰 발급')
+    parser.add_argument('--prune', action='store_true', help='오래된 프로파일 정리')
+    parser.add_argument('--list', action='store_true', help='저장된 프로파일 목록')
+    args = parser.parse_args()
+
+    print("🔬 요청 프로파일러")
+    print("=" * 60)
+    if args.list:
+        names = sorted(
+            (name for name in os.listdir(PROFILE_DIR) if name.endswith('.speedscope.json')),
+            key=lambda name: os.path.getmtime(os.path.join(PROFILE_DIR, name)),
+            reverse=True,
+        ) if os.path.isdir(PROFILE_DIR) else []
+        for name in names:
+            print(f"   {name} ({os.path.getsize(os.path.join(PROFILE_DIR, name)) // 1024}KB)")
+        print(f"📁 {PROFILE_DIR}: {len(names)}개")
+        return
+    if args.prune:
+        print(f"🧹 {prune_profiles()}개 삭제 (최근 {PROFILE_MAX_FILES}개, {PROFILE_MAX_AGE_DAYS}일 이내만 유지)")
+        return
+    if args.sign:
+        if not setup_django():
+            return
+        from django.contrib.auth import get_user_model
+        from request_scope import load_scope
+
+        user = get_user_model().objects.filter(username=args.sign).first()
+        if user is None or not load_scope(user.pk).is_admin:
+            print(f"❌ 관리자 계정이 아닙니다: {args.sign}")
+            return
+        print(f"✅ {args.sign} 본인 요청에서 {PROFILE_TOKEN_MAX_AGE // 60}분 동안 유효:")
+        print(f"   curl -H '{PROFILE_HEADER}: {sign_profile_token(user.pk)}' -H 'Authorization: Token ...' <URL>")
+        return
+    parser.print_help()
+
+
+if __name__ == '__main__':
+    main()
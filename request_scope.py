@@ -0,0 +1,255 @@
+#!/usr/bin/env python3
+"""
+요청 권한 범위(scope) 해석 + 사용자별 캐시
+뷰마다 user.parent_account.apartment 를 따라가며 (부아이디는 지연 쿼리 2번 추가)
+user_type/is_manager 분기를 반복하던 것을 한 곳으로 모은다.
+
+RequestScope 는 변경 불가능한 namedtuple 이다:
+    user_id, username, user_type
+    role             'admin' | 'main' | 'manager' | 'sub' | 'none'
+    main_account_id  실제 데이터 주인 (메인 계정 본인 / 부아이디의 부모), admin 은 None
+    main_username
+    apartment_id, apartment_name
+    data_scope       'apartment' (아파트 전체) | 'own' (본인이 등록한 것만) | 'none'
+
+사용자 id 별로 Django 캐시에 저장하고, User/Apartment 가 바뀌면 관련 사용자 캐시를 지운다
+(connect_scope_signals). 한 요청 안에서는 request 에 보관해 다시 계산하지 않는다.
+
+settings.MIDDLEWARE 에 'request_scope.RequestScopeMiddleware' 를 AuthenticationMiddleware 뒤에 추가하면
+대시보드 뷰/템플릿에서 request.scope.apartment_id 처럼 쓸 수 있다.
+토큰 인증(api_auth_required) 뷰는 인증이 뷰 안에서 끝나므로 get_request_scope(request) 를 호출한다.
+"""
+
+from collections import namedtuple
+
+from app_metrics import record_cache
+
+SCOPE_CACHE_PREFIX = 'request_scope:v1:'
+SCOPE_CACHE_SECONDS = 600
+
+ROLE_ADMIN = 'admin'
+ROLE_MAIN = 'main'
+ROLE_MANAGER = 'manager'
+ROLE_SUB = 'sub'
+ROLE_NONE = 'none'
+
+DATA_SCOPE_APARTMENT = 'apartment'
+DATA_SCOPE_OWN = 'own'
+DATA_SCOPE_NONE = 'none'
+
+SCOPE_FIELDS = (
+    'user_id', 'username', 'user_type', 'role', 'main_account_id', 'main_username',
+    'apartment_id', 'apartment_name', 'data_scope',
+)
+
+
+class RequestScope(namedtuple('RequestScope', SCOPE_FIELDS)):
+    """한 사용자의 권한 범위 (변경 불가)"""
+
+    __slots__ = ()
+
+    @property
+    def is_authenticated(self):
+        return self.user_id is not None
+
+    @property
+    def can_manage(self):
+        """관리 데이터 (comprehensive, 스냅샷, 내보내기, 상습 차량) 접근 가능 여부"""
+        return self.role in (ROLE_ADMIN, ROLE_MAIN, ROLE_MANAGER)
+
+    @property
+    def is_admin(self):
+        return self.role == ROLE_ADMIN
+
+
+# build_scope 가 읽는 User 필드 - 이 중 하나라도 바뀐 저장만 scope 캐시를 지운다
+SCOPE_USER_FIELDS = ('username', 'user_type', 'apartment_id', 'parent_account_id', 'is_manager')
+# 메인 계정에서 부아이디 scope 로 넘어가는 필드 (main_username, apartment_id) - 바뀔 때만 부아이디까지 지운다
+SCOPE_FANOUT_FIELDS = ('username', 'user_type', 'apartment_id')
+# 로그인마다 last_login 만 저장한다 (django.contrib.auth)
+LAST_LOGIN_ONLY = frozenset({'last_login'})
+
+_NOT_LOADED = object()
+
+ANONYMOUS_SCOPE = RequestScope(None, '', '', ROLE_NONE, None, '', None, '', DATA_SCOPE_NONE)
+
+
+def build_scope(user):
+    """User (apartment, parent_account__apartment select_related) -> RequestScope"""
+    if user.user_type in ('admin', 'super_admin'):
+        role, main_user, apartment = ROLE_ADMIN, None, user.apartment
+    elif user.user_type == 'main_account':
+        role, main_user, apartment = ROLE_MAIN, user, user.apartment
+    elif user.user_type == 'sub_account':
+        role = ROLE_MANAGER if getattr(user, 'is_manager', False) else ROLE_SUB
+        main_user = user.parent_account
+        apartment = main_user.apartment if main_user else None
+    else:
+        role, main_user, apartment = ROLE_NONE, None, None
+
+    if role in (ROLE_ADMIN, ROLE_MAIN):
+        data_scope = DATA_SCOPE_APARTMENT
+    elif role in (ROLE_MANAGER, ROLE_SUB):
+        data_scope = DATA_SCOPE_OWN
+    else:
+        data_scope = DATA_SCOPE_NONE
+
+    return RequestScope(
+        user_id=user.pk,
+        username=user.username,
+        user_type=user.user_type,
+        role=role,
+        main_account_id=main_user.pk if main_user else None,
+        main_username=main_user.username if main_user else '',
+        apartment_id=apartment.pk if apartment else None,
+        apartment_name=str(apartment) if apartment else '',
+        data_scope=data_scope,
+    )
+
+
+def _cache_key(user_id):
+    return f'{SCOPE_CACHE_PREFIX}{user_id}'
+
+
+def load_scope(user_id):
+    """사용자 id -> RequestScope (캐시 우선, 없으면 쿼리 1번). 없는 사용자면 ANONYMOUS_SCOPE"""
+    from django.core.cache import cache
+
+    from accounts.models import User
+
+    key = _cache_key(user_id)
+    cached = cache.get(key)
+    record_cache('request_scope', cached is not None)
+    if cached is not None:
+        return RequestScope(*cached)
+
+    user = User.objects.select_related('apartment', 'parent_account__apartment').filter(pk=user_id).first()
+    if user is None:
+        return ANONYMOUS_SCOPE
+    scope = build_scope(user)
+    # 캐시 백엔드 직렬화에 의존하지 않도록 plain tuple 로 저장
+    cache.set(key, tuple(scope), SCOPE_CACHE_SECONDS)
+    return scope
+
+
+def get_request_scope(request):
+    """요청 사용자의 RequestScope - 요청당 한 번만 해석 (인증 후 사용자가 바뀌면 다시 해석)"""
+    user = getattr(request, 'user', None)
+    user_id = user.pk if user is not None and user.is_authenticated else None
+    scope = request.__dict__.get('_request_scope')
+    if scope is None or scope.user_id != user_id:
+        scope = load_scope(user_id) if user_id is not None else ANONYMOUS_SCOPE
+        request._request_scope = scope
+    return scope
+
+
+def invalidate_scopes(user_ids):
+    from django.core.cache import cache
+
+    keys = [_cache_key(user_id) for user_id in user_ids if user_id is not None]
+    if keys:
+        cache.delete_many(keys)
+
+
+class _ScopeAccessor:
+    """request.scope - 속성을 읽을 때마다 현재 인증 사용자 기준 scope 로 위임"""
+
+    __slots__ = ('_request',)
+
+    def __init__(self, request):
+        self._request = request
+
+    def __getattr__(self, name):
+        return getattr(get_request_scope(self._request), name)
+
+    def __repr__(self):
+        return repr(get_request_scope(self._request))
+
+
+class RequestScopeMiddleware:
+    """request.scope 제공 (AuthenticationMiddleware 뒤에 둔다)
+
+    ASGI 에서도 async 체인을 끊지 않는다. request.scope 는 속성을 읽을 때 DB/캐시를 볼 수 있으므로
+    async 뷰에서는 sync_to_async(get_request_scope) 로 꺼낸다.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        request.scope = _ScopeAccessor(request)
+        return self.get_response(request)
+
+    async def __acall__(self, request):
+        request.scope = _ScopeAccessor(request)
+        return await self.get_response(request)
+
+
+def connect_scope_signals():
+    """AppConfig.ready() 에서 한 번 호출 - 계정 연결/아파트가 바뀌면 관련 사용자 scope 캐시 삭제"""
+    from django.db import transaction
+    from django.db.models.signals import post_delete, post_init, post_save
+
+    from accounts.models import Apartment, User
+
+    def remember_scope_fields(sender, instance, **kwargs):
+        # 불러온 시점 값 - 저장 때 scope 에 영향을 주는 필드가 실제로 바뀌었는지 비교
+        # (지연 로딩 필드는 '모름', 모델에 없는 필드(is_manager 등)는 None)
+        values = instance.__dict__
+        instance._scope_loaded = {
+            field: values[field] if field in values else _NOT_LOADED if hasattr(sender, field) else None
+            for field in SCOPE_USER_FIELDS
+        }
+
+    def changed_fields(instance, created):
+        loaded = getattr(instance, '_scope_loaded', None)
+        if created or loaded is None:
+            return set(SCOPE_USER_FIELDS)
+        return {
+            field for field in SCOPE_USER_FIELDS
+            if loaded[field] is _NOT_LOADED or loaded[field] != getattr(instance, field, None)
+        }
+
+    def invalidate_user(instance, changed):
+        if not changed:
+            return
+        user_ids = [instance.pk]
+        if instance.user_type == 'main_account' and changed & set(SCOPE_FANOUT_FIELDS):
+            # 메인 계정의 아파트/이름은 부아이디 scope 에도 들어 있다
+            user_ids.extend(User.objects.filter(parent_account_id=instance.pk).values_list('pk', flat=True))
+        transaction.on_commit(lambda: invalidate_scopes(user_ids))
+
+    def user_saved(sender, instance, created, update_fields=None, **kwargs):
+        # 로그인(last_login 만 저장)은 scope 와 무관
+        if update_fields and set(update_fields) <= LAST_LOGIN_ONLY:
+            return
+        changed = changed_fields(instance, created)
+        remember_scope_fields(sender, instance)
+        invalidate_user(instance, changed)
+
+    def user_deleted(sender, instance, **kwargs):
+        invalidate_user(instance, set(SCOPE_USER_FIELDS))
+
+    def apartment_changed(sender, instance, **kwargs):
+        from django.db.models import Q
+
+        user_ids = list(User.objects.filter(
+            Q(apartment_id=instance.pk) | Q(parent_account__apartment_id=instance.pk)
+        ).values_list('pk', flat=True))
+        transaction.on_commit(lambda: invalidate_scopes(user_ids))
+
+    post_init.connect(remember_scope_fields, sender=User, dispatch_uid='request_scope_user_loaded')
+    post_save.connect(user_saved, sender=User, dispatch_uid='request_scope_user_saved')
+    post_delete.connect(user_deleted, sender=User, dispatch_uid='request_scope_user_deleted')
+    post_save.connect(apartment_changed, sender=Apartment, dispatch_uid='request_scope_apartment_saved')
+    post_delete.connect(apartment_changed, sender=Apartment, dispatch_uid='request_scope_apartment_deleted')
@@ -0,0 +1,223 @@
+#!/usr/bin/env python3
+"""
+응답 압축 (brotli / gzip 협상)
+comprehensive / 방문차량 JSON 은 프록시 설정에 따라 압축 없이 내려가는 경우가 많아
+Django 에서 직접 Accept-Encoding 을 보고 brotli(설치된 경우) 또는 gzip 으로 압축한다.
+
+공유/캐시되는 본문은 CompressedPayload 에 원본과 함께 압축 결과를 보관해
+같은 본문에 대한 두 번째 요청부터는 압축 CPU 를 쓰지 않는다.
+(coalescing 으로 공유되는 comprehensive 본문, Django 캐시에 담는 방문차량 본문,
+ 스냅샷 파일 옆의 .br/.gz 파일)
+payload_response 는 원본 본문 해시로 약한 ETag 를 붙이고 If-None-Match 가 맞으면 304 를 준다.
+
+    from response_compression import CompressedPayload, payload_response
+    return payload_response(request, CompressedPayload(body))
+
+그 밖의 JSON 응답은 settings.MIDDLEWARE 에
+'response_compression.CompressionMiddleware' 를 추가하면 같은 규칙으로 압축된다.
+"""
+
+import gzip
+import hashlib
+import os
+import re
+import threading
+
+try:
+    import brotli
+except ImportError:
+    brotli = None
+
+# 이보다 작은 본문은 압축 이득보다 헤더/CPU 비용이 크다
+MIN_COMPRESS_SIZE = 1024
+
+# 요청마다 압축하는 본문은 빠른 설정, 한 번 만들어 오래 쓰는 파일은 최대 압축
+DYNAMIC_BROTLI_QUALITY = 5
+DYNAMIC_GZIP_LEVEL = 6
+STATIC_BROTLI_QUALITY = 11
+STATIC_GZIP_LEVEL = 9
+
+COMPRESSIBLE_TYPES = ('application/json', 'text/', 'application/javascript', 'image/svg+xml')
+
+_ACCEPT_PATTERN = re.compile(r'\s*([^\s;,]+)\s*(?:;\s*q\s*=\s*([0-9.]+))?')
+
+
+def supported_encodings():
+    """서버가 만들 수 있는 인코딩 (선호 순)"""
+    return ('br', 'gzip') if brotli is not None else ('gzip',)
+
+
+def negotiate_encoding(accept_encoding):
+    """Accept-Encoding 헤더 -> 'br' / 'gzip' / None (q=0 은 거부로 처리)"""
+    if not accept_encoding:
+        return None
+    accepted = {}
+    for match in _ACCEPT_PATTERN.finditer(accept_encoding):
+        name, quality = match.group(1).lower(), match.group(2)
+        try:
+            accepted[name] = float(quality) if quality is not None else 1.0
+        except ValueError:
+            continue
+    wildcard = accepted.get('*', 0.0)
+    best, best_quality = None, 0.0
+    for encoding in supported_encodings():
+        quality = accepted.get(encoding, wildcard)
+        # 같은 q 면 supported_encodings 순서(brotli 우선)
+        if quality > best_quality:
+            best, best_quality = encoding, quality
+    return best
+
+
+def compress_bytes(data, encoding, static=False):
+    """bytes -> 압축 bytes"""
+    if encoding == 'br':
+        return brotli.compress(data, quality=STATIC_BROTLI_QUALITY if static else DYNAMIC_BROTLI_QUALITY)
+    if encoding == 'gzip':
+        # mtime=0: 같은 본문이면 같은 결과 (ETag 안정)
+        return gzip.compress(data, compresslevel=STATIC_GZIP_LEVEL if static else DYNAMIC_GZIP_LEVEL, mtime=0)
+    raise ValueError(f'지원하지 않는 인코딩: {encoding}')
+
+
+class CompressedPayload:
+    """원본 본문 + 인코딩별 압축 결과 (처음 요청될 때 한 번만 압축)"""
+
+    __slots__ = ('raw', '_variants', '_lock', '_etag')
+
+    def __init__(self, raw):
+        self.raw = raw
+        self._variants = {}
+        self._lock = threading.Lock()
+        self._etag = None
+
+    @property
+    def etag(self):
+        if self._etag is None:
+            self._etag = hashlib.sha1(self.raw).hexdigest()
+        return self._etag
+
+    def __getstate__(self):
+        # Django 캐시(pickle)에 담을 때 Lock 은 빼고 원본 + 압축 결과만
+        return self.raw, dict(self._variants)
+
+    def __setstate__(self, state):
+        self.raw, variants = state
+        self._variants = dict(variants)
+        self._lock = threading.Lock()
+        self._etag = None
+
+    def precompress(self):
+        """지원하는 모든 인코딩을 미리 압축 (캐시에 넣기 전에 호출)"""
+        for encoding in supported_encodings():
+            self.variant(encoding)
+        return self
+
+    def variant(self, encoding):
+        """인코딩별 본문 (None 이면 원본)"""
+        if encoding is None or len(self.raw) < MIN_COMPRESS_SIZE:
+            return self.raw
+        data = self._variants.get(encoding)
+        if data is None:
+            with self._lock:
+                data = self._variants.get(encoding)
+                if data is None:
+                    data = compress_bytes(self.raw, encoding)
+                    self._variants[encoding] = data
+        return data
+
+
+def etag_matches(if_none_match, etag):
+    """If-None-Match 헤더와 ETag 의 약한 비교 (W/ 접두사 무시)"""
+    if not if_none_match:
+        return False
+    if if_none_match.strip() == '*':
+        return True
+    opaque = etag[2:] if etag.startswith('W/') else etag
+    for candidate in if_none_match.split(','):
+        candidate = candidate.strip()
+        if (candidate[2:] if candidate.startswith('W/') else candidate) == opaque:
+            return True
+    return False
+
+
+def payload_response(request, payload, content_type='application/json', status=200):
+    """CompressedPayload -> 협상된 인코딩의 HttpResponse (If-None-Match 가 맞으면 304)"""
+    from django.http import HttpResponse, HttpResponseNotModified
+    from django.utils.cache import patch_vary_headers
+
+    # 인코딩마다 바이트가 달라지므로 원본 해시는 약한 ETag 로
+    etag = f'W/"{payload.etag}"'
+    if status == 200 and etag_matches(request.headers.get('If-None-Match', ''), etag):
+        response = HttpResponseNotModified()
+        response['ETag'] = etag
+        patch_vary_headers(response, ('Accept-Encoding',))
+        return response
+
+    encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+    body = payload.variant(encoding)
+    response = HttpResponse(body, status=status, content_type=content_type)
+    if body is not payload.raw:
+        response['Content-Encoding'] = encoding
+    patch_vary_headers(response, ('Accept-Encoding',))
+    response['Content-Length'] = str(len(body))
+    response['ETag'] = etag
+    return response
+
+
+def write_precompressed(path):
+    """파일 옆에 path.br / path.gz 생성 (스냅샷처럼 한 번 만들어 여러 번 내려주는 파일용)"""
+    with open(path, 'rb') as f:
+        data = f.read()
+    written = {}
+    for encoding, suffix in (('br', '.br'), ('gzip', '.gz')):
+        if encoding not in supported_encodings():
+            continue
+        tmp_path = f'{path}{suffix}.tmp'
+        with open(tmp_path, 'wb') as f:
+            f.write(compress_bytes(data, encoding, static=True))
+        os.replace(tmp_path, path + suffix)
+        written[encoding] = path + suffix
+    return written
+
+
+def precompressed_path(path, encoding):
+    """협상된 인코딩의 미리 압축된 파일 경로 (없으면 None)"""
+    suffix = {'br': '.br', 'gzip': '.gz'}.get(encoding)
+    if suffix and os.path.exists(path + suffix):
+        return path + suffix
+    return None
+
+
+class CompressionMiddleware:
+    """JSON/텍스트 응답을 brotli 또는 gzip 으로 압축 (django GZipMiddleware 대체)"""
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+
+    def __call__(self, request):
+        response = self.get_response(request)
+        return self.process_response(request, response)
+
+    def process_response(self, request, response):
+        if (response.streaming or response.has_header('Content-Encoding')
+                or len(response.content) < MIN_COMPRESS_SIZE
+                or not response.get('Content-Type', '').startswith(COMPRESSIBLE_TYPES)):
+            return response
+
+        from django.utils.cache import patch_vary_headers
+
+        patch_vary_headers(response, ('Accept-Encoding',))
+        encoding = negotiate_encoding(request.headers.get('Accept-Encoding', ''))
+        if encoding is None:
+            return response
+
+        compressed = compress_bytes(response.content, encoding)
+        if len(compressed) >= len(response.content):
+            return response
+        response.content = compressed
+        response['Content-Encoding'] = encoding
+        response['Content-Length'] = str(len(compressed))
+        # 강한 ETag 는 압축본과 맞지 않으므로 약한 ETag 로
+        etag = response.get('ETag')
+        if etag and not etag.startswith('W/'):
+            response['ETag'] = 'W/' + etag
+        return response
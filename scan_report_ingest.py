@@ -0,0 +1,525 @@
+#!/usr/bin/env python3
+"""
+스캔 보고서 수신 + 중복 스캔 억제
+여러 경비원이 몇 분 안에 같은 차를 스캔하거나 CameraScanActivity 연속 분석기가 같은 번호판을
+반복 보고하면 보고서가 그만큼 쌓이고 단속 조치도 중복될 수 있다.
+(아파트, 정규화 번호판) 의 첫 인식부터 SCAN_DEDUP_WINDOW_SECONDS 안에 들어온 보고는
+새 행을 만들지 않고 기존 보고서의 인식 횟수(sighting_count)로 합친다.
+
+    1) 워커 메모리의 TTL 인덱스 -> 최근 보고서 id 를 바로 찾아 UPDATE
+    2) 인덱스에 없으면 (다른 워커/재시작) DB 에서 창 안의 보고서 조회
+    3) 그래도 없으면 INSERT - (apartment_id, plate_normalized, window_start) UNIQUE 제약이
+       같은 순간 두 워커가 동시에 넣는 경우를 ON CONFLICT 로 합친다
+
+조치사항은 처음 들어온 것만 남고, 창 안에서 다시 들어온 조치는 action_count 만 올린 뒤
+응답의 action_suppressed=True 로 단말에 알려준다 (중복 스티커 발부 방지).
+
+보고서는 KST 월별 파티션 테이블(scan_report_partitions)에 저장되고, 이력/보고서 화면은
+scan_report_history_api 로 기간에 걸친 달의 파티션만 읽는다 (보관 정책도 파티션 단위).
+기존 화면을 아직 옮기지 못한 서버만 APTGO_LEGACY_SCAN_REPORT_MODEL='anpr_reports.ANPRReport' 로
+새 보고서(창 안의 첫 인식)를 그 모델에도 함께 쓴다 - 그 모델은 보관 정책이 없으므로 전환 기간에만 켠다.
+
+인증: 새 앱은 Authorization 토큰을 보낸다. 이미 배포된 앱은 토큰 없이 본문의 user_id(아이디)만
+보내는데, 아이디는 누구나 써넣을 수 있으므로 그것만으로는 받지 않는다.
+APTGO_SCAN_LEGACY_IPS 에 경비실 단말의 고정 IP 와 아파트를 묶어 둔 경우에만
+(예: '203.0.113.5=12,198.51.100.7=15') 그 IP 에서 온, 그 아파트 사용자의 요청을 LEGACY_AUTH_UNTIL 까지
+받아 주고 Deprecation/Sunset 헤더를 붙인다. IP 마다 분당 LEGACY_RATE_PER_MINUTE 건까지.
+기본은 비어 있어 토큰 없는 요청은 모두 401 이다.
+
+urls.py (기존 anpr-reports/api/receive/ 와 이력 조회를 대체):
+    from scan_report_ingest import scan_report_history_api, scan_report_receive_api
+    path('anpr-reports/api/receive/', scan_report_receive_api),
+    path('anpr-reports/api/history/', scan_report_history_api),
+"""
+
+import json
+import os
+import sys
+import threading
+import time
+from collections import OrderedDict
+from datetime import date, datetime, time as dt_time
+
+from app_metrics import scan_reports
+from registered_plate_set import normalize_plate
+from repeat_offenders import record_offence
+from scan_report_partitions import (
+    SCAN_REPORT_COLUMNS,
+    ensure_partition,
+    ensure_partition_tables,
+    iter_scan_reports,
+    month_key_for,
+    next_report_id,
+    partitions_for_range,
+    query_scan_reports,
+    scan_report_aggregate,
+)
+
+SCAN_DEDUP_WINDOW_SECONDS = int(os.environ.get('APTGO_SCAN_DEDUP_WINDOW', '300'))
+SCAN_INDEX_MAX_ENTRIES = 50000
+
+# 전환 기간에만 함께 쓰는 기존 보고서 모델 ('app_label.ModelName', 기본은 쓰지 않음)
+LEGACY_REPORT_MODEL = os.environ.get('APTGO_LEGACY_SCAN_REPORT_MODEL', '')
+DEFAULT_HISTORY_LIMIT = 100
+MAX_HISTORY_LIMIT = 500
+# 토큰 없이 보내는 이전 앱 요청을 받아 주는 마지막 날 (KST)
+LEGACY_AUTH_UNTIL = date.fromisoformat(os.environ.get('APTGO_SCAN_LEGACY_AUTH_UNTIL', '2027-03-31'))
+# 토큰 없는 요청을 받아 줄 단말 IP -> 아파트 id ('IP=아파트id,...', 비우면 받지 않음)
+LEGACY_ALLOWED_IPS = {
+    ip.strip(): int(apartment_id)
+    for ip, _, apartment_id in (
+        entry.partition('=') for entry in os.environ.get('APTGO_SCAN_LEGACY_IPS', '').split(',')
+    )
+    if ip.strip() and apartment_id.strip().isdigit()
+}
+LEGACY_RATE_PER_MINUTE = int(os.environ.get('APTGO_SCAN_LEGACY_RATE', '120'))
+# 앞단 리버스 프록시 (이 주소에서 온 요청만 X-Forwarded-For 를 믿는다)
+TRUSTED_PROXIES = ('127.0.0.1', '::1')
+# 이전 앱 본문 키 중 기존 모델에 그대로 옮기는 것 (모델에 있는 필드만 쓴다)
+_LEGACY_FIELDS = ('plate_number', 'is_registered', 'recognition_time', 'action_taken', 'location',
+                  'reported_by', 'photo_url')
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def ensure_scan_report_table():
+    """파티션 카탈로그/id 할당기 + 이번 달 파티션 생성 (이미 있으면 무시)"""
+    ensure_partition_tables()
+    return ensure_partition(month_key_for(_now_ms()))
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+class ScanWindowIndex:
+    """(아파트, 번호판) -> (보고서 id, 파티션 테이블, 창 만료 시각) TTL 인덱스 (워커 프로세스마다 하나)"""
+
+    def __init__(self, max_entries=SCAN_INDEX_MAX_ENTRIES):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key, now_ms):
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                return None
+            if entry[2] <= now_ms:
+                del self._entries[key]
+                return None
+            return entry[0], entry[1]
+
+    def put(self, key, report_id, table, expires_at):
+        with self._lock:
+            self._entries[key] = (report_id, table, expires_at)
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def discard(self, key):
+        with self._lock:
+            self._entries.pop(key, None)
+
+
+scan_window_index = ScanWindowIndex()
+
+
+def _merge_sighting(cursor, table, report_id, seen_at, report):
+    """기존 보고서에 인식 1회 합치기 -> (sighting_count, action_taken, action_count) 또는 None (행 없음)"""
+    action = report['action_taken']
+    cursor.execute(
+        f'''UPDATE {table} SET
+            sighting_count = sighting_count + 1,
+            last_seen_at = CASE WHEN last_seen_at < %s THEN %s ELSE last_seen_at END,
+            action_taken = CASE WHEN action_taken = '' THEN %s ELSE action_taken END,
+            action_count = action_count + %s,
+            photo_id = COALESCE(photo_id, %s),
+            photo_url = COALESCE(photo_url, %s),
+            thumbnail_url = COALESCE(thumbnail_url, %s)
+        WHERE id = %s
+        RETURNING sighting_count, action_taken, action_count''',
+        [seen_at, seen_at, action, 1 if action else 0,
+         report['photo_id'], report['photo_url'], report['thumbnail_url'], report_id]
+    )
+    return cursor.fetchone()
+
+
+def ingest_scan_report(apartment_id, report, now_ms=None, window_seconds=SCAN_DEDUP_WINDOW_SECONDS):
+    """보고서 한 건 수신 -> {'reportId', 'duplicate', 'sightingCount', 'actionTaken', 'actionSuppressed'}
+
+    report 키: plate_number, is_registered, action_taken, location, reported_by,
+              recognition_time, photo_id, photo_url, thumbnail_url
+    """
+    from django.db import DatabaseError, connection, transaction
+
+    seen_at = now_ms if now_ms is not None else _now_ms()
+    window_ms = window_seconds * 1000
+    plate = normalize_plate(report['plate_number'])
+    key = (apartment_id, plate)
+    action = report['action_taken']
+
+    with transaction.atomic(), connection.cursor() as cursor:
+        merged, report_id, cached = None, None, scan_window_index.get(key, seen_at)
+        if cached is not None:
+            report_id, table = cached
+            merged = _merge_sighting(cursor, table, report_id, seen_at, report)
+            if merged is None:
+                # 보관 정리/파티션 이동으로 행이 사라졌으면 인덱스만 비우고 아래에서 다시 찾는다
+                scan_window_index.discard(key)
+
+        if merged is None:
+            # 창이 달 경계에 걸치면 두 파티션을 본다 (최신 달부터)
+            for table in reversed(partitions_for_range(seen_at - window_ms, seen_at + 1)):
+                cursor.execute(
+                    f'SELECT id, first_seen_at FROM {table} '
+                    f'WHERE apartment_id = %s AND plate_normalized = %s AND first_seen_at > %s '
+                    f'ORDER BY first_seen_at DESC LIMIT 1',
+                    [apartment_id, plate, seen_at - window_ms]
+                )
+                row = cursor.fetchone()
+                if row:
+                    report_id = row[0]
+                    merged = _merge_sighting(cursor, table, report_id, seen_at, report)
+                    scan_window_index.put(key, report_id, table, row[1] + window_ms)
+                    break
+
+        if merged is None:
+            window_start = seen_at - seen_at % window_ms
+            table = ensure_partition(month_key_for(window_start))
+            cursor.execute(
+                f'''INSERT INTO {table} (
+                    id, apartment_id, plate_normalized, plate_number, window_start, first_seen_at, last_seen_at,
+                    sighting_count, is_registered, action_taken, action_count, location, reported_by,
+                    recognition_time, photo_id, photo_url, thumbnail_url
+                ) VALUES (%s, %s, %s, %s, %s, %s, %s, 1, %s, %s, %s, %s, %s, %s, %s, %s, %s)
+                ON CONFLICT (apartment_id, plate_normalized, window_start) DO UPDATE SET
+                    sighting_count = {table}.sighting_count + 1,
+                    last_seen_at = excluded.last_seen_at,
+                    action_taken = CASE WHEN {table}.action_taken = ''
+                        THEN excluded.action_taken ELSE {table}.action_taken END,
+                    action_count = {table}.action_count + excluded.action_count
+                RETURNING id, first_seen_at, sighting_count, action_taken, action_count''',
+                [next_report_id(cursor), apartment_id, plate, report['plate_number'], window_start, seen_at, seen_at,
+                 report['is_registered'], action, 1 if action else 0, report['location'],
+                 report['reported_by'], report['recognition_time'],
+                 report['photo_id'], report['photo_url'], report['thumbnail_url']]
+            )
+            report_id, first_seen_at, *merged = cursor.fetchone()
+            scan_window_index.put(key, report_id, table, first_seen_at + window_ms)
+
+        sighting_count, stored_action, action_count = merged
+        if not report['is_registered']:
+            # 상습 미등록 차량 카운터 (새 보고서 / 첫 조치만 반영) - 실패해도 보고서는 남도록 savepoint
+            try:
+                with transaction.atomic():
+                    record_offence(apartment_id, report['plate_number'], seen_at,
+                                   sighting_count == 1, action if action and action_count == 1 else '')
+            except DatabaseError as e:
+                print(f"⚠️  상습 차량 카운터 갱신 실패 ({report['plate_number']}): {e}")
+
+    return {
+        'reportId': report_id,
+        'duplicate': sighting_count > 1,
+        'sightingCount': sighting_count,
+        'actionTaken': stored_action,
+        'actionSuppressed': bool(action) and action_count > 1,
+    }
+
+
+def iter_scan_report_rows(apartment_id, from_ms, to_ms, chunk_size=2000):
+    """[from_ms, to_ms) 첫 인식 보고서를 해당 달 파티션만 서버 측 커서로 읽는다 (SCAN_REPORT_COLUMNS 순서)"""
+    return iter_scan_reports(apartment_id, from_ms, to_ms, SCAN_REPORT_COLUMNS, chunk_size)
+
+
+def scan_report_version(apartment_id, from_ms, to_ms):
+    """내보내기 ETag 재료 - 병합으로 행 수가 그대로여도 인식 횟수/마지막 인식이 바뀌면 달라진다"""
+    return scan_report_aggregate(apartment_id, from_ms, to_ms)
+
+
+def parse_scan_report(body, username):
+    """앱이 보내는 보고서 JSON -> ingest_scan_report 입력 (번호판이 없으면 ValueError)"""
+    plate_number = str(body.get('plate_number') or '').strip()
+    if not normalize_plate(plate_number):
+        raise ValueError('plate_number 가 필요합니다.')
+    return {
+        'plate_number': plate_number[:20],
+        'is_registered': bool(body.get('is_registered')),
+        'action_taken': str(body.get('action_taken') or '')[:30],
+        'location': str(body.get('location') or '')[:50],
+        'reported_by': username or str(body.get('user_id') or '')[:150],
+        'recognition_time': str(body.get('recognition_time') or '')[:20],
+        'photo_id': body.get('photo_id') or None,
+        'photo_url': body.get('photo_url') or None,
+        'thumbnail_url': body.get('thumbnail_url') or None,
+    }
+
+
+_legacy_model_missing = False
+
+
+def write_legacy_report(apartment_id, report):
+    """기존 ANPR 보고서 모델에도 한 행 추가 (이력/보고서 화면용). 실패해도 보고서 수신은 그대로"""
+    global _legacy_model_missing
+    from django.apps import apps
+    from django.core.exceptions import FieldDoesNotExist
+    from django.db import DatabaseError, transaction
+
+    if not LEGACY_REPORT_MODEL or _legacy_model_missing:
+        return
+    try:
+        model = apps.get_model(LEGACY_REPORT_MODEL)
+    except (LookupError, ValueError):
+        _legacy_model_missing = True
+        print(f"⚠️  기존 보고서 모델 {LEGACY_REPORT_MODEL} 이 없어 함께 쓰지 않습니다")
+        return
+
+    candidates = dict({field: report[field] for field in _LEGACY_FIELDS}, apartment=apartment_id)
+    values = {}
+    for field, value in candidates.items():
+        try:
+            model._meta.get_field(field)
+        except FieldDoesNotExist:
+            continue
+        values['apartment_id' if field == 'apartment' else field] = value
+    try:
+        with transaction.atomic():
+            model.objects.create(**values)
+    except DatabaseError as e:
+        print(f"⚠️  기존 보고서 모델 기록 실패 ({report['plate_number']}): {e}")
+
+
+def client_ip(request):
+    """요청 IP - 로컬 리버스 프록시를 거친 요청은 프록시가 덧붙인 X-Forwarded-For 마지막 값"""
+    remote = request.META.get('REMOTE_ADDR', '')
+    forwarded = request.META.get('HTTP_X_FORWARDED_FOR', '')
+    if remote in TRUSTED_PROXIES and forwarded:
+        return forwarded.split(',')[-1].strip()
+    return remote
+
+
+def _legacy_user(body, apartment_id):
+    """토큰 없는 이전 앱 요청의 user_id(아이디) -> 단말 IP 에 묶인 아파트의 활성 사용자 (없으면 None)"""
+    from accounts.models import User
+
+    from apartment_snapshot_builder import user_apartment_id
+
+    username = str(body.get('user_id') or '').strip()
+    if not username:
+        return None
+    user = User.objects.select_related('parent_account').filter(username=username, is_active=True).first()
+    if user is None or user_apartment_id(user) != apartment_id:
+        return None
+    return user
+
+
+def _legacy_apartment(ip, today=None):
+    """토큰 없는 요청을 받아 줄 IP 면 묶인 아파트 id (아니면 None)"""
+    from fast_serializers import KST
+
+    if (today or datetime.now(KST).date()) > LEGACY_AUTH_UNTIL:
+        return None
+    return LEGACY_ALLOWED_IPS.get(ip)
+
+
+def _legacy_rate_exceeded(ip):
+    from django.core.cache import cache
+
+    key = f'scan_legacy_rate:{ip}:{int(time.time() // 60)}'
+    cache.add(key, 0, 120)
+    try:
+        return cache.incr(key) > LEGACY_RATE_PER_MINUTE
+    except ValueError:
+        # add 와 incr 사이에 만료된 경우 - 이번 요청은 통과
+        return False
+
+
+def _mark_deprecated(response):
+    from django.utils.http import http_date
+
+    from fast_serializers import KST
+
+    sunset = datetime.combine(LEGACY_AUTH_UNTIL, dt_time.max, tzinfo=KST)
+    response['Deprecation'] = 'true'
+    response['Sunset'] = http_date(sunset.timestamp())
+    return response
+
+
+def _receive(body, apartment_id, username):
+    """보고서 한 건 수신 + 응답 (토큰/이전 앱 공용)"""
+    from fast_serializers import json_response
+
+    if not apartment_id:
+        return json_response({'success': False, 'error': '아파트 정보가 없습니다.'}, status=400)
+    try:
+        report = parse_scan_report(body, username)
+    except (ValueError, AttributeError) as e:
+        return json_response({'success': False, 'error': f'잘못된 보고서입니다: {e}'}, status=400)
+
+    result = ingest_scan_report(apartment_id, report)
+    if not result['duplicate']:
+        write_legacy_report(apartment_id, report)
+    scan_reports.inc((
+        'suppressed' if result['actionSuppressed'] else 'duplicate' if result['duplicate'] else 'new',
+    ))
+    if result['actionSuppressed']:
+        message = f"이미 조치된 차량입니다 ({result['actionTaken']})"
+    elif result['duplicate']:
+        message = f"중복 인식 {result['sightingCount']}회째로 기록되었습니다"
+    else:
+        message = '보고서가 저장되었습니다'
+    return json_response({
+        'success': True,
+        'message': message,
+        'report_id': result['reportId'],
+        'duplicate': result['duplicate'],
+        'sighting_count': result['sightingCount'],
+        'action_taken': result['actionTaken'],
+        'action_suppressed': result['actionSuppressed'],
+    }, status=200 if result['duplicate'] else 201)
+
+
+def scan_report_receive_api(request):
+    """POST anpr-reports/api/receive/ - 스캔 보고서 수신 (창 안의 중복은 인식 횟수로 합침)"""
+    from django.views.decorators.csrf import csrf_exempt
+    from vehicles.views import api_auth_required
+
+    from fast_serializers import json_response
+    from request_scope import get_request_scope
+
+    def _body(request):
+        try:
+            body = json.loads(request.body)
+        except ValueError:
+            return None
+        return body if isinstance(body, dict) else None
+
+    @csrf_exempt
+    @api_auth_required
+    def _view(request):
+        if request.method != 'POST':
+            return json_response({'error': '잘못된 요청 방식입니다.'}, status=405)
+        body = _body(request)
+        if body is None:
+            return json_response({'success': False, 'error': '잘못된 보고서입니다.'}, status=400)
+        scope = get_request_scope(request)
+        return _receive(body, scope.apartment_id, scope.username)
+
+    @csrf_exempt
+    def _legacy_view(request, ip, apartment_id):
+        # 이미 배포된 앱 (토큰 없이 본문 user_id 만 보냄) - 허용한 단말 IP, LEGACY_AUTH_UNTIL 까지만
+        if request.method != 'POST':
+            return json_response({'error': '잘못된 요청 방식입니다.'}, status=405)
+        if _legacy_rate_exceeded(ip):
+            return json_response({'success': False, 'error': '요청이 너무 많습니다.'}, status=429)
+        body = _body(request)
+        if body is None:
+            return json_response({'success': False, 'error': '잘못된 보고서입니다.'}, status=400)
+        user = _legacy_user(body, apartment_id)
+        if user is None:
+            return json_response({'success': False, 'error': '인증이 필요합니다.'}, status=401)
+        return _mark_deprecated(_receive(body, apartment_id, user.username))
+
+    if 'HTTP_AUTHORIZATION' not in request.META:
+        ip = client_ip(request)
+        apartment_id = _legacy_apartment(ip)
+        if apartment_id is not None:
+            return _legacy_view(request, ip, apartment_id)
+    return _view(request)
+
+
+def serialize_scan_report(row):
+    """query_scan_reports 행 -> 이력 화면 JSON (목록은 썸네일만 렌더링)"""
+    from evidence_photos import thumbnail_url_for
+    from fast_serializers import KST
+
+    def iso(ms):
+        return datetime.fromtimestamp(ms / 1000, KST).isoformat(timespec='seconds')
+
+    return {
+        'id': row['id'],
+        'plateNumber': row['plate_number'],
+        'isRegistered': bool(row['is_registered']),
+        'firstSeenAt': iso(row['first_seen_at']),
+        'lastSeenAt': iso(row['last_seen_at']),
+        'sightingCount': row['sighting_count'],
+        'actionTaken': row['action_taken'],
+        'actionCount': row['action_count'],
+        'location': row['location'],
+        'reportedBy': row['reported_by'],
+        'recognitionTime': row['recognition_time'],
+        'photoUrl': row['photo_url'],
+        'thumbnailUrl': thumbnail_url_for(row['thumbnail_url'] or row['photo_url']),
+    }
+
+
+def scan_report_history_api(request):
+    """GET anpr-reports/api/history/?start=&end=&plate=&registered=0|1&limit= - 단속 이력/보고서
+
+    기간(KST, 기본 이번 달)에 걸친 달의 파티션만 읽고, 최신 보고서부터 limit 건과 기간 합계를 돌려준다.
+    """
+    from vehicles.views import api_auth_required
+
+    from fast_serializers import json_response
+    from history_export import kst_range, parse_export_period
+    from request_scope import get_request_scope
+
+    @api_auth_required
+    def _view(request):
+        if request.method != 'GET':
+            return json_response({'error': '잘못된 요청 방식입니다.'}, status=405)
+        scope = get_request_scope(request)
+        if not scope.can_manage:
+            return json_response({'success': False, 'error': '관리단 권한이 필요합니다.'}, status=403)
+        apartment_id = (request.GET.get('apartment') if scope.is_admin else None) or scope.apartment_id
+        registered = request.GET.get('registered')
+        try:
+            apartment_id = int(apartment_id)
+            start, end = parse_export_period(request.GET)
+            limit = max(1, min(int(request.GET.get('limit', DEFAULT_HISTORY_LIMIT)), MAX_HISTORY_LIMIT))
+        except (TypeError, ValueError) as e:
+            return json_response({'success': False, 'error': f'잘못된 조건입니다: {e}'}, status=400)
+        registered = None if registered in (None, '') else registered == '1'
+
+        range_from, range_to = kst_range(start, end)
+        from_ms, to_ms = int(range_from.timestamp() * 1000), int(range_to.timestamp() * 1000)
+        plate = normalize_plate(request.GET.get('plate', '')) or None
+        rows = query_scan_reports(apartment_id, from_ms, to_ms, plate, limit, registered)
+        count, _, sightings, _ = scan_report_aggregate(apartment_id, from_ms, to_ms, registered, plate)
+        return json_response({
+            'success': True,
+            'start': start.isoformat(),
+            'end': end.isoformat(),
+            'reports': [serialize_scan_report(row) for row in rows],
+            'count': count,
+            'sightings': sightings,
+            'hasMore': count > len(rows),
+        })
+
+    return _view(request)
+
+
+def main():
+    print("=" * 60)
+    print("🚗 스캔 보고서 저장소")
+    print("=" * 60)
+
+    if not setup_django():
+        return
+    table = ensure_scan_report_table()
+    print(f"   ✅ {table} 파티션 준비 완료 (중복 억제 창 {SCAN_DEDUP_WINDOW_SECONDS}초)")
+
+
+if __name__ == "__main__":
+    main()
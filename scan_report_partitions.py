@@ -0,0 +1,546 @@
+#!/usr/bin/env python3
+"""
+스캔 보고서 월별 파티션 + 보관 정책
+scan_reports 는 아파트마다 한 달에 수천 건씩 쌓이기만 하는데 이력/보고서 조회가 매번
+테이블 전체 인덱스를 훑었다. 보고서를 KST 월 단위 테이블 (scan_reports_202610) 에 나눠 저장하고
+조회는 기간에 걸친 달의 테이블만 읽는다 (partition pruning).
+
+- 파티션 키: window_start 의 KST 월. 중복 억제 UNIQUE (apartment_id, plate_normalized, window_start)
+  가 한 파티션 안에서 그대로 성립한다. first_seen_at 은 window_start 보다 창 크기만큼 늦을 수 있어
+  기간 조회는 PARTITION_MARGIN_MS 만큼 앞 달까지 포함한다.
+- 자동 생성: 보고서가 처음 들어오는 달에 테이블/인덱스를 만들고 카탈로그에 기록 (워커별 memo).
+  cron 의 --maintain 이 다음 달 파티션을 미리 만든다.
+- 보관: RETENTION_MONTHS 보다 오래된 달은 gzip CSV 로 보관한 뒤 DROP TABLE (DELETE 없이 즉시).
+- 보고서 id 는 파티션과 무관하게 전역 유일 (PostgreSQL 시퀀스 / SQLite AUTOINCREMENT 할당 테이블).
+  앱 ScanReportResponse.report_id 와 기존 id 가 그대로 이어진다.
+
+PostgreSQL 선언적 파티셔닝은 PK/UNIQUE 에 파티션 키를 넣어야 해서 id 로 찾는 UPDATE 가
+모든 파티션을 보게 되므로, 두 백엔드 모두 같은 월별 테이블 방식을 쓴다.
+
+기존 단일 테이블(scan_reports)은 옮길 때까지 조회에 함께 포함되고, 옮기기는 migration_runner 로:
+    python3 migration_runner.py scan_reports_to_partitions --max-load 0.3
+
+서버에서 실행 (매일 cron):
+    python3 scan_report_partitions.py --maintain          # 이번/다음 달 생성 + 보관 정책 적용
+    python3 scan_report_partitions.py --maintain --dry-run
+    python3 scan_report_partitions.py --list
+    python3 scan_report_partitions.py --drop-legacy       # 이동이 끝나 빈 scan_reports 삭제
+"""
+
+import csv
+import gzip
+import os
+import sys
+import threading
+import time
+from datetime import datetime
+
+from fast_serializers import KST
+
+LEGACY_SCAN_REPORT_TABLE = 'scan_reports'
+PARTITION_PREFIX = 'scan_reports_'
+PARTITION_CATALOG_TABLE = 'scan_report_partitions'
+SCAN_REPORT_ID_TABLE = 'scan_report_ids'
+SCAN_REPORT_ID_SEQUENCE = 'scan_report_id_seq'
+
+RETENTION_MONTHS = int(os.environ.get('APTGO_SCAN_REPORT_RETENTION_MONTHS', '24'))
+# repeat_offenders 가 최근 90일 보고서에서 다시 계산할 수 있어야 한다
+MIN_RETENTION_MONTHS = 4
+ARCHIVE_DIR = os.environ.get(
+    'APTGO_SCAN_REPORT_ARCHIVE_DIR', '/home/kyb9852/vehicle-management-system/media/archive/scan_reports'
+)
+# first_seen_at - window_start 의 상한 (중복 억제 창보다 넉넉하게)
+PARTITION_MARGIN_MS = 24 * 3600 * 1000
+CATALOG_CACHE_SECONDS = 60
+
+STATUS_ACTIVE = 'active'
+STATUS_ARCHIVED = 'archived'
+
+SCAN_REPORT_COLUMNS = (
+    'id', 'plate_number', 'is_registered', 'first_seen_at', 'last_seen_at', 'sighting_count',
+    'action_taken', 'action_count', 'location', 'reported_by', 'recognition_time',
+    'photo_id', 'photo_url', 'thumbnail_url',
+)
+# 파티션 이동/보관에 쓰는 전체 컬럼
+SCAN_REPORT_STORAGE_COLUMNS = (
+    'id', 'apartment_id', 'plate_normalized', 'plate_number', 'window_start', 'first_seen_at',
+    'last_seen_at', 'sighting_count', 'is_registered', 'action_taken', 'action_count', 'location',
+    'reported_by', 'recognition_time', 'photo_id', 'photo_url', 'thumbnail_url',
+)
+
+_ID_SOURCE_DDL = {
+    'sqlite': f'CREATE TABLE IF NOT EXISTS {SCAN_REPORT_ID_TABLE} (id INTEGER PRIMARY KEY AUTOINCREMENT)',
+    'postgresql': f'CREATE SEQUENCE IF NOT EXISTS {SCAN_REPORT_ID_SEQUENCE}',
+}
+_NEXT_ID_SQL = {
+    'sqlite': f'INSERT INTO {SCAN_REPORT_ID_TABLE} DEFAULT VALUES RETURNING id',
+    'postgresql': f"SELECT nextval('{SCAN_REPORT_ID_SEQUENCE}')",
+}
+# 다음 할당 id 가 %s 보다 커지도록 (기존 테이블 id 와 겹치지 않게)
+_RESERVE_ID_SQL = {
+    'sqlite': f'INSERT INTO {SCAN_REPORT_ID_TABLE} (id) VALUES (%s) ON CONFLICT (id) DO NOTHING',
+    'postgresql': (
+        f"SELECT setval('{SCAN_REPORT_ID_SEQUENCE}', "
+        f"GREATEST((SELECT last_value FROM {SCAN_REPORT_ID_SEQUENCE}), %s, 1))"
+    ),
+}
+
+CATALOG_DDL = (
+    f'''CREATE TABLE IF NOT EXISTS {PARTITION_CATALOG_TABLE} (
+        month_key INTEGER PRIMARY KEY,
+        table_name VARCHAR(50) NOT NULL,
+        range_start BIGINT NOT NULL,
+        range_end BIGINT NOT NULL,
+        status VARCHAR(10) NOT NULL,
+        created_at BIGINT NOT NULL,
+        archived_at BIGINT,
+        archive_path TEXT,
+        archived_rows BIGINT
+    )''',
+)
+
+_known_partitions = set()
+_tables_ready = False
+_catalog_cache = {'loaded_at': 0.0, 'partitions': [], 'legacy': False}
+_partition_lock = threading.Lock()
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def _now_ms():
+    return int(time.time() * 1000)
+
+
+# ---------------------------------------------------------------------------
+# 월 키 / 범위
+# ---------------------------------------------------------------------------
+
+def month_key_for(timestamp_ms):
+    """epoch ms -> KST 월 키 (202610)"""
+    moment = datetime.fromtimestamp(timestamp_ms / 1000, KST)
+    return moment.year * 100 + moment.month
+
+
+def shift_month(month_key, months):
+    index = (month_key // 100) * 12 + (month_key % 100 - 1) + months
+    return (index // 12) * 100 + index % 12 + 1
+
+
+def month_range_ms(month_key):
+    """월 키 -> [시작, 끝) epoch ms (KST 기준)"""
+    def start_of(key):
+        return int(datetime(key // 100, key % 100, 1, tzinfo=KST).timestamp() * 1000)
+    return start_of(month_key), start_of(shift_month(month_key, 1))
+
+
+def partition_table(month_key):
+    return f'{PARTITION_PREFIX}{month_key}'
+
+
+def _partition_ddl(table):
+    return (
+        f'''CREATE TABLE IF NOT EXISTS {table} (
+            id BIGINT PRIMARY KEY,
+            apartment_id INTEGER NOT NULL,
+            plate_normalized VARCHAR(20) NOT NULL,
+            plate_number VARCHAR(20) NOT NULL,
+            window_start BIGINT NOT NULL,
+            first_seen_at BIGINT NOT NULL,
+            last_seen_at BIGINT NOT NULL,
+            sighting_count INTEGER NOT NULL DEFAULT 1,
+            is_registered BOOLEAN NOT NULL,
+            action_taken VARCHAR(30) NOT NULL DEFAULT '',
+            action_count INTEGER NOT NULL DEFAULT 0,
+            location VARCHAR(50) NOT NULL DEFAULT '',
+            reported_by VARCHAR(150) NOT NULL DEFAULT '',
+            recognition_time VARCHAR(20) NOT NULL DEFAULT '',
+            photo_id VARCHAR(64),
+            photo_url TEXT,
+            thumbnail_url TEXT,
+            UNIQUE (apartment_id, plate_normalized, window_start)
+        )''',
+        f'CREATE INDEX IF NOT EXISTS {table}_plate_idx ON {table} (apartment_id, plate_normalized, first_seen_at)',
+        f'CREATE INDEX IF NOT EXISTS {table}_seen_idx ON {table} (apartment_id, first_seen_at)',
+    )
+
+
+# ---------------------------------------------------------------------------
+# 생성 / 카탈로그
+# ---------------------------------------------------------------------------
+
+def _ensure_catalog_tables():
+    """카탈로그 + id 할당기 생성 (이미 있으면 무시). 수신 경로에서도 부르므로 워커당 한 번만 DDL"""
+    from django.db import connection, transaction
+
+    if _tables_ready:
+        return
+    with _partition_lock:
+        if _tables_ready:
+            return
+        with connection.cursor() as cursor:
+            for statement in CATALOG_DDL + (_ID_SOURCE_DDL.get(connection.vendor, _ID_SOURCE_DDL['postgresql']),):
+                cursor.execute(statement)
+
+        def mark_ready():
+            global _tables_ready
+            _tables_ready = True
+
+        # PostgreSQL 은 DDL 도 트랜잭션에 묶이므로 커밋된 뒤에만 '있음' 으로 기억
+        transaction.on_commit(mark_ready)
+
+
+def ensure_partition_tables():
+    """카탈로그 + id 할당기 생성, 기존 테이블이 있으면 id 를 그 뒤로 예약"""
+    _ensure_catalog_tables()
+    _refresh_catalog(force=True)
+
+
+def ensure_partition(month_key):
+    """해당 월 파티션 테이블 이름 (없으면 생성 + 카탈로그 기록). 워커당 달마다 한 번만 DDL"""
+    from django.db import connection, transaction
+
+    table = partition_table(month_key)
+    if month_key in _known_partitions:
+        return table
+    _ensure_catalog_tables()
+    with _partition_lock:
+        if month_key in _known_partitions:
+            return table
+        range_start, range_end = month_range_ms(month_key)
+        with connection.cursor() as cursor:
+            for statement in _partition_ddl(table):
+                cursor.execute(statement)
+            cursor.execute(
+                f'INSERT INTO {PARTITION_CATALOG_TABLE} '
+                f'(month_key, table_name, range_start, range_end, status, created_at) '
+                f'VALUES (%s, %s, %s, %s, %s, %s) ON CONFLICT (month_key) DO NOTHING',
+                [month_key, table, range_start, range_end, STATUS_ACTIVE, _now_ms()]
+            )
+        # PostgreSQL 은 DDL 도 트랜잭션에 묶이므로 커밋된 뒤에만 '있음' 으로 기억
+        transaction.on_commit(lambda: _known_partitions.add(month_key))
+        _catalog_cache['loaded_at'] = 0.0
+    return table
+
+
+def _refresh_catalog(force=False):
+    """활성 파티션 목록 + 기존 테이블 존재 여부 (CATALOG_CACHE_SECONDS 동안 캐시)"""
+    from django.db import connection
+
+    if not force and time.time() - _catalog_cache['loaded_at'] < CATALOG_CACHE_SECONDS:
+        return _catalog_cache
+    _ensure_catalog_tables()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT month_key, table_name, range_start, range_end FROM {PARTITION_CATALOG_TABLE} '
+            f'WHERE status = %s ORDER BY month_key',
+            [STATUS_ACTIVE]
+        )
+        partitions = cursor.fetchall()
+    legacy = LEGACY_SCAN_REPORT_TABLE in connection.introspection.table_names()
+    if legacy and not _catalog_cache['legacy']:
+        # 옮기기 전 id 와 새 id 가 겹치면 이동 시 ON CONFLICT 로 행이 사라지므로 먼저 예약
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT MAX(id) FROM {LEGACY_SCAN_REPORT_TABLE}')
+            reserve_report_ids((cursor.fetchone()[0] or 0))
+    _catalog_cache.update(loaded_at=time.time(), partitions=partitions, legacy=legacy)
+    return _catalog_cache
+
+
+def next_report_id(cursor):
+    """전역 보고서 id 하나 할당 (호출한 쪽 커서/트랜잭션에서)"""
+    from django.db import connection
+
+    _ensure_catalog_tables()
+    cursor.execute(_NEXT_ID_SQL.get(connection.vendor, _NEXT_ID_SQL['postgresql']))
+    return cursor.fetchone()[0]
+
+
+def reserve_report_ids(max_id):
+    from django.db import connection
+
+    _ensure_catalog_tables()
+    with connection.cursor() as cursor:
+        cursor.execute(_RESERVE_ID_SQL.get(connection.vendor, _RESERVE_ID_SQL['postgresql']), [max_id])
+
+
+def partitions_for_range(from_ms, to_ms):
+    """[from_ms, to_ms) 에 first_seen_at 이 걸칠 수 있는 테이블 (오래된 순, 기존 테이블이 있으면 맨 앞)"""
+    catalog = _refresh_catalog()
+    tables = [LEGACY_SCAN_REPORT_TABLE] if catalog['legacy'] else []
+    tables.extend(
+        table for _, table, range_start, range_end in catalog['partitions']
+        if range_start < to_ms and range_end + PARTITION_MARGIN_MS > from_ms
+    )
+    return tables
+
+
+# ---------------------------------------------------------------------------
+# 조회 도우미 (이력/보고서/내보내기)
+# ---------------------------------------------------------------------------
+
+def _range_where(apartment_id, from_ms, to_ms, plate_normalized=None, registered=None):
+    where = 'apartment_id = %s AND first_seen_at >= %s AND first_seen_at < %s'
+    params = [apartment_id, from_ms, to_ms]
+    if plate_normalized:
+        where += ' AND plate_normalized = %s'
+        params.append(plate_normalized)
+    if registered is not None:
+        where += ' AND is_registered = %s'
+        params.append(registered)
+    return where, params
+
+
+def iter_scan_reports(apartment_id, from_ms, to_ms, columns=SCAN_REPORT_COLUMNS, chunk_size=2000,
+                      registered=None):
+    """[from_ms, to_ms) 보고서를 파티션 순서(오래된 달부터)로 서버 측 커서로 읽는다"""
+    from django.db import connection
+
+    where, params = _range_where(apartment_id, from_ms, to_ms, registered=registered)
+    for table in partitions_for_range(from_ms, to_ms):
+        cursor = connection.chunked_cursor()
+        try:
+            cursor.execute(f'SELECT {", ".join(columns)} FROM {table} WHERE {where} ORDER BY id', params)
+            while True:
+                rows = cursor.fetchmany(chunk_size)
+                if not rows:
+                    break
+                yield from rows
+        finally:
+            cursor.close()
+
+
+def query_scan_reports(apartment_id, from_ms, to_ms, plate_normalized=None, limit=100, registered=None):
+    """최근 보고서부터 limit 건 (dict). 최신 달부터 읽고 limit 이 차면 나머지 달은 읽지 않는다"""
+    from django.db import connection
+
+    where, params = _range_where(apartment_id, from_ms, to_ms, plate_normalized, registered)
+    result = []
+    with connection.cursor() as cursor:
+        for table in reversed(partitions_for_range(from_ms, to_ms)):
+            cursor.execute(
+                f'SELECT {", ".join(SCAN_REPORT_COLUMNS)} FROM {table} WHERE {where} '
+                f'ORDER BY first_seen_at DESC LIMIT %s',
+                params + [limit - len(result)]
+            )
+            result.extend(dict(zip(SCAN_REPORT_COLUMNS, row)) for row in cursor.fetchall())
+            if len(result) >= limit:
+                break
+    # 경계 여유(PARTITION_MARGIN_MS) 때문에 두 달에 걸친 결과는 다시 정렬
+    result.sort(key=lambda row: row['first_seen_at'], reverse=True)
+    return result[:limit]
+
+
+def scan_report_aggregate(apartment_id, from_ms, to_ms, registered=None, plate_normalized=None):
+    """(보고서 수, 최대 id, 인식 횟수 합, 마지막 인식) - 파티션별 집계를 합친다"""
+    from django.db import connection
+
+    where, params = _range_where(apartment_id, from_ms, to_ms, plate_normalized, registered)
+    count, max_id, sightings, last_seen = 0, None, 0, None
+    with connection.cursor() as cursor:
+        for table in partitions_for_range(from_ms, to_ms):
+            cursor.execute(
+                f'SELECT COUNT(*), MAX(id), SUM(sighting_count), MAX(last_seen_at) FROM {table} WHERE {where}',
+                params
+            )
+            part_count, part_max_id, part_sightings, part_last_seen = cursor.fetchone()
+            count += part_count
+            sightings += part_sightings or 0
+            if part_max_id is not None:
+                max_id = part_max_id if max_id is None else max(max_id, part_max_id)
+            if part_last_seen is not None:
+                last_seen = part_last_seen if last_seen is None else max(last_seen, part_last_seen)
+    return count, max_id, sightings, last_seen
+
+
+# ---------------------------------------------------------------------------
+# 보관 정책
+# ---------------------------------------------------------------------------
+
+def archive_partition(table, path):
+    """파티션 전체를 gzip CSV 로 저장 (임시 파일 -> rename). 행 수 반환"""
+    from django.db import connection
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    tmp_path = path + '.tmp'
+    count = 0
+    cursor = connection.chunked_cursor()
+    try:
+        cursor.execute(f'SELECT {", ".join(SCAN_REPORT_STORAGE_COLUMNS)} FROM {table} ORDER BY id')
+        with gzip.open(tmp_path, 'wt', encoding='utf-8', newline='') as raw:
+            writer = csv.writer(raw)
+            writer.writerow(SCAN_REPORT_STORAGE_COLUMNS)
+            while True:
+                rows = cursor.fetchmany(2000)
+                if not rows:
+                    break
+                writer.writerows(rows)
+                count += len(rows)
+    finally:
+        cursor.close()
+    os.replace(tmp_path, path)
+    return count
+
+
+def apply_retention(keep_months=RETENTION_MONTHS, archive=True, now_ms=None, dry_run=False):
+    """보관 기간이 지난 달 파티션을 (보관 후) DROP. [(월 키, 테이블, 행 수 또는 None)] 반환"""
+    from django.db import connection, transaction
+
+    keep_months = max(keep_months, MIN_RETENTION_MONTHS)
+    cutoff = shift_month(month_key_for(now_ms or _now_ms()), -keep_months + 1)
+    expired = [
+        (month_key, table) for month_key, table, _, _ in _refresh_catalog(force=True)['partitions']
+        if month_key < cutoff
+    ]
+    done = []
+    for month_key, table in expired:
+        if dry_run:
+            done.append((month_key, table, None))
+            continue
+        path = os.path.join(ARCHIVE_DIR, f'{table}.csv.gz') if archive else None
+        rows = archive_partition(table, path) if archive else None
+        with transaction.atomic(), connection.cursor() as cursor:
+            cursor.execute(
+                f'UPDATE {PARTITION_CATALOG_TABLE} SET status = %s, archived_at = %s, archive_path = %s, '
+                f'archived_rows = %s WHERE month_key = %s',
+                [STATUS_ARCHIVED, _now_ms(), path, rows, month_key]
+            )
+            cursor.execute(f'DROP TABLE IF EXISTS {table}')
+        _known_partitions.discard(month_key)
+        done.append((month_key, table, rows))
+    _catalog_cache['loaded_at'] = 0.0
+    return done
+
+
+def cleanup_id_allocator():
+    """SQLite 할당 테이블은 마지막 id 만 남긴다 (AUTOINCREMENT 는 지워도 재사용하지 않음)"""
+    from django.db import connection
+
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'DELETE FROM {SCAN_REPORT_ID_TABLE} WHERE id < (SELECT MAX(id) FROM {SCAN_REPORT_ID_TABLE})'
+        )
+
+
+def maintain_partitions(now_ms=None, dry_run=False):
+    """cron: 이번 달/다음 달 파티션 준비 + 보관 정책. (생성한 테이블, 정리 결과) 반환"""
+    now_ms = now_ms or _now_ms()
+    ensure_partition_tables()
+    current = month_key_for(now_ms)
+    created = [] if dry_run else [ensure_partition(current), ensure_partition(shift_month(current, 1))]
+    expired = apply_retention(now_ms=now_ms, dry_run=dry_run)
+    if not dry_run:
+        cleanup_id_allocator()
+    return created, expired
+
+
+# ---------------------------------------------------------------------------
+# 기존 단일 테이블 -> 월별 파티션 (migration_runner 'scan_reports_to_partitions')
+# ---------------------------------------------------------------------------
+
+def legacy_source(after_pk, limit):
+    from django.db import connection
+
+    if LEGACY_SCAN_REPORT_TABLE not in connection.introspection.table_names():
+        return []
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {", ".join(SCAN_REPORT_STORAGE_COLUMNS)} FROM {LEGACY_SCAN_REPORT_TABLE} '
+            f'WHERE id > %s ORDER BY id LIMIT %s',
+            [after_pk, limit]
+        )
+        return cursor.fetchall()
+
+
+def legacy_plan(rows):
+    window_index = SCAN_REPORT_STORAGE_COLUMNS.index('window_start')
+    return [
+        {'op': 'move', 'target': partition_table(month_key_for(row[window_index])), 'row': row,
+         'month_key': month_key_for(row[window_index])}
+        for row in rows
+    ]
+
+
+def legacy_apply(changes):
+    """행을 해당 월 파티션에 넣고 기존 테이블에서 지운다 - 이미 옮긴 행은 ON CONFLICT 로 건너뜀"""
+    from django.db import connection
+
+    if not changes:
+        return 0
+    reserve_report_ids(max(change['row'][0] for change in changes))
+    moved = 0
+    with connection.cursor() as cursor:
+        for change in changes:
+            table = ensure_partition(change['month_key'])
+            cursor.execute(
+                f'INSERT INTO {table} ({", ".join(SCAN_REPORT_STORAGE_COLUMNS)}) '
+                f'VALUES ({", ".join(["%s"] * len(SCAN_REPORT_STORAGE_COLUMNS))}) ON CONFLICT DO NOTHING',
+                list(change['row'])
+            )
+            moved += cursor.rowcount
+        cursor.executemany(
+            f'DELETE FROM {LEGACY_SCAN_REPORT_TABLE} WHERE id = %s', [[change['row'][0]] for change in changes]
+        )
+    return moved
+
+
+def main():
+    print("=" * 60)
+    print("🗂️  스캔 보고서 월별 파티션")
+    print("=" * 60)
+
+    args = sys.argv[1:]
+    dry_run = '--dry-run' in args
+    if not setup_django():
+        return
+
+    if '--maintain' in args:
+        created, expired = maintain_partitions(dry_run=dry_run)
+        for table in created:
+            print(f"   ✅ 파티션 준비: {table}")
+        label = '(dry-run) ' if dry_run else ''
+        for month_key, table, rows in expired:
+            detail = f'{rows}행 보관' if rows is not None else '보관 안 함'
+            print(f"   🗑️  {label}{table} 삭제 ({detail})")
+        if not expired:
+            print(f"   ✅ 보관 기간({RETENTION_MONTHS}개월)이 지난 파티션 없음")
+    elif '--drop-legacy' in args:
+        from django.db import connection
+
+        ensure_partition_tables()
+        if not _catalog_cache['legacy']:
+            print(f"   ✅ 기존 테이블 {LEGACY_SCAN_REPORT_TABLE} 없음")
+            return
+        with connection.cursor() as cursor:
+            cursor.execute(f'SELECT COUNT(*) FROM {LEGACY_SCAN_REPORT_TABLE}')
+            remaining = cursor.fetchone()[0]
+            if remaining:
+                print(f"❌ 아직 {remaining}행 남아 있습니다. migration_runner 로 먼저 옮기세요.")
+                return
+            cursor.execute(f'DROP TABLE {LEGACY_SCAN_REPORT_TABLE}')
+        print(f"   🗑️  {LEGACY_SCAN_REPORT_TABLE} 삭제 (이제 파티션만 조회)")
+    elif '--list' in args:
+        ensure_partition_tables()
+        catalog = _refresh_catalog(force=True)
+        if catalog['legacy']:
+            print(f"   ⚠️  기존 테이블 {LEGACY_SCAN_REPORT_TABLE} 남아 있음 (migration_runner 로 이동)")
+        for month_key, table, _, _ in catalog['partitions']:
+            print(f"   {month_key}: {table}")
+    else:
+        print("사용법: python3 scan_report_partitions.py --maintain [--dry-run] | --list | --drop-legacy")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,357 @@
+#!/usr/bin/env python3
+"""
+느린 쿼리 기록 + 자동 EXPLAIN
+comprehensive/visitor API 가 느려질 때마다 api_diagnostic_script.py 로 조건을 손으로 재현하던 것을 대신한다.
+
+- 요청 처리 중 SLOW_QUERY_MS 이상 걸린 쿼리의 SQL, 파라미터, 호출 뷰, 호출 스택을 기록
+- SELECT 는 백그라운드 스레드(별도 DB 연결)에서 실행 계획을 받아 붙인다
+  (PostgreSQL: EXPLAIN, SQLite: EXPLAIN QUERY PLAN) - 요청은 기다리지 않는다
+- Django 캐시에 SLOW_QUERY_RING_SIZE 칸짜리 링 버퍼로 저장 (공유 캐시면 워커 전체가 한 버퍼를 쓴다)
+- 관리자 페이지 /admin-tools/slow-queries/ 에서 최근 기록 확인 (?format=json 지원)
+
+settings.MIDDLEWARE 에 'slow_query_log.SlowQueryMiddleware' 추가 (인증 미들웨어 뒤), urls.py:
+    from slow_query_log import slow_queries_view
+    path('admin-tools/slow-queries/', slow_queries_view),
+
+스크립트에서는 with capture_slow_queries('script_name'): ... 로 같은 기록을 남길 수 있다.
+파라미터에는 개인정보가 들어갈 수 있으므로 페이지는 관리자(ROLE_ADMIN)만 볼 수 있다.
+"""
+
+import os
+import re
+import sys
+import threading
+import time
+import traceback
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from datetime import datetime
+
+SLOW_QUERY_MS = float(os.environ.get('APTGO_SLOW_QUERY_MS', '100'))
+SLOW_QUERY_RING_SIZE = 200
+SLOW_QUERY_CACHE_PREFIX = 'slow_query:v1:'
+SLOW_QUERY_CACHE_SECONDS = 7 * 24 * 3600
+# 같은 형태의 쿼리는 이 시간 동안 실행 계획을 다시 뽑지 않는다
+PLAN_CACHE_SECONDS = 300
+PLAN_CACHE_SIZE = 256
+# 백그라운드 대기열이 이만큼 밀리면 새 기록은 버린다 (DB 가 이미 느린 상황에서 부하를 더하지 않도록)
+MAX_PENDING = 50
+STACK_DEPTH = 12
+MAX_SQL_LENGTH = 4000
+MAX_PARAMS_LENGTH = 1000
+
+_EXPLAIN_PREFIX = {
+    'sqlite': 'EXPLAIN QUERY PLAN ',
+    'postgresql': 'EXPLAIN ',
+}
+_IN_LIST = re.compile(r'%s(?:\s*,\s*%s)+')
+_SKIP_FRAMES = (os.sep + 'django' + os.sep, 'site-packages', 'asgiref', os.path.abspath(__file__))
+
+_executor = None
+_executor_lock = threading.Lock()
+_pending = threading.BoundedSemaphore(MAX_PENDING)
+_dropped = 0
+_plan_cache = OrderedDict()
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='slow-query')
+        return _executor
+
+
+def query_fingerprint(sql):
+    """IN (%s, %s, ...) 길이 차이를 접어 같은 형태의 쿼리를 한 키로"""
+    return _IN_LIST.sub('%s...', ' '.join(sql.split()))
+
+
+def calling_stack():
+    """Django/라이브러리 프레임을 뺀 앱 코드 호출 위치 (가까운 순서 아님, 바깥 -> 안쪽)"""
+    frames = [
+        frame for frame in traceback.extract_stack()
+        if not any(part in frame.filename for part in _SKIP_FRAMES)
+    ]
+    return [f'{frame.filename}:{frame.lineno} in {frame.name}' for frame in frames[-STACK_DEPTH:]]
+
+
+def _truncate(text, limit):
+    return text if len(text) <= limit else text[:limit] + f'... ({len(text)}자)'
+
+
+def explain_query(alias, vendor, sql, params):
+    """실행 계획 줄 목록 - SELECT 가 아니거나 지원하지 않는 DB 면 None"""
+    from django.db import connections
+
+    prefix = _EXPLAIN_PREFIX.get(vendor)
+    if prefix is None or not sql.lstrip().upper().startswith(('SELECT', 'WITH')):
+        return None
+    fingerprint = (alias, query_fingerprint(sql))
+    cached = _plan_cache.get(fingerprint)
+    if cached is not None and time.time() - cached[0] < PLAN_CACHE_SECONDS:
+        return cached[1]
+
+    connection = connections[alias]
+    try:
+        with connection.cursor() as cursor:
+            cursor.execute(prefix + sql, params)
+            # SQLite: (id, parent, notused, detail) / PostgreSQL: (QUERY PLAN,)
+            plan = [str(row[-1]) for row in cursor.fetchall()]
+    except Exception as e:
+        plan = [f'EXPLAIN 실패: {e}']
+    finally:
+        connection.close_if_unusable_or_obsolete()
+
+    _plan_cache[fingerprint] = (time.time(), plan)
+    _plan_cache.move_to_end(fingerprint)
+    while len(_plan_cache) > PLAN_CACHE_SIZE:
+        _plan_cache.popitem(last=False)
+    return plan
+
+
+def push_entry(entry):
+    """링 버퍼에 한 건 저장 -> 부여된 순번"""
+    from django.core.cache import cache
+
+    counter_key = f'{SLOW_QUERY_CACHE_PREFIX}seq'
+    cache.add(counter_key, 0, None)
+    seq = cache.incr(counter_key)
+    entry['seq'] = seq
+    cache.set(f'{SLOW_QUERY_CACHE_PREFIX}{seq % SLOW_QUERY_RING_SIZE}', entry, SLOW_QUERY_CACHE_SECONDS)
+    return seq
+
+
+def recent_slow_queries(limit=SLOW_QUERY_RING_SIZE):
+    """최근 기록 (최신 순)"""
+    from django.core.cache import cache
+
+    last = cache.get(f'{SLOW_QUERY_CACHE_PREFIX}seq') or 0
+    seqs = range(last, max(last - min(limit, SLOW_QUERY_RING_SIZE), 0), -1)
+    keys = [f'{SLOW_QUERY_CACHE_PREFIX}{seq % SLOW_QUERY_RING_SIZE}' for seq in seqs]
+    found = cache.get_many(keys)
+    # 다른 순번이 덮어쓴 칸은 건너뛴다
+    return [
+        found[key] for seq, key in zip(seqs, keys)
+        if key in found and found[key].get('seq') == seq
+    ]
+
+
+def clear_slow_queries():
+    from django.core.cache import cache
+
+    cache.delete_many(
+        [f'{SLOW_QUERY_CACHE_PREFIX}{slot}' for slot in range(SLOW_QUERY_RING_SIZE)]
+        + [f'{SLOW_QUERY_CACHE_PREFIX}seq']
+    )
+
+
+def _record(entry, alias, vendor, sql, params):
+    try:
+        if not entry['many']:
+            entry['plan'] = explain_query(alias, vendor, sql, params)
+        push_entry(entry)
+    except Exception as e:
+        print(f"❌ 느린 쿼리 기록 실패: {e}")
+    finally:
+        _pending.release()
+
+
+def _submit(entry, alias, vendor, sql, params):
+    global _dropped
+    if not _pending.acquire(blocking=False):
+        _dropped += 1
+        return
+    _get_executor().submit(_record, entry, alias, vendor, sql, params)
+
+
+@contextmanager
+def capture_slow_queries(view, path='', threshold_ms=None):
+    """이 블록 안(현재 스레드의 기본 연결)에서 느린 쿼리 기록
+
+    view 는 문자열 또는 호출 시점에 이름을 돌려주는 함수 (뷰 해석 전에 블록이 시작되는 미들웨어용)
+    """
+    from django.db import connection
+
+    threshold = (SLOW_QUERY_MS if threshold_ms is None else threshold_ms) / 1000
+
+    def capture(execute, sql, params, many, context):
+        started = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed = time.perf_counter() - started
+            if elapsed >= threshold:
+                db = context['connection']
+                entry = {
+                    'captured_at': time.time(),
+                    'duration_ms': round(elapsed * 1000, 1),
+                    'view': view() if callable(view) else view,
+                    'path': path,
+                    'alias': db.alias,
+                    'sql': _truncate(sql, MAX_SQL_LENGTH),
+                    'params': _truncate(repr(params), MAX_PARAMS_LENGTH),
+                    'many': many,
+                    'stack': calling_stack(),
+                    'plan': None,
+                }
+                _submit(entry, db.alias, db.vendor, sql, None if many else params)
+
+    with connection.execute_wrapper(capture):
+        yield
+
+
+class SlowQueryMiddleware:
+    """요청마다 capture_slow_queries 적용
+
+    async 뷰(ASGI)의 ORM 호출은 다른 스레드의 연결에서 실행되므로 잡지 않고 그대로 통과시킨다.
+    async 를 지원해야 ASGI 에서 미들웨어 체인 전체가 sync 로 바뀌지 않는다.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.get_response(request)
+        from app_metrics import view_label
+
+        with capture_slow_queries(lambda: view_label(request), request.path):
+            return self.get_response(request)
+
+
+# ---------------------------------------------------------------------------
+# 관리자 페이지
+# ---------------------------------------------------------------------------
+
+def _format_entry(entry):
+    from fast_serializers import KST
+
+    return {
+        'seq': entry['seq'],
+        'capturedAt': datetime.fromtimestamp(entry['captured_at'], KST).isoformat(timespec='seconds'),
+        'durationMs': entry['duration_ms'],
+        'view': entry['view'],
+        'path': entry['path'],
+        'alias': entry['alias'],
+        'sql': entry['sql'],
+        'params': entry['params'],
+        'stack': entry['stack'],
+        'plan': entry['plan'],
+    }
+
+
+def render_slow_queries(entries):
+    from django.utils.html import format_html, format_html_join
+
+    if not entries:
+        return format_html('<p class="dashboard-empty">{}</p>', f'{SLOW_QUERY_MS:g}ms 이상 걸린 쿼리가 없습니다.')
+    rows = format_html_join(
+        '\n',
+        '<tr><td>{}</td><td>{}</td><td>{}ms</td><td>{}<br><small>{}</small></td>'
+        '<td><details><summary><code>{}</code></summary><pre>{}</pre><p>params: <code>{}</code></p>'
+        '<pre>{}</pre></details></td><td><pre>{}</pre></td></tr>',
+        (
+            (
+                entry['seq'], entry['capturedAt'], entry['durationMs'], entry['view'], entry['path'],
+                entry['sql'][:120], entry['sql'], entry['params'], '\n'.join(entry['stack']),
+                '\n'.join(entry['plan'] or ['-']),
+            )
+            for entry in entries
+        ),
+    )
+    return format_html(
+        '<table class="slow-queries"><thead><tr><th>#</th><th>시각</th><th>소요</th><th>뷰</th>'
+        '<th>SQL / 스택</th><th>실행 계획</th></tr></thead><tbody>{}</tbody></table>',
+        rows,
+    )
+
+
+def slow_queries_view(request):
+    """GET /admin-tools/slow-queries/ - 최근 느린 쿼리 (관리자 전용, ?format=json, POST clear=1 로 비우기)"""
+    from django.contrib.auth.decorators import login_required
+    from django.http import HttpResponse
+    from django.views.decorators.cache import never_cache
+
+    from fast_serializers import json_response
+    from request_scope import get_request_scope
+
+    @login_required
+    @never_cache
+    def _view(request):
+        if not get_request_scope(request).is_admin:
+            return HttpResponse('권한이 없습니다.', status=403, content_type='text/plain; charset=utf-8')
+        if request.method == 'POST' and request.POST.get('clear') == '1':
+            clear_slow_queries()
+        entries = [_format_entry(entry) for entry in recent_slow_queries()]
+        if request.GET.get('format') == 'json':
+            return json_response({
+                'success': True,
+                'thresholdMs': SLOW_QUERY_MS,
+                'droppedInWorker': _dropped,
+                'queries': entries,
+            })
+        html = (
+            f'<!DOCTYPE html><html lang="ko"><head><meta charset="utf-8"><title>느린 쿼리</title></head>'
+            f'<body><h1>느린 쿼리 (≥ {SLOW_QUERY_MS:g}ms, 최근 {len(entries)}건)</h1>'
+            f'{render_slow_queries(entries)}</body></html>'
+        )
+        return HttpResponse(html, content_type='text/html; charset=utf-8')
+
+    return _view(request)
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='느린 쿼리 기록 확인')
+    parser.add_argument('--limit', type=int, default=20)
+    parser.add_argument('--clear', action='store_true', help='링 버퍼 비우기')
+    args = parser.parse_args()
+
+    print("🐢 느린 쿼리 기록")
+    print("=" * 60)
+    if not setup_django():
+        return
+    if args.clear:
+        clear_slow_queries()
+        print("✅ 비웠습니다")
+        return
+
+    entries = recent_slow_queries(args.limit)
+    if not entries:
+        print(f"   {SLOW_QUERY_MS:g}ms 이상 걸린 쿼리가 없습니다 (캐시가 프로세스별이면 서버 워커 기록은 보이지 않습니다)")
+    for entry in map(_format_entry, entries):
+        print(f"\n#{entry['seq']} {entry['capturedAt']} {entry['durationMs']}ms {entry['view']} {entry['path']}")
+        print(f"   SQL: {entry['sql']}")
+        print(f"   params: {entry['params']}")
+        for line in entry['plan'] or []:
+            print(f"   plan: {line}")
+        for frame in entry['stack'][-3:]:
+            print(f"   at {frame}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,531 @@
+#!/usr/bin/env python3
+"""
+부아이디 관리 목록 API (manage-sub-accounts)
+manage-sub-accounts 페이지가 메인 계정의 부아이디 전체를 한 번에 템플릿으로 그리던 것을
+정렬 키 인덱스가 있는 보조 테이블 + keyset 페이지네이션 JSON API 로 바꾼다.
+페이지는 빈 표만 그리고 스크롤할 때마다 다음 페이지를 받아 행을 이어 붙인다.
+
+- 정렬: username / unit (동·호) / plate / joined, asc|desc
+  각 정렬마다 (main_account_id, 정렬 키, user_id) 인덱스가 있어 OFFSET 없이
+  "마지막으로 본 (키, id) 다음" 부터 LIMIT 만큼만 읽는다.
+- 검색(접두어): 아이디, 동/호 ('101', '101-12', '101동 1203호'), 번호판 ('12가', '12가34')
+  키 컬럼은 PostgreSQL 에서 COLLATE "C" 라 범위 조건이 같은 인덱스를 탄다.
+
+    GET /api/sub-accounts/?sort=unit&order=asc&q=101-12&limit=50&cursor=<nextCursor>
+
+서버 템플릿에서:
+    from sub_account_directory import sub_account_page_context
+    {{ sub_account_table }} {{ sub_account_script }}
+
+서버에서 실행:
+    python3 sub_account_directory.py --sync [<main_account_id> ...]
+"""
+
+import base64
+import json
+import os
+import re
+import sys
+import threading
+import time
+
+from fast_serializers import KSTFormatter
+from registered_plate_set import normalize_plate
+from unit_directory import normalize_dong, normalize_ho, unit_label
+
+SUB_ACCOUNT_TABLE = 'sub_account_directory'
+
+DEFAULT_PAGE_SIZE = 50
+MAX_PAGE_SIZE = 200
+
+# 정렬 이름 -> 키 컬럼 (모두 (main_account_id, 키, user_id) 인덱스가 있다)
+SORT_COLUMNS = {
+    'username': 'username_key',
+    'unit': 'unit_key',
+    'plate': 'plate_normalized',
+    'joined': 'joined_at',
+}
+
+SUB_ACCOUNT_COLUMNS = (
+    'user_id', 'main_account_id', 'username', 'username_key', 'phone', 'dong', 'ho', 'unit_key',
+    'unit_label', 'plate_number', 'plate_normalized', 'is_manager', 'is_active', 'joined_at',
+)
+
+# 로그인마다 last_login 만 저장된다 - 목록에 보이는 값이 바뀌지 않으므로 다시 반영하지 않음
+LAST_LOGIN_ONLY = frozenset({'last_login'})
+
+_table_ready = False
+_table_lock = threading.Lock()
+
+# 접두어 범위 조건이 인덱스를 타도록 키 컬럼은 바이트 순서 비교
+_KEY_COLLATE = {
+    'sqlite': '',
+    'postgresql': ' COLLATE "C"',
+}
+
+# '101동', '101-12', '101/1203', '101 1203', '101동 1203호' (구분자나 '동' 이 있어야 세대 검색)
+_UNIT_QUERY = re.compile(r'^(\d+)\s*(?:(동)\s*|\s*[-/]\s*|\s+)(\d*)\s*호?$')
+
+
+def _sub_account_ddl(vendor):
+    collate = _KEY_COLLATE.get(vendor, _KEY_COLLATE['postgresql'])
+    statements = [
+        f'''CREATE TABLE IF NOT EXISTS {SUB_ACCOUNT_TABLE} (
+            user_id INTEGER PRIMARY KEY,
+            main_account_id INTEGER NOT NULL,
+            username VARCHAR(150) NOT NULL,
+            username_key VARCHAR(150){collate} NOT NULL,
+            phone VARCHAR(30) NOT NULL,
+            dong VARCHAR(20){collate} NOT NULL,
+            ho VARCHAR(20){collate} NOT NULL,
+            unit_key VARCHAR(50){collate} NOT NULL,
+            unit_label VARCHAR(50) NOT NULL,
+            plate_number VARCHAR(20) NOT NULL,
+            plate_normalized VARCHAR(20){collate} NOT NULL,
+            is_manager BOOLEAN NOT NULL,
+            is_active BOOLEAN NOT NULL,
+            joined_at VARCHAR(32) NOT NULL
+        )''',
+        f'CREATE INDEX IF NOT EXISTS sub_account_unit_search_idx '
+        f'ON {SUB_ACCOUNT_TABLE} (main_account_id, dong, ho)',
+    ]
+    for sort, column in SORT_COLUMNS.items():
+        statements.append(
+            f'CREATE INDEX IF NOT EXISTS sub_account_{sort}_idx '
+            f'ON {SUB_ACCOUNT_TABLE} (main_account_id, {column}, user_id)'
+        )
+    return statements
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def ensure_sub_account_table():
+    """보조 테이블/정렬 인덱스 생성 (이미 있으면 무시). 워커당 한 번만 DDL"""
+    from django.db import connection, transaction
+
+    if _table_ready:
+        return
+    with _table_lock:
+        if _table_ready:
+            return
+        with connection.cursor() as cursor:
+            for statement in _sub_account_ddl(connection.vendor):
+                cursor.execute(statement)
+
+        def mark_ready():
+            global _table_ready
+            _table_ready = True
+
+        # PostgreSQL 은 DDL 도 트랜잭션에 묶이므로 커밋된 뒤에만 '있음' 으로 기억
+        transaction.on_commit(mark_ready)
+
+
+def unit_sort_key(dong, ho):
+    """'101','1203' -> '0000101|0001203' (숫자 동/호가 101, 102, ..., 1001 순서로 정렬되도록)"""
+    return f'{dong.zfill(7)}|{ho.zfill(7)}'
+
+
+# ---------------------------------------------------------------------------
+# 동기화
+# ---------------------------------------------------------------------------
+
+USER_FIELDS = (
+    'id', 'parent_account_id', 'username', 'phone', 'dong', 'ho', 'vehicle_number',
+    'is_manager', 'is_active', 'date_joined',
+)
+
+
+def _directory_row(fmt, pk, main_account_id, username, phone, dong, ho, plate, is_manager, is_active, joined):
+    dong, ho = normalize_dong(dong), normalize_ho(ho)
+    return (
+        pk, main_account_id, username, username.lower(), (phone or '').strip(), dong, ho,
+        unit_sort_key(dong, ho), unit_label(dong, ho), (plate or '').strip(), normalize_plate(plate),
+        bool(is_manager), bool(is_active), fmt.kst_iso(joined),
+    )
+
+
+def _upsert_rows(cursor, rows):
+    updates = ', '.join(f'{column} = excluded.{column}' for column in SUB_ACCOUNT_COLUMNS[1:])
+    cursor.executemany(
+        f'INSERT INTO {SUB_ACCOUNT_TABLE} ({", ".join(SUB_ACCOUNT_COLUMNS)}) '
+        f'VALUES ({", ".join(["%s"] * len(SUB_ACCOUNT_COLUMNS))}) '
+        f'ON CONFLICT (user_id) DO UPDATE SET {updates}',
+        [list(row) for row in rows]
+    )
+
+
+def _sub_account_users():
+    from accounts.models import User
+
+    return User.objects.filter(user_type='sub_account', parent_account_id__isnull=False)
+
+
+def refresh_sub_account(user_id):
+    """부아이디 한 명 다시 반영 (signals 용) - 부아이디가 아니게 됐거나 삭제됐으면 행 삭제"""
+    from django.db import connection
+
+    ensure_sub_account_table()
+    values = _sub_account_users().filter(pk=user_id).values_list(*USER_FIELDS).first()
+    with connection.cursor() as cursor:
+        if values is None:
+            cursor.execute(f'DELETE FROM {SUB_ACCOUNT_TABLE} WHERE user_id = %s', [user_id])
+        else:
+            _upsert_rows(cursor, [_directory_row(KSTFormatter(), *values)])
+
+
+def sync_sub_accounts(main_account_ids=None, batch_size=1000):
+    """전체(또는 지정한 메인 계정) 다시 채우기. (반영, 삭제) 건수 반환"""
+    from django.db import connection, transaction
+
+    ensure_sub_account_table()
+    users = _sub_account_users()
+    if main_account_ids:
+        users = users.filter(parent_account_id__in=main_account_ids)
+    fmt = KSTFormatter()
+    seen = set()
+    written = 0
+    with transaction.atomic(), connection.cursor() as cursor:
+        batch = []
+        for values in users.values_list(*USER_FIELDS).iterator(chunk_size=batch_size):
+            batch.append(_directory_row(fmt, *values))
+            seen.add(values[0])
+            if len(batch) >= batch_size:
+                _upsert_rows(cursor, batch)
+                written += len(batch)
+                batch = []
+        if batch:
+            _upsert_rows(cursor, batch)
+            written += len(batch)
+
+        sql = f'SELECT user_id FROM {SUB_ACCOUNT_TABLE}'
+        args = []
+        if main_account_ids:
+            sql += f' WHERE main_account_id IN ({", ".join(["%s"] * len(main_account_ids))})'
+            args.extend(main_account_ids)
+        cursor.execute(sql, args)
+        stale = [[row[0]] for row in cursor.fetchall() if row[0] not in seen]
+        if stale:
+            cursor.executemany(f'DELETE FROM {SUB_ACCOUNT_TABLE} WHERE user_id = %s', stale)
+    return written, len(stale)
+
+
+def connect_sub_account_signals():
+    """AppConfig.ready() 에서 한 번 호출 - 사용자 저장/삭제 커밋 후 그 행만 다시 반영"""
+    from django.db import transaction
+    from django.db.models.signals import post_delete, post_save
+
+    from accounts.models import User
+
+    def user_changed(sender, instance, update_fields=None, **kwargs):
+        if update_fields and set(update_fields) <= LAST_LOGIN_ONLY:
+            return
+        # user_type 이 바뀐 경우도 있으므로 부아이디가 아니어도 한 번 확인 (없으면 DELETE 0건)
+        user_id = instance.pk
+        transaction.on_commit(lambda: refresh_sub_account(user_id))
+
+    post_save.connect(user_changed, sender=User, dispatch_uid='sub_account_directory_user_saved')
+    post_delete.connect(user_changed, sender=User, dispatch_uid='sub_account_directory_user_deleted')
+
+
+# ---------------------------------------------------------------------------
+# 조회
+# ---------------------------------------------------------------------------
+
+def encode_cursor(sort, order, key, user_id):
+    raw = json.dumps([sort, order, key, user_id], separators=(',', ':')).encode()
+    return base64.urlsafe_b64encode(raw).decode().rstrip('=')
+
+
+def decode_cursor(token, sort, order):
+    """nextCursor -> (key, user_id). 정렬이 바뀌었거나 형식이 틀리면 ValueError"""
+    try:
+        raw = base64.urlsafe_b64decode(token + '=' * (-len(token) % 4))
+        cursor_sort, cursor_order, key, user_id = json.loads(raw)
+    except (TypeError, ValueError) as e:
+        raise ValueError('cursor 형식이 올바르지 않습니다.') from e
+    if (cursor_sort, cursor_order) != (sort, order) or not isinstance(user_id, int):
+        raise ValueError('정렬이 바뀌었습니다. 첫 페이지부터 다시 요청하세요.')
+    return key, user_id
+
+
+def _prefix_range(column, prefix):
+    """접두어 -> 인덱스 범위 조건 (LIKE 는 collation 에 따라 인덱스를 못 탈 수 있다)"""
+    return f'{column} >= %s AND {column} < %s', [prefix, prefix + '\uffff']
+
+
+def search_condition(query):
+    """검색어 -> (where, params). 동/호 형태면 세대, 아니면 아이디 또는 번호판 접두어"""
+    query = (query or '').strip()
+    if not query:
+        return '', []
+    match = _UNIT_QUERY.match(query)
+    if match:
+        dong = normalize_dong(match.group(1))
+        ho = normalize_ho(match.group(3))
+        if not ho:
+            return 'dong = %s', [dong]
+        ho_where, ho_params = _prefix_range('ho', ho)
+        return f'dong = %s AND {ho_where}', [dong] + ho_params
+
+    username_where, username_params = _prefix_range('username_key', query.lower())
+    plate = normalize_plate(query)
+    if not plate:
+        return username_where, username_params
+    plate_where, plate_params = _prefix_range('plate_normalized', plate)
+    if query.isdigit():
+        # 숫자만 입력하면 동 번호일 수도 있다 ('101')
+        return (f'(({username_where}) OR ({plate_where}) OR dong = %s)',
+                username_params + plate_params + [normalize_dong(query)])
+    return f'(({username_where}) OR ({plate_where}))', username_params + plate_params
+
+
+def list_sub_accounts(main_account_id, sort='username', order='asc', query='', cursor=None,
+                      limit=DEFAULT_PAGE_SIZE, with_count=False):
+    """부아이디 한 페이지
+
+    반환: {'subAccounts': [...], 'nextCursor': str|None, 'hasMore': bool, ['count': 전체(검색 조건 포함)]}
+    """
+    from django.db import connection
+
+    if sort not in SORT_COLUMNS:
+        raise ValueError(f'sort 는 {", ".join(SORT_COLUMNS)} 중 하나여야 합니다.')
+    if order not in ('asc', 'desc'):
+        raise ValueError('order 는 asc 또는 desc 여야 합니다.')
+    limit = max(1, min(int(limit), MAX_PAGE_SIZE))
+    column = SORT_COLUMNS[sort]
+    ensure_sub_account_table()
+
+    where = ['main_account_id = %s']
+    args = [main_account_id]
+    search_where, search_args = search_condition(query)
+    if search_where:
+        where.append(search_where)
+        args.extend(search_args)
+
+    base_where = ' AND '.join(where)
+    base_args = list(args)
+    if cursor:
+        key, after_id = decode_cursor(cursor, sort, order)
+        where.append(f'({column}, user_id) {">" if order == "asc" else "<"} (%s, %s)')
+        args.extend([key, after_id])
+
+    direction = 'ASC' if order == 'asc' else 'DESC'
+    with connection.cursor() as db_cursor:
+        db_cursor.execute(
+            f'SELECT {", ".join(SUB_ACCOUNT_COLUMNS)} FROM {SUB_ACCOUNT_TABLE} '
+            f'WHERE {" AND ".join(where)} ORDER BY {column} {direction}, user_id {direction} LIMIT %s',
+            args + [limit + 1]
+        )
+        rows = [dict(zip(SUB_ACCOUNT_COLUMNS, row)) for row in db_cursor.fetchall()]
+        count = None
+        if with_count:
+            db_cursor.execute(f'SELECT COUNT(*) FROM {SUB_ACCOUNT_TABLE} WHERE {base_where}', base_args)
+            count = db_cursor.fetchone()[0]
+
+    has_more = len(rows) > limit
+    rows = rows[:limit]
+    last = rows[-1] if rows else None
+    page = {
+        'subAccounts': [serialize_sub_account(row) for row in rows],
+        'hasMore': has_more,
+        'nextCursor': encode_cursor(sort, order, last[column], last['user_id']) if has_more else None,
+    }
+    if with_count:
+        page['count'] = count
+    return page
+
+
+def serialize_sub_account(row):
+    return {
+        'id': row['user_id'],
+        'username': row['username'],
+        'phone': row['phone'],
+        'dong': row['dong'],
+        'ho': row['ho'],
+        'unitLabel': row['unit_label'],
+        'vehicleNumber': row['plate_number'],
+        'isManager': bool(row['is_manager']),
+        'isActive': bool(row['is_active']),
+        'dateJoined': row['joined_at'],
+    }
+
+
+def sub_accounts_api(request):
+    """GET /api/sub-accounts/ - 메인 계정(관리단) 부아이디 목록 한 페이지"""
+    from django.contrib.auth.decorators import login_required
+
+    from fast_serializers import json_response
+    from mobile_api_views import comprehensive_access_error
+    from request_scope import get_request_scope
+
+    @login_required
+    def _view(request):
+        if request.method != 'GET':
+            return json_response({'error': '잘못된 요청 방식입니다.'}, status=405)
+        scope = get_request_scope(request)
+        denied = comprehensive_access_error(scope)
+        if denied:
+            return denied
+
+        cursor = request.GET.get('cursor') or None
+        try:
+            page = list_sub_accounts(
+                scope.main_account_id,
+                sort=request.GET.get('sort', 'username'),
+                order=request.GET.get('order', 'asc'),
+                query=request.GET.get('q', ''),
+                cursor=cursor,
+                limit=int(request.GET.get('limit', DEFAULT_PAGE_SIZE)),
+                # 전체 건수는 첫 페이지에서만 (이후 페이지는 인덱스 범위만 읽는다)
+                with_count=cursor is None,
+            )
+        except ValueError as e:
+            return json_response({'success': False, 'error': str(e)}, status=400)
+
+        page['success'] = True
+        return json_response(page)
+
+    return _view(request)
+
+
+# ---------------------------------------------------------------------------
+# 페이지 (점진 렌더링)
+# ---------------------------------------------------------------------------
+
+SUB_ACCOUNT_TABLE_HTML = '''<div class="sub-account-list" data-api-url="/api/sub-accounts/">
+  <input type="search" class="sub-account-search" placeholder="아이디, 동/호(101-1203), 차량번호 검색">
+  <span class="sub-account-count"></span>
+  <table class="sub-account-table">
+    <thead><tr>
+      <th><button type="button" data-sort="username">아이디</button></th>
+      <th><button type="button" data-sort="unit">동/호</button></th>
+      <th><button type="button" data-sort="plate">차량번호</button></th>
+      <th>연락처</th>
+      <th><button type="button" data-sort="joined">가입일</button></th>
+      <th>구분</th>
+    </tr></thead>
+    <tbody></tbody>
+  </table>
+  <div class="sub-account-sentinel" aria-hidden="true"></div>
+</div>'''
+
+# 한 페이지씩 받아 행을 이어 붙인다. 검색어/정렬이 바뀌면 처음부터, 늦게 온 이전 응답은 버린다.
+# 행에는 data-id 만 달아 기존 수정/삭제 스크립트가 tbody 에 위임(delegation)해서 쓴다.
+SUB_ACCOUNT_SCRIPT = '''<script>
+(function () {
+  var root = document.querySelector('.sub-account-list');
+  if (!root) { return; }
+  var tbody = root.querySelector('tbody');
+  var counter = root.querySelector('.sub-account-count');
+  var state = {sort: 'username', order: 'asc', q: '', cursor: null, done: false, loading: false, generation: 0};
+
+  function cell(row, text) {
+    var td = document.createElement('td');
+    td.textContent = text || '';
+    row.appendChild(td);
+  }
+
+  function render(accounts) {
+    var fragment = document.createDocumentFragment();
+    accounts.forEach(function (a) {
+      var tr = document.createElement('tr');
+      tr.setAttribute('data-id', a.id);
+      if (!a.isActive) { tr.className = 'inactive'; }
+      cell(tr, a.username); cell(tr, a.unitLabel); cell(tr, a.vehicleNumber);
+      cell(tr, a.phone); cell(tr, (a.dateJoined || '').slice(0, 10)); cell(tr, a.isManager ? '관리단' : '입주민');
+      fragment.appendChild(tr);
+    });
+    tbody.appendChild(fragment);
+  }
+
+  function loadMore() {
+    if (state.loading || state.done) { return; }
+    state.loading = true;
+    var generation = state.generation;
+    var params = new URLSearchParams({sort: state.sort, order: state.order, q: state.q});
+    if (state.cursor) { params.set('cursor', state.cursor); }
+    fetch(root.getAttribute('data-api-url') + '?' + params, {credentials: 'same-origin'})
+      .then(function (r) { return r.json(); })
+      .then(function (page) {
+        if (generation !== state.generation) { return; }
+        if (!page.success) { throw new Error(page.error); }
+        render(page.subAccounts);
+        if (page.count !== undefined) { counter.textContent = '총 ' + page.count + '명'; }
+        state.cursor = page.nextCursor;
+        state.done = !page.hasMore;
+      })
+      .catch(function () { counter.textContent = '목록을 불러오지 못했습니다.'; })
+      .then(function () {
+        if (generation === state.generation) { state.loading = false; }
+      });
+  }
+
+  function reset() {
+    state.generation += 1;
+    state.cursor = null; state.done = false; state.loading = false;
+    tbody.textContent = '';
+    loadMore();
+  }
+
+  var timer = null;
+  root.querySelector('.sub-account-search').addEventListener('input', function (e) {
+    clearTimeout(timer);
+    timer = setTimeout(function () { state.q = e.target.value.trim(); reset(); }, 250);
+  });
+  root.querySelectorAll('[data-sort]').forEach(function (button) {
+    button.addEventListener('click', function () {
+      var sort = button.getAttribute('data-sort');
+      state.order = (state.sort === sort && state.order === 'asc') ? 'desc' : 'asc';
+      state.sort = sort;
+      reset();
+    });
+  });
+  new IntersectionObserver(function (entries) {
+    if (entries[0].isIntersecting) { loadMore(); }
+  }, {rootMargin: '400px'}).observe(root.querySelector('.sub-account-sentinel'));
+})();
+</script>'''
+
+
+def sub_account_page_context():
+    """manage-sub-accounts 템플릿 컨텍스트 - 빈 표와 스크립트만 (행은 API 로 점진 렌더링)"""
+    from django.utils.safestring import mark_safe
+
+    return {
+        'sub_account_table': mark_safe(SUB_ACCOUNT_TABLE_HTML),
+        'sub_account_script': mark_safe(SUB_ACCOUNT_SCRIPT),
+    }
+
+
+def main():
+    print("=" * 60)
+    print("👥 부아이디 관리 목록 테이블")
+    print("=" * 60)
+
+    args = sys.argv[1:]
+    if not setup_django():
+        return
+
+    ensure_sub_account_table()
+    if '--sync' in args:
+        main_account_ids = [int(a) for a in args if a.isdigit()] or None
+        start = time.time()
+        written, removed = sync_sub_accounts(main_account_ids)
+        print(f"   ✅ 반영 {written}건, 삭제 {removed}건 ({time.time() - start:.2f}초)")
+    else:
+        print("사용법: python3 sub_account_directory.py --sync [<main_account_id> ...]")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,449 @@
+#!/usr/bin/env python3
+"""
+부아이디 일괄 등록 (CSV / XLSX)
+새 아파트 입주 시 부아이디를 폼으로 한 명씩 만들면 요청마다 비밀번호 해시 비용을
+직렬로 치르므로, 파일 한 번 업로드로 수천 세대를 등록한다.
+
+1. 파일을 한 행씩 읽으며 검증 (필수값, 아이디 형식/중복, 동/호 정규화, 비밀번호 정책)
+2. 검증을 통과한 행의 비밀번호는 읽는 동안 바로 프로세스 풀에 나눠 해시
+3. bulk_create 로 배치 단위 INSERT (배치가 실패하면 그 배치만 한 행씩 다시 시도)
+4. bulk_create 는 post_save 를 보내지 않으므로 변경 피드/디렉터리/세대/스냅샷은 직접 갱신
+
+응답은 행 번호별 오류 목록이다. dry_run=1 이면 검증만 하고 저장하지 않는다.
+
+    POST /api/sub-accounts/import/  (multipart: file=<csv|xlsx>, dry_run=0|1)
+
+파일 첫 행은 헤더 (영문 또는 한글):
+    username/아이디, password/비밀번호, dong/동, ho/호, vehicle_number/차량번호, phone/연락처, is_manager/관리단 (관리단 지정은 메인 계정만)
+
+XLSX 는 openpyxl 이 있어야 읽는다 (없으면 CSV 로 업로드).
+
+서버에서 실행:
+    python3 sub_account_import.py <main_username> accounts.csv [--dry-run]
+"""
+
+import csv
+import io
+import os
+import re
+import sys
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import openpyxl
+except ImportError:
+    openpyxl = None
+
+from registered_plate_set import normalize_plate
+from unit_directory import normalize_dong, normalize_ho
+
+IMPORT_WORKERS = int(os.environ.get('APTGO_IMPORT_WORKERS', str(os.cpu_count() or 2)))
+MAX_IMPORT_ROWS = 5000
+MAX_IMPORT_SIZE = 10 * 1024 * 1024
+INSERT_BATCH_SIZE = 500
+# 작업 하나당 해시 개수 - 프로세스 간 전달 비용을 줄인다
+HASH_CHUNK_SIZE = 50
+
+# 내부 필드 -> 허용하는 헤더 이름
+HEADER_ALIASES = {
+    'username': ('username', '아이디'),
+    'password': ('password', '비밀번호'),
+    'dong': ('dong', '동'),
+    'ho': ('ho', '호'),
+    'vehicle_number': ('vehicle_number', '차량번호', '번호판'),
+    'phone': ('phone', '연락처', '전화번호'),
+    'is_manager': ('is_manager', '관리단'),
+}
+REQUIRED_FIELDS = ('username', 'password', 'dong', 'ho')
+
+# django.contrib.auth.validators.UnicodeUsernameValidator 와 같은 규칙
+_USERNAME_PATTERN = re.compile(r'^[\w.@+-]{1,150}$')
+_TRUE_VALUES = ('1', 'y', 'yes', 'true', 'o', '예', '관리단')
+
+_executor = None
+_executor_lock = threading.Lock()
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+# ---------------------------------------------------------------------------
+# 파일 읽기 (스트리밍)
+# ---------------------------------------------------------------------------
+
+def _iter_csv(fileobj):
+    # Django UploadedFile 은 실제 파일 객체를 .file 에 들고 있다
+    text = io.TextIOWrapper(getattr(fileobj, 'file', fileobj), encoding='utf-8-sig', newline='')
+    try:
+        yield from csv.reader(text)
+    finally:
+        text.detach()
+
+
+def _iter_xlsx(fileobj):
+    if openpyxl is None:
+        raise ValueError('엑셀 업로드에는 openpyxl 이 필요합니다. CSV 로 업로드해주세요.')
+    workbook = openpyxl.load_workbook(fileobj, read_only=True, data_only=True)
+    try:
+        for values in workbook.worksheets[0].iter_rows(values_only=True):
+            yield ['' if value is None else str(value) for value in values]
+    finally:
+        workbook.close()
+
+
+def _header_map(header):
+    """헤더 행 -> {필드: 열 번호}. 필수 열이 없으면 ValueError"""
+    lookup = {alias: field for field, aliases in HEADER_ALIASES.items() for alias in aliases}
+    columns = {}
+    for index, name in enumerate(header):
+        field = lookup.get(str(name).strip().lower())
+        if field and field not in columns:
+            columns[field] = index
+    missing = [field for field in REQUIRED_FIELDS if field not in columns]
+    if missing:
+        raise ValueError(f'필수 열이 없습니다: {", ".join(missing)}')
+    return columns
+
+
+def iter_import_rows(fileobj, filename):
+    """(행 번호, {필드: 문자열}) - 헤더 다음 행이 2번. 빈 행은 건너뛴다"""
+    reader = _iter_xlsx(fileobj) if filename.lower().endswith('.xlsx') else _iter_csv(fileobj)
+    header = next(reader, None)
+    if header is None:
+        raise ValueError('빈 파일입니다.')
+    columns = _header_map(header)
+    for row_number, values in enumerate(reader, start=2):
+        if not any(str(value).strip() for value in values):
+            continue
+        yield row_number, {
+            field: str(values[index]).strip() if index < len(values) else ''
+            for field, index in columns.items()
+        }
+
+
+# ---------------------------------------------------------------------------
+# 검증
+# ---------------------------------------------------------------------------
+
+def _row_errors(values, seen_usernames):
+    """한 행 검증 (DB 조회 없이) -> 오류 문자열 목록"""
+    from django.contrib.auth.password_validation import validate_password
+    from django.core.exceptions import ValidationError
+
+    from accounts.models import User
+
+    errors = [f'{field} 값이 비어 있습니다.' for field in REQUIRED_FIELDS if not values.get(field)]
+    username = values.get('username', '')
+    if username:
+        if not _USERNAME_PATTERN.match(username):
+            errors.append('아이디는 150자 이하의 영문/숫자/@.+-_ 만 사용할 수 있습니다.')
+        elif username in seen_usernames:
+            errors.append(f'파일 안에서 중복된 아이디입니다 ({seen_usernames[username]}행).')
+    if values.get('dong') and not normalize_dong(values['dong']):
+        errors.append('동 형식이 올바르지 않습니다.')
+    if values.get('ho') and not normalize_ho(values['ho']):
+        errors.append('호 형식이 올바르지 않습니다.')
+    if values.get('password'):
+        try:
+            validate_password(values['password'], User(username=username))
+        except ValidationError as e:
+            errors.extend(e.messages)
+    return errors
+
+
+def validate_rows(rows):
+    """스트리밍 검증 - (행 번호, 값, 오류 목록) 을 순서대로 낸다 (오류가 없어야 등록 대상)
+
+    DB 중복 확인은 INSERT_BATCH_SIZE 행씩 모아 username__in 한 번으로 한다.
+    """
+    from accounts.models import User
+
+    seen_usernames = {}
+    pending = []
+
+    def flush():
+        usernames = [values['username'] for _, values in pending]
+        existing = set(User.objects.filter(username__in=usernames).values_list('username', flat=True))
+        for row_number, values in pending:
+            if values['username'] in existing:
+                yield row_number, values, ['이미 사용 중인 아이디입니다.']
+            else:
+                yield row_number, values, []
+        pending.clear()
+
+    for count, (row_number, values) in enumerate(rows, start=1):
+        if count > MAX_IMPORT_ROWS:
+            yield row_number, values, [f'한 번에 {MAX_IMPORT_ROWS}행까지 등록할 수 있습니다.']
+            break
+        errors = _row_errors(values, seen_usernames)
+        if values.get('username') and values['username'] not in seen_usernames:
+            seen_usernames[values['username']] = row_number
+        if errors:
+            yield row_number, values, errors
+            continue
+        pending.append((row_number, values))
+        if len(pending) >= INSERT_BATCH_SIZE:
+            yield from flush()
+    if pending:
+        yield from flush()
+
+
+# ---------------------------------------------------------------------------
+# 비밀번호 해시 (프로세스 풀)
+# ---------------------------------------------------------------------------
+
+def hash_passwords(hasher_path, passwords):
+    """워커 프로세스에서 실행 - settings 없이 hasher 클래스만으로 해시 (salt 는 행마다 새로)"""
+    from django.utils.module_loading import import_string
+
+    hasher = import_string(hasher_path)()
+    return [hasher.encode(password, hasher.salt()) for password in passwords]
+
+
+def default_hasher_path():
+    """settings.PASSWORD_HASHERS 첫 번째 (make_password 가 쓰는 것과 같은 hasher)"""
+    from django.contrib.auth.hashers import get_hasher
+
+    hasher_class = type(get_hasher('default'))
+    return f'{hasher_class.__module__}.{hasher_class.__qualname__}'
+
+
+def _get_executor():
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ProcessPoolExecutor(max_workers=IMPORT_WORKERS)
+        return _executor
+
+
+# ---------------------------------------------------------------------------
+# 등록
+# ---------------------------------------------------------------------------
+
+def _build_users(main_account, batch, encoded_passwords):
+    from accounts.models import User
+
+    return [
+        User(
+            username=values['username'],
+            password=encoded,
+            user_type='sub_account',
+            parent_account_id=main_account.pk,
+            dong=normalize_dong(values['dong']),
+            ho=normalize_ho(values['ho']),
+            vehicle_number=values.get('vehicle_number', ''),
+            phone=values.get('phone', ''),
+            is_manager=values.get('is_manager', '').lower() in _TRUE_VALUES,
+            is_active=True,
+        )
+        for (_, values), encoded in zip(batch, encoded_passwords)
+    ]
+
+
+def _record_created(users, apartment_id):
+    """signals 대신 변경 피드 기록 (같은 트랜잭션)"""
+    from change_feed import ENTITY_USER, OP_CREATE, record_change
+
+    for user in users:
+        record_change(ENTITY_USER, user.pk, apartment_id, OP_CREATE)
+
+
+def _insert_batch(main_account, batch, encoded_passwords, report):
+    """배치 INSERT. 동시에 같은 아이디가 생기는 등 실패하면 그 배치만 한 행씩 다시"""
+    from django.db import IntegrityError, transaction
+
+    from accounts.models import User
+
+    users = _build_users(main_account, batch, encoded_passwords)
+    apartment_id = main_account.apartment_id
+    try:
+        with transaction.atomic():
+            created = User.objects.bulk_create(users)
+            _record_created(created, apartment_id)
+        report['created'] += len(created)
+        return created
+    except IntegrityError:
+        pass
+
+    created = []
+    for (row_number, values), user in zip(batch, users):
+        user.pk = None
+        try:
+            with transaction.atomic():
+                user.save(force_insert=True)
+        except IntegrityError as e:
+            report['errors'].append({'row': row_number, 'username': values['username'], 'errors': [str(e)]})
+        else:
+            # save() 는 post_save 를 보내므로 변경 피드는 signals 가 기록한다
+            created.append(user)
+    report['created'] += len(created)
+    return created
+
+
+def _refresh_derived(main_account, created):
+    """bulk_create 로 빠진 post_save 후속 작업 - 아파트/메인 계정 단위로 한 번씩"""
+    from apartment_snapshot_builder import schedule_snapshot_rebuild
+    from sub_account_directory import sync_sub_accounts
+    from unit_directory import register_units
+    from vehicle_directory import reconcile_apartment
+
+    apartment_id = main_account.apartment_id
+    sync_sub_accounts([main_account.pk])
+    if apartment_id:
+        register_units(apartment_id, [(user.dong, user.ho) for user in created])
+        if any(normalize_plate(user.vehicle_number) for user in created):
+            reconcile_apartment(apartment_id)
+        schedule_snapshot_rebuild(apartment_id)
+
+
+def import_sub_accounts(main_account, fileobj, filename, dry_run=False, allow_managers=True):
+    """파일 -> 부아이디 일괄 등록. 행별 오류를 담은 결과 dict 반환
+
+    allow_managers=False 면 관리단(is_manager) 지정 행은 오류로 돌려준다 (관리단이 관리단을 만들지 못하게).
+
+    검증과 해시가 겹치도록 검증을 통과한 행은 HASH_CHUNK_SIZE 개씩 바로 풀에 넣고,
+    INSERT 는 파일 순서대로 배치별 해시가 끝나는 대로 진행한다.
+    """
+    started = time.time()
+    report = {'total': 0, 'valid': 0, 'created': 0, 'errors': [], 'dryRun': dry_run}
+    hasher_path = None if dry_run else default_hasher_path()
+
+    batches = []       # [(행 목록, [future, ...])]
+    batch, futures, chunk = [], [], []
+
+    def submit_chunk():
+        if chunk:
+            futures.append(_get_executor().submit(hash_passwords, hasher_path, list(chunk)))
+            chunk.clear()
+
+    for row_number, values, errors in validate_rows(iter_import_rows(fileobj, filename)):
+        report['total'] += 1
+        if not allow_managers and values.get('is_manager', '').lower() in _TRUE_VALUES:
+            errors = errors + ['관리단 지정은 메인 계정만 할 수 있습니다.']
+        if errors:
+            report['errors'].append({'row': row_number, 'username': values.get('username', ''), 'errors': errors})
+            continue
+        report['valid'] += 1
+        if dry_run:
+            continue
+        batch.append((row_number, values))
+        chunk.append(values['password'])
+        if len(chunk) >= HASH_CHUNK_SIZE:
+            submit_chunk()
+        if len(batch) >= INSERT_BATCH_SIZE:
+            submit_chunk()
+            batches.append((batch, futures))
+            batch, futures = [], []
+    if batch:
+        submit_chunk()
+        batches.append((batch, futures))
+
+    created = []
+    for batch, futures in batches:
+        encoded = [value for future in futures for value in future.result()]
+        created.extend(_insert_batch(main_account, batch, encoded, report))
+    if created:
+        _refresh_derived(main_account, created)
+
+    report['errors'].sort(key=lambda error: error['row'])
+    report['failed'] = len(report['errors'])
+    report['elapsedMs'] = int((time.time() - started) * 1000)
+    return report
+
+
+def sub_account_import_api(request):
+    """POST /api/sub-accounts/import/ - 메인 계정(관리단)이 부아이디 파일 업로드"""
+    from django.contrib.auth.decorators import login_required
+
+    from accounts.models import User
+
+    from fast_serializers import json_response
+    from mobile_api_views import comprehensive_access_error
+    from request_scope import ROLE_MAIN, get_request_scope
+
+    @login_required
+    def _view(request):
+        if request.method != 'POST':
+            return json_response({'error': '잘못된 요청 방식입니다.'}, status=405)
+        scope = get_request_scope(request)
+        denied = comprehensive_access_error(scope)
+        if denied:
+            return denied
+
+        upload = request.FILES.get('file')
+        if upload is None:
+            return json_response({'success': False, 'error': 'file 이 필요합니다.'}, status=400)
+        if upload.size > MAX_IMPORT_SIZE:
+            return json_response({'success': False, 'error': '파일이 너무 큽니다.'}, status=413)
+        if not upload.name.lower().endswith(('.csv', '.xlsx')):
+            return json_response({'success': False, 'error': 'CSV 또는 XLSX 파일만 업로드할 수 있습니다.'}, status=400)
+
+        main_account = User.objects.get(pk=scope.main_account_id)
+        dry_run = request.POST.get('dry_run') in ('1', 'true')
+        try:
+            # 관리단 부아이디도 일괄 등록은 할 수 있지만 관리단 권한 부여는 메인 계정만
+            report = import_sub_accounts(main_account, upload, upload.name, dry_run=dry_run,
+                                         allow_managers=scope.role == ROLE_MAIN)
+        except ValueError as e:
+            return json_response({'success': False, 'error': str(e)}, status=400)
+
+        report['success'] = True
+        report['message'] = (
+            f"{report['total']}행 중 {report['valid']}행 검증 통과"
+            if dry_run else f"{report['created']}명 등록, {report['failed']}행 오류"
+        )
+        return json_response(report)
+
+    return _view(request)
+
+
+def main():
+    print("=" * 60)
+    print("👥 부아이디 일괄 등록")
+    print("=" * 60)
+
+    args = [a for a in sys.argv[1:] if not a.startswith('--')]
+    dry_run = '--dry-run' in sys.argv
+    if len(args) != 2:
+        print("사용법: python3 sub_account_import.py <main_username> <file.csv|file.xlsx> [--dry-run]")
+        return
+    if not setup_django():
+        return
+
+    from accounts.models import User
+
+    main_account = User.objects.filter(username=args[0], user_type='main_account').first()
+    if main_account is None:
+        print(f"❌ 메인 계정을 찾을 수 없습니다: {args[0]}")
+        return
+
+    with open(args[1], 'rb') as fileobj:
+        try:
+            report = import_sub_accounts(main_account, fileobj, args[1], dry_run=dry_run)
+        except ValueError as e:
+            print(f"❌ {e}")
+            return
+
+    label = '(dry-run) ' if dry_run else ''
+    print(f"   ✅ {label}{report['total']}행: 검증 통과 {report['valid']}, 등록 {report['created']}, "
+          f"오류 {report['failed']} ({report['elapsedMs']}ms)")
+    for error in report['errors'][:50]:
+        print(f"   ❌ {error['row']}행 {error['username']}: {' / '.join(error['errors'])}")
+    if report['failed'] > 50:
+        print(f"   ... 외 {report['failed'] - 50}행")
+
+
+if __name__ == '__main__':
+    main()
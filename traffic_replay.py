@@ -0,0 +1,500 @@
+#!/usr/bin/env python3
+"""
+실제 API 요청 기록 + 두 뷰 구현 나란히 재생 비교
+fix_*/deploy_* 스크립트로 뷰 본문을 바꾼 뒤 post_deployment_verification.py 같은 기능 확인만 하던 것에
+성능 비교를 더한다. 배포 전에 운영에서 기록한 요청을 로컬 데이터 사본에서 기존/새 구현으로 각각 실행해
+응답 차이, 지연 시간, 쿼리 수 차이를 보고한다.
+
+기록
+    settings.MIDDLEWARE 에 'traffic_replay.TrafficRecorderMiddleware' 추가 (RequestScopeMiddleware 뒤).
+    APTGO_TRAFFIC_DIR 를 지정한 경우에만 동작하며 TRAFFIC_DIR/traffic_YYYYMMDD.jsonl 에 한 줄씩 쓴다
+    (method, path, 쿼리, URL 인자, 인증 사용자 id, JSON 본문, 뷰 이름, 상태 코드, 처리 시간).
+    APTGO_TRAFFIC_SAMPLE (0~1) 로 일부만 기록할 수 있다. 로그인 요청과 비밀번호 필드는 남기지 않는다.
+
+재생 (운영 DB 가 아닌 사본을 가리키는 settings 로 실행)
+    python3 traffic_replay.py traffic_20261019.jsonl \\
+        --baseline vehicles.views.comprehensive_vehicle_data_api \\
+        --candidate mobile_api_views.comprehensive_vehicle_data_api
+
+기록한 사용자를 request.user 로 넣어 뷰 함수를 직접 호출한다 (세션 인증과 같은 경로 - 토큰 불필요).
+요청마다 두 구현을 번갈아 실행하고, 각 실행은 롤백되는 트랜잭션 안에서 돌아 POST 도 데이터를 바꾸지 않는다.
+DB 밖의 부작용도 replay_sandbox() 안에 가둔다: 캐시는 locmem, MEDIA_ROOT 와 사진/내보내기 디렉터리는
+임시 디렉터리, scan_report_ingest.scan_window_index 는 새 인스턴스. GET 이 아닌 요청은 실행마다 캐시,
+임시 디렉터리, 인덱스를 비워 롤백된 쓰기가 다음 실행에 보이지 않게 한다.
+그 밖의 프로세스 메모리 상태나 외부 호출(푸시, 메일 등)은 되돌리지 않으므로 그런 뷰는 GET 만 재생한다.
+"""
+
+import json
+import os
+import random
+import shutil
+import statistics
+import sys
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+from datetime import date
+
+TRAFFIC_DIR = os.environ.get('APTGO_TRAFFIC_DIR', '')
+TRAFFIC_SAMPLE = float(os.environ.get('APTGO_TRAFFIC_SAMPLE', '1'))
+RECORD_PATH_PREFIXES = ('/api/',)
+RECORD_EXCLUDE_PATHS = ('/api/login/',)
+SENSITIVE_FIELDS = frozenset({'password', 'password1', 'password2', 'new_password', 'old_password', 'token'})
+MAX_RECORD_BODY = 64 * 1024
+
+SAFE_METHODS = frozenset({'GET', 'HEAD', 'OPTIONS'})
+# 재생 중 임시 디렉터리로 돌릴 모듈 상수 (모듈, 속성, 하위 디렉터리)
+SANDBOX_DIRS = (
+    ('evidence_photos', 'PHOTO_DIR', 'evidence'),
+    ('history_export', 'EXPORT_DIR', 'exports'),
+)
+
+# 요청 시각마다 바뀌는 필드 - 응답 비교에서 제외
+VOLATILE_FIELDS = frozenset({'lastUpdated'})
+MAX_DIFFS_PER_RESPONSE = 10
+
+_write_lock = threading.Lock()
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+# ---------------------------------------------------------------------------
+# 기록
+# ---------------------------------------------------------------------------
+
+def _redact(value):
+    if isinstance(value, dict):
+        return {
+            key: '***' if key in SENSITIVE_FIELDS else _redact(item)
+            for key, item in value.items()
+        }
+    if isinstance(value, list):
+        return [_redact(item) for item in value]
+    return value
+
+
+def _record_body(request):
+    if request.method in ('GET', 'HEAD') or not request.content_type.startswith('application/json'):
+        return None
+    if len(request.body) > MAX_RECORD_BODY:
+        return None
+    try:
+        return _redact(json.loads(request.body))
+    except ValueError:
+        return None
+
+
+def traffic_log_path(day=None):
+    return os.path.join(TRAFFIC_DIR, f'traffic_{(day or date.today()):%Y%m%d}.jsonl')
+
+
+def append_record(record):
+    line = json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n'
+    with _write_lock:
+        with open(traffic_log_path(), 'a', encoding='utf-8') as f:
+            f.write(line)
+
+
+def _should_record(path):
+    return (path.startswith(RECORD_PATH_PREFIXES) and path not in RECORD_EXCLUDE_PATHS
+            and (TRAFFIC_SAMPLE >= 1 or random.random() < TRAFFIC_SAMPLE))
+
+
+def _record(request, path, body, response, elapsed):
+    """응답까지 끝난 요청 한 건 기록 (request.user 조회가 있어 sync 컨텍스트에서 호출)"""
+    from app_metrics import view_label
+    from request_scope import get_request_scope
+
+    match = getattr(request, 'resolver_match', None)
+    try:
+        append_record({
+            'ts': time.time(),
+            'method': request.method,
+            'path': path,
+            'query': list(request.GET.lists()),
+            'kwargs': dict(match.kwargs) if match is not None else {},
+            'userId': get_request_scope(request).user_id,
+            'body': body,
+            'view': view_label(request),
+            'status': response.status_code,
+            'durationMs': round(elapsed * 1000, 1),
+        })
+    except (OSError, TypeError, ValueError) as e:
+        print(f"❌ 요청 기록 실패: {e}")
+
+
+class TrafficRecorderMiddleware:
+    """/api/ 요청을 재생 가능한 형태로 기록 (APTGO_TRAFFIC_DIR 가 없으면 미들웨어 비활성)
+
+    async 요청(ASGI)도 기록하되, 사용자 조회와 파일 쓰기는 sync 스레드에서 한다.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+        from django.core.exceptions import MiddlewareNotUsed
+
+        if not TRAFFIC_DIR:
+            raise MiddlewareNotUsed
+        os.makedirs(TRAFFIC_DIR, exist_ok=True)
+        self.get_response = get_response
+        self.is_async = iscoroutinefunction(get_response)
+        if self.is_async:
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if self.is_async:
+            return self.__acall__(request)
+        path = request.path
+        if not _should_record(path):
+            return self.get_response(request)
+
+        # 뷰가 본문을 스트림으로 읽기 전에 확보
+        body = _record_body(request)
+        started = time.perf_counter()
+        response = self.get_response(request)
+        _record(request, path, body, response, time.perf_counter() - started)
+        return response
+
+    async def __acall__(self, request):
+        from asgiref.sync import sync_to_async
+
+        path = request.path
+        if not _should_record(path):
+            return await self.get_response(request)
+
+        body = _record_body(request)
+        started = time.perf_counter()
+        response = await self.get_response(request)
+        await sync_to_async(_record)(request, path, body, response, time.perf_counter() - started)
+        return response
+
+
+def iter_records(path, view=None, limit=None):
+    count = 0
+    with open(path, encoding='utf-8') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            if view and record.get('view') != view:
+                continue
+            yield record
+            count += 1
+            if limit and count >= limit:
+                return
+
+
+# ---------------------------------------------------------------------------
+# 응답 비교
+# ---------------------------------------------------------------------------
+
+def normalize_payload(value, ignore=VOLATILE_FIELDS):
+    """ignore 키를 (어느 깊이든) 뺀 사본"""
+    if isinstance(value, dict):
+        return {key: normalize_payload(item, ignore) for key, item in value.items() if key not in ignore}
+    if isinstance(value, list):
+        return [normalize_payload(item, ignore) for item in value]
+    return value
+
+
+def diff_payloads(before, after, path='$'):
+    """구조 차이 목록 [(경로, 이전, 이후)] - 값이 다르면 잎 단위, 키/길이가 다르면 그 위치에서 보고"""
+    if isinstance(before, dict) and isinstance(after, dict):
+        diffs = []
+        for key in sorted(before.keys() | after.keys(), key=str):
+            child = f'{path}.{key}'
+            if key not in after:
+                diffs.append((child, before[key], '<없음>'))
+            elif key not in before:
+                diffs.append((child, '<없음>', after[key]))
+            else:
+                diffs.extend(diff_payloads(before[key], after[key], child))
+        return diffs
+    if isinstance(before, list) and isinstance(after, list):
+        diffs = []
+        for index, (old, new) in enumerate(zip(before, after)):
+            diffs.extend(diff_payloads(old, new, f'{path}[{index}]'))
+        if len(before) != len(after):
+            diffs.append((f'{path}.length', len(before), len(after)))
+        return diffs
+    if type(before) is not type(after) or before != after:
+        return [(path, before, after)]
+    return []
+
+
+def response_payload(response):
+    """(상태 코드, JSON 이면 파싱한 값 / 아니면 본문 문자열)"""
+    body = b''.join(response.streaming_content) if response.streaming else response.content
+    try:
+        return response.status_code, json.loads(body)
+    except ValueError:
+        return response.status_code, body.decode('utf-8', 'replace')
+
+
+# ---------------------------------------------------------------------------
+# 재생
+# ---------------------------------------------------------------------------
+
+def load_view(dotted_path):
+    from django.utils.module_loading import import_string
+
+    return import_string(dotted_path)
+
+
+def build_request(record, user):
+    from django.test import RequestFactory
+
+    factory = RequestFactory()
+    path = record['path']
+    query = [(key, value) for key, values in record['query'] for value in values]
+    if record['method'] == 'GET':
+        request = factory.get(path, query)
+    else:
+        from urllib.parse import urlencode
+
+        body = json.dumps(record['body']) if record.get('body') is not None else ''
+        if query:
+            path = f'{path}?{urlencode(query)}'
+        request = factory.generic(record['method'], path, body, content_type='application/json')
+    request.user = user
+    return request
+
+
+def _fresh_scan_index():
+    """scan_report_ingest 를 쓰는 경우 창 인덱스를 빈 인스턴스로 교체"""
+    module = sys.modules.get('scan_report_ingest')
+    if module is not None:
+        module.scan_window_index = module.ScanWindowIndex()
+
+
+def _empty_dir(path):
+    for name in os.listdir(path):
+        target = os.path.join(path, name)
+        if os.path.isdir(target):
+            shutil.rmtree(target, ignore_errors=True)
+        else:
+            os.remove(target)
+
+
+@contextmanager
+def replay_sandbox():
+    """DB 롤백으로 되돌릴 수 없는 캐시/파일/인덱스 쓰기를 재생 동안 격리 -> 임시 디렉터리"""
+    import importlib
+
+    from django.test.utils import override_settings
+
+    root = tempfile.mkdtemp(prefix='aptgo_replay_')
+    patched = []
+    scan_module = sys.modules.get('scan_report_ingest')
+    scan_index = scan_module.scan_window_index if scan_module is not None else None
+    try:
+        for module_name, attr, subdir in SANDBOX_DIRS:
+            try:
+                module = importlib.import_module(module_name)
+            except ImportError:
+                continue
+            patched.append((module, attr, getattr(module, attr)))
+            setattr(module, attr, os.path.join(root, subdir))
+        with override_settings(
+            CACHES={'default': {'BACKEND': 'django.core.cache.backends.locmem.LocMemCache', 'LOCATION': 'aptgo-replay'}},
+            MEDIA_ROOT=os.path.join(root, 'media'),
+        ):
+            _fresh_scan_index()
+            yield root
+    finally:
+        for module, attr, value in patched:
+            setattr(module, attr, value)
+        if scan_module is not None:
+            scan_module.scan_window_index = scan_index
+        shutil.rmtree(root, ignore_errors=True)
+
+
+def _discard_side_effects(root):
+    """쓰기 요청 실행 뒤 - 롤백된 DB 와 어긋나는 캐시/파일/인덱스를 비움"""
+    from django.core.cache import cache
+
+    cache.clear()
+    _empty_dir(root)
+    _fresh_scan_index()
+
+
+def run_once(view, record, user, sandbox_root=None):
+    """롤백되는 트랜잭션 안에서 한 번 실행 -> (응답, 초, 쿼리 수)
+
+    sandbox_root: replay_sandbox() 안에서 호출할 때 그 임시 디렉터리 (쓰기 요청 뒤 정리)
+    """
+    from asgiref.sync import async_to_sync, iscoroutinefunction
+    from django.db import connection, transaction
+    from django.test.utils import CaptureQueriesContext
+
+    request = build_request(record, user)
+    call = async_to_sync(view) if iscoroutinefunction(view) else view
+    try:
+        with transaction.atomic():
+            with CaptureQueriesContext(connection) as queries:
+                started = time.perf_counter()
+                response = call(request, **record.get('kwargs', {}))
+                # 스트리밍 응답은 본문까지 읽어야 실제 작업이 끝난다
+                payload = response_payload(response)
+                elapsed = time.perf_counter() - started
+            transaction.set_rollback(True)
+    finally:
+        if sandbox_root is not None and record['method'] not in SAFE_METHODS:
+            _discard_side_effects(sandbox_root)
+    return payload, elapsed, len(queries)
+
+
+def _users_by_id(records):
+    from django.contrib.auth.models import AnonymousUser
+
+    from accounts.models import User
+
+    ids = {record['userId'] for record in records if record.get('userId')}
+    users = User.objects.in_bulk(ids)
+    return lambda user_id: users.get(user_id) or AnonymousUser()
+
+
+def replay(records, baseline, candidate, repeat=3, ignore=VOLATILE_FIELDS):
+    """기록마다 두 구현 비교 -> 결과 dict 목록
+
+    첫 실행은 캐시/연결 준비용으로 버리고, 이후 repeat 번을 순서를 번갈아 실행해 중앙값을 쓴다.
+    """
+    records = list(records)
+    user_for = _users_by_id(records)
+    with replay_sandbox() as sandbox_root:
+        return _replay_records(records, user_for, baseline, candidate, repeat, ignore, sandbox_root)
+
+
+def _replay_records(records, user_for, baseline, candidate, repeat, ignore, sandbox_root):
+    results = []
+    for record in records:
+        user = user_for(record.get('userId'))
+        timings = {'baseline': [], 'candidate': []}
+        queries = {}
+        payloads = {}
+        for round_index in range(repeat + 1):
+            order = [('baseline', baseline), ('candidate', candidate)]
+            if round_index % 2:
+                order.reverse()
+            for name, view in order:
+                payloads[name], elapsed, queries[name] = run_once(view, record, user, sandbox_root)
+                if round_index:
+                    timings[name].append(elapsed)
+
+        (old_status, old_body), (new_status, new_body) = payloads['baseline'], payloads['candidate']
+        diffs = []
+        if old_status != new_status:
+            diffs.append(('status', old_status, new_status))
+        diffs.extend(diff_payloads(normalize_payload(old_body, ignore), normalize_payload(new_body, ignore)))
+        results.append({
+            'record': record,
+            'diffs': diffs,
+            'baselineMs': statistics.median(timings['baseline']) * 1000,
+            'candidateMs': statistics.median(timings['candidate']) * 1000,
+            'baselineQueries': queries['baseline'],
+            'candidateQueries': queries['candidate'],
+        })
+    return results
+
+
+def _percentile(values, fraction):
+    ordered = sorted(values)
+    return ordered[min(len(ordered) - 1, int(len(ordered) * fraction))]
+
+
+def summarize(results):
+    baseline_ms = [result['baselineMs'] for result in results]
+    candidate_ms = [result['candidateMs'] for result in results]
+    return {
+        'requests': len(results),
+        'different': sum(1 for result in results if result['diffs']),
+        'baselineMedianMs': statistics.median(baseline_ms),
+        'candidateMedianMs': statistics.median(candidate_ms),
+        'baselineP95Ms': _percentile(baseline_ms, 0.95),
+        'candidateP95Ms': _percentile(candidate_ms, 0.95),
+        'baselineQueries': sum(result['baselineQueries'] for result in results),
+        'candidateQueries': sum(result['candidateQueries'] for result in results),
+    }
+
+
+def _short(value, limit=80):
+    text = json.dumps(value, ensure_ascii=False) if not isinstance(value, str) else value
+    return text if len(text) <= limit else text[:limit] + '…'
+
+
+def main():
+    import argparse
+
+    parser = argparse.ArgumentParser(description='기록한 요청으로 두 뷰 구현 비교')
+    parser.add_argument('log', help='traffic_YYYYMMDD.jsonl')
+    parser.add_argument('--baseline', required=True, help='기존 뷰 (예: vehicles.views.comprehensive_vehicle_data_api)')
+    parser.add_argument('--candidate', required=True, help='새 뷰 (예: mobile_api_views.comprehensive_vehicle_data_api)')
+    parser.add_argument('--view', help='이 뷰 이름으로 기록된 요청만 (기본: baseline 함수 이름)')
+    parser.add_argument('--limit', type=int, help='최대 요청 수')
+    parser.add_argument('--repeat', type=int, default=3, help='구현별 측정 횟수 (중앙값 사용)')
+    parser.add_argument('--ignore', action='append', default=[], help='비교에서 뺄 필드 추가')
+    parser.add_argument('--max-slowdown', type=float, default=1.2,
+                        help='candidate 중앙값이 baseline 의 이 배수를 넘으면 실패')
+    args = parser.parse_args()
+
+    print("🔁 요청 재생 비교")
+    print("=" * 60)
+    if not setup_django():
+        sys.exit(2)
+
+    view_name = args.view or args.baseline.rsplit('.', 1)[-1]
+    records = list(iter_records(args.log, view_name, args.limit))
+    if not records:
+        print(f"❌ {args.log} 에 {view_name} 요청이 없습니다")
+        sys.exit(2)
+    print(f"   {view_name}: {len(records)}건, 구현별 {args.repeat}회")
+
+    results = replay(
+        records, load_view(args.baseline), load_view(args.candidate),
+        repeat=args.repeat, ignore=VOLATILE_FIELDS | set(args.ignore),
+    )
+
+    for result in results:
+        record = result['record']
+        mark = '❌' if result['diffs'] else '✅'
+        print(f"\n{mark} {record['method']} {record['path']} (user {record.get('userId')}) "
+              f"{result['baselineMs']:.1f}ms -> {result['candidateMs']:.1f}ms, "
+              f"쿼리 {result['baselineQueries']} -> {result['candidateQueries']}")
+        for diff_path, old, new in result['diffs'][:MAX_DIFFS_PER_RESPONSE]:
+            print(f"   {diff_path}: {_short(old)} -> {_short(new)}")
+        if len(result['diffs']) > MAX_DIFFS_PER_RESPONSE:
+            print(f"   ... 외 {len(result['diffs']) - MAX_DIFFS_PER_RESPONSE}개")
+
+    summary = summarize(results)
+    print("\n" + "=" * 60)
+    print(f"📊 응답 차이: {summary['different']}/{summary['requests']}건")
+    print(f"⏱️ 중앙값 {summary['baselineMedianMs']:.1f}ms -> {summary['candidateMedianMs']:.1f}ms, "
+          f"p95 {summary['baselineP95Ms']:.1f}ms -> {summary['candidateP95Ms']:.1f}ms")
+    print(f"🗄️ 쿼리 합계 {summary['baselineQueries']} -> {summary['candidateQueries']}")
+
+    slower = summary['candidateMedianMs'] > summary['baselineMedianMs'] * args.max_slowdown
+    more_queries = summary['candidateQueries'] > summary['baselineQueries']
+    if slower:
+        print(f"❌ candidate 가 {args.max_slowdown}배 넘게 느립니다")
+    if more_queries:
+        print("❌ candidate 쿼리 수가 늘었습니다")
+    sys.exit(1 if summary['different'] or slower or more_queries else 0)
+
+
+if __name__ == '__main__':
+    main()
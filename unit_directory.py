@@ -0,0 +1,367 @@
+#!/usr/bin/env python3
+"""
+동/호 세대 디렉터리 및 세대 조회 API
+User/Resident/VisitorVehicle/VisitorReservation 에 자유 문자열로 들어있는
+dong/ho 를 정규화해 (apartment_id, dong, ho) 복합 키 테이블로 관리하고,
+"101동 1203호 입주민, 차량과 오늘 방문자" 를 세대 입주민 테이블과 vehicle_directory 의
+(apartment_id, dong, ho) 인덱스에서 쿼리 한 번으로 돌려준다.
+세대 입주민 테이블(부아이디)은 signals 로 유지하며 처음 한 번은 --sync 로 채운다.
+
+세대 라벨('101동 1203호')도 서버에서 만들어 내려주므로
+앱 VehicleDataSync 의 "${dong}동 ${ho}호" 문자열 조합을 대신한다.
+
+서버에서 실행:
+    python3 unit_directory.py --sync            # 전체 아파트 세대 테이블 동기화
+    python3 unit_directory.py <apartment_id> 101 1203
+"""
+
+import os
+import re
+import sys
+import threading
+from datetime import date
+from functools import lru_cache
+
+UNIT_TABLE = 'unit_directory'
+UNIT_RESIDENT_TABLE = 'unit_directory_residents'
+
+UNIT_DDL = (
+    f'''CREATE TABLE IF NOT EXISTS {UNIT_TABLE} (
+        apartment_id INTEGER NOT NULL,
+        dong VARCHAR(20) NOT NULL,
+        ho VARCHAR(20) NOT NULL,
+        label VARCHAR(50) NOT NULL,
+        PRIMARY KEY (apartment_id, dong, ho)
+    )''',
+    f'''CREATE TABLE IF NOT EXISTS {UNIT_RESIDENT_TABLE} (
+        apartment_id INTEGER NOT NULL,
+        dong VARCHAR(20) NOT NULL,
+        ho VARCHAR(20) NOT NULL,
+        user_id INTEGER NOT NULL,
+        username VARCHAR(150) NOT NULL,
+        phone VARCHAR(30) NOT NULL,
+        PRIMARY KEY (apartment_id, dong, ho, user_id)
+    )''',
+    f'CREATE INDEX IF NOT EXISTS unit_directory_residents_user_idx ON {UNIT_RESIDENT_TABLE} (user_id)',
+)
+
+_SPACE_PATTERN = re.compile(r'\s+')
+
+# 로그인마다 last_login 만 저장된다 - 세대 정보가 바뀌지 않으므로 건너뜀
+LAST_LOGIN_ONLY = frozenset({'last_login'})
+
+_table_ready = False
+_table_lock = threading.Lock()
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def _normalize_part(value, unit_char):
+    text = _SPACE_PATTERN.sub('', str(value or '')).upper()
+    if text.endswith(unit_char):
+        text = text[:-1]
+    return text.lstrip('0') if text.isdigit() and text != '0' else text
+
+
+def normalize_dong(value):
+    """'101동', ' 101 ' -> '101'"""
+    return _normalize_part(value, '동')
+
+
+def normalize_ho(value):
+    """'1203호', '01203' -> '1203'"""
+    return _normalize_part(value, '호')
+
+
+@lru_cache(maxsize=8192)
+def unit_label(dong, ho):
+    """정규화된 세대 라벨 '101동 1203호' (둘 다 없으면 '') - 세대 수만큼만 계산되도록 캐시"""
+    dong, ho = normalize_dong(dong), normalize_ho(ho)
+    if not dong and not ho:
+        return ''
+    if not ho:
+        return f'{dong}동'
+    if not dong:
+        return f'{ho}호'
+    return f'{dong}동 {ho}호'
+
+
+def raw_variants(normalized, unit_char):
+    """원본 테이블의 자유 문자열 검색용 후보 ('101' -> ['101', '101동'])"""
+    return [normalized, f'{normalized}{unit_char}']
+
+
+def ensure_unit_table():
+    """세대 테이블 생성 (이미 있으면 무시). 워커당 한 번만 DDL"""
+    from django.db import connection, transaction
+
+    if _table_ready:
+        return
+    with _table_lock:
+        if _table_ready:
+            return
+        with connection.cursor() as cursor:
+            for statement in UNIT_DDL:
+                cursor.execute(statement)
+
+        def mark_ready():
+            global _table_ready
+            _table_ready = True
+
+        # PostgreSQL 은 DDL 도 트랜잭션에 묶이므로 커밋된 뒤에만 '있음' 으로 기억
+        transaction.on_commit(mark_ready)
+
+
+def register_units(apartment_id, pairs):
+    """(dong, ho) 목록을 정규화해 세대 테이블에 추가 (이미 있으면 무시)"""
+    from django.db import connection
+
+    if not apartment_id:
+        return 0
+    rows = {
+        (apartment_id, normalize_dong(d), normalize_ho(h), unit_label(d, h))
+        for d, h in pairs if normalize_dong(d) and normalize_ho(h)
+    }
+    if not rows:
+        return 0
+    ensure_unit_table()
+    with connection.cursor() as cursor:
+        cursor.executemany(
+            f'INSERT INTO {UNIT_TABLE} (apartment_id, dong, ho, label) VALUES (%s, %s, %s, %s) '
+            f'ON CONFLICT (apartment_id, dong, ho) DO NOTHING',
+            sorted(rows)
+        )
+    return len(rows)
+
+
+def _resident_row(apartment_id, user_id, username, phone, dong, ho):
+    dong, ho = normalize_dong(dong), normalize_ho(ho)
+    if not apartment_id or not dong or not ho:
+        return None
+    return apartment_id, dong, ho, user_id, username, (phone or '').strip()
+
+
+def update_unit_resident(user_id, apartment_id=None, username='', phone='', dong='', ho='', active=False):
+    """부아이디 한 명의 세대 입주민 행 갱신 (비활성/삭제/세대 없음이면 행 삭제)"""
+    from django.db import connection, transaction
+
+    ensure_unit_table()
+    row = _resident_row(apartment_id, user_id, username, phone, dong, ho) if active else None
+    with transaction.atomic(), connection.cursor() as cursor:
+        # 동/호가 바뀌면 이전 세대 행도 지워야 하므로 user_id 로 지우고 다시 넣는다
+        cursor.execute(f'DELETE FROM {UNIT_RESIDENT_TABLE} WHERE user_id = %s', [user_id])
+        if row is not None:
+            cursor.execute(
+                f'INSERT INTO {UNIT_RESIDENT_TABLE} (apartment_id, dong, ho, user_id, username, phone) '
+                f'VALUES (%s, %s, %s, %s, %s, %s)',
+                list(row)
+            )
+
+
+def sync_unit_directory(apartment_id):
+    """아파트의 입주민/방문차량에 등장하는 모든 세대 등록 + 세대 입주민 테이블 재구성"""
+    from django.db import connection, transaction
+
+    from accounts.models import User
+    from vehicles.models import VisitorVehicle
+
+    users = list(User.objects.filter(
+        parent_account__apartment_id=apartment_id,
+        user_type='sub_account'
+    ).values_list('id', 'username', 'phone', 'dong', 'ho', 'is_active'))
+    pairs = {(dong, ho) for _, _, _, dong, ho, _ in users}
+    pairs.update(VisitorVehicle.objects.filter(
+        apartment_id=apartment_id
+    ).values_list('visiting_dong', 'visiting_ho').distinct())
+    count = register_units(apartment_id, pairs)
+
+    rows = [
+        _resident_row(apartment_id, pk, username, phone, dong, ho)
+        for pk, username, phone, dong, ho, active in users if active
+    ]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(f'DELETE FROM {UNIT_RESIDENT_TABLE} WHERE apartment_id = %s', [apartment_id])
+        cursor.executemany(
+            f'INSERT INTO {UNIT_RESIDENT_TABLE} (apartment_id, dong, ho, user_id, username, phone) '
+            f'VALUES (%s, %s, %s, %s, %s, %s)',
+            [list(row) for row in rows if row is not None]
+        )
+    return count
+
+
+def list_units(apartment_id, dong=None):
+    """세대 목록 (동 지정 시 해당 동만) - (apartment_id, dong, ho) 인덱스 앞부분 사용"""
+    from django.db import connection
+
+    ensure_unit_table()
+    sql = f'SELECT dong, ho, label FROM {UNIT_TABLE} WHERE apartment_id = %s'
+    params = [apartment_id]
+    if dong:
+        sql += ' AND dong = %s'
+        params.append(normalize_dong(dong))
+    with connection.cursor() as cursor:
+        cursor.execute(sql + ' ORDER BY dong, ho', params)
+        return [{'dong': d, 'ho': h, 'unitLabel': label} for d, h, label in cursor.fetchall()]
+
+
+def unit_lookup(apartment_id, dong, ho, today=None):
+    """세대의 입주민 + 세대 차량 + 오늘 방문자 조회
+
+    세대 입주민 테이블과 vehicle_directory 를 (apartment_id, dong, ho) 인덱스로 읽는 쿼리 한 번.
+    방문차량은 등록일(valid_from), 예약은 방문일(valid_from)이 오늘인 행만 방문자로 본다.
+    """
+    from django.db import connection
+
+    from vehicle_directory import (
+        RESIDENT_SOURCES, VEHICLE_DIRECTORY_TABLE, date_text, ensure_vehicle_directory_table,
+    )
+
+    today = today or date.today()
+    dong, ho = normalize_dong(dong), normalize_ho(ho)
+    ensure_unit_table()
+    ensure_vehicle_directory_table()
+
+    resident_marks = ', '.join(['%s'] * len(RESIDENT_SOURCES))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT source, source_id, owner_name, phone, plate_number, valid_from '
+            f'FROM {VEHICLE_DIRECTORY_TABLE} WHERE apartment_id = %s AND dong = %s AND ho = %s '
+            f'AND (source IN ({resident_marks}) OR valid_from = %s) '
+            f'UNION ALL '
+            f"SELECT 'member', user_id, username, phone, '', NULL "
+            f'FROM {UNIT_RESIDENT_TABLE} WHERE apartment_id = %s AND dong = %s AND ho = %s '
+            f'ORDER BY 1, 2',
+            [apartment_id, dong, ho, *RESIDENT_SOURCES, today, apartment_id, dong, ho]
+        )
+        rows = cursor.fetchall()
+
+    result = {'residents': [], 'residentVehicles': [], 'visitors': []}
+    for source, source_id, name, phone, plate, valid_from in rows:
+        if source == 'member':
+            result['residents'].append({'id': source_id, 'username': name, 'phone': phone})
+        elif source in RESIDENT_SOURCES:
+            result['residentVehicles'].append({
+                'source': source, 'id': source_id, 'plateNumber': plate, 'ownerName': name,
+            })
+        else:
+            result['visitors'].append({
+                'source': source,
+                'id': source_id,
+                'plateNumber': plate,
+                'visitorName': name,
+                'contact': phone,
+                'visitDate': date_text(valid_from),
+            })
+    return result
+
+
+def unit_lookup_api(request):
+    """GET /api/units/lookup/?dong=101&ho=1203 - 세대 차량/방문자 조회 (ho 생략 시 세대 목록)"""
+    from vehicles.views import api_auth_required
+
+    from fast_serializers import json_response
+    from request_scope import get_request_scope
+
+    @api_auth_required
+    def _view(request):
+        dong = normalize_dong(request.GET.get('dong'))
+        ho = normalize_ho(request.GET.get('ho'))
+        if not dong:
+            return json_response({'success': False, 'error': '동/호를 입력해주세요.'}, status=400)
+        scope = get_request_scope(request)
+        # 다른 세대의 차량/방문자/연락처가 나오므로 관리단만
+        if not scope.can_manage:
+            return json_response({'success': False, 'error': '관리단 권한이 필요합니다.'}, status=403)
+        apartment_id = scope.apartment_id
+        if not apartment_id:
+            return json_response({'error': '아파트 정보가 없습니다.'}, status=400)
+
+        # 호 없이 동만 주면 해당 동의 세대 목록
+        if not ho:
+            units = list_units(apartment_id, dong)
+            return json_response({'success': True, 'dong': dong, 'units': units, 'count': len(units)})
+
+        data = unit_lookup(apartment_id, dong, ho)
+        data.update({'success': True, 'dong': dong, 'ho': ho, 'unitLabel': unit_label(dong, ho)})
+        return json_response(data)
+
+    return _view(request)
+
+
+def connect_unit_signals():
+    """AppConfig.ready() 에서 한 번 호출 - 새 세대가 생기면 커밋 후 테이블에 추가"""
+    from django.db import transaction
+    from django.db.models.signals import post_delete, post_save
+
+    from accounts.models import User
+    from vehicles.models import VisitorVehicle
+
+    from apartment_snapshot_builder import user_apartment_id
+
+    def on_commit(apartment_id, dong, ho):
+        # 부모 계정/아파트가 없는 부계정은 등록할 세대가 없다 (apartment_id NOT NULL)
+        if apartment_id and normalize_dong(dong) and normalize_ho(ho):
+            transaction.on_commit(lambda: register_units(apartment_id, [(dong, ho)]))
+
+    def user_saved(sender, instance, update_fields=None, **kwargs):
+        if update_fields and set(update_fields) <= LAST_LOGIN_ONLY:
+            return
+        if instance.user_type != 'sub_account':
+            return
+        apartment_id = user_apartment_id(instance)
+        on_commit(apartment_id, instance.dong, instance.ho)
+        fields = (instance.pk, apartment_id, instance.username, instance.phone, instance.dong, instance.ho,
+                  instance.is_active)
+        transaction.on_commit(lambda: update_unit_resident(*fields))
+
+    def user_deleted(sender, instance, **kwargs):
+        if instance.user_type == 'sub_account':
+            user_id = instance.pk
+            transaction.on_commit(lambda: update_unit_resident(user_id))
+
+    def visitor_saved(sender, instance, **kwargs):
+        on_commit(instance.apartment_id, instance.visiting_dong, instance.visiting_ho)
+
+    post_save.connect(user_saved, sender=User, dispatch_uid='unit_directory_user_saved')
+    post_delete.connect(user_deleted, sender=User, dispatch_uid='unit_directory_user_deleted')
+    post_save.connect(visitor_saved, sender=VisitorVehicle, dispatch_uid='unit_directory_visitor_saved')
+
+
+def main():
+    print("=" * 60)
+    print("🏢 동/호 세대 디렉터리")
+    print("=" * 60)
+
+    if not setup_django():
+        return
+
+    from accounts.models import Apartment
+
+    ensure_unit_table()
+    args = sys.argv[1:]
+    if '--sync' in args:
+        for apartment_id in Apartment.objects.values_list('id', flat=True):
+            print(f"   ✅ apartment={apartment_id}: {sync_unit_directory(apartment_id)}세대")
+
+    if len(args) == 3 and args[0].isdigit():
+        data = unit_lookup(int(args[0]), args[1], args[2])
+        print(f"\n🔍 {unit_label(args[1], args[2])}")
+        print(f"   입주민 {len(data['residents'])}명, 차량 {len(data['residentVehicles'])}대, "
+              f"오늘 방문 {len(data['visitors'])}건")
+        for visitor in data['visitors']:
+            print(f"   - {visitor['plateNumber']} {visitor['visitorName']} {visitor['visitDate']}")
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,499 @@
+#!/usr/bin/env python3
+"""
+통합 차량 디렉터리 (vehicle_directory)
+입주민 번호판은 User.vehicle_number 와 Resident 두 곳에, 방문 번호판은
+VisitorVehicle / VisitorReservation 에 나뉘어 있어 API 마다 조회 범위가 달랐다.
+아파트별 번호판 하나당 한 행(출처, 세대, 소유자, 유효기간)을 두는 비정규화 테이블로 합치고
+조회 API 는 (apartment_id, ...) 인덱스 한 번으로 이 테이블만 읽는다.
+
+같은 번호판이 여러 출처에 있으면 SOURCE_PRIORITY 순서로 대표 행을 고르고
+나머지 출처는 sources 컬럼에 남긴다 (User/Resident 불일치 확인용).
+
+유지 방식:
+    - signals: 저장/삭제된 행의 번호판만 다시 계산
+    - reconciler: 아파트 단위 전체 비교 후 차이만 반영 (매일 cron, 지난 예약 정리 포함)
+
+서버에서 실행:
+    python3 vehicle_directory.py --reconcile            # 전체 아파트 동기화
+    python3 vehicle_directory.py --reconcile --dry-run  # 차이만 출력
+"""
+
+import os
+import sys
+import threading
+import time
+from datetime import date
+
+from fast_serializers import KSTFormatter
+from plate_suffix_index import plate_suffix
+from registered_plate_set import normalize_plate
+from unit_directory import normalize_dong, normalize_ho, unit_label
+
+VEHICLE_DIRECTORY_TABLE = 'vehicle_directory'
+
+# 같은 번호판일 때 대표 행 우선순위 (작을수록 우선)
+SOURCE_PRIORITY = {'resident_user': 0, 'resident': 1, 'visitor_vehicle': 2, 'visitor_reservation': 3}
+RESIDENT_SOURCES = ('resident_user', 'resident')
+VISITOR_SOURCES = ('visitor_vehicle', 'visitor_reservation')
+
+# 로그인마다 last_login 만 저장된다 - 번호판/세대가 바뀌지 않으므로 재계산하지 않음
+LAST_LOGIN_ONLY = frozenset({'last_login'})
+
+VEHICLE_DIRECTORY_DDL = (
+    f'''CREATE TABLE IF NOT EXISTS {VEHICLE_DIRECTORY_TABLE} (
+        apartment_id INTEGER NOT NULL,
+        plate_normalized VARCHAR(20) NOT NULL,
+        plate_number VARCHAR(20) NOT NULL,
+        plate_suffix CHAR(4),
+        source VARCHAR(20) NOT NULL,
+        source_id INTEGER NOT NULL,
+        sources VARCHAR(100) NOT NULL,
+        owner_name VARCHAR(150) NOT NULL,
+        phone VARCHAR(30) NOT NULL,
+        dong VARCHAR(20) NOT NULL,
+        ho VARCHAR(20) NOT NULL,
+        unit_label VARCHAR(50) NOT NULL,
+        registered_by VARCHAR(150) NOT NULL,
+        registered_at VARCHAR(32) NOT NULL,
+        valid_from DATE,
+        valid_until DATE,
+        PRIMARY KEY (apartment_id, plate_normalized)
+    )''',
+    f'CREATE INDEX IF NOT EXISTS vehicle_directory_suffix_idx '
+    f'ON {VEHICLE_DIRECTORY_TABLE} (apartment_id, plate_suffix)',
+    f'CREATE INDEX IF NOT EXISTS vehicle_directory_unit_idx '
+    f'ON {VEHICLE_DIRECTORY_TABLE} (apartment_id, dong, ho)',
+    f'CREATE INDEX IF NOT EXISTS vehicle_directory_source_idx '
+    f'ON {VEHICLE_DIRECTORY_TABLE} (source, source_id)',
+    # refresh_expired: 방문일이 지난 대표 행 찾기
+    f'CREATE INDEX IF NOT EXISTS vehicle_directory_valid_until_idx '
+    f'ON {VEHICLE_DIRECTORY_TABLE} (apartment_id, valid_until)',
+)
+
+DIRECTORY_COLUMNS = (
+    'apartment_id', 'plate_normalized', 'plate_number', 'plate_suffix', 'source', 'source_id', 'sources',
+    'owner_name', 'phone', 'dong', 'ho', 'unit_label', 'registered_by', 'registered_at',
+    'valid_from', 'valid_until',
+)
+_SOURCE_INDEX = DIRECTORY_COLUMNS.index('source')
+_SOURCES_INDEX = DIRECTORY_COLUMNS.index('sources')
+_VALID_FROM_INDEX = DIRECTORY_COLUMNS.index('valid_from')
+
+# normalize_plate 가 지우는 문자 ([\s\-] 중 실제로 번호판에 섞여 들어오는 것)
+_PLATE_STRIP_CHARS = (' ', '-', '\t', '\n', '\r', '\u3000')
+
+_table_ready = False
+_table_lock = threading.Lock()
+
+
+def setup_django():
+    """Setup Django environment"""
+    try:
+        sys.path.append('/home/kyb9852/vehicle-management-system')
+        os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'vehicle_system.settings')
+        import django
+        django.setup()
+        return True
+    except Exception as e:
+        print(f"❌ Django setup failed: {e}")
+        return False
+
+
+def ensure_vehicle_directory_table():
+    """디렉터리 테이블/인덱스 생성 (이미 있으면 무시). 워커당 한 번만 DDL"""
+    from django.db import connection, transaction
+
+    if _table_ready:
+        return
+    with _table_lock:
+        if _table_ready:
+            return
+        with connection.cursor() as cursor:
+            for statement in VEHICLE_DIRECTORY_DDL:
+                cursor.execute(statement)
+
+        def mark_ready():
+            global _table_ready
+            _table_ready = True
+
+        # PostgreSQL 은 DDL 도 트랜잭션에 묶이므로 커밋된 뒤에만 '있음' 으로 기억
+        transaction.on_commit(mark_ready)
+
+
+def normalized_plate_expression(field='vehicle_number'):
+    """DB 쪽 normalize_plate (공백/하이픈 제거 + 대문자) - 원본 표기와 무관하게 번호판 비교"""
+    from django.db.models import F, Value
+    from django.db.models.functions import Replace, Upper
+
+    expression = F(field)
+    for char in _PLATE_STRIP_CHARS:
+        expression = Replace(expression, Value(char), Value(''))
+    return Upper(expression)
+
+
+def _candidate(fmt, apartment_id, source, source_id, plate, owner_name, phone, dong, ho,
+               registered_by, registered_at, valid_from=None, valid_until=None):
+    """출처 한 행 -> 디렉터리 후보 행 (번호판이 비어 있으면 None)"""
+    normalized = normalize_plate(plate)
+    if not normalized or not apartment_id:
+        return None
+    if valid_from is None and registered_at is not None:
+        valid_from = fmt.to_kst(registered_at).date()
+    return (
+        apartment_id, normalized, plate.strip(), plate_suffix(plate), source, source_id, source,
+        (owner_name or '').strip(), (phone or '').strip(), normalize_dong(dong), normalize_ho(ho),
+        unit_label(dong, ho), registered_by or '', fmt.kst_iso(registered_at), valid_from, valid_until,
+    )
+
+
+def collect_candidates(apartment_id, plate=None, today=None):
+    """아파트의 네 출처에서 후보 행 수집 (plate 지정 시 그 번호판만)"""
+    from django.db.models import Q
+
+    from accounts.models import User
+    from vehicles.models import Resident, VisitorVehicle
+    from visitors.models import VisitorReservation
+
+    today = today or date.today()
+    fmt = KSTFormatter()
+    target = normalize_plate(plate) if plate else None
+    # 번호판 표기(공백/하이픈/끝 공백)가 제각각이라 DB 에서 정규화한 값으로 비교
+    plate_filter = Q(plate_key=target) if target else Q()
+    candidates = []
+
+    def with_plate_key(queryset):
+        return queryset.annotate(plate_key=normalized_plate_expression()) if target else queryset
+
+    users = with_plate_key(User.objects).filter(
+        plate_filter,
+        parent_account__apartment_id=apartment_id,
+        user_type='sub_account',
+        is_active=True
+    ).exclude(vehicle_number__isnull=True).exclude(vehicle_number__exact='').values_list(
+        'id', 'vehicle_number', 'username', 'phone', 'dong', 'ho', 'date_joined'
+    )
+    for pk, number, username, phone, dong, ho, joined in users:
+        candidates.append(_candidate(fmt, apartment_id, 'resident_user', pk, number, username, phone,
+                                     dong, ho, '', joined))
+
+    residents = with_plate_key(Resident.objects).filter(plate_filter, apartment_id=apartment_id).exclude(
+        vehicle_number__isnull=True
+    ).exclude(vehicle_number__exact='').values_list(
+        'id', 'vehicle_number', 'username', 'phone', 'dong', 'ho', 'created_at'
+    )
+    for pk, number, username, phone, dong, ho, created_at in residents:
+        candidates.append(_candidate(fmt, apartment_id, 'resident', pk, number, username, phone,
+                                     dong, ho, '', created_at))
+
+    visitors = with_plate_key(VisitorVehicle.objects).filter(
+        plate_filter, apartment_id=apartment_id, is_active=True
+    ).values_list(
+        'id', 'vehicle_number', 'contact', 'visiting_dong', 'visiting_ho', 'registered_by__username', 'created_at'
+    )
+    for pk, number, contact, dong, ho, registered_by, created_at in visitors:
+        candidates.append(_candidate(fmt, apartment_id, 'visitor_vehicle', pk, number, contact, contact,
+                                     dong, ho, registered_by, created_at))
+
+    reservations = with_plate_key(VisitorReservation.objects).filter(
+        plate_filter,
+        Q(resident__apartment_id=apartment_id) | Q(resident__parent_account__apartment_id=apartment_id),
+        visit_date__gte=today,
+        is_approved=True
+    ).values_list(
+        'id', 'vehicle_number', 'visitor_name', 'visitor_phone', 'resident__dong', 'resident__ho',
+        'resident__username', 'created_at', 'visit_date'
+    )
+    for pk, number, name, phone, dong, ho, registered_by, created_at, visit_date in reservations:
+        candidates.append(_candidate(fmt, apartment_id, 'visitor_reservation', pk, number, name, phone,
+                                     dong, ho, registered_by, created_at, visit_date, visit_date))
+
+    candidates = [row for row in candidates if row is not None]
+    if target:
+        candidates = [row for row in candidates if row[1] == target]
+    return candidates
+
+
+def merge_candidates(candidates):
+    """번호판별로 대표 행 하나 선택 -> {plate_normalized: row}
+
+    예약은 가장 가까운 방문일 행이 대표가 되므로 valid_from~valid_until 이 그 방문일 하루다.
+    """
+    grouped = {}
+    for row in candidates:
+        grouped.setdefault(row[1], []).append(row)
+
+    merged = {}
+    for normalized, rows in grouped.items():
+        rows.sort(key=lambda r: (SOURCE_PRIORITY[r[_SOURCE_INDEX]], str(r[_VALID_FROM_INDEX] or ''), r[5]))
+        sources = sorted({r[_SOURCE_INDEX] for r in rows}, key=SOURCE_PRIORITY.get)
+        winner = list(rows[0])
+        winner[_SOURCES_INDEX] = ','.join(sources)
+        merged[normalized] = tuple(winner)
+    return merged
+
+
+def _upsert_rows(cursor, rows):
+    updates = ', '.join(f'{column} = excluded.{column}' for column in DIRECTORY_COLUMNS[2:])
+    cursor.executemany(
+        f'INSERT INTO {VEHICLE_DIRECTORY_TABLE} ({", ".join(DIRECTORY_COLUMNS)}) '
+        f'VALUES ({", ".join(["%s"] * len(DIRECTORY_COLUMNS))}) '
+        f'ON CONFLICT (apartment_id, plate_normalized) DO UPDATE SET {updates}',
+        [list(row) for row in rows]
+    )
+
+
+def _comparable(row):
+    # DB 에서 읽은 날짜는 백엔드에 따라 date/str 이므로 문자열로 맞춰 비교
+    return tuple(str(value) if value is not None else None for value in row)
+
+
+def refresh_plate(apartment_id, plate):
+    """번호판 하나의 대표 행 재계산 (signals 용)"""
+    from django.db import connection
+
+    normalized = normalize_plate(plate)
+    if not normalized or not apartment_id:
+        return
+    row = merge_candidates(collect_candidates(apartment_id, normalized)).get(normalized)
+    with connection.cursor() as cursor:
+        if row is None:
+            cursor.execute(
+                f'DELETE FROM {VEHICLE_DIRECTORY_TABLE} WHERE apartment_id = %s AND plate_normalized = %s',
+                [apartment_id, normalized]
+            )
+        else:
+            _upsert_rows(cursor, [row])
+
+
+def refresh_source(source, source_id, apartment_id=None, plate=None, old_plate=None):
+    """출처 행 하나가 바뀌었을 때: 새 번호판 + 이전 번호판 + 이 행이 대표였던 번호판 재계산
+
+    대표가 아니던 행의 번호판이 바뀌면 이전 번호판 행의 sources 에서도 빠져야 하므로
+    old_plate (저장 전 값) 도 다시 계산한다.
+    """
+    from django.db import connection
+
+    ensure_vehicle_directory_table()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT apartment_id, plate_normalized FROM {VEHICLE_DIRECTORY_TABLE} '
+            f'WHERE source = %s AND source_id = %s',
+            [source, source_id]
+        )
+        targets = set(cursor.fetchall())
+    for value in (plate, old_plate):
+        if apartment_id and normalize_plate(value):
+            targets.add((apartment_id, normalize_plate(value)))
+    for target_apartment_id, normalized in targets:
+        refresh_plate(target_apartment_id, normalized)
+
+
+def reconcile_apartment(apartment_id, dry_run=False):
+    """아파트 전체를 원본과 비교해 차이만 반영. (추가, 변경, 삭제) 건수 반환"""
+    from django.db import connection, transaction
+
+    ensure_vehicle_directory_table()
+    desired = merge_candidates(collect_candidates(apartment_id))
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT {", ".join(DIRECTORY_COLUMNS)} FROM {VEHICLE_DIRECTORY_TABLE} WHERE apartment_id = %s',
+            [apartment_id]
+        )
+        current = {row[1]: row for row in cursor.fetchall()}
+
+    added = [row for key, row in desired.items() if key not in current]
+    changed = [
+        row for key, row in desired.items()
+        if key in current and _comparable(row) != _comparable(current[key])
+    ]
+    removed = [key for key in current if key not in desired]
+
+    if not dry_run and (added or changed or removed):
+        with transaction.atomic(), connection.cursor() as cursor:
+            if removed:
+                cursor.executemany(
+                    f'DELETE FROM {VEHICLE_DIRECTORY_TABLE} WHERE apartment_id = %s AND plate_normalized = %s',
+                    [[apartment_id, key] for key in removed]
+                )
+            if added or changed:
+                _upsert_rows(cursor, added + changed)
+    return len(added), len(changed), len(removed)
+
+
+# ---------------------------------------------------------------------------
+# 조회 (모든 읽기 API 가 사용)
+# ---------------------------------------------------------------------------
+
+def refresh_expired(apartment_id, today=None):
+    """방문일이 지난 대표 예약 행을 다시 계산 (더 뒤의 예약이 있으면 그 방문일로, 없으면 삭제)
+
+    대표 행은 저장 시점과 매일 reconcile 에서만 계산되므로, 그 사이에 방문일이 지나면
+    뒤에 남은 예약이 있어도 번호판이 조회에서 빠진다. 조회 직전에 지난 행만 고쳐 둔다.
+    """
+    from django.db import connection
+
+    today = today or date.today()
+    with connection.cursor() as cursor:
+        cursor.execute(
+            f'SELECT plate_normalized FROM {VEHICLE_DIRECTORY_TABLE} '
+            f'WHERE apartment_id = %s AND valid_until < %s',
+            [apartment_id, today]
+        )
+        expired = [row[0] for row in cursor.fetchall()]
+    for normalized in expired:
+        refresh_plate(apartment_id, normalized)
+    return len(expired)
+
+
+def query_directory(apartment_id, where='', params=(), sources=None, on_date=None, order_by='plate_normalized'):
+    """디렉터리 조회 - on_date 기준 유효한 행만. dict 목록 반환
+
+    where 는 'plate_suffix = %s' 처럼 apartment_id 뒤에 붙는 인덱스 조건.
+    오늘 기준 조회면 방문일이 지난 대표 행을 먼저 다시 계산한다 (refresh_expired).
+    """
+    from django.db import connection
+
+    ensure_vehicle_directory_table()
+    if on_date is None or on_date == date.today():
+        refresh_expired(apartment_id)
+    sql = f'SELECT {", ".join(DIRECTORY_COLUMNS)} FROM {VEHICLE_DIRECTORY_TABLE} WHERE apartment_id = %s'
+    args = [apartment_id]
+    if where:
+        sql += f' AND {where}'
+        args.extend(params)
+    if sources:
+        sql += f' AND source IN ({", ".join(["%s"] * len(sources))})'
+        args.extend(sources)
+    on_date = on_date or date.today()
+    sql += ' AND (valid_until IS NULL OR valid_until >= %s)'
+    args.append(on_date)
+    with connection.cursor() as cursor:
+        cursor.execute(f'{sql} ORDER BY {order_by}', args)
+        return [dict(zip(DIRECTORY_COLUMNS, row)) for row in cursor.fetchall()]
+
+
+def date_text(value):
+    """DATE 컬럼 값 -> 'YYYY-MM-DD' (백엔드에 따라 date 또는 str)"""
+    if value is None:
+        return ''
+    return value.isoformat() if hasattr(value, 'isoformat') else str(value)
+
+
+def serialize_directory_vehicles(rows):
+    """디렉터리 입주민 행 -> comprehensive 'vehicles' 형식"""
+    return [
+        {
+            'id': row['source_id'],
+            'source': row['source'],
+            'plateNumber': row['plate_number'],
+            'vehicleType': 'resident',
+            'ownerName': row['owner_name'],
+            'ownerPhone': row['phone'],
+            'dong': row['dong'],
+            'ho': row['ho'],
+            'unitLabel': row['unit_label'],
+            'registeredDate': row['registered_at'],
+            'isActive': True,
+        }
+        for row in rows
+    ]
+
+
+def serialize_directory_visitors(rows):
+    """디렉터리 방문 행 -> comprehensive 'visitorVehicles' 형식"""
+    return [
+        {
+            'id': row['source_id'],
+            'source': row['source'],
+            'plateNumber': row['plate_number'],
+            'ownerName': row['owner_name'],
+            'contactNumber': row['phone'],
+            'visitDate': date_text(row['valid_from']),
+            'registeredBy': row['registered_by'],
+            'dong': row['dong'],
+            'ho': row['ho'],
+            'unitLabel': row['unit_label'],
+            'isActive': True,
+        }
+        for row in rows
+    ]
+
+
+def connect_vehicle_directory_signals():
+    """AppConfig.ready() 에서 한 번 호출 - 저장/삭제 커밋 후 해당 번호판만 재계산"""
+    from django.db import transaction
+    from django.db.models.signals import post_delete, post_init, post_save
+
+    from accounts.models import User
+    from vehicles.models import Resident, VisitorVehicle
+    from visitors.models import VisitorReservation
+
+    from apartment_snapshot_builder import user_apartment_id
+
+    def remember_plate(sender, instance, **kwargs):
+        # 불러온 시점 번호판 - 저장 후 이전 번호판 행도 다시 계산하기 위해 (지연 로딩 필드면 건너뜀)
+        instance._directory_loaded_plate = instance.__dict__.get('vehicle_number')
+
+    def on_commit(source, instance, apartment_id):
+        plate = instance.vehicle_number
+        old_plate = getattr(instance, '_directory_loaded_plate', None)
+        instance._directory_loaded_plate = plate
+        transaction.on_commit(lambda: refresh_source(source, instance.pk, apartment_id, plate, old_plate))
+
+    def user_changed(sender, instance, update_fields=None, **kwargs):
+        if update_fields and set(update_fields) <= LAST_LOGIN_ONLY:
+            return
+        if instance.user_type == 'sub_account':
+            on_commit('resident_user', instance, user_apartment_id(instance))
+
+    def resident_changed(sender, instance, **kwargs):
+        on_commit('resident', instance, instance.apartment_id)
+
+    def visitor_vehicle_changed(sender, instance, **kwargs):
+        on_commit('visitor_vehicle', instance, instance.apartment_id)
+
+    def reservation_changed(sender, instance, **kwargs):
+        resident = instance.resident
+        apartment_id = user_apartment_id(resident) if resident is not None else None
+        on_commit('visitor_reservation', instance, apartment_id)
+
+    for handler, model, name in (
+        (user_changed, User, 'user'),
+        (resident_changed, Resident, 'resident'),
+        (visitor_vehicle_changed, VisitorVehicle, 'visitor_vehicle'),
+        (reservation_changed, VisitorReservation, 'reservation'),
+    ):
+        post_init.connect(remember_plate, sender=model, dispatch_uid=f'vehicle_directory_{name}_loaded')
+        post_save.connect(handler, sender=model, dispatch_uid=f'vehicle_directory_{name}_saved')
+        post_delete.connect(handler, sender=model, dispatch_uid=f'vehicle_directory_{name}_deleted')
+
+
+def main():
+    print("=" * 60)
+    print("🚗 통합 차량 디렉터리")
+    print("=" * 60)
+
+    args = sys.argv[1:]
+    dry_run = '--dry-run' in args
+    if not setup_django():
+        return
+
+    from accounts.models import Apartment
+
+    ensure_vehicle_directory_table()
+    if '--reconcile' in args:
+        apartment_ids = [int(a) for a in args if a.isdigit()] or list(
+            Apartment.objects.values_list('id', flat=True)
+        )
+        for apartment_id in apartment_ids:
+            start = time.time()
+            added, changed, removed = reconcile_apartment(apartment_id, dry_run=dry_run)
+            label = '(dry-run) ' if dry_run else ''
+            print(f"   ✅ {label}apartment={apartment_id}: 추가 {added}, 변경 {changed}, 삭제 {removed} "
+                  f"({time.time() - start:.2f}초)")
+    else:
+        print("사용법: python3 vehicle_directory.py --reconcile [<apartment_id> ...] [--dry-run]")
+
+
+if __name__ == "__main__":
+    main()